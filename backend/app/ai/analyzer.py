@@ -1,14 +1,26 @@
 """
 AI分析模块
 量化分析皱纹、肤质、轮廓等改善
+
+各项指标只由两张照片各自的特征（app.ai.features）计算，
+已保存特征的照片直接用 compare_features 对比，无需解码图像
 """
 
 import cv2
 import numpy as np
 from typing import Dict, Tuple, Optional
-from sklearn.metrics import mean_squared_error
 import logging
 
+from app.ai.features import (
+    ANALYSIS_TYPES,
+    image_features,
+    pore_features,
+    skin_tone_features,
+    texture_features,
+    wrinkle_features,
+)
+from app.ai.tone_map import compare_grids, compare_regions
+
 logger = logging.getLogger(__name__)
 
 
@@ -37,68 +49,61 @@ class BeforeAfterAnalyzer:
             皱纹分析结果
         """
         try:
-            # 转换为灰度图
-            before_gray = cv2.cvtColor(before_image, cv2.COLOR_BGR2GRAY)
-            after_gray = cv2.cvtColor(after_image, cv2.COLOR_BGR2GRAY)
-
-            # 使用Canny边缘检测
-            before_edges = cv2.Canny(before_gray, 50, 150)
-            after_edges = cv2.Canny(after_gray, 50, 150)
-
-            # 计算边缘像素数量（代表皱纹）
-            before_count = np.sum(before_edges > 0)
-            after_count = np.sum(after_edges > 0)
-
-            # 计算减少百分比
-            if before_count > 0:
-                reduction_pct = ((before_count - after_count) / before_count) * 100
-                reduction_pct = max(0, min(100, reduction_pct))  # 限制在0-100
+            return self.compare_wrinkles(
+                wrinkle_features(cv2.cvtColor(before_image, cv2.COLOR_BGR2GRAY)),
+                wrinkle_features(cv2.cvtColor(after_image, cv2.COLOR_BGR2GRAY))
+            )
+        except Exception as e:
+            logger.error(f"Wrinkle analysis failed: {str(e)}")
+            return {"error": str(e)}
+
+    def compare_wrinkles(self, before: Dict, after: Dict) -> Dict:
+        """
+        由边缘特征计算皱纹改善
+
+        Args:
+            before: 术前照片的 wrinkle_features
+            after: 术后照片的 wrinkle_features
+
+        Returns:
+            皱纹分析结果
+        """
+        # 边缘像素数量（代表皱纹）的减少百分比
+        before_count = before["count"]
+        after_count = after["count"]
+        if before_count > 0:
+            reduction_pct = ((before_count - after_count) / before_count) * 100
+            reduction_pct = max(0, min(100, reduction_pct))  # 限制在0-100
+        else:
+            reduction_pct = 0
+
+        # 分区域：额头、眼周、嘴周
+        regional_analysis = {}
+        for region_name, before_region_count in before["regions"].items():
+            after_region_count = after["regions"][region_name]
+
+            if before_region_count > 0:
+                region_reduction = ((before_region_count - after_region_count) /
+                                  before_region_count) * 100
+                region_reduction = max(0, min(100, region_reduction))
             else:
-                reduction_pct = 0
-
-            # 使用更复杂的方法分析不同区域的皱纹
-            # 分区域：额头、眼周、嘴周
-            h, w = before_gray.shape
-            regions = {
-                "forehead": (int(h * 0.1), int(h * 0.4)),
-                "eyes": (int(h * 0.3), int(h * 0.6)),
-                "mouth": (int(h * 0.5), int(h * 0.8))
-            }
+                region_reduction = 0
 
-            regional_analysis = {}
-            for region_name, (y1, y2) in regions.items():
-                before_region = before_edges[y1:y2, :]
-                after_region = after_edges[y1:y2, :]
-
-                before_region_count = np.sum(before_region > 0)
-                after_region_count = np.sum(after_region > 0)
-
-                if before_region_count > 0:
-                    region_reduction = ((before_region_count - after_region_count) /
-                                      before_region_count) * 100
-                    region_reduction = max(0, min(100, region_reduction))
-                else:
-                    region_reduction = 0
-
-                regional_analysis[region_name] = {
-                    "count_before": int(before_region_count),
-                    "count_after": int(after_region_count),
-                    "reduction_pct": round(region_reduction, 1)
-                }
-
-            return {
-                "overall": {
-                    "count_before": int(before_count),
-                    "count_after": int(after_count),
-                    "reduction_pct": round(reduction_pct, 1)
-                },
-                "regions": regional_analysis,
-                "score": min(10, reduction_pct / 10)  # 0-10分
+            regional_analysis[region_name] = {
+                "count_before": int(before_region_count),
+                "count_after": int(after_region_count),
+                "reduction_pct": round(region_reduction, 1)
             }
 
-        except Exception as e:
-            logger.error(f"Wrinkle analysis failed: {str(e)}")
-            return {"error": str(e)}
+        return {
+            "overall": {
+                "count_before": int(before_count),
+                "count_after": int(after_count),
+                "reduction_pct": round(reduction_pct, 1)
+            },
+            "regions": regional_analysis,
+            "score": min(10, reduction_pct / 10)  # 0-10分
+        }
 
     def analyze_skin_tone(
         self,
@@ -116,61 +121,64 @@ class BeforeAfterAnalyzer:
             肤色分析结果
         """
         try:
-            # 转换到LAB色彩空间
-            before_lab = cv2.cvtColor(before_image, cv2.COLOR_BGR2LAB)
-            after_lab = cv2.cvtColor(after_image, cv2.COLOR_BGR2LAB)
-
-            # 分离通道
-            before_l, before_a, before_b = cv2.split(before_lab)
-            after_l, after_a, after_b = cv2.split(after_lab)
-
-            # 计算每个通道的标准差（标准差越小，越均匀）
-            before_l_std = np.std(before_l)
-            after_l_std = np.std(after_l)
-
-            before_a_std = np.std(before_a)
-            after_a_std = np.std(after_a)
-
-            before_b_std = np.std(before_b)
-            after_b_std = np.std(after_b)
-
-            # 计算均匀度分数（标准差的倒数归一化）
-            def std_to_evenness(std):
-                # 将标准差转换为0-1的均匀度分数
-                return 1.0 / (1.0 + std / 100.0)
-
-            before_evenness = std_to_evenness(before_l_std)
-            after_evenness = std_to_evenness(after_l_std)
-
-            # 计算改善百分比
-            if before_evenness > 0:
-                improvement_pct = ((after_evenness - before_evenness) /
-                                  before_evenness) * 100
-            else:
-                improvement_pct = 0
-
-            # 分析红血丝（a通道）
-            before_redness = np.mean(before_a)
-            after_redness = np.mean(after_a)
-            redness_reduction_pct = 0
-            if before_redness > 128:  # a通道 > 128表示偏红
-                redness_reduction_pct = ((before_redness - after_redness) /
-                                        (before_redness - 128)) * 100
-
-            return {
-                "evenness_before": round(before_evenness, 2),
-                "evenness_after": round(after_evenness, 2),
-                "improvement_pct": round(max(0, improvement_pct), 1),
-                "brightness_before": round(float(np.mean(before_l)), 1),
-                "brightness_after": round(float(np.mean(after_l)), 1),
-                "redness_reduction_pct": round(max(0, redness_reduction_pct), 1),
-                "score": min(10, max(0, improvement_pct) / 10)
-            }
-
+            return self.compare_skin_tone(skin_tone_features(before_image), skin_tone_features(after_image))
         except Exception as e:
             logger.error(f"Skin tone analysis failed: {str(e)}")
             return {"error": str(e)}
 
+    def compare_skin_tone(self, before: Dict, after: Dict) -> Dict:
+        """
+        由 LAB 统计量计算肤色改善
+
+        Args:
+            before: 术前照片的 skin_tone_features
+            after: 术后照片的 skin_tone_features
+
+        Returns:
+            肤色分析结果
+        """
+        # 计算均匀度分数（标准差的倒数归一化，标准差越小，越均匀）
+        def std_to_evenness(std):
+            # 将标准差转换为0-1的均匀度分数
+            return 1.0 / (1.0 + std / 100.0)
+
+        before_evenness = std_to_evenness(before["l_std"])
+        after_evenness = std_to_evenness(after["l_std"])
+
+        # 计算改善百分比
+        if before_evenness > 0:
+            improvement_pct = ((after_evenness - before_evenness) /
+                              before_evenness) * 100
+        else:
+            improvement_pct = 0
+
+        # 分析红血丝（a通道）
+        before_redness = before["a_mean"]
+        after_redness = after["a_mean"]
+        redness_reduction_pct = 0
+        if before_redness > 128:  # a通道 > 128表示偏红
+            redness_reduction_pct = ((before_redness - after_redness) /
+                                    (before_redness - 128)) * 100
+
+        result = {
+            "evenness_before": round(before_evenness, 2),
+            "evenness_after": round(after_evenness, 2),
+            "improvement_pct": round(max(0, improvement_pct), 1),
+            "brightness_before": round(float(before["l_mean"]), 1),
+            "brightness_after": round(float(after["l_mean"]), 1),
+            "redness_reduction_pct": round(max(0, redness_reduction_pct), 1),
+            "score": min(10, max(0, improvement_pct) / 10)
+        }
+
+        # 分区域均匀度 / 泛红和热力图（整图统计包含背景，区域统计只看面部）
+        if "regions" in before and "regions" in after:
+            result["regions"] = compare_regions(before["regions"], after["regions"])
+        if "grid" in before and "grid" in after:
+            heatmap = compare_grids(before["grid"], after["grid"])
+            if heatmap is not None:
+                result["heatmap"] = heatmap
+        return result
+
     def analyze_texture(
         self,
         before_image: np.ndarray,
@@ -189,43 +197,46 @@ class BeforeAfterAnalyzer:
             纹理分析结果
         """
         try:
-            # 转换为灰度图
-            before_gray = cv2.cvtColor(before_image, cv2.COLOR_BGR2GRAY)
-            after_gray = cv2.cvtColor(after_image, cv2.COLOR_BGR2GRAY)
-
-            # 使用拉普拉斯算子计算纹理
-            before_laplacian = cv2.Laplacian(before_gray, cv2.CV_64F)
-            after_laplacian = cv2.Laplacian(after_gray, cv2.CV_64F)
-
-            # 计算方差（方差越大，纹理越粗糙）
-            before_variance = np.var(before_laplacian)
-            after_variance = np.var(after_laplacian)
-
-            # 计算光滑度分数（方差的倒数）
-            def variance_to_smoothness(variance):
-                return 1.0 / (1.0 + variance / 1000.0)
-
-            before_smoothness = variance_to_smoothness(before_variance)
-            after_smoothness = variance_to_smoothness(after_variance)
-
-            # 计算改善百分比
-            if before_smoothness > 0:
-                improvement_pct = ((after_smoothness - before_smoothness) /
-                                  before_smoothness) * 100
-            else:
-                improvement_pct = 0
-
-            return {
-                "smoothness_before": round(before_smoothness, 2),
-                "smoothness_after": round(after_smoothness, 2),
-                "improvement_pct": round(max(0, improvement_pct), 1),
-                "score": min(10, max(0, improvement_pct) / 10)
-            }
-
+            return self.compare_texture(
+                texture_features(cv2.cvtColor(before_image, cv2.COLOR_BGR2GRAY)),
+                texture_features(cv2.cvtColor(after_image, cv2.COLOR_BGR2GRAY))
+            )
         except Exception as e:
             logger.error(f"Texture analysis failed: {str(e)}")
             return {"error": str(e)}
 
+    def compare_texture(self, before: Dict, after: Dict) -> Dict:
+        """
+        由拉普拉斯方差计算纹理改善
+
+        Args:
+            before: 术前照片的 texture_features
+            after: 术后照片的 texture_features
+
+        Returns:
+            纹理分析结果
+        """
+        # 计算光滑度分数（方差的倒数，方差越大，纹理越粗糙）
+        def variance_to_smoothness(variance):
+            return 1.0 / (1.0 + variance / 1000.0)
+
+        before_smoothness = variance_to_smoothness(before["laplacian_var"])
+        after_smoothness = variance_to_smoothness(after["laplacian_var"])
+
+        # 计算改善百分比
+        if before_smoothness > 0:
+            improvement_pct = ((after_smoothness - before_smoothness) /
+                              before_smoothness) * 100
+        else:
+            improvement_pct = 0
+
+        return {
+            "smoothness_before": round(before_smoothness, 2),
+            "smoothness_after": round(after_smoothness, 2),
+            "improvement_pct": round(max(0, improvement_pct), 1),
+            "score": min(10, max(0, improvement_pct) / 10)
+        }
+
     def analyze_pores(
         self,
         before_image: np.ndarray,
@@ -242,46 +253,80 @@ class BeforeAfterAnalyzer:
             毛孔分析结果
         """
         try:
-            # 转换为灰度图
-            before_gray = cv2.cvtColor(before_image, cv2.COLOR_BGR2GRAY)
-            after_gray = cv2.cvtColor(after_image, cv2.COLOR_BGR2GRAY)
-
-            # 使用形态学操作检测毛孔（暗点）
-            kernel = cv2.getStructuringElement(cv2.MORPH_ELLIPSE, (3, 3))
-
-            # 黑帽操作检测暗点
-            before_blackhat = cv2.morphologyEx(before_gray, cv2.MORPH_BLACKHAT, kernel)
-            after_blackhat = cv2.morphologyEx(after_gray, cv2.MORPH_BLACKHAT, kernel)
-
-            # 阈值化
-            _, before_pores = cv2.threshold(before_blackhat, 10, 255, cv2.THRESH_BINARY)
-            _, after_pores = cv2.threshold(after_blackhat, 10, 255, cv2.THRESH_BINARY)
-
-            # 计算毛孔面积
-            before_pore_area = np.sum(before_pores > 0)
-            after_pore_area = np.sum(after_pores > 0)
-
-            # 计算减少百分比
-            if before_pore_area > 0:
-                reduction_pct = ((before_pore_area - after_pore_area) /
-                               before_pore_area) * 100
-                reduction_pct = max(0, min(100, reduction_pct))
-            else:
-                reduction_pct = 0
-
-            return {
-                "pore_area_before": int(before_pore_area),
-                "pore_area_after": int(after_pore_area),
-                "reduction_pct": round(reduction_pct, 1),
-                "visibility_score_before": round(before_pore_area / 1000.0, 2),
-                "visibility_score_after": round(after_pore_area / 1000.0, 2),
-                "score": min(10, reduction_pct / 10)
-            }
-
+            return self.compare_pores(
+                pore_features(cv2.cvtColor(before_image, cv2.COLOR_BGR2GRAY)),
+                pore_features(cv2.cvtColor(after_image, cv2.COLOR_BGR2GRAY))
+            )
         except Exception as e:
             logger.error(f"Pore analysis failed: {str(e)}")
             return {"error": str(e)}
 
+    def compare_pores(self, before: Dict, after: Dict) -> Dict:
+        """
+        由暗点面积计算毛孔改善
+
+        Args:
+            before: 术前照片的 pore_features
+            after: 术后照片的 pore_features
+
+        Returns:
+            毛孔分析结果
+        """
+        before_pore_area = before["pore_area"]
+        after_pore_area = after["pore_area"]
+
+        # 计算减少百分比
+        if before_pore_area > 0:
+            reduction_pct = ((before_pore_area - after_pore_area) /
+                           before_pore_area) * 100
+            reduction_pct = max(0, min(100, reduction_pct))
+        else:
+            reduction_pct = 0
+
+        return {
+            "pore_area_before": int(before_pore_area),
+            "pore_area_after": int(after_pore_area),
+            "reduction_pct": round(reduction_pct, 1),
+            "visibility_score_before": round(before_pore_area / 1000.0, 2),
+            "visibility_score_after": round(after_pore_area / 1000.0, 2),
+            "score": min(10, reduction_pct / 10)
+        }
+
+    def compare_skin_regions(self, before: Dict, after: Dict) -> Dict:
+        """
+        由高分辨率皮肤区域统计量计算各区域的改善（负数表示变差）
+
+        Args:
+            before: 术前照片的 region_features
+            after: 术后照片的 region_features
+
+        Returns:
+            区域 -> 纹理、毛孔、肤色均匀度的改善，只包含两张照片都有的区域
+        """
+        def pct(before_value, after_value):
+            return round((after_value - before_value) / before_value * 100, 1) if before_value > 0 else 0.0
+
+        regions = {}
+        for name, before_region in before.items():
+            after_region = after.get(name)
+            if after_region is None:
+                continue
+
+            before_smoothness = 1.0 / (1.0 + before_region["laplacian_var"] / 1000.0)
+            after_smoothness = 1.0 / (1.0 + after_region["laplacian_var"] / 1000.0)
+            before_evenness = 1.0 / (1.0 + before_region["l_std"] / 100.0)
+            after_evenness = 1.0 / (1.0 + after_region["l_std"] / 100.0)
+            regions[name] = {
+                "smoothness_before": round(before_smoothness, 3),
+                "smoothness_after": round(after_smoothness, 3),
+                "texture_improvement_pct": pct(before_smoothness, after_smoothness),
+                "pore_density_before": round(before_region["pore_density"], 4),
+                "pore_density_after": round(after_region["pore_density"], 4),
+                "pore_reduction_pct": -pct(before_region["pore_density"], after_region["pore_density"]),
+                "evenness_improvement_pct": pct(before_evenness, after_evenness),
+            }
+        return regions
+
     def calculate_overall_score(self, improvements: Dict) -> float:
         """
         计算总体改善分数
@@ -317,40 +362,46 @@ class BeforeAfterAnalyzer:
             logger.error(f"Overall score calculation failed: {str(e)}")
             return 0.0
 
-    def analyze_comparison(
+    def compare_features(
         self,
-        before_image: np.ndarray,
-        after_image: np.ndarray,
+        before_features: Dict,
+        after_features: Dict,
         analysis_types: list = None
     ) -> Dict:
         """
-        完整的对比分析
+        由两张照片的特征计算完整的对比分析（只做算术，不需要图像）
 
         Args:
-            before_image: 术前图像
-            after_image: 术后图像
-            analysis_types: 要执行的分析类型列表
+            before_features: 术前照片的 image_features
+            after_features: 术后照片的 image_features
+            analysis_types: 要执行的分析类型列表，默认两者都有特征的全部类型
 
         Returns:
-            完整的分析结果
+            完整的分析结果（与 analyze_comparison 格式相同）
         """
+        comparisons = {
+            "wrinkles": self.compare_wrinkles,
+            "skin_tone": self.compare_skin_tone,
+            "texture": self.compare_texture,
+            "pores": self.compare_pores,
+        }
         if analysis_types is None:
-            analysis_types = ["wrinkles", "skin_tone", "texture", "pores"]
+            analysis_types = ANALYSIS_TYPES
 
         improvements = {}
 
         try:
-            if "wrinkles" in analysis_types:
-                improvements["wrinkles"] = self.analyze_wrinkles(before_image, after_image)
-
-            if "skin_tone" in analysis_types:
-                improvements["skin_tone"] = self.analyze_skin_tone(before_image, after_image)
-
-            if "texture" in analysis_types:
-                improvements["texture"] = self.analyze_texture(before_image, after_image)
-
-            if "pores" in analysis_types:
-                improvements["pores"] = self.analyze_pores(before_image, after_image)
+            for analysis_type in analysis_types:
+                if analysis_type in before_features and analysis_type in after_features:
+                    improvements[analysis_type] = comparisons[analysis_type](
+                        before_features[analysis_type], after_features[analysis_type]
+                    )
+
+            # 高分辨率皮肤区域（只作为参考细节，不计入总体分数）
+            if "skin_regions" in before_features and "skin_regions" in after_features:
+                improvements["skin_regions"] = self.compare_skin_regions(
+                    before_features["skin_regions"], after_features["skin_regions"]
+                )
 
             # 计算总体分数
             overall_score = self.calculate_overall_score(improvements)
@@ -358,6 +409,44 @@ class BeforeAfterAnalyzer:
 
             return improvements
 
+        except Exception as e:
+            logger.error(f"Feature comparison failed: {str(e)}")
+            return {"error": str(e)}
+
+    def analyze_comparison(
+        self,
+        before_image: np.ndarray,
+        after_image: np.ndarray,
+        analysis_types: list = None,
+        buffers: Optional[Dict] = None
+    ) -> Dict:
+        """
+        完整的对比分析
+
+        Args:
+            before_image: 术前图像
+            after_image: 术后图像
+            analysis_types: 要执行的分析类型列表
+            buffers: 传入 dict 时保留两张图像逐像素的中间结果
+                （buffers["before"] / buffers["after"]，见 image_features）
+
+        Returns:
+            完整的分析结果
+        """
+        if analysis_types is None:
+            analysis_types = list(ANALYSIS_TYPES)
+
+        before_buffers = after_buffers = None
+        if buffers is not None:
+            before_buffers = buffers.setdefault("before", {})
+            after_buffers = buffers.setdefault("after", {})
+
+        try:
+            return self.compare_features(
+                image_features(before_image, analysis_types, before_buffers),
+                image_features(after_image, analysis_types, after_buffers),
+                analysis_types
+            )
         except Exception as e:
             logger.error(f"Comparison analysis failed: {str(e)}")
             return {"error": str(e)}
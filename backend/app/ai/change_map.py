@@ -0,0 +1,148 @@
+"""
+变化热力图
+用本地分析器在两张配准图像上已经算出的逐像素中间结果（Canny 边缘、LAB、Laplacian）
+得到局部的差异图，着色后叠加到术后图像上：绿色为改善，红色为变差，颜色越深变化越大
+"""
+
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Dict, Optional
+import logging
+
+import cv2
+import numpy as np
+
+from app.ai.tone_map import FACE_BOX
+
+logger = logging.getLogger(__name__)
+
+
+# 热力图类型 -> 使用的中间结果
+CHANGE_KINDS = {
+    "edges": "edges",           # 皱纹：局部边缘密度减少
+    "redness": "lab",           # 泛红：a 通道减少
+    "texture": "laplacian",     # 纹理：局部 Laplacian 能量减少
+}
+
+# 局部统计窗口（标准画面 1000x1000 上的像素）
+EDGE_WINDOW = 31
+TEXTURE_WINDOW = 21
+REDNESS_SIGMA = 8.0
+
+# 着色满量程的下限（差异的 99 分位数小于该值时按该值着色，避免把噪声放大成满色）
+CHANGE_MIN_SCALE = {
+    "edges": 0.05,      # 边缘像素比例
+    "redness": 3.0,     # a 通道
+    "texture": 4.0,     # Laplacian 均方根
+}
+CHANGE_PERCENTILE = 99
+
+# 满量程时的叠加不透明度
+OVERLAY_MAX_ALPHA = 0.6
+
+IMPROVED_COLOR = (80, 200, 60)   # BGR 绿
+WORSENED_COLOR = (40, 40, 230)   # BGR 红
+
+
+@dataclass
+class ChangeMaps:
+    """一对配准图像的差异图（正数为改善）"""
+    image: np.ndarray               # 配准后的术后图像（叠加底图）
+    maps: Dict[str, np.ndarray]     # 类型 -> float32 差异图
+    scales: Dict[str, float]        # 类型 -> 着色满量程
+
+
+@lru_cache(maxsize=4)
+def _face_weight(h: int, w: int) -> np.ndarray:
+    """面部范围（FACE_BOX 内切椭圆，边缘羽化）的权重，背景不着色"""
+    x0, y0, x1, y1 = FACE_BOX
+    mask = np.zeros((h, w), dtype=np.uint8)
+    center = (round((x0 + x1) / 2 * w), round((y0 + y1) / 2 * h))
+    axes = (round((x1 - x0) / 2 * w), round((y1 - y0) / 2 * h))
+    cv2.ellipse(mask, center, axes, 0, 0, 360, 255, -1)
+    weight = cv2.GaussianBlur(mask, (0, 0), max(w, h) / 50).astype(np.float32) / 255.0
+    weight.setflags(write=False)
+    return weight
+
+
+def _edge_density(edges: np.ndarray) -> np.ndarray:
+    return cv2.boxFilter(edges, cv2.CV_32F, (EDGE_WINDOW, EDGE_WINDOW)) / 255.0
+
+
+def _redness(lab: np.ndarray) -> np.ndarray:
+    return cv2.GaussianBlur(lab[..., 1].astype(np.float32), (0, 0), REDNESS_SIGMA)
+
+
+def _texture_energy(laplacian: np.ndarray) -> np.ndarray:
+    energy = cv2.boxFilter(laplacian.astype(np.float32) ** 2, -1, (TEXTURE_WINDOW, TEXTURE_WINDOW))
+    return np.sqrt(np.maximum(energy, 0))
+
+
+_LOCAL = {
+    "edges": _edge_density,
+    "redness": _redness,
+    "texture": _texture_energy,
+}
+
+
+def change_maps(after_image: np.ndarray, buffers: Dict) -> Optional[ChangeMaps]:
+    """
+    由分析器的中间结果计算差异图
+
+    Args:
+        after_image: 配准后的术后图像
+        buffers: analyze_comparison 保留的中间结果 {"before": {...}, "after": {...}}
+
+    Returns:
+        差异图（前后任一缺少中间结果的类型跳过），全部缺失时返回 None
+    """
+    before, after = buffers.get("before", {}), buffers.get("after", {})
+    weight = _face_weight(*after_image.shape[:2])
+
+    maps, scales = {}, {}
+    for kind, buffer in CHANGE_KINDS.items():
+        if buffer not in before or buffer not in after:
+            continue
+        # 各项指标都是越小越好，术前减术后为改善
+        diff = (_LOCAL[kind](before[buffer]) - _LOCAL[kind](after[buffer])) * weight
+        inside = np.abs(diff[weight > 0.5])
+        peak = float(np.percentile(inside, CHANGE_PERCENTILE)) if inside.size else 0.0
+        maps[kind] = diff
+        scales[kind] = max(peak, CHANGE_MIN_SCALE[kind])
+
+    if not maps:
+        return None
+    return ChangeMaps(image=after_image, maps=maps, scales=scales)
+
+
+def render_overlay(image: np.ndarray, diff: np.ndarray, scale: float) -> np.ndarray:
+    """
+    差异图着色并叠加到图像上
+
+    Args:
+        image: BGR 底图
+        diff: 与底图同尺寸的差异图（正数改善）
+        scale: 满量程
+
+    Returns:
+        叠加后的 BGR 图像
+    """
+    strength = np.clip(diff * (1.0 / scale), -1.0, 1.0)
+    alpha = np.abs(strength) * OVERLAY_MAX_ALPHA
+    improved = strength >= 0
+    color = cv2.merge([
+        np.where(improved, np.float32(good), np.float32(bad))
+        for good, bad in zip(IMPROVED_COLOR, WORSENED_COLOR)
+    ])
+    # 逐像素权重混合（单次 OpenCV 调用，不生成中间的三通道差值数组）
+    blended = cv2.blendLinear(image.astype(np.float32), color, 1.0 - alpha, alpha)
+    # blendLinear 按 (w1 + w2 + 1e-5) 归一化，直接截断会让未变化的像素暗 1 级
+    return np.rint(blended).astype(np.uint8)
+
+
+def render_overlays(change: ChangeMaps) -> Dict[str, np.ndarray]:
+    """各类型的叠加图"""
+    return {
+        kind: render_overlay(change.image, diff, change.scales[kind])
+        for kind, diff in change.maps.items()
+    }
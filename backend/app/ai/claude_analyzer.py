@@ -7,7 +7,7 @@ import anthropic
 import base64
 import json
 import logging
-from typing import Dict, Optional, List
+from typing import Dict, Optional, List, Tuple
 from pathlib import Path
 import cv2
 import numpy as np
@@ -15,6 +15,10 @@ import numpy as np
 logger = logging.getLogger(__name__)
 
 
+# 多角度请求的输出上限（每个角度一份完整 JSON）
+MULTI_VIEW_MAX_TOKENS = 8192
+
+
 class ClaudeVisionAnalyzer:
     """基于 Claude Vision API 的医美分析器"""
 
@@ -49,7 +53,8 @@ class ClaudeVisionAnalyzer:
         before_image: np.ndarray,
         after_image: np.ndarray,
         treatment_type: Optional[str] = None,
-        focus_areas: Optional[List[str]] = None
+        focus_areas: Optional[List[str]] = None,
+        local_metrics: Optional[Dict] = None
     ) -> Dict:
         """
         综合分析术前术后照片
@@ -59,6 +64,7 @@ class ClaudeVisionAnalyzer:
             after_image: 术后图像 (OpenCV BGR 格式)
             treatment_type: 治疗类型（如 "肉毒素注射", "玻尿酸填充" 等）
             focus_areas: 重点分析区域（如 ["额头", "眼周", "苹果肌"]）
+            local_metrics: 本地 OpenCV 测量摘要（混合分析时作为参考发送）
 
         Returns:
             包含详细分析结果的字典
@@ -69,7 +75,7 @@ class ClaudeVisionAnalyzer:
             after_base64 = self.image_to_base64(after_image)
 
             # 构建分析提示词
-            analysis_prompt = self._build_analysis_prompt(treatment_type, focus_areas)
+            analysis_prompt = self._build_analysis_prompt(treatment_type, focus_areas, local_metrics)
 
             # 调用 Claude API
             message = self.client.messages.create(
@@ -116,6 +122,7 @@ class ClaudeVisionAnalyzer:
                 'model': self.model,
                 'treatment_type': treatment_type,
                 'focus_areas': focus_areas,
+                'local_metrics': local_metrics is not None,
                 'tokens_used': message.usage.input_tokens + message.usage.output_tokens,
                 'cost_usd': self._calculate_cost(message.usage)
             }
@@ -129,19 +136,122 @@ class ClaudeVisionAnalyzer:
                 "success": False
             }
 
+    def analyze_multi_view(
+        self,
+        views: Dict[str, Tuple[np.ndarray, np.ndarray]],
+        treatment_type: Optional[str] = None,
+        focus_areas: Optional[List[str]] = None,
+        local_metrics: Optional[Dict[str, Dict]] = None
+    ) -> Dict:
+        """
+        一次请求分析多个角度的术前术后照片
+
+        提示词和评分格式只发送一次，各角度的照片按顺序排列；
+        调用方应先把照片裁剪到人脸并缩小（见 app/ai/multi_view.py）
+
+        Args:
+            views: 角度 -> (术前图像, 术后图像)
+            treatment_type: 治疗类型
+            focus_areas: 重点分析区域
+            local_metrics: 角度 -> 本地 OpenCV 测量摘要
+
+        Returns:
+            {"views": {角度: 单角度格式的结果}, "requested_angles": [...], "_meta": {...}}；
+            无法解析的角度不出现在 views 中
+        """
+        angles = list(views)
+        try:
+            content = []
+            for angle in angles:
+                label = f"角度 {angle}：术前、术后"
+                if local_metrics and angle in local_metrics:
+                    label += f"（本地图像测量，仅供参考: {json.dumps(local_metrics[angle], ensure_ascii=False)}）"
+                content.append({"type": "text", "text": label})
+                for image in views[angle]:
+                    content.append({
+                        "type": "image",
+                        "source": {
+                            "type": "base64",
+                            "media_type": "image/jpeg",
+                            "data": self.image_to_base64(image),
+                        },
+                    })
+
+            example = ", ".join(f'"{angle}": {{...}}' for angle in angles)
+            closing = f"""**多角度说明:**
+以上照片按角度成对给出，角度依次为: {', '.join(angles)}。
+请对每个角度分别按上述 JSON 格式分析（侧面角度重点评估轮廓和体积，照片中看不到的指标可以省略），
+并按以下结构返回：
+
+```json
+{{"views": {{{example}}}}}
+```
+
+请开始分析："""
+            content.append({
+                "type": "text",
+                "text": self._build_analysis_prompt(treatment_type, focus_areas, closing=closing)
+            })
+
+            message = self.client.messages.create(
+                model=self.model,
+                max_tokens=MULTI_VIEW_MAX_TOKENS,
+                messages=[{"role": "user", "content": content}],
+                temperature=0.3,
+            )
+
+            response_text = message.content[0].text
+            parsed = self._parse_claude_response(response_text)
+
+            results = {}
+            for angle, result in (parsed.get("views") or {}).items():
+                if angle in views and isinstance(result, dict):
+                    results[angle] = {**result, "success": True}
+
+            return {
+                "success": parsed.get("success", False) and bool(results),
+                "views": results,
+                "requested_angles": angles,
+                "raw_response": response_text,
+                "_meta": {
+                    'model': self.model,
+                    'treatment_type': treatment_type,
+                    'focus_areas': focus_areas,
+                    'angles': angles,
+                    'local_metrics': local_metrics is not None,
+                    'tokens_used': message.usage.input_tokens + message.usage.output_tokens,
+                    'cost_usd': self._calculate_cost(message.usage)
+                }
+            }
+
+        except Exception as e:
+            logger.error(f"Claude multi-view analysis failed: {str(e)}")
+            return {
+                "error": str(e),
+                "success": False,
+                "views": {},
+                "requested_angles": angles
+            }
+
     def _build_analysis_prompt(
         self,
         treatment_type: Optional[str] = None,
-        focus_areas: Optional[List[str]] = None
+        focus_areas: Optional[List[str]] = None,
+        local_metrics: Optional[Dict] = None,
+        closing: str = "请开始分析："
     ) -> str:
-        """构建分析提示词"""
+        """构建分析提示词（closing 为结尾的指令，多角度分析时替换）"""
 
         treatment_context = f"\n治疗类型: {treatment_type}" if treatment_type else ""
         focus_context = f"\n重点关注区域: {', '.join(focus_areas)}" if focus_areas else ""
+        local_context = (
+            "\n本地图像测量（照片配准后逐像素计算的改善百分比，仅供参考，请以照片为准）: "
+            + json.dumps(local_metrics, ensure_ascii=False)
+        ) if local_metrics else ""
 
         prompt = f"""你是一位经验丰富的医美专家顾问。请仔细对比这两张术前术后照片，进行专业的量化分析。
 
-**分析要求:**{treatment_context}{focus_context}
+**分析要求:**{treatment_context}{focus_context}{local_context}
 
 请从以下维度进行详细分析，每个维度给出 0-100 的评分：
 
@@ -296,7 +406,7 @@ class ClaudeVisionAnalyzer:
 4. description 应简洁专业，突出关键改善点
 5. 必须返回有效的 JSON 格式，不要包含其他文字
 
-请开始分析："""
+{closing}"""
 
         return prompt
 
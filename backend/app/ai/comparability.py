@@ -0,0 +1,235 @@
+"""
+术前术后照片可比性
+比较两张照片的头部姿态、468 个关键点的形状、拍摄距离和人脸区域的 LAB 颜色分布；
+姿态、距离或光线差异过大时，分析得到的改善数值不可信
+"""
+
+import math
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+import logging
+
+import cv2
+import numpy as np
+
+from app.ai.face_geometry import eye_distance, head_pose
+
+logger = logging.getLogger(__name__)
+
+
+# 各分项差异达到容差时记 0 分
+POSE_TOLERANCE = 20.0               # 姿态角差（度）
+SCALE_TOLERANCE = math.log(2.0)     # 人脸相对大小之比（对数）
+SHAPE_TOLERANCE = 0.01              # 相似变换对齐后的 Procrustes 残差
+LIGHTING_TOLERANCE = 1.0            # LAB 直方图的 Bhattacharyya 距离
+
+# 综合分数阈值：低于 MARGINAL 不可比较（拒绝分析），低于 COMPARABLE 需要医生复核
+COMPARABLE_SCORE = 0.7
+MARGINAL_SCORE = 0.4
+
+# 颜色直方图：人脸区域缩放到固定尺寸，每通道 32 个分箱
+FACE_SAMPLE_SIZE = 128
+HIST_BINS = 32
+
+COMPARABLE = "comparable"
+MARGINAL = "marginal"
+NOT_COMPARABLE = "not_comparable"
+
+
+@dataclass
+class ComparabilityReport:
+    """照片对可比性"""
+    score: float
+    components: Dict[str, float]
+    details: Dict[str, object]
+    issues: List[Dict] = field(default_factory=list)
+
+    @property
+    def level(self) -> str:
+        if self.score >= COMPARABLE_SCORE:
+            return COMPARABLE
+        if self.score >= MARGINAL_SCORE:
+            return MARGINAL
+        return NOT_COMPARABLE
+
+    @property
+    def passed(self) -> bool:
+        return self.level != NOT_COMPARABLE
+
+    def to_dict(self) -> Dict:
+        return {
+            "score": self.score,
+            "level": self.level,
+            "components": self.components,
+            "details": self.details,
+            "issues": self.issues,
+        }
+
+
+def _score(difference: float, tolerance: float) -> float:
+    return round(float(min(max(1.0 - difference / tolerance, 0.0), 1.0)), 2)
+
+
+def _procrustes_residual(before: np.ndarray, after: np.ndarray) -> float:
+    """
+    两组关键点经最优相似变换（平移、缩放、旋转）对齐后的残差
+
+    形状各自中心化并归一化为单位范数，残差 = 1 - (Σσ)²，σ 为协方差矩阵的奇异值
+    （行列式为负时最后一个奇异值取负，排除镜像）
+    """
+    a = before - before.mean(axis=0)
+    b = after - after.mean(axis=0)
+    a /= np.linalg.norm(a) or 1.0
+    b /= np.linalg.norm(b) or 1.0
+
+    u, sigma, vt = np.linalg.svd(a.T @ b)
+    if np.linalg.det(u @ vt) < 0:
+        sigma[-1] = -sigma[-1]
+    return float(max(1.0 - sigma.sum() ** 2, 0.0))
+
+
+def _face_sample(image: np.ndarray, points: np.ndarray) -> np.ndarray:
+    """关键点外接矩形内的人脸区域，缩放到固定尺寸"""
+    h, w = image.shape[:2]
+    x1, y1 = np.clip(np.floor(points.min(axis=0)).astype(int), 0, [w, h])
+    x2, y2 = np.clip(np.ceil(points.max(axis=0)).astype(int), 0, [w, h])
+    face = image[y1:y2, x1:x2] if x2 - x1 >= 8 and y2 - y1 >= 8 else image
+    return cv2.resize(face, (FACE_SAMPLE_SIZE, FACE_SAMPLE_SIZE), interpolation=cv2.INTER_AREA)
+
+
+def _lab_histograms(samples: np.ndarray) -> np.ndarray:
+    """
+    一次 bincount 计算所有样本各 LAB 通道的归一化直方图
+
+    Args:
+        samples: (N, H, W, 3) 的 LAB 图像
+
+    Returns:
+        (N, 3, HIST_BINS)
+    """
+    n = samples.shape[0]
+    bins = (samples >> 3).reshape(n, -1, 3).astype(np.int64)  # 256 / 8 = 32 个分箱
+    offsets = (np.arange(n)[:, None, None] * 3 + np.arange(3)[None, None, :]) * HIST_BINS
+    counts = np.bincount((bins + offsets).ravel(), minlength=n * 3 * HIST_BINS)
+    counts = counts.reshape(n, 3, HIST_BINS).astype(np.float64)
+    return counts / counts.sum(axis=2, keepdims=True)
+
+
+def face_signature(image: np.ndarray, landmarks: Dict) -> Dict:
+    """
+    单张照片的可比性签名（头部姿态、人脸相对大小、人脸区域 LAB 直方图）
+
+    与关键点一起保存后，两张照片的可比性无需解码图像即可计算
+
+    Args:
+        image: BGR 图像
+        landmarks: 该图像坐标的关键点
+
+    Returns:
+        签名（可 JSON 序列化）
+    """
+    points = np.array(landmarks["all_landmarks"], dtype=np.float64)
+    sample = cv2.cvtColor(_face_sample(image, points), cv2.COLOR_BGR2LAB)
+    return {
+        "pose": head_pose(landmarks, image.shape[:2]),
+        "face_scale": eye_distance(landmarks) / image.shape[1],
+        "brightness": float(sample[..., 0].mean()),
+        "lab_histogram": _lab_histograms(sample[None])[0].tolist(),
+    }
+
+
+def signature_comparability(
+    before_signature: Dict,
+    before_landmarks: Dict,
+    after_signature: Dict,
+    after_landmarks: Dict
+) -> ComparabilityReport:
+    """
+    由两张照片的签名和关键点计算可比性
+
+    Args:
+        before_signature: 术前照片的 face_signature
+        before_landmarks: 术前照片的关键点
+        after_signature: 术后照片的 face_signature
+        after_landmarks: 术后照片的关键点
+
+    Returns:
+        可比性结果
+    """
+    components: Dict[str, float] = {}
+    details: Dict[str, object] = {}
+    issues: List[Dict] = []
+
+    # 1. 头部姿态差
+    before_pose = before_signature.get("pose")
+    after_pose = after_signature.get("pose")
+    if before_pose is not None and after_pose is not None:
+        delta = {axis: round(after_pose[axis] - before_pose[axis], 1) for axis in before_pose}
+        details["pose_delta"] = delta
+        components["pose"] = _score(max(abs(v) for v in delta.values()), POSE_TOLERANCE)
+
+    # 2. 关键点形状（全部 468 点，表情和姿态差异都会体现）
+    residual = _procrustes_residual(
+        np.array(before_landmarks["all_landmarks"], dtype=np.float64),
+        np.array(after_landmarks["all_landmarks"], dtype=np.float64)
+    )
+    details["shape_residual"] = round(residual, 4)
+    components["shape"] = _score(residual, SHAPE_TOLERANCE)
+
+    # 3. 拍摄距离：眼距占画面宽度的比例之比
+    before_size = before_signature["face_scale"]
+    ratio = after_signature["face_scale"] / before_size if before_size > 0 else 0.0
+    details["scale_ratio"] = round(ratio, 3)
+    components["scale"] = _score(abs(math.log(ratio)) if ratio > 0 else math.inf, SCALE_TOLERANCE)
+
+    # 4. 光线：人脸区域 LAB 直方图的 Bhattacharyya 距离
+    histograms = np.array(
+        [before_signature["lab_histogram"], after_signature["lab_histogram"]], dtype=np.float64
+    )
+    overlap = np.sqrt(histograms[0] * histograms[1]).sum(axis=1)
+    distances = np.sqrt(np.clip(1.0 - overlap, 0.0, 1.0))
+    details["lighting_distance"] = {
+        channel: round(float(d), 3) for channel, d in zip(("L", "a", "b"), distances)
+    }
+    details["brightness_delta"] = round(after_signature["brightness"] - before_signature["brightness"], 1)
+    components["lighting"] = _score(float(distances.max()), LIGHTING_TOLERANCE)
+
+    messages = {
+        "pose": "Head pose differs between photos",
+        "shape": "Facial expression or angle differs between photos",
+        "scale": "Camera distance differs between photos",
+        "lighting": "Lighting differs between photos",
+    }
+    for name, value in components.items():
+        if value < COMPARABLE_SCORE:
+            issues.append({"code": f"{name}_mismatch", "score": value, "message": messages[name]})
+
+    score = round(min(components.values()), 2)
+    return ComparabilityReport(score=score, components=components, details=details, issues=issues)
+
+
+def pair_comparability(
+    before_image: np.ndarray,
+    before_landmarks: Optional[Dict],
+    after_image: np.ndarray,
+    after_landmarks: Optional[Dict]
+) -> Optional[ComparabilityReport]:
+    """
+    计算术前术后照片的可比性
+
+    Args:
+        before_image: 术前照片（BGR 原图）
+        before_landmarks: 术前照片的人脸关键点（原图坐标）
+        after_image: 术后照片
+        after_landmarks: 术后照片的人脸关键点
+
+    Returns:
+        可比性结果，任一照片未检测到人脸时返回 None
+    """
+    if before_landmarks is None or after_landmarks is None:
+        return None
+
+    return signature_comparability(
+        face_signature(before_image, before_landmarks), before_landmarks,
+        face_signature(after_image, after_landmarks), after_landmarks
+    )
@@ -0,0 +1,135 @@
+"""
+并排对比图渲染
+只依赖 OpenCV，可在报告渲染进程中直接使用
+"""
+
+import cv2
+import numpy as np
+from functools import lru_cache
+from typing import Dict, Tuple
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+# 标签样式
+LABEL_FONT = cv2.FONT_HERSHEY_SIMPLEX
+LABEL_FONT_SCALE = 1.5
+LABEL_THICKNESS = 3
+LABEL_COLOR = (255, 255, 255)
+LABEL_ORIGIN = (50, 50)
+
+
+@lru_cache(maxsize=16)
+def _label_mask(h: int, w: int) -> Tuple[slice, np.ndarray]:
+    """
+    标签遮罩（按尺寸缓存，同尺寸只绘制一次）
+
+    Returns:
+        (标签所在行范围, 该行范围内的抗锯齿 alpha 遮罩 float32, 形状 band_h x 2w x 1)
+    """
+    mask = np.zeros((h, w * 2), dtype=np.uint8)
+    cv2.putText(mask, "Before", LABEL_ORIGIN, LABEL_FONT, LABEL_FONT_SCALE,
+                255, LABEL_THICKNESS, cv2.LINE_AA)
+    cv2.putText(mask, "After", (w + LABEL_ORIGIN[0], LABEL_ORIGIN[1]), LABEL_FONT,
+                LABEL_FONT_SCALE, 255, LABEL_THICKNESS, cv2.LINE_AA)
+
+    rows = np.flatnonzero(mask.any(axis=1))
+    if rows.size == 0:
+        return slice(0, 0), np.zeros((0, w * 2, 1), dtype=np.float32)
+
+    band = slice(int(rows[0]), int(rows[-1]) + 1)
+    alpha = (mask[band].astype(np.float32) / 255.0)[:, :, None]
+    alpha.setflags(write=False)
+    return band, alpha
+
+
+def render_side_by_side(
+    before_image: np.ndarray,
+    after_image: np.ndarray,
+    labels: bool = True
+) -> np.ndarray:
+    """
+    渲染并排对比图
+
+    术后图尺寸不一致时按术前图缩放；标签遮罩按尺寸缓存，只在标签所在的行做混合
+
+    Args:
+        before_image: 术前图像
+        after_image: 术后图像
+        labels: 是否添加标签
+
+    Returns:
+        并排对比图（h x 2w）
+    """
+    h, w = before_image.shape[:2]
+    if after_image.shape[:2] != (h, w):
+        after_image = cv2.resize(after_image, (w, h), interpolation=cv2.INTER_AREA)
+
+    canvas = np.empty((h, w * 2, 3), dtype=np.uint8)
+    canvas[:, :w] = before_image
+    canvas[:, w:] = after_image
+
+    if labels:
+        band, alpha = _label_mask(h, w)
+        region = canvas[band].astype(np.float32)
+        region += (np.array(LABEL_COLOR, dtype=np.float32) - region) * alpha
+        canvas[band] = region.astype(np.uint8)
+
+    return canvas
+
+
+def build_pyramid(image: np.ndarray, widths: Dict[str, int]) -> Dict[str, np.ndarray]:
+    """
+    由全分辨率图像生成多尺寸版本
+
+    从大到小逐级使用区域插值（INTER_AREA）降采样，每一级都基于上一级结果，
+    不超过原图尺寸的级别直接复用原图
+
+    Args:
+        image: 全分辨率图像
+        widths: {尺寸名: 目标宽度}
+
+    Returns:
+        {尺寸名: 图像}
+    """
+    h, w = image.shape[:2]
+    levels = {}
+    current = image
+
+    for name, target_w in sorted(widths.items(), key=lambda item: item[1], reverse=True):
+        if target_w >= current.shape[1]:
+            levels[name] = current
+            continue
+        target_h = max(1, round(h * target_w / w))
+        current = cv2.resize(current, (target_w, target_h), interpolation=cv2.INTER_AREA)
+        levels[name] = current
+
+    return levels
+
+
+@lru_cache(maxsize=1)
+def _eye_cascade():
+    """眼睛检测器（每个进程加载一次）"""
+    return cv2.CascadeClassifier(cv2.data.haarcascades + "haarcascade_eye.xml")
+
+
+def blur_eyes(image: np.ndarray) -> np.ndarray:
+    """
+    模糊眼部区域（隐私保护）
+
+    Args:
+        image: BGR 图像
+
+    Returns:
+        眼部模糊后的新图像
+    """
+    gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+    eyes = _eye_cascade().detectMultiScale(gray, scaleFactor=1.1, minNeighbors=5)
+    result = image.copy()
+    for (x, y, w, h) in eyes:
+        pad_x, pad_y = w // 4, h // 4
+        y1, y2 = max(0, y - pad_y), min(image.shape[0], y + h + pad_y)
+        x1, x2 = max(0, x - pad_x), min(image.shape[1], x + w + pad_x)
+        result[y1:y2, x1:x2] = cv2.GaussianBlur(result[y1:y2, x1:x2], (51, 51), 0)
+    return result
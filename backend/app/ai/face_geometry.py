@@ -0,0 +1,168 @@
+"""
+人脸几何
+基于 MediaPipe Face Mesh 关键点估计头部姿态、眼距和图像间的配准变换，
+供质量检查、配对比较、图像对齐等模块共用
+"""
+
+from typing import Dict, Optional, Sequence, Tuple
+import logging
+
+import cv2
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+# Face Mesh 关键点索引
+NOSE_TIP = 1
+CHIN = 152
+LEFT_EYE_OUTER = 33     # 图像左侧的外眼角
+RIGHT_EYE_OUTER = 263   # 图像右侧的外眼角
+MOUTH_LEFT = 61
+MOUTH_RIGHT = 291
+
+POSE_LANDMARKS = (NOSE_TIP, CHIN, LEFT_EYE_OUTER, RIGHT_EYE_OUTER, MOUTH_LEFT, MOUTH_RIGHT)
+
+# 通用三维人脸模型（毫米，鼻尖为原点，x 向右、y 向下、z 指向相机后方）
+FACE_MODEL_3D = np.array([
+    (0.0, 0.0, 0.0),          # 鼻尖
+    (0.0, 330.0, 65.0),       # 下巴
+    (-225.0, -170.0, 135.0),  # 左外眼角
+    (225.0, -170.0, 135.0),   # 右外眼角
+    (-150.0, 150.0, 125.0),   # 左嘴角
+    (150.0, 150.0, 125.0),    # 右嘴角
+], dtype=np.float64)
+
+
+def _points(landmarks: Dict) -> Sequence[Tuple[float, float]]:
+    return landmarks["all_landmarks"]
+
+
+def scale_landmarks(landmarks: Dict, factor: float) -> Dict:
+    """关键点坐标按比例缩放（缩小图上检测的关键点换算回原图坐标）"""
+    def scale(point):
+        return (point[0] * factor, point[1] * factor)
+
+    return {
+        "all_landmarks": [scale(point) for point in landmarks["all_landmarks"]],
+        "key_points": {name: scale(point) for name, point in landmarks.get("key_points", {}).items()},
+    }
+
+
+def eye_distance(landmarks: Dict) -> float:
+    """两外眼角之间的像素距离"""
+    points = _points(landmarks)
+    left = np.array(points[LEFT_EYE_OUTER], dtype=np.float64)
+    right = np.array(points[RIGHT_EYE_OUTER], dtype=np.float64)
+    return float(np.linalg.norm(right - left))
+
+
+def head_pose(landmarks: Dict, image_size: Tuple[int, int]) -> Optional[Dict[str, float]]:
+    """
+    估计头部姿态
+
+    用 6 个关键点和通用三维人脸模型求解 PnP（焦距近似为图像宽度，无畸变），
+    正脸时三个角度均接近 0
+
+    Args:
+        landmarks: detect_face_landmarks 的返回值（像素坐标）
+        image_size: 关键点所在图像的 (高, 宽)
+
+    Returns:
+        {"yaw": 左右转头, "pitch": 抬头低头, "roll": 歪头}（角度），求解失败返回 None
+    """
+    points = _points(landmarks)
+    if len(points) <= max(POSE_LANDMARKS):
+        return None
+
+    image_points = np.array([points[i] for i in POSE_LANDMARKS], dtype=np.float64)
+    h, w = image_size
+    camera = np.array([[w, 0, w / 2], [0, w, h / 2], [0, 0, 1]], dtype=np.float64)
+
+    ok, rotation_vector, _ = cv2.solvePnP(
+        FACE_MODEL_3D, image_points, camera, None, flags=cv2.SOLVEPNP_ITERATIVE
+    )
+    if not ok:
+        return None
+
+    rotation, _ = cv2.Rodrigues(rotation_vector)
+    angles, *_ = cv2.RQDecomp3x3(rotation)
+    pitch, yaw, roll = angles
+    return {"yaw": float(yaw), "pitch": float(pitch), "roll": float(roll)}
+
+
+def similarity_transform(src: np.ndarray, dst: np.ndarray) -> Tuple[np.ndarray, float]:
+    """
+    最小二乘相似变换（Umeyama），把 src 点集映射到 dst
+
+    全部对应点一起求解（平移、旋转、等比缩放），不会拟合局部形变，
+    因此填充等治疗带来的真实轮廓变化不会被配准抹掉
+
+    Args:
+        src: (N, 2) 源点
+        dst: (N, 2) 目标点
+
+    Returns:
+        (2x3 仿射矩阵, 变换后的均方根残差（像素）)
+    """
+    src = np.asarray(src, dtype=np.float64)
+    dst = np.asarray(dst, dtype=np.float64)
+    src_mean, dst_mean = src.mean(axis=0), dst.mean(axis=0)
+    src_centered, dst_centered = src - src_mean, dst - dst_mean
+
+    covariance = dst_centered.T @ src_centered / len(src)
+    u, sigma, vt = np.linalg.svd(covariance)
+    d = np.ones(2)
+    if np.linalg.det(u) * np.linalg.det(vt) < 0:
+        d[-1] = -1  # 排除镜像
+
+    rotation = u @ np.diag(d) @ vt
+    variance = (src_centered ** 2).sum() / len(src)
+    scale = (sigma * d).sum() / variance if variance > 0 else 1.0
+    translation = dst_mean - scale * rotation @ src_mean
+
+    matrix = np.hstack([scale * rotation, translation[:, None]])
+    residual = src @ matrix[:, :2].T + matrix[:, 2] - dst
+    return matrix, float(np.sqrt((residual ** 2).sum(axis=1).mean()))
+
+
+def canonical_transform(landmarks: Dict, size: Tuple[int, int]) -> np.ndarray:
+    """
+    原图 -> 标准人脸画面的仿射矩阵
+
+    两眼连线水平，眼距为画面宽度的 35%，两眼中点位于水平中央、距顶部 40% 处
+
+    Args:
+        landmarks: 原图坐标的关键点
+        size: 输出画面 (宽, 高)
+
+    Returns:
+        2x3 仿射矩阵
+    """
+    points = _points(landmarks)
+    left = np.array(points[LEFT_EYE_OUTER], dtype=np.float64)
+    right = np.array(points[RIGHT_EYE_OUTER], dtype=np.float64)
+    dx, dy = right - left
+    angle = np.degrees(np.arctan2(dy, dx))
+    scale = size[0] * 0.35 / max(float(np.hypot(dx, dy)), 1e-6)
+
+    center = (left + right) / 2
+    matrix = cv2.getRotationMatrix2D((float(center[0]), float(center[1])), angle, scale)
+    matrix[:, 2] += np.array([size[0] / 2, size[1] * 0.4]) - center
+    return matrix
+
+
+def compose_affine(outer: np.ndarray, inner: np.ndarray) -> np.ndarray:
+    """两个 2x3 仿射矩阵的复合（先 inner 后 outer），只需一次重采样"""
+    return np.hstack([outer[:, :2] @ inner[:, :2], (outer[:, :2] @ inner[:, 2] + outer[:, 2])[:, None]])
+
+
+def compact_landmarks(landmarks: Dict, precision: int = 1) -> Dict:
+    """关键点坐标取整到 precision 位小数（写入 photos.face_landmarks，之后分析无需重新检测）"""
+    def compact(point):
+        return [round(float(point[0]), precision), round(float(point[1]), precision)]
+
+    return {
+        "all_landmarks": [compact(point) for point in landmarks["all_landmarks"]],
+        "key_points": {name: compact(point) for name, point in landmarks.get("key_points", {}).items()},
+    }
@@ -0,0 +1,200 @@
+"""
+单张照片的特征向量
+本地分析器的各项指标（边缘数、LAB 均值/标准差、Laplacian 方差、毛孔面积）都只依赖单张图像，
+上传时在对齐后的照片上提取一次并保存，之后任意两张照片的对比只需对两个特征向量做算术，
+无需再解码图像
+"""
+
+from concurrent.futures import Executor
+from typing import Dict, Iterable, Optional
+import logging
+
+import cv2
+import numpy as np
+
+from app.ai.comparability import face_signature
+from app.ai.skin_regions import region_features
+from app.ai.tone_map import tone_features
+
+logger = logging.getLogger(__name__)
+
+
+# 特征定义变化时递增，版本不同的已保存特征会重新提取
+FEATURE_VERSION = 3
+
+ANALYSIS_TYPES = ("wrinkles", "skin_tone", "texture", "pores")
+
+# 皱纹分区（图像高度的比例）：额头、眼周、嘴周
+WRINKLE_REGIONS = {
+    "forehead": (0.1, 0.4),
+    "eyes": (0.3, 0.6),
+    "mouth": (0.5, 0.8),
+}
+
+
+def wrinkle_features(gray: np.ndarray, buffers: Optional[Dict] = None) -> Dict:
+    """Canny 边缘像素数（整体和各分区）"""
+    edges = cv2.Canny(gray, 50, 150)
+    if buffers is not None:
+        buffers["edges"] = edges
+    h = gray.shape[0]
+    return {
+        "count": int(np.count_nonzero(edges)),
+        "regions": {
+            name: int(np.count_nonzero(edges[int(h * top):int(h * bottom), :]))
+            for name, (top, bottom) in WRINKLE_REGIONS.items()
+        },
+    }
+
+
+def skin_tone_features(image: np.ndarray, buffers: Optional[Dict] = None) -> Dict:
+    """LAB 亮度标准差、亮度均值和 a 通道（红色）均值：整图、各面部区域和热力图网格（一次积分图）"""
+    return tone_features(image, buffers)
+
+
+# 纹理和毛孔按水平条带处理（每条带的灰度、Laplacian 和黑帽结果都在 CPU 缓存内），
+# 条带上下多取的行数：Laplacian 需要 1 行邻域，闭运算（膨胀再腐蚀）需要 2 行
+STRIP_ROWS = 64
+STRIP_HALO = 2
+
+# 毛孔：黑帽响应阈值
+PORE_THRESHOLD = 10
+
+_PORE_KERNEL = cv2.getStructuringElement(cv2.MORPH_ELLIPSE, (3, 3))
+
+
+def _strip_statistics(
+    gray: np.ndarray,
+    texture: bool = True,
+    pores: bool = True,
+    buffers: Optional[Dict] = None
+) -> Dict:
+    """
+    一次按条带遍历灰度图，同时计算 Laplacian 方差和黑帽毛孔面积
+
+    uint8 图像的 3x3 Laplacian 在 [-1020, 1020] 内，用 int16 计算，和与平方和按条带累加（精确整数），
+    最后一次得到方差；不再生成整图的 float64 Laplacian 和各自的整图中间结果。
+    条带带有 STRIP_HALO 行邻域，结果与整图计算相同
+
+    Args:
+        gray: 灰度图
+        texture: 是否计算 Laplacian 方差
+        pores: 是否计算毛孔面积
+        buffers: 传入 dict 时保留整图的 int16 Laplacian（"laplacian"）
+
+    Returns:
+        {"laplacian_var", "pore_area"} 中需要的项
+    """
+    h = gray.shape[0]
+    keep_laplacian = texture and buffers is not None
+    laplacian_full = np.empty(gray.shape, dtype=np.int16) if keep_laplacian else None
+    total = squares = 0.0
+    pore_area = 0
+
+    for top in range(0, h, STRIP_ROWS):
+        bottom = min(top + STRIP_ROWS, h)
+        start, end = max(top - STRIP_HALO, 0), min(bottom + STRIP_HALO, h)
+        band = gray[start:end]
+        rows = slice(top - start, bottom - start)
+
+        if texture:
+            laplacian = cv2.Laplacian(band, cv2.CV_16S)[rows]
+            total += cv2.sumElems(laplacian)[0]
+            squares += cv2.norm(laplacian, cv2.NORM_L2SQR)
+            if keep_laplacian:
+                laplacian_full[top:bottom] = laplacian
+        if pores:
+            blackhat = cv2.morphologyEx(band, cv2.MORPH_BLACKHAT, _PORE_KERNEL)[rows]
+            _, mask = cv2.threshold(blackhat, PORE_THRESHOLD, 255, cv2.THRESH_BINARY)
+            pore_area += cv2.countNonZero(mask)
+
+    statistics = {}
+    if texture:
+        n = gray.size
+        mean = total / n
+        statistics["laplacian_var"] = float(max(squares / n - mean ** 2, 0.0))
+        if keep_laplacian:
+            buffers["laplacian"] = laplacian_full
+    if pores:
+        statistics["pore_area"] = int(pore_area)
+    return statistics
+
+
+def texture_features(gray: np.ndarray, buffers: Optional[Dict] = None) -> Dict:
+    """Laplacian 方差（越大纹理越粗糙）"""
+    return {"laplacian_var": _strip_statistics(gray, pores=False, buffers=buffers)["laplacian_var"]}
+
+
+def pore_features(gray: np.ndarray) -> Dict:
+    """黑帽变换检测的暗点（毛孔）面积"""
+    return {"pore_area": _strip_statistics(gray, texture=False)["pore_area"]}
+
+
+def image_features(
+    image: np.ndarray,
+    analysis_types: Iterable[str] = ANALYSIS_TYPES,
+    buffers: Optional[Dict] = None
+) -> Dict:
+    """
+    提取本地分析器使用的单图特征（灰度图只转换一次）
+
+    Args:
+        image: BGR 图像（对齐、标准化光照后）
+        analysis_types: 需要的分析类型
+        buffers: 传入 dict 时保留逐像素的中间结果（edges: Canny 边缘, lab: LAB 图像,
+            laplacian: int16 Laplacian 响应），供变化热力图复用
+
+    Returns:
+        分析类型 -> 特征
+    """
+    analysis_types = set(analysis_types)
+    gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+    features = {}
+    if "wrinkles" in analysis_types:
+        features["wrinkles"] = wrinkle_features(gray, buffers)
+    if "skin_tone" in analysis_types:
+        features["skin_tone"] = skin_tone_features(image, buffers)
+
+    # 纹理和毛孔在同一次条带遍历中计算
+    texture, pores = "texture" in analysis_types, "pores" in analysis_types
+    if texture or pores:
+        statistics = _strip_statistics(gray, texture, pores, buffers)
+        if texture:
+            features["texture"] = {"laplacian_var": statistics["laplacian_var"]}
+        if pores:
+            features["pores"] = {"pore_area": statistics["pore_area"]}
+    return features
+
+
+def photo_features(
+    aligned: np.ndarray,
+    image: np.ndarray,
+    landmarks: Dict,
+    executor: Optional[Executor] = None
+) -> Dict:
+    """
+    一张照片保存的全部特征（写入 photos.features）
+
+    Args:
+        aligned: 对齐到标准人脸画面并标准化光照的图像
+        image: 原图（可比性签名和高分辨率皮肤区域在原图上计算）
+        landmarks: 原图坐标的关键点
+        executor: 皮肤区域分块并行使用的线程池
+
+    Returns:
+        {"version", "image": 本地分析器特征（含 skin_regions）, "face": 可比性签名}
+    """
+    features = image_features(aligned)
+    features["skin_regions"] = region_features(image, landmarks, executor)
+    return {
+        "version": FEATURE_VERSION,
+        "image": features,
+        "face": face_signature(image, landmarks),
+    }
+
+
+def current_features(features: Optional[Dict]) -> Optional[Dict]:
+    """已保存的特征，缺失或版本过期时返回 None"""
+    if not isinstance(features, dict) or features.get("version") != FEATURE_VERSION:
+        return None
+    return features
@@ -0,0 +1,229 @@
+"""
+本地 + Claude 混合分析
+先在配准后的照片上计算本地 OpenCV 指标（几十毫秒、无费用），
+只有变化明显、存在风险信号或医生要求时才调用 Claude，并把本地数值作为参考一起发送
+"""
+
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+import logging
+
+import numpy as np
+
+from app.ai.analyzer import BeforeAfterAnalyzer
+from app.ai.change_map import ChangeMaps
+from app.ai.comparability import COMPARABLE, ComparabilityReport
+from app.ai.metrics import extract_metrics, overall_score
+
+logger = logging.getLogger(__name__)
+
+
+# 分析模式：claude 始终调用，hybrid 按本地结果决定，local 只在医生要求时调用
+MODE_CLAUDE = "claude"
+MODE_HYBRID = "hybrid"
+MODE_LOCAL = "local"
+ANALYSIS_MODES = (MODE_CLAUDE, MODE_HYBRID, MODE_LOCAL)
+
+# 单项指标变差超过该百分比视为风险信号（与报告控制的对称性规则一致）
+NEGATIVE_CHANGE_PCT = -10.0
+
+LOCAL_MODEL_VERSION = "local-opencv"
+
+# 升级到 Claude 的原因
+REASON_MODE = "clinic_policy"
+REASON_REQUESTED = "clinician_request"
+REASON_LARGE_CHANGE = "large_change"
+REASON_NEGATIVE_CHANGE = "negative_change"
+REASON_NOT_COMPARABLE = "not_comparable"
+REASON_NO_FACE = "no_face"
+REASON_LOCAL_FAILED = "local_analysis_failed"
+
+# 本地结果 -> Claude 格式的分类
+LOCAL_SECTIONS = {
+    "wrinkles": "wrinkle_analysis",
+    "skin_quality": "skin_quality",
+}
+
+
+@dataclass
+class AnalysisPolicy:
+    """诊所的分析策略"""
+    mode: str = MODE_HYBRID
+    escalation_threshold: float = 30.0  # 本地整体改善（0-100）达到该值时调用 Claude
+
+    @classmethod
+    def for_clinic(cls, clinic, default_mode: str, default_threshold: float) -> "AnalysisPolicy":
+        """诊所未设置的项使用全局默认值（clinic 为 None 时全部使用默认值）"""
+        mode = getattr(clinic, "analysis_mode", None) or default_mode
+        threshold = getattr(clinic, "claude_escalation_threshold", None)
+        if mode not in ANALYSIS_MODES:
+            logger.warning(f"Unknown analysis mode {mode!r}, falling back to {default_mode}")
+            mode = default_mode
+        return cls(mode=mode, escalation_threshold=default_threshold if threshold is None else float(threshold))
+
+
+@dataclass
+class LocalScreen:
+    """本地预筛结果"""
+    improvements: Dict                  # BeforeAfterAnalyzer.analyze_comparison 的输出
+    overall_improvement: Optional[float]
+    metrics: List[Dict] = field(default_factory=list)
+    registered: bool = True             # 是否基于关键点配准（未检测到人脸时只缩放）
+    comparability: Optional[ComparabilityReport] = None
+    processing_time_ms: int = 0
+    change: Optional[ChangeMaps] = field(default=None, repr=False)  # 变化热力图（配准成功时）
+
+    @property
+    def failed(self) -> bool:
+        return "error" in self.improvements or self.overall_improvement is None
+
+    def to_dict(self) -> Dict:
+        return {
+            "overall_improvement": self.overall_improvement,
+            "metrics": self.metrics,
+            "registered": self.registered,
+            "processing_time_ms": self.processing_time_ms,
+            "raw": self.improvements,
+        }
+
+
+def screen_pair(
+    before_image: np.ndarray,
+    after_image: np.ndarray,
+    analyzer: BeforeAfterAnalyzer,
+    registered: bool = True,
+    comparability: Optional[ComparabilityReport] = None,
+    buffers: Optional[Dict] = None
+) -> LocalScreen:
+    """
+    本地指标预筛
+
+    Args:
+        before_image: 对齐后的术前图像
+        after_image: 配准到术前图像的术后图像（同尺寸）
+        analyzer: 本地分析器
+        registered: 图像是否经过关键点配准
+        comparability: 照片对可比性
+        buffers: 传入 dict 时保留分析器的逐像素中间结果（见 analyze_comparison）
+
+    Returns:
+        预筛结果
+    """
+    improvements = analyzer.analyze_comparison(before_image, after_image, buffers=buffers)
+    return LocalScreen(
+        improvements=improvements,
+        overall_improvement=overall_score(improvements),
+        metrics=extract_metrics(improvements),
+        registered=registered,
+        comparability=comparability,
+    )
+
+
+def screen_features(
+    before_features: Dict,
+    after_features: Dict,
+    analyzer: BeforeAfterAnalyzer,
+    comparability: Optional[ComparabilityReport] = None
+) -> LocalScreen:
+    """
+    由两张照片已保存的特征预筛（只做算术，不解码图像）
+
+    特征在各自的标准人脸画面上提取，与 screen_pair 的逐对配准相比只差一个很小的相似变换，
+    各项指标都是整图或水平分区的统计量，对此不敏感
+
+    Args:
+        before_features: 术前照片 features["image"]
+        after_features: 术后照片 features["image"]
+        analyzer: 本地分析器
+        comparability: 照片对可比性
+
+    Returns:
+        预筛结果
+    """
+    improvements = analyzer.compare_features(before_features, after_features)
+    return LocalScreen(
+        improvements=improvements,
+        overall_improvement=overall_score(improvements),
+        metrics=extract_metrics(improvements),
+        comparability=comparability,
+    )
+
+
+def escalation_reasons(screen: LocalScreen, policy: AnalysisPolicy, requested: bool = False) -> List[str]:
+    """
+    需要调用 Claude 的原因（空列表表示本地结果即可）
+
+    Args:
+        screen: 本地预筛结果
+        policy: 诊所分析策略
+        requested: 医生是否要求 Claude 分析
+
+    Returns:
+        原因代码列表
+    """
+    reasons = []
+    if requested:
+        reasons.append(REASON_REQUESTED)
+    if policy.mode == MODE_CLAUDE:
+        reasons.append(REASON_MODE)
+    if policy.mode != MODE_HYBRID:
+        return reasons
+
+    if screen.failed:
+        reasons.append(REASON_LOCAL_FAILED)
+        return reasons
+    if not screen.registered:
+        reasons.append(REASON_NO_FACE)
+    if screen.comparability is not None and screen.comparability.level != COMPARABLE:
+        reasons.append(REASON_NOT_COMPARABLE)
+    if screen.overall_improvement >= policy.escalation_threshold:
+        reasons.append(REASON_LARGE_CHANGE)
+    if any(row["improvement_pct"] < NEGATIVE_CHANGE_PCT for row in screen.metrics):
+        reasons.append(REASON_NEGATIVE_CHANGE)
+    return reasons
+
+
+def local_context(screen: LocalScreen) -> Dict:
+    """发送给 Claude 的本地测量摘要（只保留各指标改善百分比）"""
+    context = {
+        "overall_improvement": screen.overall_improvement,
+        "metrics": {f"{row['category']}.{row['metric']}": row["improvement_pct"] for row in screen.metrics},
+    }
+    if screen.comparability is not None:
+        context["comparability_score"] = screen.comparability.score
+    regions = screen.improvements.get("skin_regions")
+    if regions:
+        # 原图分辨率的分区域纹理 / 毛孔变化（标准化图像看不到的细节）
+        context["skin_regions"] = {
+            name: {"texture": values["texture_improvement_pct"], "pores": values["pore_reduction_pct"]}
+            for name, values in regions.items()
+        }
+    return context
+
+
+def local_analysis_result(screen: LocalScreen) -> Dict:
+    """
+    不调用 Claude 时的分析结果
+
+    本地指标转换为 Claude 的输出格式，报告控制、模板和指标统计无需区分来源
+    """
+    result: Dict = {section: {} for section in LOCAL_SECTIONS.values()}
+    for row in screen.metrics:
+        section = LOCAL_SECTIONS.get(row["category"])
+        if section is not None:
+            result[section][row["metric"]] = {
+                "before_score": row["before_score"],
+                "after_score": row["after_score"],
+                "improvement_pct": row["improvement_pct"],
+                "description": "",
+            }
+
+    result["overall_assessment"] = {
+        "overall_improvement": screen.overall_improvement,
+        "summary": "",
+        "recommendations": [],
+    }
+    result["success"] = not screen.failed
+    result["_meta"] = {"model": LOCAL_MODEL_VERSION, "tokens_used": 0, "cost_usd": 0.0}
+    return result
+
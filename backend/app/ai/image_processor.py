@@ -10,6 +10,10 @@ import mediapipe as mp
 from typing import Tuple, List, Optional, Dict
 import logging
 
+from app.ai.comparability import pair_comparability
+from app.ai.face_geometry import canonical_transform, compose_affine, similarity_transform
+from app.ai.composite import render_side_by_side
+
 logger = logging.getLogger(__name__)
 
 
@@ -273,19 +277,26 @@ class ImageProcessor:
     def align_image_pair(
         self,
         before_image: np.ndarray,
-        after_image: np.ndarray
+        after_image: np.ndarray,
+        require_comparable: bool = False,
+        desired_size: Tuple[int, int] = (1000, 1000)
     ) -> Tuple[np.ndarray, np.ndarray]:
         """
         对齐一对术前术后图像
 
-        确保两张图像中的人脸完美对齐
+        术后图像用全部 468 个关键点的最小二乘相似变换配准到术前图像，
+        再与术前图像一起变换到标准人脸画面；两次变换复合后每张图只重采样一次，
+        逐像素比较的指标（皱纹边缘、毛孔数量等）对比的是同一块皮肤。
+        对齐前先检查两张照片的可比性（姿态、拍摄距离、光线差异过大时对齐和光照标准化无法弥补）
 
         Args:
             before_image: 术前图像
             after_image: 术后图像
+            require_comparable: 不可比较时抛出 ValueError（默认只记录警告）
+            desired_size: 输出尺寸
 
         Returns:
-            (对齐后的术前图像, 对齐后的术后图像)
+            (对齐后的术前图像, 配准到术前图像的术后图像)
         """
         try:
             # 检测两张图像的关键点
@@ -295,20 +306,82 @@ class ImageProcessor:
             if landmarks_before is None or landmarks_after is None:
                 raise ValueError("Failed to detect face in one or both images")
 
-            # 对齐两张图像
-            aligned_before = self.align_face(before_image, landmarks_before)
-            aligned_after = self.align_face(after_image, landmarks_after)
+            comparability = pair_comparability(before_image, landmarks_before, after_image, landmarks_after)
+            if not comparability.passed:
+                if require_comparable:
+                    raise ValueError(f"Images are not comparable (score {comparability.score})")
+                logger.warning(f"Image pair is not comparable: {comparability.issues}")
 
-            # 标准化光照
-            std_before = self.standardize_lighting(aligned_before)
-            std_after = self.standardize_lighting(aligned_after)
-
-            return std_before, std_after
+            return self.register_pair(
+                before_image, landmarks_before, after_image, landmarks_after, desired_size
+            )
 
         except Exception as e:
             logger.error(f"Image pair alignment failed: {str(e)}")
             raise
 
+    def register_to(
+        self,
+        image: np.ndarray,
+        landmarks: Dict,
+        reference_landmarks: Dict,
+        desired_size: Tuple[int, int] = (1000, 1000)
+    ) -> np.ndarray:
+        """
+        把图像配准到参考关键点的标准人脸画面并标准化光照（一次重采样）
+
+        关键点到参考关键点的最小二乘相似变换与参考图像的标准化变换复合后一次完成，
+        同一参考下配准的图像逐像素对应；image 就是参考图像时只做标准化变换
+
+        Args:
+            image: 输入图像
+            landmarks: 输入图像的关键点（原图坐标）
+            reference_landmarks: 参考图像（术前照片）的关键点
+            desired_size: 输出尺寸
+
+        Returns:
+            配准后的图像
+        """
+        canonical = canonical_transform(reference_landmarks, desired_size)
+        if landmarks is not reference_landmarks:
+            registration, residual = similarity_transform(
+                landmarks["all_landmarks"], reference_landmarks["all_landmarks"]
+            )
+            canonical = compose_affine(canonical, registration)
+            logger.debug(f"Registration residual: {residual:.2f}px")
+
+        # 边缘复制填充，避免黑边在两张图上产生不同的边缘
+        aligned = cv2.warpAffine(
+            image, canonical, desired_size, flags=cv2.INTER_CUBIC, borderMode=cv2.BORDER_REPLICATE
+        )
+        return self.standardize_lighting(aligned)
+
+    def register_pair(
+        self,
+        before_image: np.ndarray,
+        landmarks_before: Dict,
+        after_image: np.ndarray,
+        landmarks_after: Dict,
+        desired_size: Tuple[int, int] = (1000, 1000)
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        用已检测的关键点配准一对图像并标准化光照（不做人脸检测）
+
+        Args:
+            before_image: 术前图像
+            landmarks_before: 术前图像的关键点（原图坐标）
+            after_image: 术后图像
+            landmarks_after: 术后图像的关键点
+            desired_size: 输出尺寸
+
+        Returns:
+            (对齐后的术前图像, 配准到术前图像的术后图像)
+        """
+        return (
+            self.register_to(before_image, landmarks_before, landmarks_before, desired_size),
+            self.register_to(after_image, landmarks_after, landmarks_before, desired_size),
+        )
+
     def create_side_by_side(
         self,
         before_image: np.ndarray,
@@ -327,26 +400,8 @@ class ImageProcessor:
             并排对比图
         """
         try:
-            h, w = before_image.shape[:2]
-
-            # 创建画布
-            canvas = np.zeros((h, w * 2, 3), dtype=np.uint8)
-            canvas[:, :w] = before_image
-            canvas[:, w:] = after_image
-
-            if labels:
-                # 添加"Before"和"After"标签
-                font = cv2.FONT_HERSHEY_SIMPLEX
-                font_scale = 1.5
-                font_thickness = 3
-                font_color = (255, 255, 255)
-
-                cv2.putText(canvas, "Before", (50, 50), font, font_scale,
-                           font_color, font_thickness, cv2.LINE_AA)
-                cv2.putText(canvas, "After", (w + 50, 50), font, font_scale,
-                           font_color, font_thickness, cv2.LINE_AA)
-
-            return canvas
+            # 标签遮罩按尺寸缓存；需要多种尺寸时使用 CompositeService
+            return render_side_by_side(before_image, after_image, labels=labels)
 
         except Exception as e:
             logger.error(f"Side-by-side creation failed: {str(e)}")
@@ -0,0 +1,134 @@
+"""
+分析指标提取
+将 Claude / 本地分析器的 improvements 输出展开为统一的 (分类, 指标, 改善百分比) 行，
+用于写入 analysis_results 的类型化列和 analysis_metrics 表，统计查询不再解析 JSONB
+"""
+
+from typing import Dict, List, Optional
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+# 统一的分类名
+CATEGORIES = ["wrinkles", "skin_quality", "contour", "volume"]
+
+# Claude 输出的分类 -> 统一分类名
+CLAUDE_SECTIONS = {
+    "wrinkle_analysis": "wrinkles",
+    "skin_quality": "skin_quality",
+    "facial_contour": "contour",
+    "volume_fullness": "volume",
+}
+
+# 本地分析器的皱纹区域 -> Claude 指标名（保证同一指标可跨分析器统计）
+LOCAL_WRINKLE_REGIONS = {
+    "forehead": "forehead_lines",
+    "eyes": "crows_feet",
+    "mouth": "nasolabial_folds",
+}
+
+# 本地分析器的肤质结果 -> (Claude 指标名, 改善百分比字段)
+LOCAL_SKIN_METRICS = {
+    "skin_tone": ("tone_evenness", "improvement_pct"),
+    "texture": ("radiance", "improvement_pct"),
+    "pores": ("pore_size", "reduction_pct"),
+}
+
+
+def _number(value) -> Optional[float]:
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        return None
+    return float(value)
+
+
+def _row(category: str, metric: str, values: Dict, pct_key: str = "improvement_pct") -> Optional[Dict]:
+    improvement = _number(values.get(pct_key))
+    if improvement is None:
+        return None
+    return {
+        "category": category,
+        "metric": metric,
+        "before_score": _number(values.get("before_score")),
+        "after_score": _number(values.get("after_score")),
+        "improvement_pct": improvement,
+    }
+
+
+def extract_metrics(improvements: Optional[Dict]) -> List[Dict]:
+    """
+    展开分析结果中的各项指标
+
+    Args:
+        improvements: 分析器输出（Claude 或本地分析器格式）
+
+    Returns:
+        指标行列表，每行包含 category / metric / before_score / after_score / improvement_pct
+    """
+    if not isinstance(improvements, dict):
+        return []
+
+    rows = []
+
+    # Claude 格式：{section: {metric: {before_score, after_score, improvement_pct}}}
+    for section, category in CLAUDE_SECTIONS.items():
+        metrics = improvements.get(section)
+        if not isinstance(metrics, dict):
+            continue
+        for metric, values in metrics.items():
+            if isinstance(values, dict):
+                row = _row(category, metric, values)
+                if row is not None:
+                    rows.append(row)
+
+    # 本地分析器格式：wrinkles.regions / skin_tone / texture / pores
+    wrinkles = improvements.get("wrinkles")
+    if isinstance(wrinkles, dict) and isinstance(wrinkles.get("regions"), dict):
+        for region, metric in LOCAL_WRINKLE_REGIONS.items():
+            values = wrinkles["regions"].get(region)
+            if isinstance(values, dict):
+                row = _row("wrinkles", metric, values, "reduction_pct")
+                if row is not None:
+                    rows.append(row)
+
+    for key, (metric, pct_key) in LOCAL_SKIN_METRICS.items():
+        values = improvements.get(key)
+        if isinstance(values, dict):
+            row = _row("skin_quality", metric, values, pct_key)
+            if row is not None:
+                rows.append(row)
+
+    return rows
+
+
+def overall_score(improvements: Optional[Dict]) -> Optional[float]:
+    """
+    整体改善分数（0-100）
+
+    Claude 格式取 overall_assessment.overall_improvement，本地分析器的 overall_score（0-10）换算为百分制
+    """
+    if not isinstance(improvements, dict):
+        return None
+
+    assessment = improvements.get("overall_assessment")
+    if isinstance(assessment, dict):
+        score = _number(assessment.get("overall_improvement"))
+        if score is not None:
+            return score
+
+    score = _number(improvements.get("overall_score"))
+    if score is not None:
+        return score * 10
+    return None
+
+
+def category_improvements(metrics: List[Dict]) -> Dict[str, Optional[float]]:
+    """各分类的平均改善百分比（没有指标的分类为 None）"""
+    values: Dict[str, List[float]] = {category: [] for category in CATEGORIES}
+    for row in metrics:
+        values.setdefault(row["category"], []).append(row["improvement_pct"])
+
+    return {
+        category: round(sum(pcts) / len(pcts), 2) if pcts else None
+        for category, pcts in values.items()
+    }
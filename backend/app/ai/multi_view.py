@@ -0,0 +1,128 @@
+"""
+多角度对比
+一次 Claude 请求发送全部角度的术前术后照片（裁剪到人脸并缩小），按角度解析结果；
+某个角度 Claude 没有返回有效结果或不需要调用 Claude 时使用该角度的本地指标
+"""
+
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+import logging
+
+import cv2
+import numpy as np
+
+from app.ai.comparability import ComparabilityReport
+from app.ai.hybrid_analyzer import LocalScreen, local_analysis_result
+from app.ai.quality_gate import QualityReport
+
+logger = logging.getLogger(__name__)
+
+
+# 角度的排列顺序（第一个有结果的角度作为主结果，用于报告控制和统计）
+ANGLE_ORDER = ("front", "left45", "right45", "left90", "right90", "top", "bottom")
+
+# 发送给 Claude 的图像最长边（约 800 个图像 token，远小于原图缩放后的上限）
+VIEW_IMAGE_SIZE = 768
+
+# 人脸外接矩形四周保留的边距（相对于矩形边长），保留下颌线、太阳穴等轮廓
+FACE_CROP_MARGIN = 0.3
+
+SOURCE_CLAUDE = "claude"
+SOURCE_LOCAL = "local"
+
+
+@dataclass
+class ViewPair:
+    """一个角度的术前术后照片及本地检查结果"""
+    angle: str
+    before_quality: QualityReport
+    after_quality: QualityReport
+    comparability: Optional[ComparabilityReport]
+    screen: LocalScreen
+    before_view: np.ndarray   # 裁剪、缩小后发送给 Claude 的图像
+    after_view: np.ndarray
+
+    @property
+    def issues(self) -> Dict[str, List[Dict]]:
+        """拒绝级问题（质量检查未通过或照片不可比较）"""
+        issues = {
+            label: report.issues
+            for label, report in (("before", self.before_quality), ("after", self.after_quality))
+            if not report.passed
+        }
+        if self.comparability is not None and not self.comparability.passed:
+            issues["comparability"] = self.comparability.issues
+        return issues
+
+
+def sort_angles(angles) -> List[str]:
+    """按 ANGLE_ORDER 排序，未知角度排在最后"""
+    return sorted(angles, key=lambda a: (ANGLE_ORDER.index(a) if a in ANGLE_ORDER else len(ANGLE_ORDER), a))
+
+
+def crop_face(image: np.ndarray, landmarks: Optional[Dict], max_size: int = VIEW_IMAGE_SIZE) -> np.ndarray:
+    """
+    裁剪到人脸（含边距）并缩小到最长边 max_size
+
+    Args:
+        image: BGR 原图
+        landmarks: 原图坐标的关键点，None 时不裁剪
+        max_size: 最长边像素
+
+    Returns:
+        裁剪、缩小后的图像
+    """
+    if landmarks is not None:
+        points = np.array(landmarks["all_landmarks"], dtype=np.float64)
+        (x1, y1), (x2, y2) = points.min(axis=0), points.max(axis=0)
+        mx, my = (x2 - x1) * FACE_CROP_MARGIN, (y2 - y1) * FACE_CROP_MARGIN
+        h, w = image.shape[:2]
+        x1, y1 = max(int(x1 - mx), 0), max(int(y1 - my), 0)
+        x2, y2 = min(int(np.ceil(x2 + mx)), w), min(int(np.ceil(y2 + my)), h)
+        if x2 - x1 >= 16 and y2 - y1 >= 16:
+            image = image[y1:y2, x1:x2]
+
+    h, w = image.shape[:2]
+    scale = max_size / max(h, w)
+    if scale < 1:
+        image = cv2.resize(image, (round(w * scale), round(h * scale)), interpolation=cv2.INTER_AREA)
+    return image
+
+
+def merge_views(views: Dict[str, ViewPair], claude_result: Optional[Dict]) -> Dict:
+    """
+    合并 Claude 的多角度结果和各角度的本地结果
+
+    Args:
+        views: 角度 -> 照片对
+        claude_result: analyze_multi_view 的返回值（未调用 Claude 时为 None）
+
+    Returns:
+        主角度结果的字段位于顶层（报告控制、指标统计直接使用），
+        全部角度的结果在 views 中，每个角度带 source（claude / local）
+    """
+    claude_views = (claude_result or {}).get("views") or {}
+    merged: Dict[str, Dict] = {}
+    for angle in sort_angles(views):
+        view = views[angle]
+        result = claude_views.get(angle)
+        if isinstance(result, dict) and result.get("success"):
+            result = {**result, "source": SOURCE_CLAUDE}
+        else:
+            if claude_result is not None and angle in claude_result.get("requested_angles", ()):
+                logger.warning(f"No Claude result for angle {angle}, using local metrics")
+            result = {**local_analysis_result(view.screen), "source": SOURCE_LOCAL}
+
+        result["local_screen"] = view.screen.to_dict()
+        if view.comparability is not None:
+            result["comparability"] = view.comparability.to_dict()
+        merged[angle] = result
+
+    primary = next(iter(merged))
+    combined = {k: v for k, v in merged[primary].items() if k != "_meta"}
+    combined["primary_angle"] = primary
+    combined["views"] = merged
+    combined["_meta"] = (claude_result or {}).get("_meta") or merged[primary].get("_meta", {})
+    if claude_result is not None and claude_result.get("error"):
+        combined["claude_error"] = claude_result["error"]
+    return combined
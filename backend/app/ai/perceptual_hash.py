@@ -0,0 +1,66 @@
+"""
+感知哈希（pHash）
+对缩小后的灰度图做 DCT，取低频 8x8 系数与中位数比较得到 64 位指纹；
+重新压缩、缩放、轻微调色后汉明距离仍很小，用于发现重复上传的照片
+"""
+
+from typing import Optional
+import logging
+
+import cv2
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+# DCT 输入尺寸和保留的低频系数边长（8x8 = 64 位）
+DCT_SIZE = 32
+HASH_SIZE = 8
+
+HASH_BITS = HASH_SIZE * HASH_SIZE
+_SIGN_BIT = 1 << (HASH_BITS - 1)
+_MASK = (1 << HASH_BITS) - 1
+
+
+def phash(image: np.ndarray) -> Optional[int]:
+    """
+    计算感知哈希
+
+    先缩小到 32x32（INTER_AREA 等价于均值池化），因此原图和缩略图得到的哈希基本一致
+
+    Args:
+        image: BGR 或灰度图
+
+    Returns:
+        64 位无符号整数，空图返回 None
+    """
+    if image is None or image.size == 0:
+        return None
+
+    gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY) if image.ndim == 3 else image
+    small = cv2.resize(gray, (DCT_SIZE, DCT_SIZE), interpolation=cv2.INTER_AREA)
+    coefficients = cv2.dct(small.astype(np.float32))[:HASH_SIZE, :HASH_SIZE]
+
+    # 直流分量只反映整体亮度，不参与中位数
+    median = np.median(coefficients.flatten()[1:])
+    bits = (coefficients > median).flatten()
+
+    value = 0
+    for bit in bits:
+        value = (value << 1) | int(bit)
+    return value
+
+
+def hamming(a: int, b: int) -> int:
+    """两个哈希的汉明距离"""
+    return (a ^ b).bit_count()
+
+
+def to_signed(value: int) -> int:
+    """无符号哈希 -> BIGINT 可存储的有符号整数"""
+    return value - (1 << HASH_BITS) if value & _SIGN_BIT else value
+
+
+def to_unsigned(value: int) -> int:
+    """数据库中的有符号整数 -> 无符号哈希"""
+    return value & _MASK
@@ -8,6 +8,8 @@ from datetime import datetime, timedelta
 from enum import Enum
 import logging
 
+from app.ai.report_templates import ReportTemplateRenderer, extract_improvements
+
 logger = logging.getLogger(__name__)
 
 
@@ -32,8 +34,16 @@ class ReportVisibility(Enum):
 class ReportController:
     """报告控制器 - 智能管理报告可见性"""
 
-    def __init__(self):
-        """初始化控制器"""
+    def __init__(self, locale: Optional[str] = None):
+        """
+        初始化控制器
+
+        Args:
+            locale: 患者报告语言（如 "zh-CN", "en-US"），默认中文
+        """
+        # 患者报告模板（预编译 + 缓存）
+        self.renderer = ReportTemplateRenderer(locale)
+
         # 效果阈值配置
         self.thresholds = {
             "excellent": 50,   # 优秀效果
@@ -220,6 +230,17 @@ class ReportController:
                 "data": negative_items
             })
 
+        # 检查照片对可比性（姿态、距离、光线差异会使改善数值失真）
+        comparability = analysis_result.get('comparability')
+        if comparability and comparability.get('level') != 'comparable':
+            risks.append({
+                "type": "photos_not_comparable",
+                "severity": "high" if comparability['level'] == 'not_comparable' else "medium",
+                "message": f"术前术后照片可比性较低 ({comparability['score']})",
+                "action": "doctor_review",
+                "data": comparability.get('issues', [])
+            })
+
         return risks
 
     def _find_negative_improvements(self, analysis_result: Dict) -> List[Dict]:
@@ -302,7 +323,7 @@ class ReportController:
         if visibility == ReportVisibility.DOCTOR_REVIEW:
             return {
                 "status": "pending_review",
-                "message": "您的复查照片已收到，医生将很快为您进行专业评估",
+                "message": self.renderer.pending_review_message(),
                 "can_view": False
             }
 
@@ -312,58 +333,28 @@ class ReportController:
         # 找出改善最明显的项目
         best_improvements = self._find_best_improvements(analysis_result)
 
-        # 根据效果等级定制标题和消息
-        if effect_level == EffectLevel.EXCELLENT:
-            headline = f"🎉 太棒了！您的治疗效果非常显著"
-            badge = "⭐ 优秀效果"
-            encouragement = "您的改善效果超过了大多数患者，非常值得分享！"
-
-        elif effect_level == EffectLevel.GOOD:
-            headline = f"✨ 很好！您的治疗效果明显"
-            badge = "✓ 良好效果"
-            encouragement = "持续保持良好的护理习惯，效果会更好！"
-
-        else:  # FAIR
-            headline = f"💪 您的治疗正在持续改善中"
-            badge = "⏳ 持续改善"
-            encouragement = "效果仍在显现，建议 2 周后再次拍照观察"
+        # 根据效果等级渲染标题、徽章、亮点和下一步建议（命中缓存时无需重新生成）
+        texts = self.renderer.render_patient_texts(effect_level.value, best_improvements)
 
         return {
             "status": "available",
             "can_view": True,
             "can_share": visibility == ReportVisibility.PUBLIC_SHAREABLE,
-            "headline": headline,
-            "badge": badge,
-            "encouragement": encouragement,
+            "headline": texts["headline"],
+            "badge": texts["badge"],
+            "encouragement": texts["encouragement"],
             "overall_improvement": overall.get('overall_improvement', 0),
-            "highlights": [item['description'] for item in best_improvements[:3]],
+            "highlights": texts["highlights"],
             "best_improvements": best_improvements,
             "summary": overall.get('summary', ''),
-            "next_steps": self._generate_next_steps(effect_level)
+            "next_steps": texts["next_steps"]
         }
 
     def _find_best_improvements(self, analysis_result: Dict) -> List[Dict]:
         """找出改善最明显的项目"""
 
-        improvements = []
-
-        # 遍历所有分析维度
-        for category in ['wrinkle_analysis', 'skin_quality', 'facial_contour', 'volume_fullness']:
-            category_data = analysis_result.get(category, {})
-
-            for metric_name, metric_data in category_data.items():
-                if isinstance(metric_data, dict) and 'improvement_pct' in metric_data:
-                    improvements.append({
-                        "category": category,
-                        "metric": metric_name,
-                        "improvement": metric_data.get('improvement_pct', 0),
-                        "description": metric_data.get('description', ''),
-                        "before_score": metric_data.get('before_score', 0),
-                        "after_score": metric_data.get('after_score', 0)
-                    })
-
         # 按改善程度排序（只保留正面改善）
-        improvements = [i for i in improvements if i['improvement'] > 0]
+        improvements = [i for i in extract_improvements(analysis_result) if i['improvement'] > 0]
         improvements.sort(key=lambda x: x['improvement'], reverse=True)
 
         return improvements
@@ -371,26 +362,7 @@ class ReportController:
     def _generate_next_steps(self, effect_level: EffectLevel) -> List[str]:
         """生成下一步建议"""
 
-        if effect_level == EffectLevel.EXCELLENT:
-            return [
-                "继续保持良好的护理习惯",
-                "6-8 个月后可考虑维持性治疗",
-                "欢迎分享您的美丽蜕变"
-            ]
-
-        elif effect_level == EffectLevel.GOOD:
-            return [
-                "效果良好，继续保持",
-                "注意防晒以维持效果",
-                "4-6 个月后复查"
-            ]
-
-        else:  # FAIR
-            return [
-                "效果仍在持续显现中",
-                "建议 2-3 周后再次拍照",
-                "如有疑问请咨询您的医生"
-            ]
+        return self.renderer.render_next_steps(effect_level.value)
 
     def _generate_doctor_alerts(
         self,
@@ -0,0 +1,282 @@
+"""
+患者报告模板渲染
+预编译多语言模板，并按（语言, 效果等级, 改善亮点）缓存渲染结果
+"""
+
+from string import Template
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+DEFAULT_LOCALE = "zh-CN"
+
+# 渲染缓存上限（语言 × 效果等级 × 亮点组合）
+RENDER_CACHE_SIZE = 512
+
+# 参与排序的分析维度
+IMPROVEMENT_CATEGORIES = ('wrinkle_analysis', 'skin_quality', 'facial_contour', 'volume_fullness')
+
+# 改善亮点的键：(category, metric, improvement, description)
+HighlightKey = Tuple[Tuple[str, str, float, str], ...]
+
+
+# 各语言的报告文案
+# highlight: 单条亮点的模板，可用变量 $metric_label / $improvement / $description
+REPORT_TEMPLATES: Dict[str, Dict] = {
+    "zh-CN": {
+        "pending_review": "您的复查照片已收到，医生将很快为您进行专业评估",
+        "highlight": "$description",
+        "levels": {
+            "excellent": {
+                "headline": "🎉 太棒了！您的治疗效果非常显著",
+                "badge": "⭐ 优秀效果",
+                "encouragement": "您的改善效果超过了大多数患者，非常值得分享！",
+                "next_steps": (
+                    "继续保持良好的护理习惯",
+                    "6-8 个月后可考虑维持性治疗",
+                    "欢迎分享您的美丽蜕变",
+                ),
+            },
+            "good": {
+                "headline": "✨ 很好！您的治疗效果明显",
+                "badge": "✓ 良好效果",
+                "encouragement": "持续保持良好的护理习惯，效果会更好！",
+                "next_steps": (
+                    "效果良好，继续保持",
+                    "注意防晒以维持效果",
+                    "4-6 个月后复查",
+                ),
+            },
+            "fair": {
+                "headline": "💪 您的治疗正在持续改善中",
+                "badge": "⏳ 持续改善",
+                "encouragement": "效果仍在显现，建议 2 周后再次拍照观察",
+                "next_steps": (
+                    "效果仍在持续显现中",
+                    "建议 2-3 周后再次拍照",
+                    "如有疑问请咨询您的医生",
+                ),
+            },
+        },
+        "metric_labels": {},
+    },
+    "en-US": {
+        "pending_review": "We've received your follow-up photos. Your provider will review them shortly.",
+        "highlight": "$metric_label improved by $improvement%",
+        "levels": {
+            "excellent": {
+                "headline": "🎉 Amazing! Your results are outstanding",
+                "badge": "⭐ Excellent Result",
+                "encouragement": "Your improvement is ahead of most patients - well worth sharing!",
+                "next_steps": (
+                    "Keep up your skincare routine",
+                    "Consider a maintenance treatment in 6-8 months",
+                    "Feel free to share your transformation",
+                ),
+            },
+            "good": {
+                "headline": "✨ Great! Your results are clearly visible",
+                "badge": "✓ Good Result",
+                "encouragement": "Keep up your aftercare routine for even better results!",
+                "next_steps": (
+                    "Good results - keep it up",
+                    "Use sun protection to maintain your results",
+                    "Schedule a check-up in 4-6 months",
+                ),
+            },
+            "fair": {
+                "headline": "💪 Your results are still developing",
+                "badge": "⏳ Improving",
+                "encouragement": "Results are still emerging - take new photos in 2 weeks",
+                "next_steps": (
+                    "Your results are still developing",
+                    "Take new photos in 2-3 weeks",
+                    "Contact your provider with any questions",
+                ),
+            },
+        },
+        "metric_labels": {
+            "forehead_lines": "Forehead lines",
+            "glabellar_lines": "Frown lines",
+            "crows_feet": "Crow's feet",
+            "nasolabial_folds": "Nasolabial folds",
+            "tone_evenness": "Skin tone evenness",
+            "pore_size": "Pore size",
+            "radiance": "Skin radiance",
+            "pigmentation": "Pigmentation",
+            "apple_muscle_fullness": "Cheek fullness",
+            "jawline_definition": "Jawline definition",
+            "facial_symmetry": "Facial symmetry",
+            "facial_firmness": "Facial firmness",
+            "temple_fullness": "Temple fullness",
+            "lip_fullness": "Lip fullness",
+            "tear_trough": "Tear troughs",
+        },
+    },
+}
+
+
+# 预编译亮点模板（模块加载时编译一次）
+_HIGHLIGHT_TEMPLATES: Dict[str, Template] = {
+    locale: Template(templates["highlight"])
+    for locale, templates in REPORT_TEMPLATES.items()
+}
+
+
+def resolve_locale(locale: Optional[str]) -> str:
+    """
+    解析语言代码，未知语言回退到默认语言
+
+    支持 "en"、"en_US"、"EN-us" 等写法
+    """
+    if not locale:
+        return DEFAULT_LOCALE
+
+    normalized = locale.replace("_", "-")
+    for candidate in REPORT_TEMPLATES:
+        if candidate.lower() == normalized.lower():
+            return candidate
+
+    language = normalized.split("-")[0].lower()
+    for candidate in REPORT_TEMPLATES:
+        if candidate.split("-")[0].lower() == language:
+            return candidate
+
+    logger.warning(f"Unsupported report locale: {locale}, falling back to {DEFAULT_LOCALE}")
+    return DEFAULT_LOCALE
+
+
+def extract_improvements(analysis_result: Dict) -> List[Dict]:
+    """
+    提取所有带 improvement_pct 的指标
+
+    Args:
+        analysis_result: Claude AI 分析结果
+
+    Returns:
+        指标列表（未排序）
+    """
+    improvements = []
+
+    for category in IMPROVEMENT_CATEGORIES:
+        category_data = analysis_result.get(category, {})
+
+        for metric_name, metric_data in category_data.items():
+            if isinstance(metric_data, dict) and 'improvement_pct' in metric_data:
+                improvements.append({
+                    "category": category,
+                    "metric": metric_name,
+                    "improvement": metric_data.get('improvement_pct', 0),
+                    "description": metric_data.get('description', ''),
+                    "before_score": metric_data.get('before_score', 0),
+                    "after_score": metric_data.get('after_score', 0)
+                })
+
+    return improvements
+
+
+def highlight_key(best_improvements: List[Dict], limit: int = 3) -> HighlightKey:
+    """将前 N 项改善转换为可哈希的缓存键"""
+    return tuple(
+        (item['category'], item['metric'], item['improvement'], item['description'])
+        for item in best_improvements[:limit]
+    )
+
+
+@lru_cache(maxsize=RENDER_CACHE_SIZE)
+def _render_cached(
+    locale: str,
+    effect_level: str,
+    highlights: HighlightKey
+) -> Tuple[Tuple[Tuple[str, str], ...], Tuple[str, ...], Tuple[str, ...]]:
+    """
+    渲染患者报告文案（结果不可变，可安全缓存）
+
+    Returns:
+        (文案字段, 亮点列表, 下一步建议)
+    """
+    templates = REPORT_TEMPLATES[locale]
+    level = templates["levels"][effect_level]
+    labels = templates["metric_labels"]
+    highlight_template = _HIGHLIGHT_TEMPLATES[locale]
+
+    rendered_highlights = tuple(
+        highlight_template.safe_substitute(
+            metric_label=labels.get(metric, metric.replace("_", " ").capitalize()),
+            improvement=f"{improvement:g}" if isinstance(improvement, (int, float)) else improvement,
+            description=description
+        )
+        for _, metric, improvement, description in highlights
+    )
+
+    fields = (
+        ("headline", level["headline"]),
+        ("badge", level["badge"]),
+        ("encouragement", level["encouragement"]),
+    )
+
+    return fields, rendered_highlights, level["next_steps"]
+
+
+class ReportTemplateRenderer:
+    """患者报告模板渲染器"""
+
+    def __init__(self, locale: Optional[str] = None):
+        """
+        初始化渲染器
+
+        Args:
+            locale: 报告语言（如 "zh-CN", "en-US"），默认中文
+        """
+        self.locale = resolve_locale(locale)
+
+    def pending_review_message(self) -> str:
+        """待医生审核提示"""
+        return REPORT_TEMPLATES[self.locale]["pending_review"]
+
+    def render_patient_texts(
+        self,
+        effect_level: str,
+        best_improvements: List[Dict]
+    ) -> Dict:
+        """
+        渲染患者报告中的文案部分
+
+        文案只取决于效果等级和前三项改善，相同输入直接命中缓存
+        （可见性由 ReportController 决定是否生成患者报告，不影响文案）
+
+        Args:
+            effect_level: 效果等级（excellent / good / fair）
+            best_improvements: 已排序的改善项目
+
+        Returns:
+            headline / badge / encouragement / highlights / next_steps
+        """
+        # POOR / NEGATIVE 不会生成患者可见报告，兜底使用 FAIR 文案
+        if effect_level not in REPORT_TEMPLATES[self.locale]["levels"]:
+            effect_level = "fair"
+
+        fields, highlights, next_steps = _render_cached(
+            self.locale,
+            effect_level,
+            highlight_key(best_improvements)
+        )
+
+        # 返回新的列表，避免调用方修改缓存内容
+        rendered = dict(fields)
+        rendered["highlights"] = list(highlights)
+        rendered["next_steps"] = list(next_steps)
+        return rendered
+
+    def render_next_steps(self, effect_level: str) -> List[str]:
+        """渲染下一步建议"""
+        levels = REPORT_TEMPLATES[self.locale]["levels"]
+        return list(levels.get(effect_level, levels["fair"])["next_steps"])
+
+
+def render_cache_info():
+    """渲染缓存命中统计（用于诊断）"""
+    return _render_cached.cache_info()
@@ -0,0 +1,189 @@
+"""
+高分辨率皮肤区域分析
+标准化图像（1000x1000）会丢失毛孔和细纹理，这里只在关键点围出的皮肤区域（额头、两颊、下巴）上
+按原图分辨率计算纹理、毛孔和肤色统计量。区域按固定大小分块处理，每块只裁剪、缩放自己的源区域，
+内存占用与原图大小无关；各块的累加量（像素数、和、平方和）在区域内相加得到区域统计
+"""
+
+import math
+from concurrent.futures import Executor
+from typing import Dict, List, Optional, Sequence, Tuple
+import logging
+
+import cv2
+import numpy as np
+
+from app.ai.face_geometry import eye_distance
+
+logger = logging.getLogger(__name__)
+
+
+# Face Mesh 关键点围成的皮肤区域（近似轮廓，避开眉毛、眼睛、鼻孔和嘴唇）
+SKIN_REGIONS = {
+    "forehead": (103, 67, 109, 10, 338, 297, 332, 334, 296, 336, 9, 107, 66, 105),
+    "left_cheek": (116, 117, 118, 119, 100, 142, 203, 206, 216, 192, 213, 147, 123),
+    "right_cheek": (345, 346, 347, 348, 329, 371, 423, 426, 436, 416, 433, 376, 352),
+    "chin": (32, 208, 199, 428, 262, 369, 400, 377, 152, 148, 176, 140),
+}
+
+# 工作分辨率：外眼角距离超过该值时缩小到该值（不同拍摄距离的照片在相近的像素/毫米下比较），
+# 否则使用原图分辨率
+REGION_EYE_DISTANCE = 800.0
+
+# 分块大小（工作分辨率像素）和四周多取的像素（3x3 算子需要 1 像素邻域）
+TILE_SIZE = 512
+TILE_HALO = 2
+
+# 毛孔：黑帽响应阈值（与 analyze_pores 相同）
+PORE_THRESHOLD = 10
+
+# 每块的累加量：像素数、Laplacian 和 / 平方和、毛孔像素数、L 和 / 平方和、a 和
+_N, _LAP, _LAP_SQ, _PORES, _L, _L_SQ, _A = range(7)
+_STATS = 7
+
+# 区域像素少于该值时不输出统计（关键点异常或区域被裁掉）
+MIN_REGION_PIXELS = 1000
+
+
+def _tile_stats(image: np.ndarray, mask: np.ndarray, tile: Tuple[int, int, int, int], scale: float) -> np.ndarray:
+    """
+    计算一个分块的累加量
+
+    Args:
+        image: BGR 原图
+        mask: 分块内的区域掩码（高, 宽）
+        tile: (x, y, 宽, 高)，工作分辨率坐标
+        scale: 工作分辨率 / 原图分辨率
+
+    Returns:
+        长度 _STATS 的累加量
+    """
+    stats = np.zeros(_STATS, dtype=np.float64)
+    n = cv2.countNonZero(mask)
+    if n == 0:
+        return stats
+
+    # 源区域四周多取 TILE_HALO 个工作分辨率像素作为算子邻域
+    x, y, w, h = tile
+    src_h, src_w = image.shape[:2]
+    sx0 = max(int(math.floor((x - TILE_HALO) / scale)), 0)
+    sy0 = max(int(math.floor((y - TILE_HALO) / scale)), 0)
+    sx1 = min(int(math.ceil((x + w + TILE_HALO) / scale)), src_w)
+    sy1 = min(int(math.ceil((y + h + TILE_HALO) / scale)), src_h)
+
+    crop = image[sy0:sy1, sx0:sx1]
+    if scale < 1:
+        size = (max(round((sx1 - sx0) * scale), 1), max(round((sy1 - sy0) * scale), 1))
+        crop = cv2.resize(crop, size, interpolation=cv2.INTER_AREA)
+
+    # 分块在裁剪区域中的位置（缩放取整可能差 1 像素，掩码同步裁剪）
+    ix0, iy0 = x - round(sx0 * scale), y - round(sy0 * scale)
+    ch, cw = crop.shape[:2]
+    if iy0 + h > ch or ix0 + w > cw:
+        mask = np.ascontiguousarray(mask[:max(ch - iy0, 0), :max(cw - ix0, 0)])
+        h, w = mask.shape
+        n = cv2.countNonZero(mask)
+        if n == 0:
+            return stats
+
+    # 全部使用带掩码的 OpenCV 统计（释放 GIL，分块可在线程间并行）
+    gray = cv2.cvtColor(crop, cv2.COLOR_BGR2GRAY)
+    laplacian = cv2.Laplacian(gray, cv2.CV_64F)[iy0:iy0 + h, ix0:ix0 + w]
+    kernel = cv2.getStructuringElement(cv2.MORPH_ELLIPSE, (3, 3))
+    blackhat = cv2.morphologyEx(gray, cv2.MORPH_BLACKHAT, kernel)[iy0:iy0 + h, ix0:ix0 + w]
+    _, pores = cv2.threshold(blackhat, PORE_THRESHOLD, 1, cv2.THRESH_BINARY)
+    lab = cv2.cvtColor(crop[iy0:iy0 + h, ix0:ix0 + w], cv2.COLOR_BGR2LAB)
+
+    lap_mean, lap_std = cv2.meanStdDev(laplacian, mask=mask)
+    lab_mean, lab_std = cv2.meanStdDev(lab, mask=mask)
+    stats[_N] = n
+    stats[_LAP] = n * lap_mean[0, 0]
+    stats[_LAP_SQ] = n * (lap_std[0, 0] ** 2 + lap_mean[0, 0] ** 2)
+    stats[_PORES] = cv2.countNonZero(cv2.bitwise_and(pores, mask))
+    stats[_L] = n * lab_mean[0, 0]
+    stats[_L_SQ] = n * (lab_std[0, 0] ** 2 + lab_mean[0, 0] ** 2)
+    stats[_A] = n * lab_mean[1, 0]
+    return stats
+
+
+def _region_mask(polygon: np.ndarray, width: float, height: float) -> Tuple[np.ndarray, int, int]:
+    """
+    区域外接矩形（裁剪到图像内）大小的掩码
+
+    Returns:
+        (掩码, 外接矩形左上角 x, y)
+    """
+    x0, y0 = np.clip(np.floor(polygon.min(axis=0)), 0, [width, height]).astype(int)
+    x1, y1 = np.clip(np.round(polygon.max(axis=0)) + 1, 0, [width, height]).astype(int)
+    mask = np.zeros((max(y1 - y0, 0), max(x1 - x0, 0)), dtype=np.uint8)
+    cv2.fillPoly(mask, [np.round(polygon).astype(np.int32) - np.array([x0, y0], dtype=np.int32)], 1)
+    return mask, int(x0), int(y0)
+
+
+def _summarize(stats: np.ndarray, scale: float) -> Optional[Dict]:
+    n = stats[_N]
+    if n < MIN_REGION_PIXELS:
+        return None
+    laplacian_mean = stats[_LAP] / n
+    l_mean = stats[_L] / n
+    return {
+        "pixels": int(n),
+        "scale": round(scale, 3),
+        "laplacian_var": float(max(stats[_LAP_SQ] / n - laplacian_mean ** 2, 0.0)),
+        "pore_density": float(stats[_PORES] / n),
+        "l_mean": float(l_mean),
+        "l_std": float(math.sqrt(max(stats[_L_SQ] / n - l_mean ** 2, 0.0))),
+        "a_mean": float(stats[_A] / n),
+    }
+
+
+def region_features(
+    image: np.ndarray,
+    landmarks: Dict,
+    executor: Optional[Executor] = None,
+    regions: Sequence[str] = tuple(SKIN_REGIONS)
+) -> Dict[str, Dict]:
+    """
+    各皮肤区域的高分辨率统计量
+
+    Args:
+        image: BGR 原图
+        landmarks: 原图坐标的关键点
+        executor: 分块并行使用的线程池（None 时顺序处理）；不能是调用方所在的线程池
+        regions: 需要的区域
+
+    Returns:
+        区域 -> {pixels, scale, laplacian_var, pore_density, l_mean, l_std, a_mean}，
+        像素不足的区域不在结果中
+    """
+    points = np.asarray(landmarks["all_landmarks"], dtype=np.float64)
+    scale = min(1.0, REGION_EYE_DISTANCE / max(eye_distance(landmarks), 1e-6))
+    h, w = image.shape[:2]
+
+    # 掩码只覆盖区域外接矩形（每像素 1 字节），图像数据在各分块内按需裁剪、缩放
+    jobs = []
+    for name in regions:
+        mask, x0, y0 = _region_mask(points[list(SKIN_REGIONS[name])] * scale, w * scale, h * scale)
+        mh, mw = mask.shape
+        for ty in range(0, mh, TILE_SIZE):
+            for tx in range(0, mw, TILE_SIZE):
+                tile_mask = mask[ty:ty + TILE_SIZE, tx:tx + TILE_SIZE]
+                tile = (x0 + tx, y0 + ty, tile_mask.shape[1], tile_mask.shape[0])
+                jobs.append((name, tile_mask, tile))
+
+    if executor is None:
+        results = [_tile_stats(image, tile_mask, tile, scale) for _, tile_mask, tile in jobs]
+    else:
+        futures = [executor.submit(_tile_stats, image, tile_mask, tile, scale) for _, tile_mask, tile in jobs]
+        results = [future.result() for future in futures]
+
+    totals = {name: np.zeros(_STATS, dtype=np.float64) for name in regions}
+    for (name, _, _), stats in zip(jobs, results):
+        totals[name] += stats
+
+    features = {}
+    for name, stats in totals.items():
+        summary = _summarize(stats, scale)
+        if summary is not None:
+            features[name] = summary
+    return features
@@ -0,0 +1,146 @@
+"""
+治疗效果时间曲线
+用随访照片的整体改善拟合效果随时间的变化，估计峰值时间和消退速度
+
+模型 y = A·t·exp(-t/τ)：效果先上升、在第 τ 天达到峰值 A·τ/e、之后指数消退（肉毒素、玻尿酸等）。
+取对数后 ln(y/t) = ln A - t/τ 为线性关系，加权最小二乘一次求解；
+数据不支持先升后降（τ 无效或有效点不足）时退回线性趋势
+"""
+
+import math
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Sequence
+import logging
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+MODEL_RISE_FADE = "rise_fade"
+MODEL_LINEAR = "linear"
+
+BUILDING = "building"   # 尚未到达峰值
+PEAK = "peak"           # 处于峰值附近
+FADING = "fading"       # 已过峰值、效果消退
+STABLE = "stable"
+
+# 最近随访距峰值超过该比例时判断为上升期 / 消退期
+PEAK_WINDOW = 0.15
+
+# 线性趋势每 30 天变化不超过该值（百分点）视为稳定
+STABLE_SLOPE_30D = 2.0
+
+# 曲线采样点数（前端绘图）
+CURVE_POINTS = 24
+
+
+@dataclass
+class TrajectoryFit:
+    """时间曲线拟合结果"""
+    model: str
+    status: str
+    peak_day: Optional[float] = None
+    peak_improvement: Optional[float] = None
+    change_per_30_days: Optional[float] = None  # 最近随访时的变化速度（负数为消退）
+    r_squared: Optional[float] = None
+    curve: List[List[float]] = field(default_factory=list)  # [[天数, 拟合值], ...]
+
+    def to_dict(self) -> Dict:
+        return {
+            "model": self.model,
+            "status": self.status,
+            "peak_day": self.peak_day,
+            "peak_improvement": self.peak_improvement,
+            "change_per_30_days": self.change_per_30_days,
+            "r_squared": self.r_squared,
+            "curve": self.curve,
+        }
+
+
+def _r_squared(values: np.ndarray, fitted: np.ndarray) -> Optional[float]:
+    total = float(((values - values.mean()) ** 2).sum())
+    if total == 0:
+        return None
+    return round(1.0 - float(((values - fitted) ** 2).sum()) / total, 3)
+
+
+def _rise_fade(days: np.ndarray, values: np.ndarray) -> Optional[TrajectoryFit]:
+    """拟合 y = A·t·exp(-t/τ)，需要至少 2 个不同天数的正值点且 τ > 0"""
+    mask = (days > 0) & (values > 0)
+    if np.unique(days[mask]).size < 2:
+        return None
+
+    t, y = days[mask], values[mask]
+    # 对数变换会放大小值的误差，按 y 加权
+    weights = y
+    design = np.stack([np.ones_like(t), -t], axis=1) * weights[:, None]
+    (log_a, rate), *_ = np.linalg.lstsq(design, np.log(y / t) * weights, rcond=None)
+    if rate <= 0:
+        return None
+
+    tau = 1.0 / float(rate)
+    amplitude = math.exp(float(log_a))
+
+    def model(x):
+        return amplitude * x * np.exp(-x / tau)
+
+    last = float(days.max())
+    # 导数 A·exp(-t/τ)·(1 - t/τ)
+    slope = amplitude * math.exp(-last / tau) * (1 - last / tau)
+    if last < tau * (1 - PEAK_WINDOW):
+        status = BUILDING
+    elif last > tau * (1 + PEAK_WINDOW):
+        status = FADING
+    else:
+        status = PEAK
+
+    end = max(last, tau) * 1.5
+    samples = np.linspace(0, end, CURVE_POINTS)
+    return TrajectoryFit(
+        model=MODEL_RISE_FADE,
+        status=status,
+        peak_day=round(tau, 1),
+        peak_improvement=round(amplitude * tau / math.e, 2),
+        change_per_30_days=round(slope * 30, 2),
+        r_squared=_r_squared(values, model(days)),
+        curve=[[round(float(x), 1), round(float(v), 2)] for x, v in zip(samples, model(samples))],
+    )
+
+
+def _linear(days: np.ndarray, values: np.ndarray) -> TrajectoryFit:
+    slope, intercept = np.polyfit(days, values, 1)
+    change = float(slope) * 30
+    if change > STABLE_SLOPE_30D:
+        status = BUILDING
+    elif change < -STABLE_SLOPE_30D:
+        status = FADING
+    else:
+        status = STABLE
+
+    samples = np.linspace(float(days.min()), float(days.max()), CURVE_POINTS)
+    return TrajectoryFit(
+        model=MODEL_LINEAR,
+        status=status,
+        change_per_30_days=round(change, 2),
+        r_squared=_r_squared(values, slope * days + intercept),
+        curve=[[round(float(x), 1), round(float(slope * x + intercept), 2)] for x in samples],
+    )
+
+
+def fit_trajectory(days: Sequence[float], values: Sequence[float]) -> Optional[TrajectoryFit]:
+    """
+    拟合效果时间曲线
+
+    Args:
+        days: 各随访距治疗的天数
+        values: 对应的整体改善（0-100）
+
+    Returns:
+        拟合结果，不同天数少于 2 个时返回 None
+    """
+    days_array = np.asarray(days, dtype=np.float64)
+    values_array = np.asarray(values, dtype=np.float64)
+    if np.unique(days_array).size < 2:
+        return None
+    return _rise_fade(days_array, values_array) or _linear(days_array, values_array)
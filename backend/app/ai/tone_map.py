@@ -0,0 +1,204 @@
+"""
+肤色分布（积分图）
+对 LAB 三个通道各做一次积分图（和、平方和），之后任意矩形的均值和标准差都是 O(1)：
+整图、各面部区域和网格单元共用同一次遍历，得到分区域的肤色均匀度和泛红程度以及热力图数据。
+区域和网格定义在标准人脸画面（canonical_transform：两眼连线水平、眼距为宽度的 35%、
+两眼中点位于水平中央距顶部 40% 处）的相对坐标上，不同照片的同一单元对应同一面部位置
+"""
+
+from typing import Dict, Optional, Tuple
+import logging
+
+import cv2
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+# 标准人脸画面中的面部区域 (x0, y0, x1, y1)，相对于画面宽高
+TONE_REGIONS = {
+    "forehead": (0.32, 0.20, 0.68, 0.32),
+    "left_cheek": (0.22, 0.47, 0.40, 0.66),
+    "right_cheek": (0.60, 0.47, 0.78, 0.66),
+    "nose": (0.45, 0.44, 0.55, 0.62),
+    "chin": (0.41, 0.84, 0.59, 0.94),
+}
+
+# 热力图覆盖的面部范围和网格大小
+FACE_BOX = (0.18, 0.16, 0.82, 0.96)
+GRID_SHAPE = (8, 8)
+
+# a 通道的中性值（大于该值偏红）
+NEUTRAL_A = 128.0
+
+
+class ToneIntegral:
+    """LAB 积分图（和、平方和），矩形统计 O(1)"""
+
+    def __init__(self, image: np.ndarray):
+        """
+        Args:
+            image: BGR 图像
+        """
+        self.lab = cv2.cvtColor(image, cv2.COLOR_BGR2LAB)
+        self.height, self.width = self.lab.shape[:2]
+        self.sums, self.squares = cv2.integral2(self.lab, sdepth=cv2.CV_64F, sqdepth=cv2.CV_64F)
+
+    def _pixels(self, box: Tuple[float, float, float, float]) -> Tuple[int, int, int, int]:
+        """相对坐标 -> 像素坐标（裁剪到图像内）"""
+        x0, y0, x1, y1 = box
+        return (
+            int(np.clip(round(x0 * self.width), 0, self.width)),
+            int(np.clip(round(y0 * self.height), 0, self.height)),
+            int(np.clip(round(x1 * self.width), 0, self.width)),
+            int(np.clip(round(y1 * self.height), 0, self.height)),
+        )
+
+    def _block(self, table: np.ndarray, ys: np.ndarray, xs: np.ndarray) -> np.ndarray:
+        """网格各单元的和：(len(ys)-1, len(xs)-1, 3)"""
+        return (
+            table[np.ix_(ys[1:], xs[1:])] - table[np.ix_(ys[:-1], xs[1:])]
+            - table[np.ix_(ys[1:], xs[:-1])] + table[np.ix_(ys[:-1], xs[:-1])]
+        )
+
+    def grid_stats(
+        self,
+        box: Tuple[float, float, float, float] = (0.0, 0.0, 1.0, 1.0),
+        shape: Tuple[int, int] = (1, 1)
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        把 box 划分为 shape 个单元，计算每个单元各通道的均值和标准差
+
+        Args:
+            box: 相对坐标 (x0, y0, x1, y1)
+            shape: (行数, 列数)
+
+        Returns:
+            (像素数 (行, 列), 均值 (行, 列, 3), 标准差 (行, 列, 3))，空单元的均值和标准差为 NaN
+        """
+        x0, y0, x1, y1 = self._pixels(box)
+        rows, cols = shape
+        ys = np.linspace(y0, y1, rows + 1).round().astype(int)
+        xs = np.linspace(x0, x1, cols + 1).round().astype(int)
+
+        counts = np.outer(np.diff(ys), np.diff(xs)).astype(np.float64)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            mean = self._block(self.sums, ys, xs) / counts[..., None]
+            variance = self._block(self.squares, ys, xs) / counts[..., None] - mean ** 2
+        return counts, mean, np.sqrt(np.clip(variance, 0.0, None))
+
+    def stats(self, box: Tuple[float, float, float, float] = (0.0, 0.0, 1.0, 1.0)) -> Optional[Dict]:
+        """
+        矩形内的 LAB 统计
+
+        Returns:
+            {pixels, l_mean, l_std, a_mean}，矩形为空时返回 None
+        """
+        counts, mean, std = self.grid_stats(box)
+        if counts[0, 0] == 0:
+            return None
+        return {
+            "pixels": int(counts[0, 0]),
+            "l_mean": float(mean[0, 0, 0]),
+            "l_std": float(std[0, 0, 0]),
+            "a_mean": float(mean[0, 0, 1]),
+        }
+
+
+def _rounded(values: np.ndarray, digits: int):
+    return [[None if np.isnan(v) else round(float(v), digits) for v in row] for row in values]
+
+
+def tone_features(image: np.ndarray, buffers: Optional[Dict] = None) -> Dict:
+    """
+    整图、各面部区域和热力图网格的肤色统计（一次积分图）
+
+    Args:
+        image: 对齐到标准人脸画面的 BGR 图像
+        buffers: 传入 dict 时保留 LAB 图像（"lab"）
+
+    Returns:
+        {l_std, l_mean, a_mean（整图）, regions: 区域 -> 统计, grid: {box, l_std, a_mean}}
+    """
+    integral = ToneIntegral(image)
+    if buffers is not None:
+        buffers["lab"] = integral.lab
+    overall = integral.stats()
+    _, mean, std = integral.grid_stats(FACE_BOX, GRID_SHAPE)
+    return {
+        "l_std": overall["l_std"],
+        "l_mean": overall["l_mean"],
+        "a_mean": overall["a_mean"],
+        "regions": {name: integral.stats(box) for name, box in TONE_REGIONS.items()},
+        "grid": {
+            "box": list(FACE_BOX),
+            "l_std": _rounded(std[..., 0], 2),
+            "a_mean": _rounded(mean[..., 1], 2),
+        },
+    }
+
+
+def evenness(l_std: float) -> float:
+    """亮度标准差 -> 0-1 的均匀度（与 analyze_skin_tone 相同）"""
+    return 1.0 / (1.0 + l_std / 100.0)
+
+
+def compare_regions(before: Dict, after: Dict) -> Dict:
+    """
+    各面部区域的均匀度和泛红变化
+
+    Args:
+        before: 术前 tone_features 的 regions
+        after: 术后 tone_features 的 regions
+
+    Returns:
+        区域 -> {evenness_before/after, improvement_pct, redness_before/after, redness_reduction}
+        （redness 为 a 通道均值减中性值，越大越红）
+    """
+    regions = {}
+    for name, before_stats in before.items():
+        after_stats = after.get(name)
+        if before_stats is None or after_stats is None:
+            continue
+        before_evenness = evenness(before_stats["l_std"])
+        after_evenness = evenness(after_stats["l_std"])
+        before_redness = before_stats["a_mean"] - NEUTRAL_A
+        after_redness = after_stats["a_mean"] - NEUTRAL_A
+        regions[name] = {
+            "evenness_before": round(before_evenness, 3),
+            "evenness_after": round(after_evenness, 3),
+            "improvement_pct": round((after_evenness - before_evenness) / before_evenness * 100, 1),
+            "redness_before": round(before_redness, 1),
+            "redness_after": round(after_redness, 1),
+            "redness_reduction": round(before_redness - after_redness, 1),
+        }
+    return regions
+
+
+def compare_grids(before: Dict, after: Dict) -> Optional[Dict]:
+    """
+    热力图：各网格单元的均匀度变化（正数变均匀）和泛红减少（正数变白）
+
+    Args:
+        before: 术前 tone_features 的 grid
+        after: 术后 tone_features 的 grid
+
+    Returns:
+        {box, evenness_change, redness_reduction}，网格定义不一致时返回 None
+    """
+    if before.get("box") != after.get("box"):
+        return None
+
+    def grid(values):
+        return np.array([[np.nan if v is None else v for v in row] for row in values], dtype=np.float64)
+
+    before_std, after_std = grid(before["l_std"]), grid(after["l_std"])
+    if before_std.shape != after_std.shape:
+        return None
+    evenness_change = evenness(after_std) - evenness(before_std)
+    redness_reduction = grid(before["a_mean"]) - grid(after["a_mean"])
+    return {
+        "box": before["box"],
+        "evenness_change": _rounded(evenness_change, 4),
+        "redness_reduction": _rounded(redness_reduction, 2),
+    }
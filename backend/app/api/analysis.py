@@ -2,17 +2,42 @@
 AI分析相关API - 使用 Claude Vision API
 """
 
-from fastapi import APIRouter, UploadFile, File, HTTPException, BackgroundTasks
+from fastapi import APIRouter, UploadFile, File, HTTPException, BackgroundTasks, Depends
+from fastapi.responses import RedirectResponse
 from typing import List, Optional
 from pydantic import BaseModel
+from sqlalchemy.ext.asyncio import AsyncSession
 import logging
-import cv2
-import numpy as np
-from io import BytesIO
+from fastapi.concurrency import run_in_threadpool
 import time
+import uuid
 
+from app.ai.change_map import CHANGE_KINDS, ChangeMaps
 from app.ai.claude_analyzer import ClaudeVisionAnalyzer
+from app.ai.comparability import pair_comparability
+from app.ai.face_geometry import compact_landmarks
+from app.ai.hybrid_analyzer import (
+    AnalysisPolicy,
+    LocalScreen,
+    escalation_reasons,
+    local_analysis_result,
+    local_context
+)
+from app.ai.multi_view import merge_views, sort_angles
+from app.ai.perceptual_hash import hamming, phash, to_signed
 from app.ai.report_controller import ReportController
+from app.core.database import get_session
+from app.repositories import AnalysisRepository, ClinicRepository, PhotoRepository, TreatmentRepository
+from app.services.duplicate_index import duplicate_index
+from app.services.heatmap_service import heatmap_service, DEFAULT_HEATMAP_KIND, HEATMAP_SIZES
+from app.services.photo_pipeline import photo_pipeline
+from app.services.upload_stream import spool_upload, UploadTooLargeError, EmptyUploadError
+from app.services.composite_service import (
+    composite_service,
+    composite_key,
+    COMPOSITE_SIZES,
+    COMPOSITE_FORMATS
+)
 from app.core.config import settings
 from datetime import datetime, timedelta
 
@@ -28,6 +53,16 @@ class AnalysisRequest(BaseModel):
     analysis_types: List[str] = ["wrinkles", "skin_tone", "texture", "pores"]
 
 
+class MultiViewRequest(BaseModel):
+    """多角度分析请求（使用已上传到治疗的照片）"""
+    treatment_id: str
+    after_photo_type: Optional[str] = None  # 如 after_1month，默认取最新的术后照片
+    angles: Optional[List[str]] = None  # 默认分析所有同时有术前、术后照片的角度
+    locale: Optional[str] = None
+    allow_low_quality: bool = False  # 质量或可比性检查未通过的角度仍然分析
+    request_claude: bool = False  # 医生要求 Claude 分析
+
+
 class AnalysisResponse(BaseModel):
     """分析响应"""
     analysis_id: str
@@ -38,6 +73,31 @@ class AnalysisResponse(BaseModel):
     comparison_image_url: Optional[str]
 
 
+def _render_heatmaps(analysis_id: uuid.UUID, change: ChangeMaps) -> None:
+    """渲染失败只记录日志，首次访问热力图时重新生成"""
+    try:
+        heatmap_service.render(analysis_id, change)
+    except Exception as e:
+        logger.warning(f"Heatmap rendering failed: {str(e)}")
+
+
+def schedule_heatmaps(
+    background_tasks: BackgroundTasks,
+    analysis_id: uuid.UUID,
+    screen: LocalScreen
+) -> Optional[str]:
+    """
+    响应返回后在后台渲染变化热力图（使用本地预筛保留的差异图，不重新计算）
+
+    Returns:
+        annotated_image_url，照片未配准时为 None
+    """
+    if screen.change is None:
+        return None
+    background_tasks.add_task(_render_heatmaps, analysis_id, screen.change)
+    return f"/api/{settings.API_VERSION}/analysis/results/{analysis_id}/heatmap"
+
+
 @router.post("/compare", response_model=AnalysisResponse)
 async def analyze_before_after(
     request: AnalysisRequest,
@@ -72,55 +132,143 @@ async def analyze_before_after(
 
 @router.post("/analyze-upload")
 async def analyze_upload(
+    background_tasks: BackgroundTasks,
     before_image: UploadFile = File(...),
     after_image: UploadFile = File(...),
     treatment_type: Optional[str] = None,
     treatment_date: Optional[str] = None,  # ISO格式日期
-    patient_id: Optional[str] = None
+    patient_id: Optional[str] = None,
+    treatment_id: Optional[str] = None,  # 关联的治疗记录（可选）
+    locale: Optional[str] = None,  # 患者报告语言，如 zh-CN / en-US
+    allow_duplicates: bool = False,  # 确认重复照片后仍然分析
+    allow_low_quality: bool = False,  # 质量或可比性检查未通过时仍然分析
+    request_claude: bool = False,  # 医生要求 Claude 分析（不受诊所策略限制）
+    session: AsyncSession = Depends(get_session)
 ):
     """
-    直接上传照片进行 Claude 分析（智能报告控制）
+    直接上传照片进行分析（本地预筛 + 按需 Claude 分析，智能报告控制）
 
     这是一个便捷接口，直接上传术前术后照片并获得分析结果
     包含智能报告可见性控制和风险检测
+
+    调用 Claude 之前先做感知哈希重复检测：术前术后是同一张照片，
+    或照片与诊所内其他治疗的照片重复时返回 409（allow_duplicates=true 时只标记）；
+    再做本地质量预检（清晰度、曝光、人脸、头部姿态、眼距）和照片对可比性检查
+    （姿态、关键点形状、拍摄距离、光线），未通过时返回 422。
+
+    之后在配准后的照片上计算本地指标，按诊所分析策略决定是否调用 Claude：
+    hybrid 模式只在变化明显、有风险信号或 request_claude=true 时调用，并附上本地数值；
+    不调用时直接使用本地结果
     """
+    before_upload = after_upload = None
     try:
-        logger.info(f"Starting Claude analysis with uploaded images")
+        logger.info(f"Starting analysis with uploaded images")
         start_time = time.time()
 
-        # 读取上传的图片
-        before_contents = await before_image.read()
-        after_contents = await after_image.read()
+        treatment = None
+        if treatment_id:
+            treatment = await TreatmentRepository(session).get(treatment_id)
+            if treatment is None:
+                raise HTTPException(status_code=404, detail="Treatment not found")
 
-        # 转换为 OpenCV 格式
-        before_np = np.frombuffer(before_contents, np.uint8)
-        after_np = np.frombuffer(after_contents, np.uint8)
+        # 分块读取上传的图片（边读边检查大小、计算摘要，写入临时文件）
+        before_upload = await spool_upload(before_image)
+        after_upload = await spool_upload(after_image)
 
-        before_img = cv2.imdecode(before_np, cv2.IMREAD_COLOR)
-        after_img = cv2.imdecode(after_np, cv2.IMREAD_COLOR)
+        # 通过内存映射解码为 OpenCV 格式
+        before_img = before_upload.decode()
+        after_img = after_upload.decode()
 
         if before_img is None or after_img is None:
             raise HTTPException(status_code=400, detail="Invalid image format")
 
-        # 初始化 Claude 分析器
-        analyzer = ClaudeVisionAnalyzer(api_key=settings.CLAUDE_API_KEY)
-
-        # 执行 AI 分析
-        analysis_result = analyzer.analyze_comprehensive(
-            before_image=before_img,
-            after_image=after_img,
-            treatment_type=treatment_type or "未指定",
-            focus_areas=None
+        # 重复检测（在付费分析之前）
+        hashes = {"before": phash(before_img), "after": phash(after_img)}
+        if not allow_duplicates and hamming(hashes["before"], hashes["after"]) <= settings.PHOTO_DUPLICATE_MAX_DISTANCE:
+            raise HTTPException(status_code=409, detail="Before and after photos are near-duplicates")
+
+        duplicates = {}
+        clinic_id = treatment.clinic_id if treatment else None
+        if clinic_id is not None:
+            for label, hash_value in hashes.items():
+                matches = await duplicate_index.find(session, clinic_id, hash_value)
+                if not matches:
+                    continue
+                duplicates[label] = matches[0]
+                # 同一治疗复用术前照片是正常情况，其他治疗的照片说明上传错误
+                if not allow_duplicates and matches[0].treatment_id != treatment.id:
+                    raise HTTPException(
+                        status_code=409,
+                        detail=f"The {label} photo duplicates photo {matches[0].photo_id} from another treatment"
+                    )
+
+        # 质量预检（在付费分析之前）
+        before_quality, after_quality = await run_in_threadpool(
+            photo_pipeline.check_quality, [before_img, after_img]
         )
+        quality = {"before": before_quality, "after": after_quality}
+        failed = {label: report.issues for label, report in quality.items() if not report.passed}
+        if failed and not allow_low_quality:
+            raise HTTPException(
+                status_code=422,
+                detail={"message": "Photo quality check failed", "issues": failed}
+            )
+
+        # 照片对可比性（复用质量预检的关键点）
+        comparability = await run_in_threadpool(
+            pair_comparability, before_img, before_quality.landmarks, after_img, after_quality.landmarks
+        )
+        if comparability is not None and not comparability.passed and not allow_low_quality:
+            raise HTTPException(
+                status_code=422,
+                detail={
+                    "message": "Before and after photos are not comparable",
+                    "score": comparability.score,
+                    "issues": comparability.issues
+                }
+            )
+
+        # 本地预筛（复用质量预检的关键点配准照片）
+        clinic = await ClinicRepository(session).get(clinic_id) if clinic_id is not None else None
+        policy = AnalysisPolicy.for_clinic(clinic, settings.ANALYSIS_MODE, settings.CLAUDE_ESCALATION_THRESHOLD)
+        screen = await run_in_threadpool(
+            photo_pipeline.local_screen,
+            before_img, before_quality.landmarks, after_img, after_quality.landmarks, comparability
+        )
+        reasons = escalation_reasons(screen, policy, request_claude)
+
+        if reasons:
+            logger.info(f"Escalating to Claude: {', '.join(reasons)}")
+            analyzer = ClaudeVisionAnalyzer(api_key=settings.CLAUDE_API_KEY)
+            analysis_result = await run_in_threadpool(
+                analyzer.analyze_comprehensive,
+                before_image=before_img,
+                after_image=after_img,
+                treatment_type=treatment_type or "未指定",
+                focus_areas=None,
+                local_metrics=local_context(screen)
+            )
+            if not analysis_result.get('success') and not screen.failed:
+                # Claude 失败时退回本地结果，报告仍可生成
+                logger.warning(f"Claude analysis failed, using local metrics: {analysis_result.get('error')}")
+                claude_error = analysis_result.get('error')
+                analysis_result = local_analysis_result(screen)
+                analysis_result['claude_error'] = claude_error
+        else:
+            analysis_result = local_analysis_result(screen)
+        analysis_result['local_screen'] = screen.to_dict()
 
         processing_time = int((time.time() - start_time) * 1000)
         analysis_result['processing_time_ms'] = processing_time
+        if comparability is not None:
+            # 随分析结果保存，报告控制据此降低可信度（见 ReportController._detect_risks）
+            analysis_result['comparability'] = comparability.to_dict()
 
         logger.info(f"Analysis completed in {processing_time}ms")
         logger.info(f"API cost: ${analysis_result.get('_meta', {}).get('cost_usd', 0)}")
 
         # 智能报告控制
-        controller = ReportController()
+        controller = ReportController(locale=locale or settings.DEFAULT_REPORT_LOCALE)
 
         # 解析治疗日期
         if treatment_date:
@@ -148,9 +296,13 @@ async def analyze_upload(
         if controlled_report['risks']:
             logger.warning(f"Risks detected: {len(controlled_report['risks'])} risks")
 
-        return {
+        analysis_id = uuid.uuid4()
+        response = {
             "success": True,
+            "analysis_id": str(analysis_id),
             "processing_time_ms": processing_time,
+            "comparison_image_url": f"/api/{settings.API_VERSION}/analysis/results/{analysis_id}/comparison",
+            "annotated_image_url": schedule_heatmaps(background_tasks, analysis_id, screen),
 
             # 患者可见部分（可能为 None）
             "patient_report": controlled_report['patient_report'],
@@ -170,28 +322,363 @@ async def analyze_upload(
             "metadata": {
                 "days_after_treatment": controlled_report['days_after_treatment'],
                 "api_cost": analysis_result.get('_meta', {}).get('cost_usd', 0),
-                "model": analysis_result.get('_meta', {}).get('model', 'unknown')
+                "model": analysis_result.get('_meta', {}).get('model', 'unknown'),
+                "analysis_mode": policy.mode,
+                "escalation_reasons": reasons,
+                "local_screen_ms": screen.processing_time_ms,
+                "duplicates": {label: str(match.photo_id) for label, match in duplicates.items()},
+                "quality": {label: report.to_dict() for label, report in quality.items()}
             }
         }
 
+        # 保存原始照片和分析结果，供报告生成使用
+        before_key = await run_in_threadpool(
+            photo_pipeline.save_original_file, before_upload.path, before_upload.sha256
+        )
+        after_key = await run_in_threadpool(
+            photo_pipeline.save_original_file, after_upload.path, after_upload.sha256
+        )
+
+        links = {
+            "treatment_id": treatment.id if treatment else None,
+            "patient_id": treatment.patient_id if treatment else None,
+            "clinic_id": treatment.clinic_id if treatment else None,
+        }
+        photos = PhotoRepository(session)
+        before_photo = await photos.create(
+            **links,
+            photo_type="before",
+            photo_angle="front",
+            original_url=before_key,
+            content_sha256=before_upload.sha256,
+            phash=to_signed(hashes["before"]),
+            duplicate_of_id=duplicates["before"].photo_id if "before" in duplicates else None,
+            file_size_bytes=before_upload.size,
+            image_width=before_img.shape[1],
+            image_height=before_img.shape[0],
+            lighting_score=before_quality.lighting_score,
+            alignment_score=before_quality.alignment_score,
+            sharpness_score=before_quality.sharpness_score,
+            face_detected=before_quality.face_detected,
+            face_landmarks=compact_landmarks(before_quality.landmarks) if before_quality.landmarks else None,
+            captured_at=treatment_dt
+        )
+        after_photo = await photos.create(
+            **links,
+            photo_type="after",
+            photo_angle="front",
+            original_url=after_key,
+            content_sha256=after_upload.sha256,
+            phash=to_signed(hashes["after"]),
+            duplicate_of_id=duplicates["after"].photo_id if "after" in duplicates else None,
+            file_size_bytes=after_upload.size,
+            image_width=after_img.shape[1],
+            image_height=after_img.shape[0],
+            lighting_score=after_quality.lighting_score,
+            alignment_score=after_quality.alignment_score,
+            sharpness_score=after_quality.sharpness_score,
+            face_detected=after_quality.face_detected,
+            face_landmarks=compact_landmarks(after_quality.landmarks) if after_quality.landmarks else None,
+            captured_at=photo_dt
+        )
+
+        doctor_view = {k: v for k, v in response["doctor_view"].items() if k != "full_analysis"}
+        await AnalysisRepository(session).create(
+            id=analysis_id,
+            **links,
+            before_photo_id=before_photo.id,
+            after_photo_id=after_photo.id,
+            days_elapsed=controlled_report['days_after_treatment'],
+            treatment_type=treatment.treatment_type if treatment else treatment_type,
+            improvements=analysis_result,
+            report_data={
+                "patient_id": patient_id,
+                "treatment_type": treatment_type,
+                "patient_report": response["patient_report"],
+                "doctor_view": doctor_view,
+                "metadata": response["metadata"],
+            },
+            comparison_image_url=response["comparison_image_url"],
+            annotated_image_url=response["annotated_image_url"],
+            ai_model_version=response["metadata"]["model"],
+            processing_time_ms=processing_time
+        )
+        await session.commit()
+
+        if clinic_id is not None:
+            duplicate_index.add(clinic_id, before_photo.id, hashes["before"])
+            duplicate_index.add(clinic_id, after_photo.id, hashes["after"])
+
+        return response
+
     except HTTPException:
         raise
+    except UploadTooLargeError as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    except EmptyUploadError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         logger.error(f"Analysis upload failed: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Analysis failed: {str(e)}")
+    finally:
+        for upload in (before_upload, after_upload):
+            if upload is not None:
+                upload.close()
+
+
+@router.post("/multi-view")
+async def analyze_multi_view(
+    request: MultiViewRequest,
+    background_tasks: BackgroundTasks,
+    session: AsyncSession = Depends(get_session)
+):
+    """
+    多角度对比分析
+
+    取治疗中各角度（front / left45 / ...）最新的术前、术后照片，每个角度做质量预检、可比性检查和本地预筛；
+    需要 Claude 的角度合并为一次请求（照片裁剪到人脸并缩小到 768 像素，提示词只发送一次），
+    按角度解析结果，Claude 未返回有效结果的角度使用本地指标。
+    主角度（优先 front）的结果用于报告控制和统计，全部角度在 full_analysis.views 中
+    """
+    try:
+        start_time = time.time()
+
+        treatment = await TreatmentRepository(session).get(request.treatment_id)
+        if treatment is None:
+            raise HTTPException(status_code=404, detail="Treatment not found")
+
+        photos = PhotoRepository(session)
+        pairs = await photos.angle_pairs(treatment.id, request.after_photo_type)
+        if request.angles:
+            pairs = {angle: pair for angle, pair in pairs.items() if angle in request.angles}
+        pairs = {angle: pairs[angle] for angle in sort_angles(pairs)}
+        if not pairs:
+            raise HTTPException(status_code=400, detail="No before/after photo pairs for this treatment")
+
+        images = {}
+        for angle, (before, after) in pairs.items():
+            before_img = await run_in_threadpool(photo_pipeline.load_image, before.original_url)
+            after_img = await run_in_threadpool(photo_pipeline.load_image, after.original_url)
+            if before_img is None or after_img is None:
+                raise HTTPException(status_code=400, detail=f"Invalid image for angle {angle}")
+            images[angle] = (before_img, after_img)
+
+        # 各角度并行预检、配准并计算本地指标
+        views = await run_in_threadpool(photo_pipeline.prepare_views, images)
+        rejected = {angle: view.issues for angle, view in views.items() if view.issues}
+        if not request.allow_low_quality:
+            views = {angle: view for angle, view in views.items() if angle not in rejected}
+            if not views:
+                raise HTTPException(
+                    status_code=422,
+                    detail={"message": "No angle passed the photo checks", "issues": rejected}
+                )
+
+        clinic = await ClinicRepository(session).get(treatment.clinic_id) if treatment.clinic_id else None
+        policy = AnalysisPolicy.for_clinic(clinic, settings.ANALYSIS_MODE, settings.CLAUDE_ESCALATION_THRESHOLD)
+        reasons = {angle: escalation_reasons(view.screen, policy, request.request_claude) for angle, view in views.items()}
+        escalated = [angle for angle, angle_reasons in reasons.items() if angle_reasons]
+
+        claude_result = None
+        if escalated:
+            logger.info(f"Escalating angles to Claude in one request: {', '.join(escalated)}")
+            analyzer = ClaudeVisionAnalyzer(api_key=settings.CLAUDE_API_KEY)
+            claude_result = await run_in_threadpool(
+                analyzer.analyze_multi_view,
+                {angle: (views[angle].before_view, views[angle].after_view) for angle in escalated},
+                treatment_type=treatment.treatment_type,
+                local_metrics={angle: local_context(views[angle].screen) for angle in escalated}
+            )
+
+        analysis_result = merge_views(views, claude_result)
+        processing_time = int((time.time() - start_time) * 1000)
+        analysis_result['processing_time_ms'] = processing_time
+
+        primary = analysis_result['primary_angle']
+        before_photo, after_photo = pairs[primary]
+        treatment_dt = datetime.combine(treatment.treatment_date, datetime.min.time())
+        photo_dt = after_photo.captured_at or after_photo.created_at
+
+        controller = ReportController(locale=request.locale or settings.DEFAULT_REPORT_LOCALE)
+        controlled_report = controller.evaluate_report(
+            analysis_result=analysis_result,
+            treatment_date=treatment_dt,
+            photo_date=photo_dt,
+            treatment_type=treatment.treatment_type
+        )
+
+        analysis_id = uuid.uuid4()
+        meta = analysis_result.get('_meta', {})
+        response = {
+            "success": True,
+            "analysis_id": str(analysis_id),
+            "processing_time_ms": processing_time,
+            "comparison_image_url": f"/api/{settings.API_VERSION}/analysis/results/{analysis_id}/comparison",
+            "annotated_image_url": schedule_heatmaps(background_tasks, analysis_id, views[primary].screen),
+            "patient_report": controlled_report['patient_report'],
+            "doctor_view": {
+                "full_analysis": controlled_report['raw_analysis'],
+                "effect_level": controlled_report['effect_level'],
+                "visibility_status": controlled_report['visibility'],
+                "risks": controlled_report['risks'],
+                "alerts": controlled_report['doctor_alerts'],
+                "suggested_actions": controlled_report['actions'],
+                "timing_status": controlled_report['timing_status']
+            },
+            "metadata": {
+                "days_after_treatment": controlled_report['days_after_treatment'],
+                "api_cost": meta.get('cost_usd', 0),
+                "model": meta.get('model', 'unknown'),
+                "analysis_mode": policy.mode,
+                "primary_angle": primary,
+                "angles": {
+                    angle: {
+                        "source": result["source"],
+                        "escalation_reasons": reasons.get(angle, []),
+                        "overall_improvement": result.get("overall_assessment", {}).get("overall_improvement"),
+                    }
+                    for angle, result in analysis_result["views"].items()
+                },
+                "rejected_angles": rejected,
+                "quality": {
+                    angle: {"before": view.before_quality.to_dict(), "after": view.after_quality.to_dict()}
+                    for angle, view in views.items()
+                }
+            }
+        }
+
+        doctor_view = {k: v for k, v in response["doctor_view"].items() if k != "full_analysis"}
+        await AnalysisRepository(session).create(
+            id=analysis_id,
+            treatment_id=treatment.id,
+            patient_id=treatment.patient_id,
+            clinic_id=treatment.clinic_id,
+            before_photo_id=before_photo.id,
+            after_photo_id=after_photo.id,
+            days_elapsed=controlled_report['days_after_treatment'],
+            treatment_type=treatment.treatment_type,
+            improvements=analysis_result,
+            report_data={
+                "treatment_type": treatment.treatment_type,
+                "patient_report": response["patient_report"],
+                "doctor_view": doctor_view,
+                "metadata": response["metadata"],
+            },
+            comparison_image_url=response["comparison_image_url"],
+            annotated_image_url=response["annotated_image_url"],
+            ai_model_version=response["metadata"]["model"],
+            processing_time_ms=processing_time
+        )
+        await session.commit()
+
+        return response
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Multi-view analysis failed: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Analysis failed: {str(e)}")
 
 
 @router.get("/results/{analysis_id}")
-async def get_analysis_results(analysis_id: str):
+async def get_analysis_results(analysis_id: str, session: AsyncSession = Depends(get_session)):
     """获取分析结果"""
-    # TODO: 从数据库获取分析结果
+    analysis = await AnalysisRepository(session).get(analysis_id)
+    if analysis is None:
+        raise HTTPException(status_code=404, detail="Analysis not found")
+
     return {
         "analysis_id": analysis_id,
         "status": "completed",
-        "results": {}
+        "analyzed_at": analysis.analyzed_at,
+        "processing_time_ms": analysis.processing_time_ms,
+        "comparison_image_url": analysis.comparison_image_url,
+        "annotated_image_url": analysis.annotated_image_url,
+        "results": analysis.report_record()
     }
 
 
+@router.get("/results/{analysis_id}/comparison")
+async def get_comparison_image(
+    analysis_id: str,
+    size: str = "web",
+    format: str = "jpg",
+    session: AsyncSession = Depends(get_session)
+):
+    """
+    获取并排对比图
+
+    size: thumbnail / web / print；format: jpg / webp
+    重定向到存储的签名URL，图片字节由存储或静态服务器直接提供
+    """
+    if size not in COMPOSITE_SIZES or format not in COMPOSITE_FORMATS:
+        raise HTTPException(status_code=400, detail="Unsupported size or format")
+
+    found = await AnalysisRepository(session).get_with_photos(analysis_id)
+    if found is None:
+        raise HTTPException(status_code=404, detail="Analysis not found")
+    _, before, after = found
+
+    key = composite_key(before.content_sha256, after.content_sha256)
+    object_key = composite_service.object_key(key, size, format)
+    storage = composite_service.storage
+
+    if not await run_in_threadpool(storage.exists, object_key):
+        # 首次访问：在线程池中渲染全部尺寸
+        before_bytes = await run_in_threadpool(storage.get_bytes, before.original_url)
+        after_bytes = await run_in_threadpool(storage.get_bytes, after.original_url)
+        await run_in_threadpool(
+            composite_service.get_or_create,
+            before_bytes,
+            after_bytes,
+            size,
+            format,
+            before_digest=before.content_sha256,
+            after_digest=after.content_sha256
+        )
+
+    return RedirectResponse(url=storage.url(object_key), status_code=307)
+
+
+@router.get("/results/{analysis_id}/heatmap")
+async def get_heatmap_image(
+    analysis_id: str,
+    kind: str = DEFAULT_HEATMAP_KIND,
+    size: str = "web",
+    format: str = "jpg",
+    session: AsyncSession = Depends(get_session)
+):
+    """
+    获取变化热力图（叠加在配准后的术后照片上，绿色改善、红色变差）
+
+    kind: edges / redness / texture；size: thumbnail / web；format: jpg / webp
+    分析时已渲染的直接重定向到存储的签名URL；之前的记录首次访问时重新配准照片并渲染全部类型和尺寸
+    """
+    if kind not in CHANGE_KINDS or size not in HEATMAP_SIZES or format not in COMPOSITE_FORMATS:
+        raise HTTPException(status_code=400, detail="Unsupported kind, size or format")
+
+    found = await AnalysisRepository(session).get_with_photos(analysis_id)
+    if found is None:
+        raise HTTPException(status_code=404, detail="Analysis not found")
+    analysis, before, after = found
+
+    object_key = heatmap_service.object_key(analysis.id, kind, size, format)
+    storage = heatmap_service.storage
+
+    if not await run_in_threadpool(storage.exists, object_key):
+        change = await run_in_threadpool(
+            photo_pipeline.change_view,
+            before.original_url, before.face_landmarks, after.original_url, after.face_landmarks
+        )
+        if change is None:
+            raise HTTPException(status_code=404, detail="Heatmap not available: face not detected")
+        kinds = await run_in_threadpool(heatmap_service.render, analysis.id, change)
+        if kind not in kinds:
+            raise HTTPException(status_code=404, detail=f"Heatmap not available: {kind}")
+
+    return RedirectResponse(url=storage.url(object_key), status_code=307)
+
+
 @router.post("/batch")
 async def batch_analyze(treatment_ids: List[str]):
     """批量分析多个治疗"""
@@ -2,11 +2,21 @@
 诊所管理API
 """
 
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, Depends, HTTPException
 from typing import Optional
-from pydantic import BaseModel, EmailStr
+from pydantic import BaseModel, EmailStr, Field
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
 import logging
 
+from app.ai.hybrid_analyzer import ANALYSIS_MODES
+from app.core.config import settings
+from app.core.database import get_session
+from app.models import Clinic
+from app.repositories import AnalysisRepository, ClinicRepository
+from app.repositories.cohorts import OVERALL_METRIC
+from app.services.cohort_service import cohort_service, TREND_INTERVALS
+
 router = APIRouter()
 logger = logging.getLogger(__name__)
 
@@ -31,57 +41,168 @@ class ClinicResponse(BaseModel):
     subscription_status: str
     monthly_analysis_limit: int
     analysis_count_current_month: int
+    analysis_mode: str
+    claude_escalation_threshold: float
+
+
+class AnalysisPolicyUpdate(BaseModel):
+    """诊所分析策略（传 null 恢复全局默认值）"""
+    analysis_mode: Optional[str] = None
+    claude_escalation_threshold: Optional[float] = Field(None, ge=0, le=100)
+
+
+def to_clinic_response(clinic: Clinic) -> ClinicResponse:
+    return ClinicResponse(
+        id=str(clinic.id),
+        name=clinic.name,
+        email=clinic.email,
+        phone=clinic.phone,
+        address=clinic.address,
+        subscription_tier=clinic.subscription_tier,
+        subscription_status=clinic.subscription_status,
+        monthly_analysis_limit=clinic.monthly_analysis_limit,
+        analysis_count_current_month=clinic.analysis_count_current_month,
+        analysis_mode=clinic.analysis_mode or settings.ANALYSIS_MODE,
+        claude_escalation_threshold=(
+            settings.CLAUDE_ESCALATION_THRESHOLD
+            if clinic.claude_escalation_threshold is None
+            else clinic.claude_escalation_threshold
+        )
+    )
 
 
 @router.post("/", response_model=ClinicResponse)
-async def create_clinic(clinic: ClinicCreate):
+async def create_clinic(clinic: ClinicCreate, session: AsyncSession = Depends(get_session)):
     """创建新诊所"""
     try:
         logger.info(f"Creating clinic: {clinic.name}")
 
-        # TODO: 保存到数据库
-
-        return ClinicResponse(
-            id="clinic-123",
-            name=clinic.name,
-            email=clinic.email,
-            phone=clinic.phone,
-            address=clinic.address,
-            subscription_tier=clinic.subscription_tier,
-            subscription_status="active",
-            monthly_analysis_limit=50,
-            analysis_count_current_month=0
-        )
+        created = await ClinicRepository(session).create(**clinic.model_dump())
+        await session.commit()
+
+        return to_clinic_response(created)
 
+    except IntegrityError:
+        raise HTTPException(status_code=409, detail="Clinic email already exists")
     except Exception as e:
         logger.error(f"Failed to create clinic: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @router.get("/{clinic_id}", response_model=ClinicResponse)
-async def get_clinic(clinic_id: str):
+async def get_clinic(clinic_id: str, session: AsyncSession = Depends(get_session)):
     """获取诊所详情"""
-    # TODO: 从数据库获取
-    return ClinicResponse(
-        id=clinic_id,
-        name="ABC Medical Spa",
-        email="contact@abc.com",
-        subscription_tier="professional",
-        subscription_status="active",
-        monthly_analysis_limit=150,
-        analysis_count_current_month=42
-    )
+    clinic = await ClinicRepository(session).get(clinic_id)
+    if clinic is None:
+        raise HTTPException(status_code=404, detail="Clinic not found")
+    return to_clinic_response(clinic)
+
+
+@router.put("/{clinic_id}/analysis-policy", response_model=ClinicResponse)
+async def update_analysis_policy(
+    clinic_id: str,
+    policy: AnalysisPolicyUpdate,
+    session: AsyncSession = Depends(get_session)
+):
+    """
+    更新诊所的分析策略
+
+    analysis_mode: claude（始终调用 Claude）/ hybrid（本地预筛后按需调用）/ local（仅医生要求时调用）；
+    claude_escalation_threshold: hybrid 模式下本地整体改善达到该值时调用 Claude
+    """
+    if policy.analysis_mode is not None and policy.analysis_mode not in ANALYSIS_MODES:
+        raise HTTPException(status_code=400, detail=f"analysis_mode must be one of {', '.join(ANALYSIS_MODES)}")
+
+    updated = await ClinicRepository(session).update(clinic_id, **policy.model_dump())
+    if updated is None:
+        raise HTTPException(status_code=404, detail="Clinic not found")
+    await session.commit()
+    return to_clinic_response(updated)
 
 
 @router.get("/{clinic_id}/analytics")
-async def get_clinic_analytics(clinic_id: str):
-    """获取诊所分析数据"""
-    # TODO: 从数据库视图获取
+async def get_clinic_analytics(clinic_id: str, session: AsyncSession = Depends(get_session)):
+    """获取诊所分析数据（读取 clinic_stats 汇总表）"""
+    repository = ClinicRepository(session)
+    clinic = await repository.get(clinic_id)
+    if clinic is None:
+        raise HTTPException(status_code=404, detail="Clinic not found")
+
+    analytics = await repository.analytics(clinic.id)
+    # 统计行缺失时 analytics 会重建，需要提交
+    await session.commit()
+
+    return {
+        "clinic_id": clinic_id,
+        **analytics
+    }
+
+
+@router.get("/{clinic_id}/cohorts")
+async def get_clinic_cohorts(
+    clinic_id: str,
+    metric: str = OVERALL_METRIC,
+    treatment_type: Optional[str] = None,
+    days: int = 90,
+    interval: str = "week",
+    analysis_id: Optional[str] = None,
+    session: AsyncSession = Depends(get_session)
+):
+    """
+    获取队列统计（分位数、直方图、趋势）
+
+    基于按天预聚合的汇总行计算，不扫描原始分析结果
+
+    Args:
+        metric: overall_score（整体分数）、分类名（wrinkles / skin_quality / contour / volume）
+            或单项指标名（如 forehead_lines）
+        treatment_type: 治疗类型，不传表示全部
+        days: 统计最近多少天
+        interval: 趋势的统计周期（day / week / month）
+        analysis_id: 传入时返回该分析在队列中的百分位排名
+    """
+    if not 1 <= days <= settings.COHORT_MAX_DAYS:
+        raise HTTPException(status_code=400, detail=f"days must be between 1 and {settings.COHORT_MAX_DAYS}")
+    if interval not in TREND_INTERVALS:
+        raise HTTPException(status_code=400, detail=f"interval must be one of {', '.join(TREND_INTERVALS)}")
+
+    clinic = await ClinicRepository(session).get(clinic_id)
+    if clinic is None:
+        raise HTTPException(status_code=404, detail="Clinic not found")
+
+    result, sketch = await cohort_service.cohort(
+        session,
+        clinic.id,
+        metric,
+        treatment_type=treatment_type,
+        days=days,
+        interval=interval
+    )
+
+    comparison = None
+    if analysis_id:
+        repository = AnalysisRepository(session)
+        analysis = await repository.get(analysis_id)
+        if analysis is None or analysis.clinic_id != clinic.id:
+            raise HTTPException(status_code=404, detail="Analysis not found")
+
+        value = await repository.metric_value(analysis, metric)
+        rank = sketch.rank(value) if value is not None else None
+        comparison = {
+            "analysis_id": analysis_id,
+            "value": value,
+            "percentile_rank": round(rank * 100, 1) if rank is not None else None
+        }
+
+    # 统计行缺失时会重建，需要提交
+    await session.commit()
+
     return {
         "clinic_id": clinic_id,
-        "total_patients": 0,
-        "total_treatments": 0,
-        "total_analyses": 0,
-        "average_satisfaction": 0.0,
-        "social_share_rate": 0.0
+        "metric": metric,
+        "treatment_type": treatment_type,
+        "days": days,
+        "interval": interval,
+        **result,
+        "comparison": comparison
     }
@@ -2,12 +2,25 @@
 患者管理API
 """
 
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, Depends, HTTPException
 from typing import List, Optional
 from pydantic import BaseModel, EmailStr
 from datetime import date
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
 import logging
 
+from app.core.database import get_session
+from app.models import Patient, PatientStats
+from app.repositories import (
+    ClinicRepository,
+    ClinicStatsRepository,
+    PatientRepository,
+    PatientStatsRepository,
+    InvalidCursorError,
+    parse_id,
+)
+
 router = APIRouter()
 logger = logging.getLogger(__name__)
 
@@ -36,65 +49,136 @@ class PatientResponse(BaseModel):
     email: Optional[str]
     phone: Optional[str]
     skin_type: Optional[str]
+
+    # 治疗摘要（来自 patient_stats）
     total_treatments: int = 0
+    total_photos: int = 0
+    total_analyses: int = 0
+    last_treatment_date: Optional[date] = None
+    average_satisfaction: Optional[float] = None
+    total_spent: float = 0
+
+
+def to_patient_response(patient: Patient, stats: Optional[PatientStats] = None) -> PatientResponse:
+    summary = {}
+    if stats is not None:
+        summary = {
+            "total_treatments": stats.total_treatments,
+            "total_photos": stats.total_photos,
+            "total_analyses": stats.total_analyses,
+            "last_treatment_date": stats.last_treatment_date,
+            "average_satisfaction": stats.average_satisfaction,
+            "total_spent": stats.total_spent or 0,
+        }
+
+    return PatientResponse(
+        id=str(patient.id),
+        clinic_id=str(patient.clinic_id),
+        patient_id=patient.patient_id,
+        first_name=patient.first_name,
+        last_name=patient.last_name,
+        date_of_birth=patient.date_of_birth,
+        email=patient.email,
+        phone=patient.phone,
+        skin_type=patient.skin_type,
+        **summary
+    )
 
 
 @router.post("/", response_model=PatientResponse)
-async def create_patient(patient: PatientCreate):
+async def create_patient(patient: PatientCreate, session: AsyncSession = Depends(get_session)):
     """创建新患者"""
     try:
         logger.info(f"Creating patient: {patient.first_name} {patient.last_name}")
 
-        # TODO: 保存到数据库
-
-        return PatientResponse(
-            id="patient-123",
-            clinic_id=patient.clinic_id,
-            patient_id=patient.patient_id,
-            first_name=patient.first_name,
-            last_name=patient.last_name,
-            date_of_birth=patient.date_of_birth,
-            email=patient.email,
-            phone=patient.phone,
-            skin_type=patient.skin_type,
-            total_treatments=0
+        if await ClinicRepository(session).get(patient.clinic_id) is None:
+            raise HTTPException(status_code=404, detail="Clinic not found")
+
+        created = await PatientRepository(session).create(
+            **patient.model_dump(exclude={"clinic_id"}),
+            clinic_id=parse_id(patient.clinic_id)
         )
+        await session.commit()
+
+        return to_patient_response(created)
 
+    except HTTPException:
+        raise
+    except IntegrityError:
+        raise HTTPException(status_code=409, detail="Patient ID already exists in this clinic")
     except Exception as e:
         logger.error(f"Failed to create patient: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @router.get("/{patient_id}", response_model=PatientResponse)
-async def get_patient(patient_id: str):
+async def get_patient(patient_id: str, session: AsyncSession = Depends(get_session)):
     """获取患者详情"""
-    # TODO: 从数据库获取
-    return PatientResponse(
-        id=patient_id,
-        clinic_id="clinic-123",
-        patient_id="P-001",
-        first_name="Jane",
-        last_name="Doe",
-        email="jane@example.com",
-        total_treatments=3
-    )
+    repository = PatientRepository(session)
+    patient = await repository.get(patient_id)
+    if patient is None or not patient.is_active:
+        raise HTTPException(status_code=404, detail="Patient not found")
+
+    stats = await PatientStatsRepository(session).get_many([patient.id])
+    # 统计行缺失时 get_many 会重建，需要提交
+    await session.commit()
+
+    return to_patient_response(patient, stats.get(patient.id))
 
 
 @router.get("/clinic/{clinic_id}")
-async def get_clinic_patients(clinic_id: str, skip: int = 0, limit: int = 100):
-    """获取诊所的所有患者"""
-    # TODO: 从数据库获取
+async def get_clinic_patients(
+    clinic_id: str,
+    cursor: Optional[str] = None,
+    limit: int = 20,
+    session: AsyncSession = Depends(get_session)
+):
+    """
+    获取诊所的患者（游标分页）
+
+    cursor 为上一页返回的 next_cursor，next_cursor 为 null 表示没有更多数据
+    """
+    clinic_uuid = parse_id(clinic_id)
+    if clinic_uuid is None:
+        raise HTTPException(status_code=404, detail="Clinic not found")
+
+    repository = PatientRepository(session)
+    try:
+        page = await repository.page_for_clinic(clinic_uuid, cursor=cursor, limit=limit)
+    except InvalidCursorError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    stats = await PatientStatsRepository(session).get_many([p.id for p in page.items])
+    # 在册患者总数读取触发器维护的 clinic_stats（主键查询），不在每页上 COUNT(*)
+    clinic_stats = (await ClinicStatsRepository(session).get_many([clinic_uuid])).get(clinic_uuid)
+    await session.commit()
+
     return {
         "clinic_id": clinic_id,
-        "patients": [],
-        "total": 0
+        "patients": [to_patient_response(p, stats.get(p.id)) for p in page.items],
+        "total": clinic_stats.total_patients if clinic_stats is not None else 0,
+        "next_cursor": page.next_cursor
     }
 
 
 @router.put("/{patient_id}")
-async def update_patient(patient_id: str, patient: PatientCreate):
+async def update_patient(
+    patient_id: str,
+    patient: PatientCreate,
+    session: AsyncSession = Depends(get_session)
+):
     """更新患者信息"""
-    # TODO: 更新数据库
+    try:
+        updated = await PatientRepository(session).update(
+            patient_id,
+            **patient.model_dump(exclude={"clinic_id"})
+        )
+        if updated is None:
+            raise HTTPException(status_code=404, detail="Patient not found")
+        await session.commit()
+    except IntegrityError:
+        raise HTTPException(status_code=409, detail="Patient ID already exists in this clinic")
+
     return {
         "message": "Patient updated",
         "patient_id": patient_id
@@ -102,9 +186,13 @@ async def update_patient(patient_id: str, patient: PatientCreate):
 
 
 @router.delete("/{patient_id}")
-async def delete_patient(patient_id: str):
-    """删除患者"""
-    # TODO: 从数据库删除（软删除）
+async def delete_patient(patient_id: str, session: AsyncSession = Depends(get_session)):
+    """删除患者（软删除）"""
+    updated = await PatientRepository(session).update(patient_id, is_active=False)
+    if updated is None:
+        raise HTTPException(status_code=404, detail="Patient not found")
+    await session.commit()
+
     return {
         "message": "Patient deleted",
         "patient_id": patient_id
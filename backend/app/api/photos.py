@@ -2,11 +2,23 @@
 照片管理API
 """
 
-from fastapi import APIRouter, UploadFile, File, HTTPException, Form
-from typing import List, Optional
+from fastapi import APIRouter, UploadFile, File, HTTPException, Form, Depends
+from typing import Dict, List, Optional
 from pydantic import BaseModel
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.ext.asyncio import AsyncSession
 import logging
 
+from app.core.database import get_session
+from app.models import Photo
+from app.repositories import PhotoRepository, TreatmentRepository, InvalidCursorError, parse_id
+from app.ai.face_geometry import compact_landmarks
+from app.ai.perceptual_hash import to_signed
+from app.ai.quality_gate import combined_score
+from app.services.duplicate_index import duplicate_index
+from app.services.photo_pipeline import photo_pipeline
+from app.services.upload_stream import spool_upload, UploadTooLargeError, EmptyUploadError
+
 router = APIRouter()
 logger = logging.getLogger(__name__)
 
@@ -31,6 +43,33 @@ class PhotoResponse(BaseModel):
     thumbnail_url: Optional[str]
     face_detected: bool
     quality_score: float
+    lighting_score: Optional[float] = None
+    alignment_score: Optional[float] = None
+    sharpness_score: Optional[float] = None
+    quality_issues: List[Dict] = []  # 上传时的质量检查问题（需要重拍时提示）
+    duplicate_of: Optional[str] = None  # 疑似重复的已有照片ID
+
+
+def to_photo_response(photo: Photo, quality_issues: Optional[List[Dict]] = None) -> PhotoResponse:
+    """照片记录 -> 响应（对象键转换为签名URL）"""
+    return PhotoResponse(
+        photo_id=str(photo.id),
+        treatment_id=str(photo.treatment_id),
+        photo_type=photo.photo_type,
+        photo_angle=photo.photo_angle,
+        original_url=photo_pipeline.url_for(photo.original_url),
+        processed_url=photo_pipeline.url_for(photo.processed_url),
+        thumbnail_url=photo_pipeline.url_for(photo.thumbnail_url),
+        face_detected=photo.face_detected,
+        quality_score=combined_score(
+            photo.face_detected, photo.sharpness_score, photo.lighting_score, photo.alignment_score
+        ),
+        lighting_score=photo.lighting_score,
+        alignment_score=photo.alignment_score,
+        sharpness_score=photo.sharpness_score,
+        quality_issues=quality_issues or [],
+        duplicate_of=str(photo.duplicate_of_id) if photo.duplicate_of_id else None
+    )
 
 
 @router.post("/upload", response_model=PhotoResponse)
@@ -38,79 +77,136 @@ async def upload_photo(
     file: UploadFile = File(...),
     treatment_id: str = Form(...),
     photo_type: str = Form(...),
-    photo_angle: str = Form(...)
+    photo_angle: str = Form(...),
+    session: AsyncSession = Depends(get_session)
 ):
     """
     上传照片
 
     接收来自移动应用的照片上传
+    质量检查的问题在 quality_issues 中返回（提示重拍），不拒绝上传
     """
     try:
         logger.info(f"Uploading photo for treatment: {treatment_id}")
 
-        # TODO: 实现实际的上传逻辑
-        # 1. 验证文件格式和大小
-        # 2. 运行人脸检测
-        # 3. 评估照片质量
-        # 4. 上传到云存储
-        # 5. 保存元数据到数据库
-
-        return PhotoResponse(
-            photo_id="photo-123",
-            treatment_id=treatment_id,
+        treatment = await TreatmentRepository(session).get(treatment_id)
+        if treatment is None:
+            raise HTTPException(status_code=404, detail="Treatment not found")
+
+        # 1. 分块读取并验证文件大小（超限立即中止）
+        try:
+            upload = await spool_upload(file)
+        except UploadTooLargeError as e:
+            raise HTTPException(status_code=413, detail=str(e))
+        except EmptyUploadError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
+        # 2. 原图 / 缩略图 / 标准化处理图并行生成（含人脸检测和质量检查）
+        with upload:
+            try:
+                result = await run_in_threadpool(
+                    photo_pipeline.process, upload.buffer(), upload.sha256, photo_angle
+                )
+            except ValueError as e:
+                raise HTTPException(status_code=400, detail=str(e))
+
+        quality = result["quality"]
+        if not quality.passed:
+            logger.warning(f"Photo failed quality check: {[issue['code'] for issue in quality.issues]}")
+
+        # 3. 按感知哈希查找诊所内的近似重复照片（只标记，不拒绝）
+        hash_value = result["phash"]
+        duplicate = None
+        if hash_value is not None and treatment.clinic_id is not None:
+            matches = await duplicate_index.find(session, treatment.clinic_id, hash_value)
+            if matches:
+                duplicate = matches[0]
+                logger.warning(
+                    f"Photo looks like a duplicate of {duplicate.photo_id} (distance {duplicate.distance})"
+                )
+
+        # 4. 保存元数据（文件字段保存存储对象键）
+        photo = await PhotoRepository(session).create(
+            treatment_id=treatment.id,
+            patient_id=treatment.patient_id,
+            clinic_id=treatment.clinic_id,
             photo_type=photo_type,
             photo_angle=photo_angle,
-            original_url="https://example.com/photo.jpg",
-            processed_url=None,
-            thumbnail_url="https://example.com/thumb.jpg",
-            face_detected=True,
-            quality_score=0.95
+            original_url=result["original_key"],
+            processed_url=result["processed_key"],
+            thumbnail_url=result["thumbnail_key"],
+            content_sha256=upload.sha256,
+            phash=to_signed(hash_value) if hash_value is not None else None,
+            duplicate_of_id=duplicate.photo_id if duplicate else None,
+            file_size_bytes=result["file_size_bytes"],
+            image_width=result["image_width"],
+            image_height=result["image_height"],
+            lighting_score=result["lighting_score"],
+            alignment_score=result["alignment_score"],
+            sharpness_score=result["sharpness_score"],
+            face_detected=result["face_detected"],
+            face_landmarks=compact_landmarks(quality.landmarks) if quality.landmarks else None,
+            features=result["features"]
         )
+        await session.commit()
 
+        if hash_value is not None and treatment.clinic_id is not None:
+            duplicate_index.add(treatment.clinic_id, photo.id, hash_value)
+
+        return to_photo_response(photo, quality.issues)
+
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Photo upload failed: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Upload failed: {str(e)}")
 
 
 @router.post("/process/{photo_id}")
-async def process_photo(photo_id: str):
+async def process_photo(photo_id: str, session: AsyncSession = Depends(get_session)):
     """
     处理照片
 
     对上传的照片进行标准化处理
     """
     try:
-        # TODO: 实现照片处理
-        # 1. 人脸检测和关键点
-        # 2. 对齐和裁剪
-        # 3. 光线标准化
-        # 4. 背景处理
+        photo = await PhotoRepository(session).get(photo_id)
+        if photo is None:
+            raise HTTPException(status_code=404, detail="Photo not found")
+
+        # 上传时已完成人脸检测、对齐和光线标准化
+        # TODO: 背景处理
 
         return {
             "photo_id": photo_id,
-            "status": "processed",
-            "processed_url": "https://example.com/processed.jpg"
+            "status": "processed" if photo.processed_url else "no_face_detected",
+            "processed_url": photo_pipeline.url_for(photo.processed_url)
         }
 
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Photo processing failed: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Processing failed: {str(e)}")
 
 
-@router.get("/{photo_id}")
-async def get_photo(photo_id: str):
+@router.get("/{photo_id}", response_model=PhotoResponse)
+async def get_photo(photo_id: str, session: AsyncSession = Depends(get_session)):
     """获取照片信息"""
-    # TODO: 从数据库获取照片信息
-    return {
-        "photo_id": photo_id,
-        "url": "https://example.com/photo.jpg"
-    }
+    photo = await PhotoRepository(session).get(photo_id)
+    if photo is None:
+        raise HTTPException(status_code=404, detail="Photo not found")
+    return to_photo_response(photo)
 
 
 @router.delete("/{photo_id}")
-async def delete_photo(photo_id: str):
+async def delete_photo(photo_id: str, session: AsyncSession = Depends(get_session)):
     """删除照片"""
-    # TODO: 从云存储和数据库删除照片
+    # 存储中的文件按内容寻址，可能被其他记录引用，只删除数据库记录
+    if not await PhotoRepository(session).delete(photo_id):
+        raise HTTPException(status_code=404, detail="Photo not found")
+    await session.commit()
+
     return {
         "message": "Photo deleted",
         "photo_id": photo_id
@@ -118,10 +214,26 @@ async def delete_photo(photo_id: str):
 
 
 @router.get("/treatment/{treatment_id}")
-async def get_treatment_photos(treatment_id: str):
-    """获取治疗的所有照片"""
-    # TODO: 从数据库获取该治疗的所有照片
+async def get_treatment_photos(
+    treatment_id: str,
+    cursor: Optional[str] = None,
+    limit: int = 20,
+    session: AsyncSession = Depends(get_session)
+):
+    """获取治疗的照片（游标分页，按上传时间倒序）"""
+    treatment_uuid = parse_id(treatment_id)
+    if treatment_uuid is None:
+        raise HTTPException(status_code=404, detail="Treatment not found")
+
+    try:
+        page = await PhotoRepository(session).page_for_treatment(
+            treatment_uuid, cursor=cursor, limit=limit
+        )
+    except InvalidCursorError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
     return {
         "treatment_id": treatment_id,
-        "photos": []
+        "photos": [to_photo_response(photo) for photo in page.items],
+        "next_cursor": page.next_cursor
     }
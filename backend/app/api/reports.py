@@ -2,12 +2,23 @@
 报告生成API
 """
 
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, Depends, HTTPException
 from typing import List, Optional
 from pydantic import BaseModel
 from enum import Enum
+from fastapi.concurrency import run_in_threadpool
+import uuid
+from sqlalchemy.ext.asyncio import AsyncSession
 import logging
 
+from app.core.database import get_session
+from app.repositories import AnalysisRepository, ReportRepository
+from app.services.report_generator import (
+    report_generator,
+    build_report_content,
+    ReportNotAvailableError
+)
+
 router = APIRouter()
 logger = logging.getLogger(__name__)
 
@@ -48,7 +59,7 @@ class ReportResponse(BaseModel):
 
 
 @router.post("/generate", response_model=ReportResponse)
-async def generate_report(request: ReportRequest):
+async def generate_report(request: ReportRequest, session: AsyncSession = Depends(get_session)):
     """
     生成报告
 
@@ -57,35 +68,91 @@ async def generate_report(request: ReportRequest):
     try:
         logger.info(f"Generating {request.report_type} report for analysis: {request.analysis_id}")
 
-        # TODO: 实现报告生成
         # 1. 获取分析结果
-        # 2. 获取照片
-        # 3. 根据类型生成不同的报告
-        # 4. 保存到云存储
-        # 5. 生成分享链接
+        found = await AnalysisRepository(session).get_with_photos(request.analysis_id)
+        if found is None:
+            raise HTTPException(status_code=404, detail="Analysis not found")
+        analysis, before, after = found
+
+        # 2. 根据类型组装报告内容（遵循智能报告可见性）
+        content = build_report_content(
+            analysis.report_record(),
+            request.report_type.value,
+            include_patient_name=request.include_patient_name,
+            custom_message=request.custom_message
+        )
+
+        # 3. 在渲染进程池中生成报告（相同请求去重）
+        result = await report_generator.generate(
+            analysis_id=request.analysis_id,
+            report_type=request.report_type.value,
+            report_format=request.report_format.value,
+            content=content,
+            before_key=before.original_url,
+            after_key=after.original_url,
+            before_digest=before.content_sha256,
+            after_digest=after.content_sha256,
+            blur_eyes=request.blur_eyes
+        )
 
+        # 4. 保存报告记录（报告ID由请求内容决定，重复请求只更新同一行）
+        await ReportRepository(session).upsert(
+            [{
+                "id": uuid.UUID(result["report_id"]),
+                "analysis_id": analysis.id,
+                "treatment_id": analysis.treatment_id,
+                "patient_id": analysis.patient_id,
+                "clinic_id": analysis.clinic_id,
+                "report_type": request.report_type.value,
+                "report_format": request.report_format.value,
+                "file_url": result["file_key"],
+                "file_size_bytes": result["file_size_bytes"],
+                "thumbnail_url": result["thumbnail_key"],
+                "include_patient_name": request.include_patient_name,
+                "blur_eyes": request.blur_eyes,
+            }],
+            update_columns=["file_url", "file_size_bytes", "thumbnail_url"]
+        )
+        await session.commit()
+
+        # TODO: 生成分享链接
+        storage = report_generator.storage
         return ReportResponse(
-            report_id="report-123",
+            report_id=result["report_id"],
             analysis_id=request.analysis_id,
             report_type=request.report_type,
             report_format=request.report_format,
-            file_url="https://example.com/report.pdf",
-            share_url="https://example.com/share/abc123",
-            thumbnail_url="https://example.com/thumb.jpg"
+            file_url=storage.url(result["file_key"]),
+            share_url=None,
+            thumbnail_url=storage.url(result["thumbnail_key"])
         )
 
+    except HTTPException:
+        raise
+    except ReportNotAvailableError as e:
+        raise HTTPException(status_code=403, detail=str(e))
     except Exception as e:
         logger.error(f"Failed to generate report: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @router.get("/{report_id}")
-async def get_report(report_id: str):
+async def get_report(report_id: str, session: AsyncSession = Depends(get_session)):
     """获取报告详情"""
-    # TODO: 从数据库获取
+    report = await ReportRepository(session).get(report_id)
+    if report is None:
+        raise HTTPException(status_code=404, detail="Report not found")
+
+    storage = report_generator.storage
     return {
         "report_id": report_id,
-        "file_url": "https://example.com/report.pdf"
+        "analysis_id": str(report.analysis_id),
+        "report_type": report.report_type,
+        "report_format": report.report_format,
+        "file_url": storage.url(report.file_url),
+        "file_size_bytes": report.file_size_bytes,
+        "thumbnail_url": storage.url(report.thumbnail_url) if report.thumbnail_url else None,
+        "generated_at": report.generated_at
     }
 
 
@@ -111,9 +178,21 @@ async def create_share_link(report_id: str, password: Optional[str] = None):
 
 
 @router.delete("/{report_id}")
-async def delete_report(report_id: str):
+async def delete_report(report_id: str, session: AsyncSession = Depends(get_session)):
     """删除报告"""
-    # TODO: 删除文件和数据库记录
+    repository = ReportRepository(session)
+    report = await repository.get(report_id)
+    if report is None:
+        raise HTTPException(status_code=404, detail="Report not found")
+
+    await repository.delete(report.id)
+    await session.commit()
+
+    storage = report_generator.storage
+    for key in (report.file_url, report.thumbnail_url):
+        if key:
+            await run_in_threadpool(storage.delete, key)
+
     return {
         "message": "Report deleted",
         "report_id": report_id
@@ -2,12 +2,25 @@
 治疗记录API
 """
 
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, Depends, HTTPException
 from typing import List, Optional
 from pydantic import BaseModel
 from datetime import date
+from sqlalchemy.ext.asyncio import AsyncSession
 import logging
 
+from app.ai.timeline import fit_trajectory
+from app.core.database import get_session
+from app.models import Treatment
+from app.repositories import (
+    PatientRepository,
+    ProviderRepository,
+    TreatmentRepository,
+    InvalidCursorError,
+    parse_id
+)
+from app.services.timeline_service import timeline_service
+
 router = APIRouter()
 logger = logging.getLogger(__name__)
 
@@ -40,62 +53,150 @@ class TreatmentResponse(BaseModel):
     photos_count: int = 0
 
 
+def to_treatment_response(treatment: Treatment, photos_count: int = 0) -> TreatmentResponse:
+    return TreatmentResponse(
+        treatment_id=str(treatment.id),
+        patient_id=str(treatment.patient_id),
+        provider_id=str(treatment.provider_id),
+        treatment_date=treatment.treatment_date,
+        treatment_type=treatment.treatment_type,
+        treatment_area=treatment.treatment_area,
+        product_name=treatment.product_name,
+        product_amount=treatment.product_amount,
+        cost=treatment.cost,
+        notes=treatment.notes,
+        photos_count=photos_count
+    )
+
+
+async def _treatment_values(session: AsyncSession, treatment: TreatmentCreate) -> dict:
+    """校验患者和医生，返回可写入的列值（clinic_id 取自患者）"""
+    patient = await PatientRepository(session).get(treatment.patient_id)
+    if patient is None:
+        raise HTTPException(status_code=404, detail="Patient not found")
+    if await ProviderRepository(session).get(treatment.provider_id) is None:
+        raise HTTPException(status_code=404, detail="Provider not found")
+
+    return {
+        **treatment.model_dump(exclude={"patient_id", "provider_id"}),
+        "patient_id": patient.id,
+        "provider_id": parse_id(treatment.provider_id),
+        "clinic_id": patient.clinic_id,
+    }
+
+
 @router.post("/", response_model=TreatmentResponse)
-async def create_treatment(treatment: TreatmentCreate):
+async def create_treatment(treatment: TreatmentCreate, session: AsyncSession = Depends(get_session)):
     """创建新的治疗记录"""
     try:
         logger.info(f"Creating treatment for patient: {treatment.patient_id}")
 
-        # TODO: 保存到数据库
-
-        return TreatmentResponse(
-            treatment_id="treatment-123",
-            patient_id=treatment.patient_id,
-            provider_id=treatment.provider_id,
-            treatment_date=treatment.treatment_date,
-            treatment_type=treatment.treatment_type,
-            treatment_area=treatment.treatment_area,
-            product_name=treatment.product_name,
-            product_amount=treatment.product_amount,
-            cost=treatment.cost,
-            notes=treatment.notes,
-            photos_count=0
-        )
+        values = await _treatment_values(session, treatment)
+        created = await TreatmentRepository(session).create(**values)
+        await session.commit()
+
+        return to_treatment_response(created)
 
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Failed to create treatment: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @router.get("/{treatment_id}", response_model=TreatmentResponse)
-async def get_treatment(treatment_id: str):
+async def get_treatment(treatment_id: str, session: AsyncSession = Depends(get_session)):
     """获取治疗记录详情"""
-    # TODO: 从数据库获取
-    return TreatmentResponse(
-        treatment_id=treatment_id,
-        patient_id="patient-123",
-        provider_id="provider-123",
-        treatment_date=date.today(),
-        treatment_type="Botox",
-        treatment_area="Forehead",
-        photos_count=2
+    repository = TreatmentRepository(session)
+    treatment = await repository.get(treatment_id)
+    if treatment is None:
+        raise HTTPException(status_code=404, detail="Treatment not found")
+
+    counts = await repository.photo_counts([treatment.id])
+    return to_treatment_response(treatment, counts.get(treatment.id, 0))
+
+
+@router.get("/{treatment_id}/timeline")
+async def get_treatment_timeline(
+    treatment_id: str,
+    angle: str = "front",
+    session: AsyncSession = Depends(get_session)
+):
+    """
+    治疗效果时间线
+
+    各随访照片配准到最新术前照片后的本地整体改善，以及效果曲线拟合（峰值时间、是否消退）；
+    已计算的随访点直接读取，只计算新增的随访照片
+    """
+    treatment = await TreatmentRepository(session).get(treatment_id)
+    if treatment is None:
+        raise HTTPException(status_code=404, detail="Treatment not found")
+
+    try:
+        before, points, computed = await timeline_service.update(session, treatment, angle)
+    except Exception as e:
+        logger.error(f"Timeline update failed: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Timeline failed: {str(e)}")
+    if before is None:
+        raise HTTPException(status_code=400, detail=f"No before photo for angle {angle}")
+    if computed:
+        await session.commit()
+
+    usable = [point for point in points if point.overall_improvement is not None]
+    trajectory = fit_trajectory(
+        [point.days_elapsed for point in usable],
+        [point.overall_improvement for point in usable]
     )
+    return {
+        "treatment_id": treatment_id,
+        "angle": angle,
+        "before_photo_id": str(before.id),
+        "points": [point.to_dict() for point in points],
+        "trajectory": trajectory.to_dict() if trajectory else None,
+        "computed": computed
+    }
 
 
 @router.get("/patient/{patient_id}")
-async def get_patient_treatments(patient_id: str):
-    """获取患者的所有治疗记录"""
-    # TODO: 从数据库获取
+async def get_patient_treatments(
+    patient_id: str,
+    cursor: Optional[str] = None,
+    limit: int = 20,
+    session: AsyncSession = Depends(get_session)
+):
+    """获取患者的治疗记录（游标分页，按创建时间倒序）"""
+    patient_uuid = parse_id(patient_id)
+    if patient_uuid is None:
+        raise HTTPException(status_code=404, detail="Patient not found")
+
+    repository = TreatmentRepository(session)
+    try:
+        page = await repository.page_for_patient(patient_uuid, cursor=cursor, limit=limit)
+    except InvalidCursorError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    counts = await repository.photo_counts([t.id for t in page.items])
+
     return {
         "patient_id": patient_id,
-        "treatments": []
+        "treatments": [to_treatment_response(t, counts.get(t.id, 0)) for t in page.items],
+        "next_cursor": page.next_cursor
     }
 
 
 @router.put("/{treatment_id}")
-async def update_treatment(treatment_id: str, treatment: TreatmentCreate):
+async def update_treatment(
+    treatment_id: str,
+    treatment: TreatmentCreate,
+    session: AsyncSession = Depends(get_session)
+):
     """更新治疗记录"""
-    # TODO: 更新数据库
+    values = await _treatment_values(session, treatment)
+    updated = await TreatmentRepository(session).update(treatment_id, **values)
+    if updated is None:
+        raise HTTPException(status_code=404, detail="Treatment not found")
+    await session.commit()
+
     return {
         "message": "Treatment updated",
         "treatment_id": treatment_id
@@ -103,9 +204,12 @@ async def update_treatment(treatment_id: str, treatment: TreatmentCreate):
 
 
 @router.delete("/{treatment_id}")
-async def delete_treatment(treatment_id: str):
+async def delete_treatment(treatment_id: str, session: AsyncSession = Depends(get_session)):
     """删除治疗记录"""
-    # TODO: 从数据库删除
+    if not await TreatmentRepository(session).delete(treatment_id):
+        raise HTTPException(status_code=404, detail="Treatment not found")
+    await session.commit()
+
     return {
         "message": "Treatment deleted",
         "treatment_id": treatment_id
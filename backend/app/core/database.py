@@ -0,0 +1,117 @@
+"""
+数据库连接
+SQLAlchemy 2.0 异步引擎（连接池）在应用启动时创建，请求通过 get_session 依赖获取会话
+"""
+
+from typing import AsyncIterator, Optional
+import logging
+
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import (
+    AsyncEngine,
+    AsyncSession,
+    async_sessionmaker,
+    create_async_engine,
+)
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+# 同步驱动 -> 异步驱动
+ASYNC_DRIVERS = {
+    "postgresql": "postgresql+asyncpg",
+    "postgres": "postgresql+asyncpg",
+    "postgresql+psycopg2": "postgresql+asyncpg",
+    "sqlite": "sqlite+aiosqlite",
+}
+
+engine: Optional[AsyncEngine] = None
+session_factory: Optional[async_sessionmaker] = None
+
+
+def async_database_url(url: str) -> str:
+    """
+    将 DATABASE_URL 转换为异步驱动的URL
+
+    postgresql://... -> postgresql+asyncpg://...，sqlite:///... -> sqlite+aiosqlite:///...
+    """
+    parsed = make_url(url)
+    driver = ASYNC_DRIVERS.get(parsed.drivername)
+    if driver is not None:
+        parsed = parsed.set(drivername=driver)
+    return parsed.render_as_string(hide_password=False)
+
+
+def create_engine(url: Optional[str] = None) -> AsyncEngine:
+    """
+    创建异步引擎
+
+    Args:
+        url: 数据库URL，默认 DATABASE_URL
+
+    Returns:
+        AsyncEngine
+    """
+    url = async_database_url(url or settings.DATABASE_URL)
+
+    if url.startswith("sqlite"):
+        # SQLite（本地开发 / 测试替身）不使用连接池参数
+        return create_async_engine(url)
+
+    return create_async_engine(
+        url,
+        pool_size=settings.DATABASE_POOL_SIZE,
+        max_overflow=settings.DATABASE_MAX_OVERFLOW,
+        pool_pre_ping=True,
+        pool_recycle=1800
+    )
+
+
+async def init_database(url: Optional[str] = None) -> AsyncEngine:
+    """
+    初始化数据库连接池（在 lifespan 启动阶段调用）
+
+    DATABASE_CREATE_TABLES 为 True 时按 ORM 模型建表（SQLite 本地开发用，
+    PostgreSQL 请使用 database/schema.sql）
+    """
+    global engine, session_factory
+
+    engine = create_engine(url)
+    session_factory = async_sessionmaker(engine, expire_on_commit=False)
+
+    if settings.DATABASE_CREATE_TABLES:
+        from app.models import Base
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+
+    logger.info(f"Database connected: {engine.url.render_as_string(hide_password=True)}")
+    return engine
+
+
+async def close_database() -> None:
+    """关闭连接池（在 lifespan 关闭阶段调用）"""
+    global engine, session_factory
+
+    if engine is not None:
+        await engine.dispose()
+    engine = None
+    session_factory = None
+
+
+async def get_session() -> AsyncIterator[AsyncSession]:
+    """
+    FastAPI 依赖：获取数据库会话
+
+    写操作由调用方显式 commit，出现异常时自动回滚
+    """
+    if session_factory is None:
+        raise RuntimeError("Database is not initialized")
+
+    async with session_factory() as session:
+        try:
+            yield session
+        except Exception:
+            await session.rollback()
+            raise
@@ -0,0 +1,262 @@
+"""
+运行时线程配置
+OpenCV、BLAS（numpy）和推理库（MediaPipe 的 TFLite、TensorFlow、torch）默认各自按全部 CPU 开线程池，
+多个 uvicorn worker 加上流水线自己的线程池时会严重超订。按部署模式（RUNTIME_PROFILE）统一设置各库的
+线程数，并可把 worker 绑定到固定的 CPU 分片。
+
+uvicorn --workers 启动的各进程继承同一份环境变量，无法用环境变量区分 worker；
+shared 模式下每个进程启动时在 TEMP_DIR/runtime 下用文件锁认领一个空闲的序号（进程退出时锁自动释放，
+重启的 worker 认领空出的序号）
+
+BLAS 和推理库只在加载时读取环境变量，本模块必须在导入 numpy / cv2 之前导入（见 app.main）
+"""
+
+import os
+import sys
+from pathlib import Path
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+import logging
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+PROFILE_DEFAULT = "default"
+PROFILE_SHARED = "shared"
+PROFILE_DEDICATED = "dedicated"
+RUNTIME_PROFILES = (PROFILE_DEFAULT, PROFILE_SHARED, PROFILE_DEDICATED)
+
+# 各库读取的线程数环境变量（已在环境中显式设置的不覆盖）
+BLAS_ENV = ("OMP_NUM_THREADS", "OPENBLAS_NUM_THREADS", "MKL_NUM_THREADS", "NUMEXPR_NUM_THREADS")
+INFERENCE_ENV = ("TF_NUM_INTRAOP_THREADS", "TF_NUM_INTEROP_THREADS")
+OPENCV_ENV = "OPENCV_FOR_THREADS_NUM"
+
+# worker 序号锁文件目录
+WORKER_SLOT_DIR = settings.TEMP_DIR / "runtime"
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+
+@dataclass
+class RuntimeConfig:
+    """生效的运行时配置"""
+    profile: str
+    cpu_count: int                              # 本进程可用的 CPU 数（绑定前）
+    cpus_per_worker: int
+    worker_index: Optional[int] = None          # 本进程的 worker 序号（绑定 CPU 分片用）
+    opencv_threads: Optional[int] = None        # None 表示使用库默认值
+    blas_threads: Optional[int] = None
+    inference_threads: Optional[int] = None
+    affinity: Optional[List[int]] = None        # 绑定的 CPU，None 表示不绑定
+    environment: Dict[str, str] = field(default_factory=dict)  # 生效的环境变量（含外部设置的）
+    numpy_preloaded: bool = False               # 配置前 numpy 已加载（BLAS 环境变量可能未生效）
+
+
+def available_cpus() -> List[int]:
+    """本进程可以使用的 CPU"""
+    if hasattr(os, "sched_getaffinity"):
+        return sorted(os.sched_getaffinity(0))
+    return list(range(os.cpu_count() or 1))
+
+
+# 认领的序号锁文件（进程存活期间保持打开）
+_worker_slot = None
+
+
+def claim_worker_slot(workers: int, directory: Path = WORKER_SLOT_DIR) -> Optional[int]:
+    """
+    认领本进程的 worker 序号
+
+    依次对 worker-{i}.lock 加非阻塞排他锁，第一个成功的 i 即为序号。锁随进程退出释放
+
+    Args:
+        workers: worker 数
+        directory: 锁文件目录
+
+    Returns:
+        序号，不支持文件锁或全部被占用时返回 None
+    """
+    global _worker_slot
+    if fcntl is None:
+        return None
+
+    directory.mkdir(parents=True, exist_ok=True)
+    for index in range(workers):
+        handle = open(directory / f"worker-{index}.lock", "a")
+        try:
+            fcntl.flock(handle, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            handle.close()
+            continue
+        _worker_slot = handle
+        return index
+    return None
+
+
+def resolve_runtime(cpus: List[int], worker_index: Optional[int] = None) -> RuntimeConfig:
+    """
+    按部署模式计算各库的线程数
+
+    - default: 不改动各库的默认值
+    - shared: 每个 worker 分到 CPU 数 / WEB_WORKERS 个核；OpenCV、BLAS、推理库都用单线程，
+      并行度由流水线线程池（PHOTO_PIPELINE_WORKERS、SKIN_REGION_WORKERS）提供，避免线程池相乘；
+      有 worker 序号时绑定到对应的 CPU 分片
+    - dedicated: 单个 worker 独占主机，各库使用全部 CPU
+
+    OPENCV_THREADS / BLAS_THREADS / INFERENCE_THREADS 覆盖部署模式的值
+
+    Args:
+        cpus: 可用 CPU
+        worker_index: 本进程的 worker 序号，None 表示不绑定 CPU
+
+    Returns:
+        运行时配置（尚未应用）
+    """
+    profile = settings.RUNTIME_PROFILE
+    if profile not in RUNTIME_PROFILES:
+        logger.warning(f"Unknown RUNTIME_PROFILE {profile!r}, using {PROFILE_DEFAULT}")
+        profile = PROFILE_DEFAULT
+
+    count = len(cpus)
+    share = max(1, count // max(settings.WEB_WORKERS, 1))
+    config = RuntimeConfig(profile=profile, cpu_count=count, cpus_per_worker=share)
+
+    if profile == PROFILE_SHARED:
+        config.opencv_threads = config.blas_threads = config.inference_threads = 1
+        if worker_index is not None:
+            config.worker_index = worker_index
+            start = (worker_index * share) % count
+            config.affinity = cpus[start:start + share]
+    elif profile == PROFILE_DEDICATED:
+        config.opencv_threads = config.blas_threads = config.inference_threads = count
+
+    if settings.OPENCV_THREADS is not None:
+        config.opencv_threads = settings.OPENCV_THREADS
+    if settings.BLAS_THREADS is not None:
+        config.blas_threads = settings.BLAS_THREADS
+    if settings.INFERENCE_THREADS is not None:
+        config.inference_threads = settings.INFERENCE_THREADS
+    return config
+
+
+def _set_environment(names, threads: Optional[int], environment: Dict[str, str]) -> None:
+    for name in names:
+        if threads is not None:
+            os.environ.setdefault(name, str(threads))
+        if name in os.environ:
+            environment[name] = os.environ[name]
+
+
+def _worker_index() -> Optional[int]:
+    """
+    shared 模式下本进程的 worker 序号
+
+    WORKER_INDEX 只适用于每个 worker 单独启动、各自设置环境变量的部署（如 systemd 模板单元）；
+    未设置时多 worker 部署通过文件锁认领序号
+    """
+    if settings.RUNTIME_PROFILE != PROFILE_SHARED:
+        return None
+    if settings.WORKER_INDEX is not None:
+        return settings.WORKER_INDEX
+    if settings.WEB_WORKERS <= 1:
+        return None
+
+    index = claim_worker_slot(settings.WEB_WORKERS)
+    if index is None:
+        logger.warning(
+            f"No free worker slot of {settings.WEB_WORKERS} in {WORKER_SLOT_DIR}, CPU affinity disabled"
+        )
+    return index
+
+
+def configure_runtime() -> RuntimeConfig:
+    """
+    应用运行时配置：环境变量、CPU 绑定、OpenCV 和已加载的 torch 的线程数
+
+    Returns:
+        生效的配置
+    """
+    config = resolve_runtime(available_cpus(), _worker_index())
+    config.numpy_preloaded = "numpy" in sys.modules
+
+    _set_environment(BLAS_ENV, config.blas_threads, config.environment)
+    _set_environment(INFERENCE_ENV, config.inference_threads, config.environment)
+    _set_environment((OPENCV_ENV,), config.opencv_threads, config.environment)
+
+    if config.affinity and hasattr(os, "sched_setaffinity"):
+        try:
+            os.sched_setaffinity(0, config.affinity)
+        except OSError as e:
+            logger.warning(f"Failed to set CPU affinity: {str(e)}")
+            config.affinity = None
+
+    # 环境变量设置之后再加载 cv2（同时加载 numpy / BLAS）
+    import cv2
+    if config.opencv_threads is not None:
+        cv2.setNumThreads(config.opencv_threads)
+
+    torch = sys.modules.get("torch")
+    if torch is not None and config.inference_threads is not None:
+        torch.set_num_threads(config.inference_threads)
+
+    if config.numpy_preloaded and config.blas_threads is not None:
+        logger.warning("numpy was imported before runtime configuration, BLAS thread limits may not apply")
+    return config
+
+
+def runtime_diagnostics() -> Dict:
+    """
+    当前进程实际生效的线程设置（诊断接口）
+
+    Returns:
+        部署模式、CPU、各库线程数、流水线线程池大小和超订警告
+    """
+    import cv2
+
+    cpus = available_cpus()
+    opencv_threads = cv2.getNumThreads()
+    torch = sys.modules.get("torch")
+    pools = {
+        "photo_pipeline": settings.PHOTO_PIPELINE_WORKERS,
+        "skin_tiles": settings.SKIN_REGION_WORKERS,
+        "report_processes": settings.REPORT_WORKERS,
+    }
+
+    warnings = []
+    busy = (settings.PHOTO_PIPELINE_WORKERS + settings.SKIN_REGION_WORKERS) * max(opencv_threads, 1)
+    if busy > len(cpus) * 2:
+        warnings.append(
+            f"Pipeline threads x OpenCV threads ({busy}) exceed twice the CPUs available to this worker ({len(cpus)})"
+        )
+    if runtime.numpy_preloaded and runtime.blas_threads is not None:
+        warnings.append("numpy was imported before runtime configuration, BLAS thread limits may not apply")
+
+    return {
+        "profile": runtime.profile,
+        "pid": os.getpid(),
+        "web_workers": settings.WEB_WORKERS,
+        "worker_index": runtime.worker_index,
+        "cpu_count": runtime.cpu_count,
+        "cpus_per_worker": runtime.cpus_per_worker,
+        "affinity": cpus,
+        "opencv": {
+            "threads": opencv_threads,
+            "cpus": cv2.getNumberOfCPUs(),
+            "optimized": cv2.useOptimized(),
+        },
+        "blas_threads": runtime.blas_threads,
+        "inference_threads": runtime.inference_threads,
+        "torch_threads": torch.get_num_threads() if torch is not None else None,
+        "environment": runtime.environment,
+        "pools": pools,
+        "warnings": warnings,
+    }
+
+
+# 导入时应用（各进程一次）
+runtime = configure_runtime()
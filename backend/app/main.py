@@ -11,7 +11,12 @@ import logging
 from pathlib import Path
 
 from app.core.config import settings
+# 线程数和 CPU 绑定必须在加载 numpy / OpenCV 之前设置
+from app.core.runtime import runtime, runtime_diagnostics
+from app.core.database import init_database, close_database
 from app.api import router as api_router
+from app.services.report_generator import report_generator
+from app.services.photo_pipeline import photo_pipeline
 
 # 配置日志
 logging.basicConfig(
@@ -27,16 +32,19 @@ async def lifespan(app: FastAPI):
     logger.info("🚀 Starting GlowTrack AI Backend...")
     logger.info(f"Environment: {settings.ENVIRONMENT}")
     logger.info(f"API Version: {settings.API_VERSION}")
+    logger.info(f"Runtime profile: {runtime.profile} ({runtime.cpu_count} CPUs)")
 
     # 启动时的初始化
-    # TODO: 初始化数据库连接
+    await init_database()
     # TODO: 加载AI模型
 
     yield
 
     # 关闭时的清理
     logger.info("👋 Shutting down GlowTrack AI Backend...")
-    # TODO: 关闭数据库连接
+    report_generator.shutdown()
+    photo_pipeline.shutdown()
+    await close_database()
     # TODO: 清理临时文件
 
 
@@ -64,6 +72,13 @@ app.add_middleware(
 # if static_dir.exists():
 #     app.mount("/static", StaticFiles(directory=str(static_dir)), name="static")
 
+# 本地存储：照片、对比图、报告通过签名URL由静态文件服务直接提供
+# （S3 / R2 使用预签名URL，客户端直接从存储下载）
+if settings.STORAGE_BACKEND == "local":
+    from app.storage import get_storage
+    from app.storage.static import SignedStaticFiles
+    app.mount(settings.STORAGE_PUBLIC_URL, SignedStaticFiles(get_storage()), name="storage")
+
 # 注册路由
 app.include_router(api_router, prefix=f"/api/{settings.API_VERSION}")
 
@@ -88,6 +103,12 @@ async def health_check():
     }
 
 
+@app.get("/health/runtime")
+async def runtime_check():
+    """运行时诊断：部署模式、CPU 绑定和各库实际使用的线程数"""
+    return runtime_diagnostics()
+
+
 if __name__ == "__main__":
     import uvicorn
 
@@ -0,0 +1,30 @@
+"""
+ORM 模型
+"""
+
+from app.models.base import Base
+from app.models.clinic import Clinic, Provider
+from app.models.patient import Patient, Treatment
+from app.models.photo import Photo
+from app.models.analysis import AnalysisResult, AnalysisMetric, AnalysisRollup, TimelinePoint
+from app.models.report import Report
+from app.models.feedback import SatisfactionRating, ActivityLog
+from app.models.stats import ClinicStats, PatientStats
+
+__all__ = [
+    "Base",
+    "Clinic",
+    "Provider",
+    "Patient",
+    "Treatment",
+    "Photo",
+    "AnalysisResult",
+    "AnalysisMetric",
+    "AnalysisRollup",
+    "TimelinePoint",
+    "Report",
+    "SatisfactionRating",
+    "ActivityLog",
+    "ClinicStats",
+    "PatientStats",
+]
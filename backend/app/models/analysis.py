@@ -0,0 +1,199 @@
+"""
+AI分析结果模型
+"""
+
+import uuid
+from datetime import date, datetime
+from typing import Dict, List, Optional
+
+from sqlalchemy import Boolean, Date, DateTime, Float, ForeignKey, Index, Integer, Numeric, String, Text, Uuid, func
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.models.base import Base, JSONType, uuid_pk, created_at_column, updated_at_column
+
+
+class AnalysisResult(Base):
+    """AI分析结果"""
+    __tablename__ = "analysis_results"
+    __table_args__ = (
+        # 按诊所 / 时间范围统计
+        Index("idx_analysis_clinic_analyzed", "clinic_id", "analyzed_at"),
+        Index("idx_analysis_clinic_type_analyzed", "clinic_id", "treatment_type", "analyzed_at"),
+        # improvements 的临时查询（@> 包含查询）
+        Index(
+            "idx_analysis_improvements",
+            "improvements",
+            postgresql_using="gin",
+            postgresql_ops={"improvements": "jsonb_path_ops"},
+        ).ddl_if(dialect="postgresql"),
+    )
+
+    id: Mapped[uuid.UUID] = uuid_pk()
+    treatment_id: Mapped[Optional[uuid.UUID]] = mapped_column(
+        Uuid, ForeignKey("treatments.id", ondelete="CASCADE"), index=True
+    )
+    patient_id: Mapped[Optional[uuid.UUID]] = mapped_column(
+        Uuid, ForeignKey("patients.id", ondelete="CASCADE"), index=True
+    )
+    clinic_id: Mapped[Optional[uuid.UUID]] = mapped_column(
+        Uuid, ForeignKey("clinics.id", ondelete="CASCADE")
+    )
+
+    # 对比照片
+    before_photo_id: Mapped[Optional[uuid.UUID]] = mapped_column(Uuid, ForeignKey("photos.id"))
+    after_photo_id: Mapped[Optional[uuid.UUID]] = mapped_column(Uuid, ForeignKey("photos.id"))
+
+    days_elapsed: Mapped[Optional[int]] = mapped_column(Integer)
+
+    # AI分析结果（完整的分析输出）
+    improvements: Mapped[Dict] = mapped_column(JSONType)
+
+    # 从 improvements 提取的统计字段（写入时由 AnalysisRepository 填充，见 app/ai/metrics.py）
+    treatment_type: Mapped[Optional[str]] = mapped_column(String(100))
+    overall_score: Mapped[Optional[float]] = mapped_column(Numeric(6, 2, asdecimal=False))  # 0-100
+    wrinkles_improvement_pct: Mapped[Optional[float]] = mapped_column(Numeric(6, 2, asdecimal=False))
+    skin_quality_improvement_pct: Mapped[Optional[float]] = mapped_column(Numeric(6, 2, asdecimal=False))
+    contour_improvement_pct: Mapped[Optional[float]] = mapped_column(Numeric(6, 2, asdecimal=False))
+    volume_improvement_pct: Mapped[Optional[float]] = mapped_column(Numeric(6, 2, asdecimal=False))
+
+    # 智能报告控制结果（患者报告 / 医生视图 / 元数据），报告生成直接使用
+    report_data: Mapped[Optional[Dict]] = mapped_column(JSONType)
+
+    # 对比图像
+    comparison_image_url: Mapped[Optional[str]] = mapped_column(Text)
+    side_by_side_url: Mapped[Optional[str]] = mapped_column(Text)
+    annotated_image_url: Mapped[Optional[str]] = mapped_column(Text)
+
+    # AI模型信息
+    ai_model_version: Mapped[Optional[str]] = mapped_column(String(50))
+    ai_confidence_score: Mapped[Optional[float]] = mapped_column(Numeric(3, 2, asdecimal=False))
+    # 术前术后照片可比性（0-1，明细在 improvements.comparability 中，见 app/ai/comparability.py）
+    comparability_score: Mapped[Optional[float]] = mapped_column(Numeric(3, 2, asdecimal=False))
+
+    processing_time_ms: Mapped[Optional[int]] = mapped_column(Integer)
+
+    # 医生审核
+    doctor_reviewed: Mapped[bool] = mapped_column(Boolean, default=False)
+    doctor_notes: Mapped[Optional[str]] = mapped_column(Text)
+    doctor_adjusted_score: Mapped[Optional[float]] = mapped_column(Numeric(3, 2, asdecimal=False))
+
+    analyzed_at: Mapped[datetime] = mapped_column(DateTime, server_default=func.now())
+    created_at: Mapped[datetime] = created_at_column()
+
+    def report_record(self) -> Dict:
+        """组装报告生成使用的分析记录（与 analyze-upload 的返回结构一致）"""
+        report_data = self.report_data or {}
+        return {
+            **report_data,
+            "analysis_id": str(self.id),
+            "doctor_view": {
+                **report_data.get("doctor_view", {}),
+                "full_analysis": self.improvements,
+            },
+        }
+
+
+class AnalysisMetric(Base):
+    """
+    单项分析指标（improvements 的展开投影）
+
+    冗余 clinic_id / treatment_type / analyzed_at，队列统计（如"本季度肉毒素的额头纹平均改善"）
+    只需扫描一个索引范围
+    """
+    __tablename__ = "analysis_metrics"
+    __table_args__ = (
+        Index(
+            "idx_analysis_metrics_cohort",
+            "clinic_id", "treatment_type", "metric", "analyzed_at",
+            postgresql_include=["improvement_pct"],
+        ),
+    )
+
+    analysis_id: Mapped[uuid.UUID] = mapped_column(
+        Uuid, ForeignKey("analysis_results.id", ondelete="CASCADE"), primary_key=True
+    )
+    category: Mapped[str] = mapped_column(String(50), primary_key=True)
+    metric: Mapped[str] = mapped_column(String(100), primary_key=True)
+
+    clinic_id: Mapped[Optional[uuid.UUID]] = mapped_column(Uuid)
+    treatment_type: Mapped[Optional[str]] = mapped_column(String(100))
+    analyzed_at: Mapped[datetime] = mapped_column(DateTime)
+
+    before_score: Mapped[Optional[float]] = mapped_column(Numeric(6, 2, asdecimal=False))
+    after_score: Mapped[Optional[float]] = mapped_column(Numeric(6, 2, asdecimal=False))
+    improvement_pct: Mapped[float] = mapped_column(Numeric(6, 2, asdecimal=False))
+
+
+class AnalysisRollup(Base):
+    """
+    分析指标日汇总（队列统计）
+
+    每个 (诊所, 治疗类型, 指标, 日期) 一行，保存计数 / 总和 / 平方和、固定分箱直方图和
+    t-digest 分位数摘要（见 app/services/sketch.py），统计查询只合并日期范围内的行
+    """
+    __tablename__ = "analysis_daily_rollups"
+    __table_args__ = (
+        # 不区分治疗类型的查询
+        Index("idx_analysis_rollups_metric_day", "clinic_id", "metric", "day"),
+    )
+
+    clinic_id: Mapped[uuid.UUID] = mapped_column(
+        Uuid, ForeignKey("clinics.id", ondelete="CASCADE"), primary_key=True
+    )
+    treatment_type: Mapped[str] = mapped_column(String(100), primary_key=True)
+    metric: Mapped[str] = mapped_column(String(100), primary_key=True)
+    day: Mapped[date] = mapped_column(Date, primary_key=True)
+
+    count: Mapped[int] = mapped_column(Integer, default=0)
+    total: Mapped[float] = mapped_column(Float, default=0)
+    total_squares: Mapped[float] = mapped_column(Float, default=0)
+    min_value: Mapped[Optional[float]] = mapped_column(Float)
+    max_value: Mapped[Optional[float]] = mapped_column(Float)
+
+    histogram: Mapped[Optional[List]] = mapped_column(JSONType)
+    digest: Mapped[Optional[Dict]] = mapped_column(JSONType)
+
+    updated_at: Mapped[datetime] = updated_at_column()
+
+
+class TimelinePoint(Base):
+    """
+    治疗时间线上的一个随访点
+
+    随访照片配准到术前照片后的本地指标，每张随访照片只计算一次；
+    术前照片更换后（before_photo_id 不同）重新计算
+    """
+    __tablename__ = "timeline_points"
+    __table_args__ = (
+        Index("idx_timeline_treatment_angle", "treatment_id", "photo_angle", "days_elapsed"),
+    )
+
+    photo_id: Mapped[uuid.UUID] = mapped_column(
+        Uuid, ForeignKey("photos.id", ondelete="CASCADE"), primary_key=True
+    )
+    before_photo_id: Mapped[uuid.UUID] = mapped_column(
+        Uuid, ForeignKey("photos.id", ondelete="CASCADE"), primary_key=True
+    )
+    treatment_id: Mapped[uuid.UUID] = mapped_column(
+        Uuid, ForeignKey("treatments.id", ondelete="CASCADE")
+    )
+
+    photo_type: Mapped[str] = mapped_column(String(50))
+    photo_angle: Mapped[str] = mapped_column(String(50))
+    days_elapsed: Mapped[int] = mapped_column(Integer)
+
+    overall_improvement: Mapped[Optional[float]] = mapped_column(Numeric(6, 2, asdecimal=False))
+    comparability_score: Mapped[Optional[float]] = mapped_column(Numeric(3, 2, asdecimal=False))
+    metrics: Mapped[Optional[List]] = mapped_column(JSONType)  # extract_metrics 的指标行
+
+    created_at: Mapped[datetime] = created_at_column()
+
+    def to_dict(self) -> Dict:
+        return {
+            "photo_id": str(self.photo_id),
+            "photo_type": self.photo_type,
+            "days_elapsed": self.days_elapsed,
+            "overall_improvement": self.overall_improvement,
+            "comparability_score": self.comparability_score,
+            "metrics": self.metrics,
+        }
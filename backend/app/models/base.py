@@ -0,0 +1,48 @@
+"""
+ORM 基类和可移植类型
+模型与 database/schema.sql 保持一致；JSONB / 数组在 SQLite 上退化为 JSON，便于本地测试
+"""
+
+import uuid
+from datetime import datetime, timezone
+
+from sqlalchemy import JSON, DateTime, Text, Uuid, func
+from sqlalchemy.dialects.postgresql import ARRAY, JSONB
+from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column
+
+
+# PostgreSQL 使用 JSONB / TEXT[]，其他数据库使用 JSON
+JSONType = JSON().with_variant(JSONB(), "postgresql")
+StringArray = JSON().with_variant(ARRAY(Text()), "postgresql")
+
+
+class Base(DeclarativeBase):
+    """ORM 基类"""
+
+    def to_dict(self) -> dict:
+        """转换为字典（列名 -> 值）"""
+        return {column.key: getattr(self, column.key) for column in self.__mapper__.column_attrs}
+
+
+def uuid_pk() -> Mapped[uuid.UUID]:
+    """UUID 主键（应用侧生成，兼容 SQLite）"""
+    return mapped_column(Uuid, primary_key=True, default=uuid.uuid4)
+
+
+def utc_now() -> datetime:
+    """当前 UTC 时间（naive，精确到微秒）"""
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+def created_at_column() -> Mapped[datetime]:
+    """
+    创建时间（游标分页的排序键）
+
+    由应用侧写入微秒精度的时间：SQLite 的 CURRENT_TIMESTAMP 只精确到秒且以文本保存，
+    同一秒内创建的行与游标比较时会全部小于游标，翻页重复；server_default 只用于直接写 SQL 的插入
+    """
+    return mapped_column(DateTime, default=utc_now, server_default=func.now())
+
+
+def updated_at_column() -> Mapped[datetime]:
+    return mapped_column(DateTime, server_default=func.now(), onupdate=func.now())
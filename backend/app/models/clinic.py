@@ -0,0 +1,67 @@
+"""
+诊所 / 医生模型
+"""
+
+import uuid
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import Boolean, DateTime, ForeignKey, Integer, Numeric, String, Text, Uuid
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.models.base import Base, uuid_pk, created_at_column, updated_at_column
+
+
+class Clinic(Base):
+    """诊所"""
+    __tablename__ = "clinics"
+
+    id: Mapped[uuid.UUID] = uuid_pk()
+    name: Mapped[str] = mapped_column(String(255))
+    email: Mapped[str] = mapped_column(String(255), unique=True, index=True)
+    phone: Mapped[Optional[str]] = mapped_column(String(50))
+    address: Mapped[Optional[str]] = mapped_column(Text)
+
+    # 品牌设置
+    logo_url: Mapped[Optional[str]] = mapped_column(Text)
+    brand_color: Mapped[Optional[str]] = mapped_column(String(20), default="#4F46E5")
+
+    # 订阅信息
+    subscription_tier: Mapped[str] = mapped_column(String(50), default="starter")
+    subscription_status: Mapped[str] = mapped_column(String(50), default="active", index=True)
+    subscription_start_date: Mapped[Optional[datetime]] = mapped_column(DateTime)
+    subscription_end_date: Mapped[Optional[datetime]] = mapped_column(DateTime)
+
+    # 配额
+    monthly_analysis_limit: Mapped[int] = mapped_column(Integer, default=50)
+    analysis_count_current_month: Mapped[int] = mapped_column(Integer, default=0)
+
+    # 分析策略（为空时使用全局默认值）
+    analysis_mode: Mapped[Optional[str]] = mapped_column(String(20))  # claude, hybrid, local
+    claude_escalation_threshold: Mapped[Optional[float]] = mapped_column(Numeric(5, 1, asdecimal=False))
+
+    created_at: Mapped[datetime] = created_at_column()
+    updated_at: Mapped[datetime] = updated_at_column()
+
+
+class Provider(Base):
+    """医生 / 员工"""
+    __tablename__ = "providers"
+
+    id: Mapped[uuid.UUID] = uuid_pk()
+    clinic_id: Mapped[Optional[uuid.UUID]] = mapped_column(
+        Uuid, ForeignKey("clinics.id", ondelete="CASCADE"), index=True
+    )
+
+    first_name: Mapped[str] = mapped_column(String(100))
+    last_name: Mapped[str] = mapped_column(String(100))
+    email: Mapped[str] = mapped_column(String(255), unique=True, index=True)
+    phone: Mapped[Optional[str]] = mapped_column(String(50))
+
+    role: Mapped[str] = mapped_column(String(50))  # doctor, nurse, admin, staff
+    specialization: Mapped[Optional[str]] = mapped_column(String(100))
+    license_number: Mapped[Optional[str]] = mapped_column(String(100))
+    is_active: Mapped[bool] = mapped_column(Boolean, default=True)
+
+    created_at: Mapped[datetime] = created_at_column()
+    updated_at: Mapped[datetime] = updated_at_column()
@@ -0,0 +1,94 @@
+"""
+满意度评分 / 活动日志模型
+"""
+
+import uuid
+from datetime import datetime
+from typing import Dict, Optional
+
+from sqlalchemy import Boolean, CheckConstraint, DateTime, ForeignKey, Integer, String, Text, Uuid, func
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.models.base import Base, JSONType, uuid_pk, created_at_column
+
+
+def _rating_check(column: str, low: int = 1, high: int = 10) -> CheckConstraint:
+    return CheckConstraint(f"{column} >= {low} AND {column} <= {high}")
+
+
+class SatisfactionRating(Base):
+    """患者满意度评分"""
+    __tablename__ = "satisfaction_ratings"
+    __table_args__ = (
+        _rating_check("overall_rating"),
+        _rating_check("treatment_effectiveness_rating"),
+        _rating_check("staff_friendliness_rating"),
+        _rating_check("clinic_cleanliness_rating"),
+        _rating_check("value_for_money_rating"),
+        _rating_check("likelihood_to_recommend", 0, 10),
+    )
+
+    id: Mapped[uuid.UUID] = uuid_pk()
+    treatment_id: Mapped[Optional[uuid.UUID]] = mapped_column(
+        Uuid, ForeignKey("treatments.id", ondelete="CASCADE"), index=True
+    )
+    patient_id: Mapped[Optional[uuid.UUID]] = mapped_column(
+        Uuid, ForeignKey("patients.id", ondelete="CASCADE"), index=True
+    )
+    clinic_id: Mapped[Optional[uuid.UUID]] = mapped_column(
+        Uuid, ForeignKey("clinics.id", ondelete="CASCADE"), index=True
+    )
+
+    # 评分（1-10）
+    overall_rating: Mapped[Optional[int]] = mapped_column(Integer, index=True)
+    treatment_effectiveness_rating: Mapped[Optional[int]] = mapped_column(Integer)
+    staff_friendliness_rating: Mapped[Optional[int]] = mapped_column(Integer)
+    clinic_cleanliness_rating: Mapped[Optional[int]] = mapped_column(Integer)
+    value_for_money_rating: Mapped[Optional[int]] = mapped_column(Integer)
+
+    # NPS
+    would_recommend: Mapped[Optional[bool]] = mapped_column(Boolean)
+    likelihood_to_recommend: Mapped[Optional[int]] = mapped_column(Integer)
+
+    # 反馈
+    positive_feedback: Mapped[Optional[str]] = mapped_column(Text)
+    negative_feedback: Mapped[Optional[str]] = mapped_column(Text)
+    suggestions: Mapped[Optional[str]] = mapped_column(Text)
+
+    # 效果可见性
+    can_see_difference: Mapped[Optional[bool]] = mapped_column(Boolean)
+    met_expectations: Mapped[Optional[bool]] = mapped_column(Boolean)
+
+    # 社交媒体意愿
+    willing_to_share: Mapped[bool] = mapped_column(Boolean, default=False)
+    shared_on_social_media: Mapped[bool] = mapped_column(Boolean, default=False)
+
+    rated_at: Mapped[datetime] = mapped_column(DateTime, server_default=func.now())
+    created_at: Mapped[datetime] = created_at_column()
+
+
+class ActivityLog(Base):
+    """系统活动日志"""
+    __tablename__ = "activity_logs"
+
+    id: Mapped[uuid.UUID] = uuid_pk()
+    clinic_id: Mapped[Optional[uuid.UUID]] = mapped_column(
+        Uuid, ForeignKey("clinics.id", ondelete="CASCADE"), index=True
+    )
+    user_id: Mapped[Optional[uuid.UUID]] = mapped_column(Uuid, index=True)
+
+    # 活动信息
+    activity_type: Mapped[str] = mapped_column(String(100), index=True)
+    entity_type: Mapped[Optional[str]] = mapped_column(String(50))
+    entity_id: Mapped[Optional[uuid.UUID]] = mapped_column(Uuid)
+
+    # 详情（metadata 为 Declarative 保留名，属性名使用 details）
+    description: Mapped[Optional[str]] = mapped_column(Text)
+    details: Mapped[Optional[Dict]] = mapped_column("metadata", JSONType)
+
+    # IP和设备
+    ip_address: Mapped[Optional[str]] = mapped_column(String(50))
+    user_agent: Mapped[Optional[str]] = mapped_column(Text)
+    device_type: Mapped[Optional[str]] = mapped_column(String(50))
+
+    created_at: Mapped[datetime] = mapped_column(DateTime, server_default=func.now(), index=True)
@@ -0,0 +1,116 @@
+"""
+患者 / 治疗记录模型
+"""
+
+import uuid
+from datetime import date, datetime
+from typing import List, Optional
+
+from sqlalchemy import (
+    Boolean, Date, ForeignKey, Index, Integer, Numeric, String, Text, UniqueConstraint, Uuid
+)
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.models.base import Base, StringArray, uuid_pk, created_at_column, updated_at_column
+
+
+class Patient(Base):
+    """患者"""
+    __tablename__ = "patients"
+    __table_args__ = (
+        # 确保同一诊所内 patient_id 唯一
+        UniqueConstraint("clinic_id", "patient_id"),
+        # 游标分页
+        Index("idx_patients_clinic_created", "clinic_id", "created_at", "id"),
+    )
+
+    id: Mapped[uuid.UUID] = uuid_pk()
+    clinic_id: Mapped[Optional[uuid.UUID]] = mapped_column(
+        Uuid, ForeignKey("clinics.id", ondelete="CASCADE")
+    )
+
+    # 基本信息
+    patient_id: Mapped[Optional[str]] = mapped_column(String(100))  # 诊所内部ID
+    first_name: Mapped[str] = mapped_column(String(100))
+    last_name: Mapped[str] = mapped_column(String(100))
+    date_of_birth: Mapped[Optional[date]] = mapped_column(Date)
+    gender: Mapped[Optional[str]] = mapped_column(String(20))
+    email: Mapped[Optional[str]] = mapped_column(String(255), index=True)
+    phone: Mapped[Optional[str]] = mapped_column(String(50), index=True)
+
+    # 医疗信息
+    skin_type: Mapped[Optional[str]] = mapped_column(String(50))
+    skin_concerns: Mapped[Optional[List[str]]] = mapped_column(StringArray)
+    allergies: Mapped[Optional[str]] = mapped_column(Text)
+    medical_history: Mapped[Optional[str]] = mapped_column(Text)
+
+    # 偏好设置
+    marketing_consent: Mapped[bool] = mapped_column(Boolean, default=False)
+    social_share_consent: Mapped[bool] = mapped_column(Boolean, default=False)
+    email_notifications: Mapped[bool] = mapped_column(Boolean, default=True)
+    sms_notifications: Mapped[bool] = mapped_column(Boolean, default=False)
+
+    privacy_level: Mapped[str] = mapped_column(String(50), default="standard")
+    is_active: Mapped[bool] = mapped_column(Boolean, default=True)
+
+    created_at: Mapped[datetime] = created_at_column()
+    updated_at: Mapped[datetime] = updated_at_column()
+
+
+class Treatment(Base):
+    """治疗记录"""
+    __tablename__ = "treatments"
+    __table_args__ = (
+        # 游标分页
+        Index("idx_treatments_patient_created", "patient_id", "created_at", "id"),
+        # patient_stats 触发器重新计算 MAX(treatment_date)
+        Index("idx_treatments_patient_date", "patient_id", "treatment_date"),
+    )
+
+    id: Mapped[uuid.UUID] = uuid_pk()
+    patient_id: Mapped[Optional[uuid.UUID]] = mapped_column(
+        Uuid, ForeignKey("patients.id", ondelete="CASCADE")
+    )
+    provider_id: Mapped[Optional[uuid.UUID]] = mapped_column(
+        Uuid, ForeignKey("providers.id"), index=True
+    )
+    clinic_id: Mapped[Optional[uuid.UUID]] = mapped_column(
+        Uuid, ForeignKey("clinics.id", ondelete="CASCADE"), index=True
+    )
+
+    # 治疗信息
+    treatment_date: Mapped[date] = mapped_column(Date, index=True)
+    treatment_type: Mapped[str] = mapped_column(String(100), index=True)
+    treatment_area: Mapped[Optional[str]] = mapped_column(String(100))
+    treatment_subtype: Mapped[Optional[str]] = mapped_column(String(100))
+
+    # 产品信息
+    product_name: Mapped[Optional[str]] = mapped_column(String(100))
+    product_brand: Mapped[Optional[str]] = mapped_column(String(100))
+    product_amount: Mapped[Optional[str]] = mapped_column(String(50))
+    batch_number: Mapped[Optional[str]] = mapped_column(String(100))
+
+    # 治疗细节
+    injection_points: Mapped[Optional[int]] = mapped_column(Integer)
+    dilution_ratio: Mapped[Optional[str]] = mapped_column(String(50))
+    technique: Mapped[Optional[str]] = mapped_column(String(100))
+
+    # 费用
+    cost: Mapped[Optional[float]] = mapped_column(Numeric(10, 2, asdecimal=False))
+    currency: Mapped[Optional[str]] = mapped_column(String(10), default="USD")
+
+    # 笔记
+    notes: Mapped[Optional[str]] = mapped_column(Text)
+    pre_treatment_notes: Mapped[Optional[str]] = mapped_column(Text)
+    post_treatment_instructions: Mapped[Optional[str]] = mapped_column(Text)
+
+    # 预期效果
+    expected_duration_days: Mapped[Optional[int]] = mapped_column(Integer)
+    expected_results: Mapped[Optional[str]] = mapped_column(Text)
+
+    # 后续
+    follow_up_date: Mapped[Optional[date]] = mapped_column(Date)
+    follow_up_completed: Mapped[bool] = mapped_column(Boolean, default=False)
+
+    created_at: Mapped[datetime] = created_at_column()
+    updated_at: Mapped[datetime] = updated_at_column()
@@ -0,0 +1,85 @@
+"""
+照片模型
+"""
+
+import uuid
+from datetime import datetime
+from typing import Dict, Optional
+
+from sqlalchemy import (
+    BigInteger, Boolean, DateTime, ForeignKey, Index, Integer, Numeric, String, Text, Uuid
+)
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.models.base import Base, JSONType, uuid_pk, created_at_column, updated_at_column
+
+
+class Photo(Base):
+    """
+    照片
+
+    original_url / processed_url / thumbnail_url 保存存储对象键，访问URL按需签名生成
+    """
+    __tablename__ = "photos"
+    __table_args__ = (
+        Index("idx_photos_type_angle", "photo_type", "photo_angle"),
+        # 游标分页
+        Index("idx_photos_treatment_created", "treatment_id", "created_at", "id"),
+        # 重复检测索引按诊所增量加载感知哈希
+        Index("idx_photos_clinic_created", "clinic_id", "created_at"),
+    )
+
+    id: Mapped[uuid.UUID] = uuid_pk()
+    treatment_id: Mapped[Optional[uuid.UUID]] = mapped_column(
+        Uuid, ForeignKey("treatments.id", ondelete="CASCADE")
+    )
+    patient_id: Mapped[Optional[uuid.UUID]] = mapped_column(
+        Uuid, ForeignKey("patients.id", ondelete="CASCADE"), index=True
+    )
+    clinic_id: Mapped[Optional[uuid.UUID]] = mapped_column(
+        Uuid, ForeignKey("clinics.id", ondelete="CASCADE")
+    )
+
+    # 照片类型
+    photo_type: Mapped[str] = mapped_column(String(50))  # before, after_2weeks, ...
+    photo_angle: Mapped[str] = mapped_column(String(50))  # front, left45, ...
+
+    # 文件信息
+    original_url: Mapped[str] = mapped_column(Text)
+    processed_url: Mapped[Optional[str]] = mapped_column(Text)
+    thumbnail_url: Mapped[Optional[str]] = mapped_column(Text)
+    content_sha256: Mapped[Optional[str]] = mapped_column(String(64))
+    file_size_bytes: Mapped[Optional[int]] = mapped_column(BigInteger)
+    image_width: Mapped[Optional[int]] = mapped_column(Integer)
+    image_height: Mapped[Optional[int]] = mapped_column(Integer)
+
+    # 重复检测：64 位感知哈希（按有符号 BIGINT 存储）及疑似重复的已有照片
+    phash: Mapped[Optional[int]] = mapped_column(BigInteger)
+    duplicate_of_id: Mapped[Optional[uuid.UUID]] = mapped_column(
+        Uuid, ForeignKey("photos.id", ondelete="SET NULL")
+    )
+
+    # 拍摄元数据
+    capture_distance: Mapped[Optional[float]] = mapped_column(Numeric(5, 2, asdecimal=False))
+    lighting_score: Mapped[Optional[float]] = mapped_column(Numeric(3, 2, asdecimal=False))
+    alignment_score: Mapped[Optional[float]] = mapped_column(Numeric(3, 2, asdecimal=False))
+    sharpness_score: Mapped[Optional[float]] = mapped_column(Numeric(3, 2, asdecimal=False))
+
+    # 相机信息
+    camera_model: Mapped[Optional[str]] = mapped_column(String(100))
+    camera_settings: Mapped[Optional[Dict]] = mapped_column(JSONType)
+
+    # 人脸检测结果
+    face_detected: Mapped[bool] = mapped_column(Boolean, default=False)
+    face_landmarks: Mapped[Optional[Dict]] = mapped_column(JSONType)
+    face_bounding_box: Mapped[Optional[Dict]] = mapped_column(JSONType)
+    # 对齐后提取的单图特征（app.ai.features），照片对比只需特征算术
+    features: Mapped[Optional[Dict]] = mapped_column(JSONType)
+
+    # 环境信息
+    ambient_lighting: Mapped[Optional[str]] = mapped_column(String(50))
+    background_type: Mapped[Optional[str]] = mapped_column(String(50))
+
+    captured_at: Mapped[Optional[datetime]] = mapped_column(DateTime)
+    created_at: Mapped[datetime] = created_at_column()
+    updated_at: Mapped[datetime] = updated_at_column()
@@ -0,0 +1,77 @@
+"""
+报告模型
+"""
+
+import uuid
+from datetime import datetime
+from typing import List, Optional
+
+from sqlalchemy import BigInteger, Boolean, DateTime, ForeignKey, Integer, String, Text, Uuid, func
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.models.base import Base, StringArray, created_at_column
+
+
+class Report(Base):
+    """
+    报告
+
+    id 由报告请求内容决定（相同请求得到相同ID），file_url / thumbnail_url 保存存储对象键
+    """
+    __tablename__ = "reports"
+
+    id: Mapped[uuid.UUID] = mapped_column(Uuid, primary_key=True)
+    analysis_id: Mapped[Optional[uuid.UUID]] = mapped_column(
+        Uuid, ForeignKey("analysis_results.id", ondelete="CASCADE"), index=True
+    )
+    treatment_id: Mapped[Optional[uuid.UUID]] = mapped_column(
+        Uuid, ForeignKey("treatments.id", ondelete="CASCADE")
+    )
+    patient_id: Mapped[Optional[uuid.UUID]] = mapped_column(
+        Uuid, ForeignKey("patients.id", ondelete="CASCADE"), index=True
+    )
+    clinic_id: Mapped[Optional[uuid.UUID]] = mapped_column(
+        Uuid, ForeignKey("clinics.id", ondelete="CASCADE"), index=True
+    )
+
+    report_type: Mapped[str] = mapped_column(String(50))  # doctor, patient, social_media
+    report_format: Mapped[str] = mapped_column(String(50))  # pdf, html, image
+
+    # 文件信息
+    file_url: Mapped[str] = mapped_column(Text)
+    file_size_bytes: Mapped[Optional[int]] = mapped_column(BigInteger)
+    thumbnail_url: Mapped[Optional[str]] = mapped_column(Text)
+
+    # 分享信息
+    share_url: Mapped[Optional[str]] = mapped_column(Text, unique=True)
+    share_token: Mapped[Optional[str]] = mapped_column(String(100), unique=True, index=True)
+    is_public: Mapped[bool] = mapped_column(Boolean, default=False)
+    password_protected: Mapped[bool] = mapped_column(Boolean, default=False)
+    password_hash: Mapped[Optional[str]] = mapped_column(Text)
+
+    # 统计
+    view_count: Mapped[int] = mapped_column(Integer, default=0)
+    download_count: Mapped[int] = mapped_column(Integer, default=0)
+    share_count: Mapped[int] = mapped_column(Integer, default=0)
+
+    # 社交媒体分享追踪
+    shared_to_platforms: Mapped[Optional[List[str]]] = mapped_column(StringArray)
+    first_shared_at: Mapped[Optional[datetime]] = mapped_column(DateTime)
+    last_shared_at: Mapped[Optional[datetime]] = mapped_column(DateTime)
+
+    # 报告设置
+    include_patient_name: Mapped[bool] = mapped_column(Boolean, default=True)
+    include_treatment_details: Mapped[bool] = mapped_column(Boolean, default=True)
+    include_clinic_branding: Mapped[bool] = mapped_column(Boolean, default=True)
+    watermark_enabled: Mapped[bool] = mapped_column(Boolean, default=True)
+
+    # 隐私设置
+    blur_eyes: Mapped[bool] = mapped_column(Boolean, default=False)
+    anonymize_patient: Mapped[bool] = mapped_column(Boolean, default=False)
+
+    # 过期设置
+    expires_at: Mapped[Optional[datetime]] = mapped_column(DateTime)
+    is_expired: Mapped[bool] = mapped_column(Boolean, default=False)
+
+    generated_at: Mapped[datetime] = mapped_column(DateTime, server_default=func.now())
+    created_at: Mapped[datetime] = created_at_column()
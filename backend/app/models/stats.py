@@ -0,0 +1,267 @@
+"""
+统计汇总表
+由数据库触发器在源表 INSERT / UPDATE / DELETE 时增量维护，读取统计只需一次主键查询
+
+触发器定义由 CounterTrigger 生成：PostgreSQL 版本写在 database/schema.sql 中，
+create_all（SQLite 本地开发）时通过 metadata 的 after_create 事件创建
+"""
+
+import uuid
+from dataclasses import dataclass, field
+from datetime import date
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import DDL, Date, ForeignKey, Integer, Numeric, Uuid, event
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.models.base import Base
+
+
+def counter_column() -> Mapped[int]:
+    return mapped_column(Integer, default=0, server_default="0")
+
+
+class ClinicStats(Base):
+    """诊所统计（clinic_analytics 的物化版本）"""
+    __tablename__ = "clinic_stats"
+
+    clinic_id: Mapped[uuid.UUID] = mapped_column(
+        Uuid, ForeignKey("clinics.id", ondelete="CASCADE"), primary_key=True
+    )
+
+    total_patients: Mapped[int] = counter_column()
+    total_treatments: Mapped[int] = counter_column()
+    total_analyses: Mapped[int] = counter_column()
+    total_reports: Mapped[int] = counter_column()
+
+    # 满意度：保存计数和总和，平均值 / 比例在读取时计算
+    total_ratings: Mapped[int] = counter_column()
+    rated_count: Mapped[int] = counter_column()  # overall_rating 非空的评分数
+    rating_sum: Mapped[int] = counter_column()
+    recommend_count: Mapped[int] = counter_column()
+    social_share_count: Mapped[int] = counter_column()
+
+    def to_analytics(self) -> Dict:
+        """转换为 /clinics/{id}/analytics 的响应字段"""
+        def rate(value: int) -> Optional[float]:
+            return value / self.total_ratings * 100 if self.total_ratings else None
+
+        return {
+            "total_patients": self.total_patients,
+            "total_treatments": self.total_treatments,
+            "total_analyses": self.total_analyses,
+            "total_reports": self.total_reports,
+            "average_satisfaction": self.rating_sum / self.rated_count if self.rated_count else None,
+            "recommendation_rate": rate(self.recommend_count),
+            "social_share_rate": rate(self.social_share_count),
+        }
+
+
+class PatientStats(Base):
+    """患者治疗摘要（patient_treatment_summary 的物化版本）"""
+    __tablename__ = "patient_stats"
+
+    patient_id: Mapped[uuid.UUID] = mapped_column(
+        Uuid, ForeignKey("patients.id", ondelete="CASCADE"), primary_key=True
+    )
+
+    total_treatments: Mapped[int] = counter_column()
+    total_photos: Mapped[int] = counter_column()
+    total_analyses: Mapped[int] = counter_column()
+    last_treatment_date: Mapped[Optional[date]] = mapped_column(Date)
+    total_spent: Mapped[float] = mapped_column(
+        Numeric(12, 2, asdecimal=False), default=0, server_default="0"
+    )
+
+    rated_count: Mapped[int] = counter_column()
+    rating_sum: Mapped[int] = counter_column()
+
+    @property
+    def average_satisfaction(self) -> Optional[float]:
+        return self.rating_sum / self.rated_count if self.rated_count else None
+
+
+# ============================================
+# 触发器
+# ============================================
+
+@dataclass(frozen=True)
+class CounterTrigger:
+    """
+    源表上的一组计数器
+
+    counters 的值是每行的增量表达式，{row} 会被替换为 NEW / OLD；
+    INSERT 加上 NEW 的增量，DELETE 减去 OLD 的增量，
+    UPDATE（仅 key_column 或 columns 变化时）先减 OLD 再加 NEW
+
+    MAX 之类无法增量撤销的列放在 aggregates 中，每次按 {key}（受影响的统计行）重新计算，
+    表达式应能走索引
+    """
+    name: str
+    source: str
+    key_column: str
+    counters: Dict[str, str]
+    columns: Tuple[str, ...] = field(default=())
+    aggregates: Dict[str, str] = field(default_factory=dict)
+
+    def apply(self, target: str, target_key: str, row: str, sign: str) -> str:
+        key = f"{row}.{self.key_column}"
+        assignments = ", ".join(
+            [
+                f"{column} = {column} {sign} ({expression.format(row=row)})"
+                for column, expression in self.counters.items()
+            ] + [
+                f"{column} = {expression.format(key=key)}"
+                for column, expression in self.aggregates.items()
+            ]
+        )
+        return (
+            f"UPDATE {target} SET {assignments} "
+            f"WHERE {target_key} = {key}"
+        )
+
+    @property
+    def watched_columns(self) -> str:
+        return ", ".join((self.key_column,) + self.columns)
+
+
+@dataclass(frozen=True)
+class StatsTable:
+    """统计表及其触发器"""
+    table: str
+    key: str
+    seed_source: str  # 插入该表时创建统计行（key 取 NEW.id）
+    counters: List[CounterTrigger]
+
+    def postgresql_ddl(self) -> List[str]:
+        statements = [
+            f"CREATE OR REPLACE FUNCTION {self.table}_seed() RETURNS TRIGGER AS $$\n"
+            f"BEGIN\n"
+            f"  INSERT INTO {self.table} ({self.key}) VALUES (NEW.id);\n"
+            f"  RETURN NULL;\n"
+            f"END;\n"
+            f"$$ LANGUAGE plpgsql",
+            f"CREATE TRIGGER {self.table}_seed AFTER INSERT ON {self.seed_source}\n"
+            f"  FOR EACH ROW EXECUTE FUNCTION {self.table}_seed()",
+        ]
+        for trigger in self.counters:
+            statements.append(
+                f"CREATE OR REPLACE FUNCTION {trigger.name}() RETURNS TRIGGER AS $$\n"
+                f"BEGIN\n"
+                f"  IF TG_OP IN ('UPDATE', 'DELETE') THEN\n"
+                f"    {trigger.apply(self.table, self.key, 'OLD', '-')};\n"
+                f"  END IF;\n"
+                f"  IF TG_OP IN ('INSERT', 'UPDATE') THEN\n"
+                f"    {trigger.apply(self.table, self.key, 'NEW', '+')};\n"
+                f"  END IF;\n"
+                f"  RETURN NULL;\n"
+                f"END;\n"
+                f"$$ LANGUAGE plpgsql"
+            )
+            statements.append(
+                f"CREATE TRIGGER {trigger.name}\n"
+                f"  AFTER INSERT OR DELETE OR UPDATE OF {trigger.watched_columns} ON {trigger.source}\n"
+                f"  FOR EACH ROW EXECUTE FUNCTION {trigger.name}()"
+            )
+        return statements
+
+    def sqlite_ddl(self) -> List[str]:
+        statements = [
+            f"CREATE TRIGGER {self.table}_seed AFTER INSERT ON {self.seed_source} "
+            f"BEGIN INSERT INTO {self.table} ({self.key}) VALUES (NEW.id); END"
+        ]
+        for trigger in self.counters:
+            new = trigger.apply(self.table, self.key, "NEW", "+")
+            old = trigger.apply(self.table, self.key, "OLD", "-")
+            statements += [
+                f"CREATE TRIGGER {trigger.name}_insert AFTER INSERT ON {trigger.source} "
+                f"BEGIN {new}; END",
+                f"CREATE TRIGGER {trigger.name}_delete AFTER DELETE ON {trigger.source} "
+                f"BEGIN {old}; END",
+                f"CREATE TRIGGER {trigger.name}_update "
+                f"AFTER UPDATE OF {trigger.watched_columns} ON {trigger.source} "
+                f"BEGIN {old}; {new}; END",
+            ]
+        return statements
+
+
+CLINIC_STATS = StatsTable(
+    table="clinic_stats",
+    key="clinic_id",
+    seed_source="clinics",
+    counters=[
+        # 患者删除为软删除（is_active = false），只统计在册患者
+        CounterTrigger(
+            "clinic_stats_patients",
+            "patients",
+            "clinic_id",
+            {"total_patients": "CASE WHEN {row}.is_active THEN 1 ELSE 0 END"},
+            columns=("is_active",),
+        ),
+        CounterTrigger("clinic_stats_treatments", "treatments", "clinic_id", {"total_treatments": "1"}),
+        CounterTrigger("clinic_stats_analyses", "analysis_results", "clinic_id", {"total_analyses": "1"}),
+        CounterTrigger("clinic_stats_reports", "reports", "clinic_id", {"total_reports": "1"}),
+        CounterTrigger(
+            "clinic_stats_ratings",
+            "satisfaction_ratings",
+            "clinic_id",
+            {
+                "total_ratings": "1",
+                "rated_count": "CASE WHEN {row}.overall_rating IS NULL THEN 0 ELSE 1 END",
+                "rating_sum": "COALESCE({row}.overall_rating, 0)",
+                "recommend_count": "CASE WHEN {row}.would_recommend THEN 1 ELSE 0 END",
+                "social_share_count": "CASE WHEN {row}.shared_on_social_media THEN 1 ELSE 0 END",
+            },
+            columns=("overall_rating", "would_recommend", "shared_on_social_media"),
+        ),
+    ],
+)
+
+PATIENT_STATS = StatsTable(
+    table="patient_stats",
+    key="patient_id",
+    seed_source="patients",
+    counters=[
+        CounterTrigger(
+            "patient_stats_treatments",
+            "treatments",
+            "patient_id",
+            {
+                "total_treatments": "1",
+                "total_spent": "COALESCE({row}.cost, 0)",
+            },
+            columns=("cost", "treatment_date"),
+            aggregates={
+                "last_treatment_date": (
+                    "(SELECT MAX(treatment_date) FROM treatments WHERE patient_id = {key})"
+                ),
+            },
+        ),
+        CounterTrigger("patient_stats_photos", "photos", "patient_id", {"total_photos": "1"}),
+        CounterTrigger("patient_stats_analyses", "analysis_results", "patient_id", {"total_analyses": "1"}),
+        CounterTrigger(
+            "patient_stats_ratings",
+            "satisfaction_ratings",
+            "patient_id",
+            {
+                "rated_count": "CASE WHEN {row}.overall_rating IS NULL THEN 0 ELSE 1 END",
+                "rating_sum": "COALESCE({row}.overall_rating, 0)",
+            },
+            columns=("overall_rating",),
+        ),
+    ],
+)
+
+STATS_TABLES = [CLINIC_STATS, PATIENT_STATS]
+
+
+def _register_triggers() -> None:
+    """create_all 建表完成后创建触发器"""
+    for stats in STATS_TABLES:
+        for statement in stats.postgresql_ddl():
+            event.listen(Base.metadata, "after_create", DDL(statement).execute_if(dialect="postgresql"))
+        for statement in stats.sqlite_ddl():
+            event.listen(Base.metadata, "after_create", DDL(statement).execute_if(dialect="sqlite"))
+
+
+_register_triggers()
@@ -0,0 +1,36 @@
+"""
+数据访问层
+每张表一个仓储，仓储只负责读写，不提交事务（由调用方 commit）
+"""
+
+from app.repositories.base import BaseRepository, parse_id
+from app.repositories.pagination import Page, InvalidCursorError
+from app.repositories.stats import ClinicStatsRepository, PatientStatsRepository
+from app.repositories.clinics import ClinicRepository, ProviderRepository
+from app.repositories.patients import PatientRepository, TreatmentRepository
+from app.repositories.photos import PhotoRepository
+from app.repositories.analyses import AnalysisRepository
+from app.repositories.cohorts import CohortRepository
+from app.repositories.timeline import TimelineRepository
+from app.repositories.reports import ReportRepository
+from app.repositories.feedback import SatisfactionRatingRepository, ActivityLogRepository
+
+__all__ = [
+    "BaseRepository",
+    "parse_id",
+    "Page",
+    "InvalidCursorError",
+    "ClinicStatsRepository",
+    "PatientStatsRepository",
+    "ClinicRepository",
+    "ProviderRepository",
+    "PatientRepository",
+    "TreatmentRepository",
+    "PhotoRepository",
+    "AnalysisRepository",
+    "CohortRepository",
+    "TimelineRepository",
+    "ReportRepository",
+    "SatisfactionRatingRepository",
+    "ActivityLogRepository",
+]
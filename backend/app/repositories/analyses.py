@@ -0,0 +1,144 @@
+"""
+AI分析结果仓储
+"""
+
+import uuid
+from typing import Dict, List, Optional, Tuple, Union
+import logging
+
+from sqlalchemy import delete, inspect, select
+
+from app.ai.metrics import CATEGORIES, category_improvements, extract_metrics, overall_score
+from app.models import AnalysisMetric, AnalysisResult, Photo
+from app.repositories.base import BaseRepository
+from app.repositories.cohorts import OVERALL_METRIC, CohortRepository, analysis_values
+
+logger = logging.getLogger(__name__)
+
+
+class AnalysisRepository(BaseRepository[AnalysisResult]):
+    """分析结果仓储"""
+
+    model = AnalysisResult
+
+    async def create(self, **values) -> AnalysisResult:
+        """插入分析结果，同时写入类型化统计字段、analysis_metrics 和队列统计日汇总"""
+        metrics = extract_metrics(values.get("improvements"))
+        values = {**self._projection(values.get("improvements"), metrics), **values}
+
+        analysis = await super().create(**values)
+        if "analyzed_at" in inspect(analysis).unloaded:
+            # 不支持 RETURNING 的数据库需要回读服务端默认值
+            await self.session.refresh(analysis, ["analyzed_at"])
+        await self._write_metrics(analysis, metrics)
+        await CohortRepository(self.session).record(
+            analysis.clinic_id,
+            analysis.treatment_type,
+            analysis.analyzed_at.date(),
+            analysis_values(analysis, metrics)
+        )
+        return analysis
+
+    async def reproject(self, batch_size: int = 500) -> int:
+        """
+        重新计算所有分析结果的统计字段（提取规则变更 / 补齐历史数据时使用）
+
+        队列统计日汇总不会自动更新，之后需对相关诊所调用 CohortRepository.rebuild
+
+        Returns:
+            处理的分析结果数
+        """
+        total = 0
+        last_id = None
+        while True:
+            stmt = select(AnalysisResult).order_by(AnalysisResult.id).limit(batch_size)
+            if last_id is not None:
+                stmt = stmt.where(AnalysisResult.id > last_id)
+            batch = list(await self.session.scalars(stmt))
+            if not batch:
+                return total
+
+            for analysis in batch:
+                metrics = extract_metrics(analysis.improvements)
+                for key, value in self._projection(analysis.improvements, metrics).items():
+                    setattr(analysis, key, value)
+                await self._write_metrics(analysis, metrics, replace=True)
+
+            await self.session.flush()
+            total += len(batch)
+            last_id = batch[-1].id
+
+    @staticmethod
+    def _projection(improvements: Optional[Dict], metrics: List[Dict]) -> Dict:
+        categories = category_improvements(metrics)
+        comparability = improvements.get("comparability") if isinstance(improvements, dict) else None
+        return {
+            "overall_score": overall_score(improvements),
+            "comparability_score": comparability.get("score") if isinstance(comparability, dict) else None,
+            "wrinkles_improvement_pct": categories["wrinkles"],
+            "skin_quality_improvement_pct": categories["skin_quality"],
+            "contour_improvement_pct": categories["contour"],
+            "volume_improvement_pct": categories["volume"],
+        }
+
+    async def _write_metrics(
+        self,
+        analysis: AnalysisResult,
+        metrics: List[Dict],
+        replace: bool = False
+    ) -> None:
+        if replace:
+            await self.session.execute(
+                delete(AnalysisMetric).where(AnalysisMetric.analysis_id == analysis.id)
+            )
+        if not metrics:
+            return
+
+        # 同一分析内 (category, metric) 唯一，重复时保留最后一个
+        rows = {
+            (row["category"], row["metric"]): {
+                **row,
+                "analysis_id": analysis.id,
+                "clinic_id": analysis.clinic_id,
+                "treatment_type": analysis.treatment_type,
+                "analyzed_at": analysis.analyzed_at,
+            }
+            for row in metrics
+        }
+        await self.session.execute(AnalysisMetric.__table__.insert(), list(rows.values()))
+
+    async def metric_value(self, analysis: AnalysisResult, metric: str) -> Optional[float]:
+        """分析结果在某个队列统计指标上的取值（整体分数 / 分类 / 单项指标）"""
+        if metric == OVERALL_METRIC:
+            return analysis.overall_score
+        if metric in CATEGORIES:
+            return getattr(analysis, f"{metric}_improvement_pct")
+        return await self.session.scalar(
+            select(AnalysisMetric.improvement_pct).where(
+                AnalysisMetric.analysis_id == analysis.id,
+                AnalysisMetric.metric == metric,
+            )
+        )
+
+    async def list_for_treatment(self, treatment_id: uuid.UUID) -> List[AnalysisResult]:
+        stmt = (
+            select(AnalysisResult)
+            .where(AnalysisResult.treatment_id == treatment_id)
+            .order_by(AnalysisResult.analyzed_at.desc())
+        )
+        return list(await self.session.scalars(stmt))
+
+    async def get_with_photos(
+        self,
+        analysis_id: Union[str, uuid.UUID]
+    ) -> Optional[Tuple[AnalysisResult, Photo, Photo]]:
+        """获取分析结果及其术前、术后照片，不存在时返回 None"""
+        analysis = await self.get(analysis_id)
+        if analysis is None:
+            return None
+
+        before = await self.session.get(Photo, analysis.before_photo_id)
+        after = await self.session.get(Photo, analysis.after_photo_id)
+        if before is None or after is None:
+            return None
+        return analysis, before, after
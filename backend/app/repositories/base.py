@@ -0,0 +1,177 @@
+"""
+仓储基类
+封装单表的增删改查，以及批量插入 / 批量 upsert
+"""
+
+import uuid
+from typing import Any, Dict, Generic, Iterable, List, Optional, Sequence, Type, TypeVar, Union
+import logging
+
+from sqlalchemy import delete, func, insert, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models import Base
+
+logger = logging.getLogger(__name__)
+
+
+ModelT = TypeVar("ModelT", bound=Base)
+
+# 单条 INSERT 语句的最大行数（PostgreSQL 参数上限 65535）
+BULK_BATCH_SIZE = 1000
+
+
+def parse_id(value: Union[str, uuid.UUID, None]) -> Optional[uuid.UUID]:
+    """解析 UUID，格式不正确时返回 None"""
+    if value is None or isinstance(value, uuid.UUID):
+        return value
+    try:
+        return uuid.UUID(str(value))
+    except ValueError:
+        return None
+
+
+def _dialect_insert(session: AsyncSession, table):
+    """按当前数据库方言选择支持 ON CONFLICT 的 insert"""
+    dialect = session.bind.dialect.name
+    if dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert as dialect_insert
+    elif dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert as dialect_insert
+    else:
+        raise NotImplementedError(f"Upsert is not supported on {dialect}")
+    return dialect_insert(table)
+
+
+def _batches(rows: Sequence[Dict], size: int) -> Iterable[Sequence[Dict]]:
+    for start in range(0, len(rows), size):
+        yield rows[start:start + size]
+
+
+class BaseRepository(Generic[ModelT]):
+    """单表仓储"""
+
+    model: Type[ModelT]
+
+    def __init__(self, session: AsyncSession):
+        self.session = session
+
+    # ---------- 查询 ----------
+
+    async def get(self, id: Union[str, uuid.UUID]) -> Optional[ModelT]:
+        """按主键获取，ID格式不正确时返回 None"""
+        pk = parse_id(id)
+        if pk is None:
+            return None
+        return await self.session.get(self.model, pk)
+
+    async def list_by(
+        self,
+        skip: int = 0,
+        limit: int = 100,
+        order_by: Any = None,
+        **filters
+    ) -> List[ModelT]:
+        """按列等值过滤"""
+        stmt = select(self.model).filter_by(**filters)
+        if order_by is not None:
+            stmt = stmt.order_by(order_by)
+        stmt = stmt.offset(skip).limit(limit)
+        result = await self.session.scalars(stmt)
+        return list(result)
+
+    async def count_by(self, **filters) -> int:
+        """按列等值过滤计数"""
+        stmt = select(func.count()).select_from(self.model).filter_by(**filters)
+        return await self.session.scalar(stmt)
+
+    # ---------- 写入 ----------
+
+    async def create(self, **values) -> ModelT:
+        """插入一行并返回对象（未提交）"""
+        obj = self.model(**values)
+        self.session.add(obj)
+        await self.session.flush()
+        return obj
+
+    async def update(self, id: Union[str, uuid.UUID], **values) -> Optional[ModelT]:
+        """按主键更新，返回更新后的对象，不存在时返回 None"""
+        obj = await self.get(id)
+        if obj is None:
+            return None
+        for key, value in values.items():
+            setattr(obj, key, value)
+        await self.session.flush()
+        return obj
+
+    async def delete(self, id: Union[str, uuid.UUID]) -> bool:
+        """按主键删除，返回是否删除了记录"""
+        pk = parse_id(id)
+        if pk is None:
+            return False
+        result = await self.session.execute(delete(self.model).where(self.model.id == pk))
+        return result.rowcount > 0
+
+    async def update_where(self, values: Dict, **filters) -> int:
+        """按列等值过滤批量更新，返回影响行数"""
+        stmt = update(self.model).filter_by(**filters).values(**values)
+        result = await self.session.execute(stmt)
+        return result.rowcount
+
+    # ---------- 批量 ----------
+
+    async def bulk_insert(self, rows: Sequence[Dict], batch_size: int = BULK_BATCH_SIZE) -> int:
+        """
+        批量插入（executemany，按批次发送）
+
+        Args:
+            rows: 行数据列表
+            batch_size: 每批行数
+
+        Returns:
+            插入行数
+        """
+        if not rows:
+            return 0
+
+        for batch in _batches(rows, batch_size):
+            await self.session.execute(insert(self.model), list(batch))
+        return len(rows)
+
+    async def upsert(
+        self,
+        rows: Sequence[Dict],
+        conflict_columns: Sequence[str] = ("id",),
+        update_columns: Optional[Sequence[str]] = None,
+        batch_size: int = BULK_BATCH_SIZE
+    ) -> int:
+        """
+        批量 upsert（INSERT ... ON CONFLICT DO UPDATE）
+
+        Args:
+            rows: 行数据列表
+            conflict_columns: 唯一约束列
+            update_columns: 冲突时更新的列，默认更新除冲突列以外的所有给定列
+            batch_size: 每批行数
+
+        Returns:
+            处理行数
+        """
+        if not rows:
+            return 0
+
+        if update_columns is None:
+            update_columns = [key for key in rows[0] if key not in conflict_columns]
+
+        table = self.model.__table__
+        for batch in _batches(rows, batch_size):
+            stmt = _dialect_insert(self.session, table).values(list(batch))
+            if update_columns:
+                stmt = stmt.on_conflict_do_update(
+                    index_elements=list(conflict_columns),
+                    set_={column: stmt.excluded[column] for column in update_columns}
+                )
+            else:
+                stmt = stmt.on_conflict_do_nothing(index_elements=list(conflict_columns))
+            await self.session.execute(stmt)
+        return len(rows)
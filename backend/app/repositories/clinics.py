@@ -0,0 +1,39 @@
+"""
+诊所 / 医生仓储
+"""
+
+import uuid
+from typing import Dict, Optional
+import logging
+
+from sqlalchemy import select
+
+from app.models import Clinic, Provider
+from app.repositories.base import BaseRepository
+from app.repositories.stats import ClinicStatsRepository
+
+logger = logging.getLogger(__name__)
+
+
+class ClinicRepository(BaseRepository[Clinic]):
+    """诊所仓储"""
+
+    model = Clinic
+
+    async def get_by_email(self, email: str) -> Optional[Clinic]:
+        return await self.session.scalar(select(Clinic).where(Clinic.email == email))
+
+    async def analytics(self, clinic_id: uuid.UUID) -> Dict:
+        """
+        诊所统计（读取触发器维护的 clinic_stats，一次主键查询）
+
+        统计行缺失（触发器上线前创建的诊所）时先从源表重建
+        """
+        stats = await ClinicStatsRepository(self.session).get_many([clinic_id])
+        return stats[clinic_id].to_analytics()
+
+
+class ProviderRepository(BaseRepository[Provider]):
+    """医生仓储"""
+
+    model = Provider
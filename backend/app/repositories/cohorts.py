@@ -0,0 +1,206 @@
+"""
+队列统计日汇总仓储
+新分析写入时增量更新当天的汇总行；rebuild 从 analysis_results / analysis_metrics 重新计算
+"""
+
+import uuid
+from collections import defaultdict
+from datetime import date
+from typing import Dict, Iterable, List, Optional, Tuple
+import logging
+
+from sqlalchemy import delete, select
+
+from app.ai.metrics import CATEGORIES
+from app.models import AnalysisMetric, AnalysisResult, AnalysisRollup
+from app.repositories.base import BaseRepository
+from app.services.sketch import Histogram, QuantileSketch
+
+logger = logging.getLogger(__name__)
+
+
+# 汇总表主键不允许为空，未指定治疗类型的分析归入该类型
+UNSPECIFIED_TREATMENT = "unspecified"
+
+# 整体分数在汇总表中的指标名（其余为分类名或单项指标名）
+OVERALL_METRIC = "overall_score"
+
+ROLLUP_KEY = ("clinic_id", "treatment_type", "metric", "day")
+
+
+def analysis_values(analysis: AnalysisResult, metrics: Iterable[Dict]) -> Dict[str, float]:
+    """
+    一次分析在汇总表中的各指标取值
+
+    Args:
+        analysis: 分析结果（已填充类型化统计字段）
+        metrics: extract_metrics 展开的指标行
+
+    Returns:
+        指标名 -> 改善百分比（整体分数为 0-100）
+    """
+    values = {}
+    if analysis.overall_score is not None:
+        values[OVERALL_METRIC] = float(analysis.overall_score)
+    for category in CATEGORIES:
+        value = getattr(analysis, f"{category}_improvement_pct")
+        if value is not None:
+            values[category] = float(value)
+    for row in metrics:
+        values[row["metric"]] = float(row["improvement_pct"])
+    return values
+
+
+class _Accumulator:
+    """单个汇总行的内存累加器"""
+
+    def __init__(self, rollup: Optional[AnalysisRollup] = None):
+        self.count = rollup.count if rollup else 0
+        self.total = rollup.total if rollup else 0.0
+        self.total_squares = rollup.total_squares if rollup else 0.0
+        self.min_value = rollup.min_value if rollup else None
+        self.max_value = rollup.max_value if rollup else None
+        self.histogram = Histogram(rollup.histogram if rollup else None)
+        self.digest = QuantileSketch.from_dict(rollup.digest if rollup else None)
+
+    def add(self, value: float) -> None:
+        self.count += 1
+        self.total += value
+        self.total_squares += value * value
+        self.min_value = value if self.min_value is None else min(self.min_value, value)
+        self.max_value = value if self.max_value is None else max(self.max_value, value)
+        self.histogram.add(value)
+        self.digest.add(value)
+
+    def values(self) -> Dict:
+        return {
+            "count": self.count,
+            "total": self.total,
+            "total_squares": self.total_squares,
+            "min_value": self.min_value,
+            "max_value": self.max_value,
+            "histogram": self.histogram.counts,
+            "digest": self.digest.to_dict(),
+        }
+
+
+class CohortRepository(BaseRepository[AnalysisRollup]):
+    """队列统计日汇总仓储"""
+
+    model = AnalysisRollup
+
+    async def record(
+        self,
+        clinic_id: Optional[uuid.UUID],
+        treatment_type: Optional[str],
+        day: date,
+        values: Dict[str, float]
+    ) -> None:
+        """
+        将一次分析计入当天的汇总行（与分析结果在同一事务中）
+
+        Args:
+            clinic_id: 诊所ID，未关联诊所的分析不计入
+            treatment_type: 治疗类型
+            day: 分析日期
+            values: 指标名 -> 取值
+        """
+        if clinic_id is None or not values:
+            return
+
+        treatment_type = treatment_type or UNSPECIFIED_TREATMENT
+        keys = [
+            {"clinic_id": clinic_id, "treatment_type": treatment_type, "metric": metric, "day": day}
+            for metric in values
+        ]
+        # 先确保汇总行存在，再加行锁读取，避免并发写入相互覆盖
+        await self.upsert(keys, conflict_columns=ROLLUP_KEY, update_columns=[])
+
+        stmt = (
+            select(AnalysisRollup)
+            .where(
+                AnalysisRollup.clinic_id == clinic_id,
+                AnalysisRollup.treatment_type == treatment_type,
+                AnalysisRollup.day == day,
+                AnalysisRollup.metric.in_(list(values)),
+            )
+            .with_for_update()
+            .execution_options(populate_existing=True)
+        )
+        for rollup in await self.session.scalars(stmt):
+            accumulator = _Accumulator(rollup)
+            accumulator.add(values[rollup.metric])
+            for key, value in accumulator.values().items():
+                setattr(rollup, key, value)
+
+        await self.session.flush()
+
+    async def load(
+        self,
+        clinic_id: uuid.UUID,
+        metric: str,
+        since: date,
+        treatment_type: Optional[str] = None
+    ) -> List[AnalysisRollup]:
+        """读取日期范围内的汇总行（按日期排序）"""
+        stmt = select(AnalysisRollup).where(
+            AnalysisRollup.clinic_id == clinic_id,
+            AnalysisRollup.metric == metric,
+            AnalysisRollup.day >= since,
+        )
+        if treatment_type is not None:
+            stmt = stmt.where(AnalysisRollup.treatment_type == treatment_type)
+        stmt = stmt.order_by(AnalysisRollup.day)
+        return list(await self.session.scalars(stmt))
+
+    async def rebuild(self, clinic_id: uuid.UUID) -> int:
+        """
+        从分析结果重新计算诊所的全部汇总行
+
+        分析结果被删除或 reproject 之后使用（摘要不支持减去已计入的值）
+
+        Returns:
+            写入的汇总行数
+        """
+        accumulators: Dict[Tuple[str, str, date], _Accumulator] = defaultdict(_Accumulator)
+
+        def add(treatment_type: Optional[str], metric: str, analyzed_at, value) -> None:
+            if value is None or analyzed_at is None:
+                return
+            key = (treatment_type or UNSPECIFIED_TREATMENT, metric, analyzed_at.date())
+            accumulators[key].add(float(value))
+
+        columns = [AnalysisResult.overall_score] + [
+            getattr(AnalysisResult, f"{category}_improvement_pct") for category in CATEGORIES
+        ]
+        stmt = select(AnalysisResult.treatment_type, AnalysisResult.analyzed_at, *columns).where(
+            AnalysisResult.clinic_id == clinic_id
+        )
+        for row in await self.session.execute(stmt):
+            treatment_type, analyzed_at, overall, *categories = row
+            add(treatment_type, OVERALL_METRIC, analyzed_at, overall)
+            for category, value in zip(CATEGORIES, categories):
+                add(treatment_type, category, analyzed_at, value)
+
+        stmt = select(
+            AnalysisMetric.treatment_type,
+            AnalysisMetric.metric,
+            AnalysisMetric.analyzed_at,
+            AnalysisMetric.improvement_pct,
+        ).where(AnalysisMetric.clinic_id == clinic_id)
+        for treatment_type, metric, analyzed_at, value in await self.session.execute(stmt):
+            add(treatment_type, metric, analyzed_at, value)
+
+        await self.session.execute(delete(AnalysisRollup).where(AnalysisRollup.clinic_id == clinic_id))
+
+        rows = [
+            {
+                "clinic_id": clinic_id,
+                "treatment_type": treatment_type,
+                "metric": metric,
+                "day": day,
+                **accumulator.values(),
+            }
+            for (treatment_type, metric, day), accumulator in accumulators.items()
+        ]
+        return await self.bulk_insert(rows)
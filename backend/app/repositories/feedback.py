@@ -0,0 +1,22 @@
+"""
+满意度评分 / 活动日志仓储
+"""
+
+import logging
+
+from app.models import ActivityLog, SatisfactionRating
+from app.repositories.base import BaseRepository
+
+logger = logging.getLogger(__name__)
+
+
+class SatisfactionRatingRepository(BaseRepository[SatisfactionRating]):
+    """满意度评分仓储"""
+
+    model = SatisfactionRating
+
+
+class ActivityLogRepository(BaseRepository[ActivityLog]):
+    """活动日志仓储（日志量大，写入优先使用 bulk_insert）"""
+
+    model = ActivityLog
@@ -0,0 +1,103 @@
+"""
+游标（keyset）分页
+按 (created_at, id) 倒序翻页：WHERE (created_at, id) < (游标) ORDER BY created_at DESC, id DESC，
+配合 (父ID, created_at, id) 复合索引，任意页的查询代价都与第一页相同
+"""
+
+import base64
+import json
+import uuid
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Generic, List, Optional, Tuple, TypeVar
+import logging
+
+from sqlalchemy import Select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+
+logger = logging.getLogger(__name__)
+
+
+T = TypeVar("T")
+
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+
+
+class InvalidCursorError(ValueError):
+    """游标格式不正确"""
+    pass
+
+
+@dataclass
+class Page(Generic[T]):
+    """一页结果"""
+    items: List[T]
+    next_cursor: Optional[str]
+
+
+def encode_cursor(created_at: datetime, id: uuid.UUID) -> str:
+    """将排序键编码为不透明的游标"""
+    payload = json.dumps({"t": created_at.isoformat(), "i": str(id)}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, uuid.UUID]:
+    """
+    解码游标
+
+    Raises:
+        InvalidCursorError: 游标被篡改或格式不正确
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        return datetime.fromisoformat(payload["t"]), uuid.UUID(payload["i"])
+    except (ValueError, KeyError, TypeError) as e:
+        raise InvalidCursorError(f"Invalid cursor: {str(e)}")
+
+
+def clamp_page_size(limit: Optional[int]) -> int:
+    """限制每页数量在 1 ~ MAX_PAGE_SIZE 之间"""
+    if not limit:
+        return DEFAULT_PAGE_SIZE
+    return max(1, min(limit, MAX_PAGE_SIZE))
+
+
+async def keyset_page(
+    session: AsyncSession,
+    stmt: Select,
+    model,
+    cursor: Optional[str] = None,
+    limit: Optional[int] = None
+) -> Page:
+    """
+    执行游标分页查询
+
+    Args:
+        session: 数据库会话
+        stmt: 已包含过滤条件的 select(model)
+        model: 带 created_at / id 列的模型
+        cursor: 上一页返回的 next_cursor，None 表示第一页
+        limit: 每页数量
+
+    Returns:
+        Page（next_cursor 为 None 表示没有更多数据）
+    """
+    limit = clamp_page_size(limit)
+
+    if cursor:
+        created_at, id = decode_cursor(cursor)
+        stmt = stmt.where(tuple_(model.created_at, model.id) < tuple_(created_at, id))
+
+    # 多取一条判断是否还有下一页
+    stmt = stmt.order_by(model.created_at.desc(), model.id.desc()).limit(limit + 1)
+    items = list(await session.scalars(stmt))
+
+    next_cursor = None
+    if len(items) > limit:
+        items = items[:limit]
+        last = items[-1]
+        next_cursor = encode_cursor(last.created_at, last.id)
+
+    return Page(items=items, next_cursor=next_cursor)
@@ -0,0 +1,58 @@
+"""
+患者 / 治疗记录仓储
+"""
+
+import uuid
+from typing import Dict, Optional, Sequence
+import logging
+
+from sqlalchemy import func, select
+
+from app.models import Patient, Photo, Treatment
+from app.repositories.base import BaseRepository
+from app.repositories.pagination import Page, keyset_page
+
+logger = logging.getLogger(__name__)
+
+
+class PatientRepository(BaseRepository[Patient]):
+    """患者仓储"""
+
+    model = Patient
+
+    async def page_for_clinic(
+        self,
+        clinic_id: uuid.UUID,
+        cursor: Optional[str] = None,
+        limit: Optional[int] = None
+    ) -> Page[Patient]:
+        """诊所的在册患者（按创建时间倒序，游标分页）"""
+        stmt = select(Patient).where(Patient.clinic_id == clinic_id, Patient.is_active.is_(True))
+        return await keyset_page(self.session, stmt, Patient, cursor, limit)
+
+
+class TreatmentRepository(BaseRepository[Treatment]):
+    """治疗记录仓储"""
+
+    model = Treatment
+
+    async def page_for_patient(
+        self,
+        patient_id: uuid.UUID,
+        cursor: Optional[str] = None,
+        limit: Optional[int] = None
+    ) -> Page[Treatment]:
+        """患者的治疗记录（按创建时间倒序，游标分页）"""
+        stmt = select(Treatment).where(Treatment.patient_id == patient_id)
+        return await keyset_page(self.session, stmt, Treatment, cursor, limit)
+
+    async def photo_counts(self, treatment_ids: Sequence[uuid.UUID]) -> Dict[uuid.UUID, int]:
+        """一次查询获取多个治疗的照片数量"""
+        if not treatment_ids:
+            return {}
+        stmt = (
+            select(Photo.treatment_id, func.count())
+            .where(Photo.treatment_id.in_(treatment_ids))
+            .group_by(Photo.treatment_id)
+        )
+        return dict((await self.session.execute(stmt)).all())
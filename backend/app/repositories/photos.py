@@ -0,0 +1,112 @@
+"""
+照片仓储
+"""
+
+import uuid
+from datetime import datetime
+from typing import Dict, List, Optional, Sequence, Tuple
+import logging
+
+from sqlalchemy import select
+
+from app.models import Photo
+from app.repositories.base import BaseRepository
+from app.repositories.pagination import Page, keyset_page
+
+logger = logging.getLogger(__name__)
+
+
+class PhotoRepository(BaseRepository[Photo]):
+    """照片仓储"""
+
+    model = Photo
+
+    async def page_for_treatment(
+        self,
+        treatment_id: uuid.UUID,
+        cursor: Optional[str] = None,
+        limit: Optional[int] = None
+    ) -> Page[Photo]:
+        """治疗的照片（按上传时间倒序，游标分页）"""
+        stmt = select(Photo).where(Photo.treatment_id == treatment_id)
+        return await keyset_page(self.session, stmt, Photo, cursor, limit)
+
+    async def angle_pairs(
+        self,
+        treatment_id: uuid.UUID,
+        after_photo_type: Optional[str] = None
+    ) -> Dict[str, Tuple[Photo, Photo]]:
+        """
+        治疗各角度最新的术前、术后照片
+
+        Args:
+            treatment_id: 治疗ID
+            after_photo_type: 术后照片类型（如 after_1month），不传时取最新的任一术后照片
+
+        Returns:
+            角度 -> (术前照片, 术后照片)，只包含两者都有的角度
+        """
+        stmt = (
+            select(Photo)
+            .where(Photo.treatment_id == treatment_id)
+            .order_by(Photo.created_at.desc(), Photo.id.desc())
+        )
+        before: Dict[str, Photo] = {}
+        after: Dict[str, Photo] = {}
+        for photo in await self.session.scalars(stmt):
+            if photo.photo_type == "before":
+                before.setdefault(photo.photo_angle, photo)
+            elif after_photo_type is None or photo.photo_type == after_photo_type:
+                after.setdefault(photo.photo_angle, photo)
+        return {angle: (before[angle], after[angle]) for angle in before if angle in after}
+
+    async def hashes_for_clinic(
+        self,
+        clinic_id: uuid.UUID,
+        since: Optional[datetime] = None
+    ) -> List[Tuple[uuid.UUID, int, datetime]]:
+        """
+        诊所照片的感知哈希（走 clinic_id + created_at 索引）
+
+        Args:
+            clinic_id: 诊所ID
+            since: 只返回该时间之后创建的照片，None 表示全部
+
+        Returns:
+            (照片ID, 哈希（有符号存储值）, 创建时间) 列表
+        """
+        stmt = select(Photo.id, Photo.phash, Photo.created_at).where(
+            Photo.clinic_id == clinic_id,
+            Photo.phash.is_not(None),
+        )
+        if since is not None:
+            stmt = stmt.where(Photo.created_at >= since)
+        return [tuple(row) for row in await self.session.execute(stmt)]
+
+    async def owners(self, ids: Sequence[uuid.UUID]) -> Dict[uuid.UUID, Tuple[Optional[uuid.UUID], Optional[uuid.UUID]]]:
+        """
+        照片所属的治疗和患者（一次主键 IN 查询，已删除的照片不在结果中）
+
+        Returns:
+            照片ID -> (治疗ID, 患者ID)
+        """
+        if not ids:
+            return {}
+        stmt = select(Photo.id, Photo.treatment_id, Photo.patient_id).where(Photo.id.in_(list(ids)))
+        return {id: (treatment_id, patient_id) for id, treatment_id, patient_id in await self.session.execute(stmt)}
+
+    async def missing_phash(self, after: Optional[uuid.UUID] = None, limit: int = 100) -> List[Photo]:
+        """尚未计算感知哈希的照片（按ID分批，补齐历史数据用）"""
+        stmt = select(Photo).where(Photo.phash.is_(None)).order_by(Photo.id).limit(limit)
+        if after is not None:
+            stmt = stmt.where(Photo.id > after)
+        return list(await self.session.scalars(stmt))
+
+    async def for_angle(self, treatment_id: uuid.UUID, photo_angle: str) -> List[Photo]:
+        """治疗某个角度的全部照片（按上传时间升序）"""
+        stmt = (
+            select(Photo)
+            .where(Photo.treatment_id == treatment_id, Photo.photo_angle == photo_angle)
+            .order_by(Photo.created_at, Photo.id)
+        )
+        return list(await self.session.scalars(stmt))
@@ -0,0 +1,22 @@
+"""
+报告仓储
+"""
+
+from typing import Optional
+import logging
+
+from sqlalchemy import select
+
+from app.models import Report
+from app.repositories.base import BaseRepository
+
+logger = logging.getLogger(__name__)
+
+
+class ReportRepository(BaseRepository[Report]):
+    """报告仓储"""
+
+    model = Report
+
+    async def get_by_share_token(self, share_token: str) -> Optional[Report]:
+        return await self.session.scalar(select(Report).where(Report.share_token == share_token))
@@ -0,0 +1,149 @@
+"""
+统计汇总表仓储
+统计行由数据库触发器增量维护（见 app/models/stats.py），这里只负责读取和从源表重建
+"""
+
+import uuid
+from abc import ABC, abstractmethod
+from typing import Dict, List, Optional, Sequence, Tuple
+import logging
+
+from sqlalchemy import func, select
+
+from app.models import (
+    AnalysisResult,
+    Clinic,
+    ClinicStats,
+    Patient,
+    PatientStats,
+    Photo,
+    Report,
+    SatisfactionRating,
+    Treatment,
+)
+from app.repositories.base import BaseRepository, ModelT
+
+logger = logging.getLogger(__name__)
+
+
+class StatsRepository(BaseRepository[ModelT], ABC):
+    """统计表仓储基类"""
+
+    parent = None  # 统计行对应的主表模型
+    key: str  # 统计表主键列（同时是源表中指向主表的列）
+
+    @abstractmethod
+    def sources(self) -> List[Tuple[type, Dict]]:
+        """源表及其聚合表达式（统计列 -> 聚合）"""
+
+    def _empty_row(self, id: uuid.UUID) -> Dict:
+        row = {}
+        for column in self.model.__table__.columns:
+            default = column.default.arg if column.default is not None else None
+            row[column.key] = default
+        row[self.key] = id
+        return row
+
+    async def rebuild(self, ids: Optional[Sequence[uuid.UUID]] = None) -> int:
+        """
+        从源表重新计算统计（全量校准 / 补齐历史数据）
+
+        每个源表单独 GROUP BY 聚合，避免多表 JOIN 后的行数膨胀。
+        重建与写入并发时结果可能偏差，建议在低峰期执行
+
+        Args:
+            ids: 指定主表ID，None 表示全部
+
+        Returns:
+            重建的统计行数
+        """
+        parent_ids = select(self.parent.id)
+        if ids is not None:
+            parent_ids = parent_ids.where(self.parent.id.in_(list(ids)))
+
+        rows = {id: self._empty_row(id) for id in await self.session.scalars(parent_ids)}
+        if not rows:
+            return 0
+
+        for model, aggregates in self.sources():
+            key_column = getattr(model, self.key)
+            stmt = select(key_column, *[value.label(name) for name, value in aggregates.items()])
+            if ids is not None:
+                stmt = stmt.where(key_column.in_(list(rows)))
+            stmt = stmt.where(key_column.is_not(None)).group_by(key_column)
+
+            for result in await self.session.execute(stmt):
+                values = result._asdict()
+                row = rows.get(values.pop(self.key))
+                if row is not None:
+                    row.update(values)
+
+        return await self.upsert(list(rows.values()), conflict_columns=(self.key,))
+
+    async def get_many(self, ids: Sequence[uuid.UUID]) -> Dict[uuid.UUID, ModelT]:
+        """
+        批量读取统计行（一次主键 IN 查询）
+
+        缺失的统计行（触发器上线前创建的数据）会先从源表重建，调用方需要 commit
+        """
+        if not ids:
+            return {}
+
+        key_column = getattr(self.model, self.key)
+        stmt = select(self.model).where(key_column.in_(list(ids)))
+        found = {getattr(stats, self.key): stats for stats in await self.session.scalars(stmt)}
+
+        missing = [id for id in ids if id not in found]
+        if missing:
+            logger.warning(f"{self.model.__tablename__} missing for {len(missing)} rows, rebuilding")
+            await self.rebuild(missing)
+            stmt = select(self.model).where(key_column.in_(missing))
+            found.update({getattr(stats, self.key): stats for stats in await self.session.scalars(stmt)})
+
+        return found
+
+
+class ClinicStatsRepository(StatsRepository[ClinicStats]):
+    """诊所统计仓储"""
+
+    model = ClinicStats
+    parent = Clinic
+    key = "clinic_id"
+
+    def sources(self) -> List[Tuple[type, Dict]]:
+        return [
+            (Patient, {"total_patients": func.count().filter(Patient.is_active.is_(True))}),
+            (Treatment, {"total_treatments": func.count()}),
+            (AnalysisResult, {"total_analyses": func.count()}),
+            (Report, {"total_reports": func.count()}),
+            (SatisfactionRating, {
+                "total_ratings": func.count(),
+                "rated_count": func.count(SatisfactionRating.overall_rating),
+                "rating_sum": func.coalesce(func.sum(SatisfactionRating.overall_rating), 0),
+                "recommend_count": func.count().filter(SatisfactionRating.would_recommend.is_(True)),
+                "social_share_count": func.count().filter(SatisfactionRating.shared_on_social_media.is_(True)),
+            }),
+        ]
+
+
+class PatientStatsRepository(StatsRepository[PatientStats]):
+    """患者治疗摘要仓储"""
+
+    model = PatientStats
+    parent = Patient
+    key = "patient_id"
+
+    def sources(self) -> List[Tuple[type, Dict]]:
+        return [
+            (Treatment, {
+                "total_treatments": func.count(),
+                "total_spent": func.coalesce(func.sum(Treatment.cost), 0),
+                "last_treatment_date": func.max(Treatment.treatment_date),
+            }),
+            (Photo, {"total_photos": func.count()}),
+            (AnalysisResult, {"total_analyses": func.count()}),
+            (SatisfactionRating, {
+                "rated_count": func.count(SatisfactionRating.overall_rating),
+                "rating_sum": func.coalesce(func.sum(SatisfactionRating.overall_rating), 0),
+            }),
+        ]
@@ -0,0 +1,42 @@
+"""
+治疗时间线仓储
+"""
+
+import uuid
+from typing import Dict, List, Sequence
+import logging
+
+from sqlalchemy import select
+
+from app.models import TimelinePoint
+from app.repositories.base import BaseRepository
+
+logger = logging.getLogger(__name__)
+
+
+class TimelineRepository(BaseRepository[TimelinePoint]):
+    """时间线随访点仓储（主键为 照片ID + 术前照片ID）"""
+
+    model = TimelinePoint
+
+    async def for_angle(
+        self,
+        treatment_id: uuid.UUID,
+        photo_angle: str,
+        before_photo_id: uuid.UUID
+    ) -> List[TimelinePoint]:
+        """以指定术前照片为基准的随访点（按天数升序）"""
+        stmt = (
+            select(TimelinePoint)
+            .where(
+                TimelinePoint.treatment_id == treatment_id,
+                TimelinePoint.photo_angle == photo_angle,
+                TimelinePoint.before_photo_id == before_photo_id,
+            )
+            .order_by(TimelinePoint.days_elapsed, TimelinePoint.photo_id)
+        )
+        return list(await self.session.scalars(stmt))
+
+    async def add_points(self, rows: Sequence[Dict]) -> int:
+        """写入新随访点（并发请求已写入的点保持不变）"""
+        return await self.upsert(rows, conflict_columns=("photo_id", "before_photo_id"), update_columns=())
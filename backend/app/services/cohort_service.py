@@ -0,0 +1,165 @@
+"""
+队列统计服务
+合并日汇总行得到分位数、直方图和趋势；结果按诊所的分析总数（clinic_stats.total_analyses）
+作为版本缓存，新分析写入后版本变化，所有进程的缓存自然失效
+"""
+
+import math
+import threading
+import uuid
+from collections import OrderedDict
+from datetime import date, timedelta
+from typing import Dict, List, Optional, Tuple
+import logging
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.models import AnalysisRollup
+from app.repositories import ClinicStatsRepository, CohortRepository
+from app.services.sketch import Histogram, QuantileSketch
+
+logger = logging.getLogger(__name__)
+
+
+PERCENTILES = [10, 25, 50, 75, 90]
+TREND_INTERVALS = ("day", "week", "month")
+
+
+def period_start(day: date, interval: str) -> date:
+    """日期所在统计周期的第一天"""
+    if interval == "week":
+        return day - timedelta(days=day.weekday())
+    if interval == "month":
+        return day.replace(day=1)
+    return day
+
+
+def _round(value: Optional[float]) -> Optional[float]:
+    return round(value, 2) if value is not None else None
+
+
+def summarize(rollups: List[AnalysisRollup], interval: str = "week") -> Tuple[Dict, QuantileSketch]:
+    """
+    合并日汇总行
+
+    Args:
+        rollups: 汇总行（可跨治疗类型）
+        interval: 趋势的统计周期（day / week / month）
+
+    Returns:
+        (统计结果, 合并后的分位数摘要)
+    """
+    sketch = QuantileSketch()
+    histogram = Histogram()
+    count, total, total_squares = 0, 0.0, 0.0
+
+    periods: "OrderedDict[date, Dict]" = OrderedDict()
+    for rollup in rollups:
+        digest = QuantileSketch.from_dict(rollup.digest)
+        sketch.merge(digest)
+        histogram.merge(Histogram(rollup.histogram))
+        count += rollup.count
+        total += rollup.total
+        total_squares += rollup.total_squares
+
+        period = periods.setdefault(
+            period_start(rollup.day, interval),
+            {"count": 0, "total": 0.0, "sketch": QuantileSketch()}
+        )
+        period["count"] += rollup.count
+        period["total"] += rollup.total
+        period["sketch"].merge(digest)
+
+    mean = total / count if count else None
+    stddev = None
+    if count > 1:
+        variance = (total_squares - total * total / count) / (count - 1)
+        stddev = math.sqrt(max(variance, 0.0))
+
+    result = {
+        "count": count,
+        "mean": _round(mean),
+        "stddev": _round(stddev),
+        "min": _round(sketch.min),
+        "max": _round(sketch.max),
+        "percentiles": {f"p{p}": _round(sketch.quantile(p / 100)) for p in PERCENTILES},
+        "histogram": histogram.bins(),
+        "trend": [
+            {
+                "period": start.isoformat(),
+                "count": period["count"],
+                "mean": _round(period["total"] / period["count"]) if period["count"] else None,
+                "p50": _round(period["sketch"].quantile(0.5)),
+            }
+            for start, period in sorted(periods.items())
+        ],
+    }
+    return result, sketch
+
+
+class CohortService:
+    """队列统计（带版本缓存）"""
+
+    def __init__(self, max_entries: int = 256):
+        self.max_entries = max_entries
+        self._cache: "OrderedDict[Tuple, Tuple[int, Dict, QuantileSketch]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _lookup(self, key: Tuple, version: int) -> Optional[Tuple[Dict, QuantileSketch]]:
+        with self._lock:
+            cached = self._cache.get(key)
+            if cached is None or cached[0] != version:
+                return None
+            self._cache.move_to_end(key)
+            return cached[1], cached[2]
+
+    def _remember(self, key: Tuple, version: int, result: Dict, sketch: QuantileSketch) -> None:
+        with self._lock:
+            self._cache[key] = (version, result, sketch)
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.max_entries:
+                self._cache.popitem(last=False)
+
+    async def cohort(
+        self,
+        session: AsyncSession,
+        clinic_id: uuid.UUID,
+        metric: str,
+        treatment_type: Optional[str] = None,
+        days: int = 90,
+        interval: str = "week"
+    ) -> Tuple[Dict, QuantileSketch]:
+        """
+        获取队列统计
+
+        Args:
+            session: 数据库会话
+            clinic_id: 诊所ID
+            metric: 指标名（overall_score / 分类名 / 单项指标名）
+            treatment_type: 治疗类型，None 表示全部
+            days: 统计最近多少天
+            interval: 趋势的统计周期
+
+        Returns:
+            (统计结果, 分位数摘要)
+        """
+        stats = await ClinicStatsRepository(session).get_many([clinic_id])
+        version = stats[clinic_id].total_analyses
+
+        since = date.today() - timedelta(days=days - 1)
+        key = (clinic_id, metric, treatment_type, since, interval)
+        cached = self._lookup(key, version)
+        if cached is not None:
+            return cached
+
+        rollups = await CohortRepository(session).load(clinic_id, metric, since, treatment_type)
+        result, sketch = summarize(rollups, interval)
+        result = {"since": since.isoformat(), **result}
+
+        self._remember(key, version, result, sketch)
+        return result, sketch
+
+
+# 全局队列统计服务
+cohort_service = CohortService(max_entries=settings.COHORT_CACHE_ENTRIES)
@@ -0,0 +1,206 @@
+"""
+对比图服务
+全分辨率渲染一次，派生缩略图 / 网页 / 打印多种尺寸，按内容寻址将编码后的字节写入对象存储
+"""
+
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+import logging
+
+import cv2
+import numpy as np
+
+from app.ai.composite import render_side_by_side, build_pyramid, blur_eyes
+from app.storage import get_storage, ObjectNotFoundError, StorageBackend
+
+logger = logging.getLogger(__name__)
+
+
+# 渲染版本：修改渲染逻辑时递增，旧的缓存自动失效
+COMPOSITE_VERSION = "v1"
+
+# 派生尺寸（目标宽度，像素）
+COMPOSITE_SIZES: Dict[str, int] = {
+    "thumbnail": 480,   # 列表 / 社交分享预览
+    "web": 1600,        # Dashboard
+    "print": 3000,      # PDF 报告
+}
+
+# 输出格式及编码参数
+COMPOSITE_FORMATS: Dict[str, Tuple[str, list]] = {
+    "jpg": (".jpg", [cv2.IMWRITE_JPEG_QUALITY, 90]),
+    "webp": (".webp", [cv2.IMWRITE_WEBP_QUALITY, 85]),
+}
+
+
+def content_digest(data: bytes) -> str:
+    """照片内容摘要（SHA-256）"""
+    return hashlib.sha256(data).hexdigest()
+
+
+def composite_key(
+    before_digest: str,
+    after_digest: str,
+    labels: bool = True,
+    eyes_blurred: bool = False
+) -> str:
+    """
+    对比图内容地址
+
+    由两张照片的内容摘要和渲染选项决定，同样的输入总是得到同样的键
+    """
+    options = f"{COMPOSITE_VERSION}:{int(labels)}:{int(eyes_blurred)}"
+    return hashlib.sha256(f"{before_digest}:{after_digest}:{options}".encode("ascii")).hexdigest()
+
+
+class CompositeService:
+    """对比图服务 - 渲染一次，按尺寸和格式提供字节"""
+
+    def __init__(self, storage: Optional[StorageBackend] = None, memory_budget_bytes: int = 64 * 1024 * 1024):
+        """
+        初始化服务
+
+        Args:
+            storage: 存储后端，默认全局存储（首次使用时创建）
+            memory_budget_bytes: 内存缓存上限
+        """
+        self._storage = storage
+        self.memory_budget_bytes = memory_budget_bytes
+        self._memory: "OrderedDict[Tuple[str, str, str], bytes]" = OrderedDict()
+        self._memory_bytes = 0
+        self._lock = threading.Lock()
+
+    @property
+    def storage(self) -> StorageBackend:
+        if self._storage is None:
+            self._storage = get_storage()
+        return self._storage
+
+    def object_key(self, key: str, size: str, fmt: str) -> str:
+        """对比图在存储中的对象键"""
+        return f"composites/{key[:2]}/{key}/{size}{COMPOSITE_FORMATS[fmt][0]}"
+
+    def _remember(self, cache_key: Tuple[str, str, str], data: bytes) -> None:
+        """放入内存缓存（LRU，按字节数淘汰）"""
+        with self._lock:
+            if cache_key in self._memory:
+                self._memory.move_to_end(cache_key)
+                return
+            self._memory[cache_key] = data
+            self._memory_bytes += len(data)
+            while self._memory_bytes > self.memory_budget_bytes and len(self._memory) > 1:
+                _, evicted = self._memory.popitem(last=False)
+                self._memory_bytes -= len(evicted)
+
+    def lookup(self, key: str, size: str = "web", fmt: str = "jpg") -> Optional[bytes]:
+        """
+        按内容地址读取已生成的对比图
+
+        命中时只读取字节，不做任何 OpenCV 处理
+
+        Returns:
+            编码后的图像字节，不存在时返回 None
+        """
+        if size not in COMPOSITE_SIZES or fmt not in COMPOSITE_FORMATS:
+            raise ValueError(f"Unsupported composite variant: {size}/{fmt}")
+
+        cache_key = (key, size, fmt)
+        with self._lock:
+            data = self._memory.get(cache_key)
+            if data is not None:
+                self._memory.move_to_end(cache_key)
+                return data
+
+        try:
+            data = self.storage.get_bytes(self.object_key(key, size, fmt))
+        except ObjectNotFoundError:
+            return None
+
+        self._remember(cache_key, data)
+        return data
+
+    def render(
+        self,
+        key: str,
+        before_image: np.ndarray,
+        after_image: np.ndarray,
+        labels: bool = True,
+        eyes_blurred: bool = False
+    ) -> None:
+        """
+        渲染全分辨率对比图并写入所有尺寸和格式
+
+        Args:
+            key: 内容地址（composite_key）
+            before_image: 术前图像
+            after_image: 术后图像
+            labels: 是否添加标签
+            eyes_blurred: 是否模糊眼部
+        """
+        if eyes_blurred:
+            before_image = blur_eyes(before_image)
+            after_image = blur_eyes(after_image)
+
+        full = render_side_by_side(before_image, after_image, labels=labels)
+        pyramid = build_pyramid(full, COMPOSITE_SIZES)
+
+        for size, image in pyramid.items():
+            for fmt, (extension, params) in COMPOSITE_FORMATS.items():
+                ok, buffer = cv2.imencode(extension, image, params)
+                if not ok:
+                    raise ValueError(f"Failed to encode composite as {fmt}")
+                self.storage.put_bytes(self.object_key(key, size, fmt), buffer.tobytes())
+
+        logger.info(f"Composite rendered: {key[:12]} ({full.shape[1]}x{full.shape[0]})")
+
+    def get_or_create(
+        self,
+        before_bytes: bytes,
+        after_bytes: bytes,
+        size: str = "web",
+        fmt: str = "jpg",
+        labels: bool = True,
+        eyes_blurred: bool = False,
+        before_digest: Optional[str] = None,
+        after_digest: Optional[str] = None
+    ) -> Tuple[str, bytes]:
+        """
+        获取对比图，不存在时解码照片并渲染
+
+        Args:
+            before_bytes: 术前照片（编码字节）
+            after_bytes: 术后照片（编码字节）
+            size: thumbnail / web / print
+            fmt: jpg / webp
+            labels: 是否添加标签
+            eyes_blurred: 是否模糊眼部
+            before_digest: 已知的术前照片摘要（可选，避免重复计算）
+            after_digest: 已知的术后照片摘要（可选）
+
+        Returns:
+            (内容地址, 编码后的图像字节)
+        """
+        key = composite_key(
+            before_digest or content_digest(before_bytes),
+            after_digest or content_digest(after_bytes),
+            labels=labels,
+            eyes_blurred=eyes_blurred
+        )
+
+        data = self.lookup(key, size, fmt)
+        if data is not None:
+            return key, data
+
+        before = cv2.imdecode(np.frombuffer(before_bytes, np.uint8), cv2.IMREAD_COLOR)
+        after = cv2.imdecode(np.frombuffer(after_bytes, np.uint8), cv2.IMREAD_COLOR)
+        if before is None or after is None:
+            raise ValueError("Invalid image format")
+
+        self.render(key, before, after, labels=labels, eyes_blurred=eyes_blurred)
+        return key, self.lookup(key, size, fmt)
+
+
+# 全局对比图服务
+composite_service = CompositeService()
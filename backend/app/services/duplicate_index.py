@@ -0,0 +1,239 @@
+"""
+重复照片检测索引
+每个诊所在内存中维护感知哈希的多索引哈希表，按汉明距离查找近似重复；
+每次查询前按 created_at 增量加载其他进程新写入的哈希，进程间无需通信
+"""
+
+import asyncio
+import threading
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+import logging
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.ai.perceptual_hash import HASH_BITS, hamming, phash, to_signed, to_unsigned
+from app.core.config import settings
+from app.repositories import PhotoRepository
+from app.services.photo_pipeline import decode_thumbnail, photo_pipeline
+
+logger = logging.getLogger(__name__)
+
+
+# 增量加载时回看的时间窗口（created_at 取事务开始时间，长事务可能晚于水位线提交）
+REFRESH_OVERLAP = timedelta(minutes=5)
+
+
+class MultiIndexHash:
+    """
+    多索引哈希（multi-index hashing）
+
+    64 位哈希切成 8 段，每段一张精确匹配的哈希表。由鸽巢原理，汉明距离不超过 7 的两个哈希
+    至少有一段完全相同，查询只需取 8 个桶的并集再逐个校验距离；更大的阈值退化为全量比较
+    """
+
+    def __init__(self, chunks: int = 8):
+        self.chunks = chunks
+        self.chunk_bits = HASH_BITS // chunks
+        self._chunk_mask = (1 << self.chunk_bits) - 1
+        self._tables: List[Dict[int, Set[uuid.UUID]]] = [{} for _ in range(chunks)]
+        self.hashes: Dict[uuid.UUID, int] = {}
+
+    def __len__(self) -> int:
+        return len(self.hashes)
+
+    def _keys(self, hash_value: int) -> List[int]:
+        return [(hash_value >> (i * self.chunk_bits)) & self._chunk_mask for i in range(self.chunks)]
+
+    def add(self, photo_id: uuid.UUID, hash_value: int) -> None:
+        if photo_id in self.hashes:
+            return
+        self.hashes[photo_id] = hash_value
+        for table, key in zip(self._tables, self._keys(hash_value)):
+            table.setdefault(key, set()).add(photo_id)
+
+    def discard(self, photo_id: uuid.UUID) -> None:
+        hash_value = self.hashes.pop(photo_id, None)
+        if hash_value is None:
+            return
+        for table, key in zip(self._tables, self._keys(hash_value)):
+            bucket = table.get(key)
+            if bucket is not None:
+                bucket.discard(photo_id)
+                if not bucket:
+                    del table[key]
+
+    def search(self, hash_value: int, max_distance: int) -> List[Tuple[int, uuid.UUID]]:
+        """
+        查找汉明距离不超过 max_distance 的照片
+
+        Returns:
+            (距离, 照片ID) 列表，按距离升序
+        """
+        if max_distance < self.chunks:
+            candidates = set()
+            for table, key in zip(self._tables, self._keys(hash_value)):
+                candidates.update(table.get(key, ()))
+        else:
+            candidates = self.hashes.keys()
+
+        found = []
+        for photo_id in candidates:
+            distance = hamming(hash_value, self.hashes[photo_id])
+            if distance <= max_distance:
+                found.append((distance, photo_id))
+
+        found.sort(key=lambda item: item[0])
+        return found
+
+
+@dataclass
+class DuplicateMatch:
+    """疑似重复的已有照片"""
+    photo_id: uuid.UUID
+    treatment_id: Optional[uuid.UUID]
+    patient_id: Optional[uuid.UUID]
+    distance: int
+
+
+class _ClinicIndex:
+    """单个诊所的哈希索引"""
+
+    def __init__(self):
+        self.hashes = MultiIndexHash()
+        self.watermark: Optional[datetime] = None
+
+
+class DuplicateIndex:
+    """按诊所划分的重复照片索引（LRU 保留最近使用的诊所）"""
+
+    def __init__(self, max_clinics: int = 64, max_distance: int = 6):
+        self.max_clinics = max_clinics
+        self.max_distance = max_distance
+        self._clinics: "OrderedDict[uuid.UUID, _ClinicIndex]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _clinic(self, clinic_id: uuid.UUID) -> _ClinicIndex:
+        with self._lock:
+            index = self._clinics.get(clinic_id)
+            if index is None:
+                index = self._clinics[clinic_id] = _ClinicIndex()
+            self._clinics.move_to_end(clinic_id)
+            while len(self._clinics) > self.max_clinics:
+                self._clinics.popitem(last=False)
+            return index
+
+    async def _refresh(self, session: AsyncSession, clinic_id: uuid.UUID) -> _ClinicIndex:
+        """加载上次水位线之后写入的哈希（首次加载诊所的全部哈希）"""
+        index = self._clinic(clinic_id)
+        since = index.watermark - REFRESH_OVERLAP if index.watermark is not None else None
+
+        rows = await PhotoRepository(session).hashes_for_clinic(clinic_id, since)
+        with self._lock:
+            for photo_id, hash_value, created_at in rows:
+                index.hashes.add(photo_id, to_unsigned(hash_value))
+                if created_at is not None and (index.watermark is None or created_at > index.watermark):
+                    index.watermark = created_at
+        return index
+
+    async def find(
+        self,
+        session: AsyncSession,
+        clinic_id: uuid.UUID,
+        hash_value: int,
+        max_distance: Optional[int] = None,
+        exclude: Iterable[uuid.UUID] = ()
+    ) -> List[DuplicateMatch]:
+        """
+        查找诊所内的近似重复照片
+
+        Args:
+            session: 数据库会话
+            clinic_id: 诊所ID
+            hash_value: 感知哈希（无符号）
+            max_distance: 汉明距离阈值，默认 PHOTO_DUPLICATE_MAX_DISTANCE
+            exclude: 不参与比较的照片ID
+
+        Returns:
+            疑似重复的照片，按距离升序
+        """
+        if max_distance is None:
+            max_distance = self.max_distance
+
+        index = await self._refresh(session, clinic_id)
+        exclude = set(exclude)
+        with self._lock:
+            candidates = [
+                (distance, photo_id)
+                for distance, photo_id in index.hashes.search(hash_value, max_distance)
+                if photo_id not in exclude
+            ]
+        if not candidates:
+            return []
+
+        # 索引不感知删除，这里顺带确认照片仍然存在
+        owners = await PhotoRepository(session).owners([photo_id for _, photo_id in candidates])
+        matches = []
+        with self._lock:
+            for distance, photo_id in candidates:
+                if photo_id not in owners:
+                    index.hashes.discard(photo_id)
+                    continue
+                treatment_id, patient_id = owners[photo_id]
+                matches.append(DuplicateMatch(photo_id, treatment_id, patient_id, distance))
+        return matches
+
+    def add(self, clinic_id: uuid.UUID, photo_id: uuid.UUID, hash_value: int) -> None:
+        """登记新写入的照片（事务提交后调用；未加载的诊所在首次查询时从数据库加载）"""
+        with self._lock:
+            index = self._clinics.get(clinic_id)
+            if index is not None:
+                index.hashes.add(photo_id, hash_value)
+
+    async def backfill(self, session: AsyncSession, batch_size: int = 100) -> int:
+        """
+        为历史照片补算感知哈希（优先读取缩略图，调用方需要 commit）
+
+        只写入哈希，不回填 duplicate_of_id
+
+        Returns:
+            写入哈希的照片数
+        """
+        photos = PhotoRepository(session)
+        storage = photo_pipeline.storage
+        loop = asyncio.get_running_loop()
+
+        def compute(key: str) -> Optional[int]:
+            image = decode_thumbnail(storage.get_bytes(key))
+            return phash(image) if image is not None else None
+
+        total = 0
+        last_id = None
+        while True:
+            batch = await photos.missing_phash(after=last_id, limit=batch_size)
+            if not batch:
+                return total
+
+            for photo in batch:
+                key = photo.thumbnail_url or photo.original_url
+                try:
+                    hash_value = await loop.run_in_executor(photo_pipeline.executor, compute, key)
+                except Exception as e:
+                    logger.warning(f"Failed to hash photo {photo.id}: {str(e)}")
+                    continue
+                if hash_value is not None:
+                    photo.phash = to_signed(hash_value)
+                    total += 1
+
+            await session.flush()
+            last_id = batch[-1].id
+
+
+# 全局重复检测索引
+duplicate_index = DuplicateIndex(
+    max_clinics=settings.PHOTO_DUPLICATE_INDEX_CLINICS,
+    max_distance=settings.PHOTO_DUPLICATE_MAX_DISTANCE
+)
@@ -0,0 +1,84 @@
+"""
+变化热力图服务
+每次分析渲染一次各类型的叠加图，派生多种尺寸和格式，按分析 ID 写入对象存储
+"""
+
+from typing import Dict, List, Optional, Union
+import logging
+import uuid
+
+import cv2
+
+from app.ai.change_map import ChangeMaps, render_overlays
+from app.ai.composite import build_pyramid
+from app.services.composite_service import COMPOSITE_FORMATS
+from app.storage import get_storage, StorageBackend
+
+logger = logging.getLogger(__name__)
+
+
+# 渲染版本：修改着色逻辑时递增，旧的缓存自动失效
+HEATMAP_VERSION = "v1"
+
+# 派生尺寸（目标宽度，像素；叠加图为标准画面大小，不超过原尺寸）
+HEATMAP_SIZES: Dict[str, int] = {
+    "thumbnail": 320,
+    "web": 1000,
+}
+
+# 默认热力图类型（annotated_image_url 指向的图）
+DEFAULT_HEATMAP_KIND = "edges"
+
+
+class HeatmapService:
+    """变化热力图服务 - 每个分析渲染一次，按类型、尺寸和格式提供"""
+
+    def __init__(self, storage: Optional[StorageBackend] = None):
+        """
+        初始化服务
+
+        Args:
+            storage: 存储后端，默认全局存储（首次使用时创建）
+        """
+        self._storage = storage
+
+    @property
+    def storage(self) -> StorageBackend:
+        if self._storage is None:
+            self._storage = get_storage()
+        return self._storage
+
+    def object_key(self, analysis_id: Union[str, uuid.UUID], kind: str, size: str, fmt: str) -> str:
+        """热力图在存储中的对象键"""
+        analysis_id = str(analysis_id)
+        return (
+            f"heatmaps/{analysis_id[:2]}/{analysis_id}/{HEATMAP_VERSION}/"
+            f"{kind}/{size}{COMPOSITE_FORMATS[fmt][0]}"
+        )
+
+    def render(self, analysis_id: Union[str, uuid.UUID], change: ChangeMaps) -> List[str]:
+        """
+        渲染各类型的叠加图并写入所有尺寸和格式（阻塞，在线程中调用）
+
+        Args:
+            analysis_id: 分析 ID
+            change: 配准照片对的差异图
+
+        Returns:
+            已渲染的类型
+        """
+        overlays = render_overlays(change)
+        for kind, overlay in overlays.items():
+            for size, image in build_pyramid(overlay, HEATMAP_SIZES).items():
+                for fmt, (extension, params) in COMPOSITE_FORMATS.items():
+                    ok, buffer = cv2.imencode(extension, image, params)
+                    if not ok:
+                        raise ValueError(f"Failed to encode heatmap as {fmt}")
+                    self.storage.put_bytes(self.object_key(analysis_id, kind, size, fmt), buffer.tobytes())
+
+        logger.info(f"Heatmaps rendered: {str(analysis_id)[:12]} ({', '.join(overlays)})")
+        return list(overlays)
+
+
+# 全局热力图服务
+heatmap_service = HeatmapService()
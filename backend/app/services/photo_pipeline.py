@@ -0,0 +1,471 @@
+"""
+照片上传处理流水线
+一次上传同时生成原图、缩略图和标准化处理图，各步骤在线程池中并行执行，
+结果按内容寻址写入对象存储
+"""
+
+import hashlib
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+import logging
+
+import cv2
+import numpy as np
+
+from app.ai.analyzer import BeforeAfterAnalyzer
+from app.ai.change_map import ChangeMaps, change_maps
+from app.ai.comparability import ComparabilityReport, pair_comparability
+from app.ai.features import photo_features
+from app.ai.face_geometry import scale_landmarks
+from app.ai.hybrid_analyzer import LocalScreen, screen_pair
+from app.ai.multi_view import ViewPair, crop_face
+from app.ai.perceptual_hash import phash
+from app.ai.skin_regions import region_features
+from app.ai.quality_gate import QUALITY_MAX_SIZE, QualityReport, assess_quality
+from app.core.config import settings
+from app.storage import get_storage, content_key, StorageBackend
+
+logger = logging.getLogger(__name__)
+
+
+# 缩略图短边像素
+THUMBNAIL_SIZE = 320
+
+# JPEG 降分辨率解码（DCT 域缩放，解码量按比例减少），从小到大依次尝试
+REDUCED_DECODE_FLAGS = (
+    cv2.IMREAD_REDUCED_COLOR_8,
+    cv2.IMREAD_REDUCED_COLOR_4,
+    cv2.IMREAD_REDUCED_COLOR_2,
+    cv2.IMREAD_COLOR,
+)
+
+# 文件头 -> 扩展名
+IMAGE_SIGNATURES = (
+    (b"\xff\xd8\xff", "jpg"),
+    (b"\x89PNG\r\n\x1a\n", "png"),
+)
+
+
+def detect_image_format(data) -> Optional[str]:
+    """根据文件头识别图片格式"""
+    header = bytes(data[:16])
+    for signature, extension in IMAGE_SIGNATURES:
+        if header.startswith(signature):
+            return extension
+    return None
+
+
+def decode_thumbnail(data: bytes, size: int = THUMBNAIL_SIZE) -> Optional[np.ndarray]:
+    """
+    解码缩略图
+
+    优先使用最小的降分辨率解码，短边不足时再用更大的比例；
+    12MP JPEG 通常 1/8 解码即可满足，无需解码完整原图
+
+    Args:
+        data: 编码后的图片字节
+        size: 缩略图短边
+
+    Returns:
+        缩略图，解码失败返回 None
+    """
+    buffer = np.frombuffer(data, np.uint8)
+    image = None
+
+    for flag in REDUCED_DECODE_FLAGS:
+        image = cv2.imdecode(buffer, flag)
+        if image is None:
+            return None
+        if min(image.shape[:2]) >= size:
+            break
+
+    h, w = image.shape[:2]
+    scale = size / min(h, w)
+    if scale < 1:
+        image = cv2.resize(image, (round(w * scale), round(h * scale)), interpolation=cv2.INTER_AREA)
+    return image
+
+
+class PhotoPipeline:
+    """照片处理流水线"""
+
+    def __init__(self, storage: Optional[StorageBackend] = None, max_workers: Optional[int] = None):
+        """
+        初始化流水线
+
+        Args:
+            storage: 存储后端，默认全局存储（首次使用时创建）
+            max_workers: 线程数，默认 PHOTO_PIPELINE_WORKERS
+        """
+        self._storage = storage
+        self.executor = ThreadPoolExecutor(
+            max_workers=max_workers or settings.PHOTO_PIPELINE_WORKERS,
+            thread_name_prefix="photo-pipeline"
+        )
+        # 高分辨率皮肤区域的分块在单独的线程池中处理（由流水线线程提交，避免互相等待）
+        self.tile_executor = ThreadPoolExecutor(
+            max_workers=settings.SKIN_REGION_WORKERS,
+            thread_name_prefix="skin-tiles"
+        )
+        # MediaPipe FaceMesh 不是线程安全的，每个线程持有一个 ImageProcessor
+        self._local = threading.local()
+        self._analyzer = BeforeAfterAnalyzer()  # 无状态，各线程共用
+
+    @property
+    def storage(self) -> StorageBackend:
+        if self._storage is None:
+            self._storage = get_storage()
+        return self._storage
+
+    def _processor(self):
+        processor = getattr(self._local, "processor", None)
+        if processor is None:
+            from app.ai.image_processor import ImageProcessor
+            processor = ImageProcessor()
+            self._local.processor = processor
+        return processor
+
+    def _align(self, image: np.ndarray, landmarks: Dict) -> np.ndarray:
+        """对齐到标准人脸画面并标准化光照（与本地预筛的术前图像相同）"""
+        return self._processor().register_to(image, landmarks, landmarks, settings.STANDARD_IMAGE_SIZE)
+
+    def _features(self, image: np.ndarray, landmarks: Dict, aligned: Optional[np.ndarray] = None) -> Dict:
+        """提取单图特征（aligned 为已对齐的图像，None 时对齐）"""
+        if aligned is None:
+            aligned = self._align(image, landmarks)
+        return photo_features(aligned, image, landmarks, self.tile_executor)
+
+    def _save_original(self, digest: str, data: bytes, extension: str) -> str:
+        """保存原图（原始字节，不重新编码，保留 EXIF；相同内容只存一份）"""
+        key = content_key(digest, extension, prefix="photos")
+        if not self.storage.exists(key):
+            self.storage.put_bytes(key, bytes(data))
+        return key
+
+    def save_original_file(self, path: Path, digest: str) -> str:
+        """
+        保存已落盘的原图（大文件由存储后端分片上传，不整体读入内存）
+
+        Args:
+            path: 本地文件路径
+            digest: 内容摘要（SHA-256）
+
+        Returns:
+            对象键
+        """
+        with open(path, "rb") as f:
+            extension = detect_image_format(f.read(16))
+        if extension is None:
+            raise ValueError("Unsupported image format")
+
+        key = content_key(digest, extension, prefix="photos")
+        if not self.storage.exists(key):
+            self.storage.put_file(key, path)
+        return key
+
+    def _save_thumbnail(self, digest: str, data: bytes) -> Tuple[Optional[str], Optional[int]]:
+        """降分辨率解码并保存缩略图，同时用缩略图计算感知哈希"""
+        thumbnail = decode_thumbnail(data)
+        if thumbnail is None:
+            return None, None
+        hash_value = phash(thumbnail)
+        ok, buffer = cv2.imencode(".jpg", thumbnail, [cv2.IMWRITE_JPEG_QUALITY, 80])
+        if not ok:
+            return None, hash_value
+        key = content_key(digest, "thumb.jpg", prefix="photos")
+        self.storage.put_bytes(key, buffer.tobytes())
+        return key, hash_value
+
+    def _save_processed(self, digest: str, data: bytes, photo_angle: str) -> Tuple[Optional[str], Dict]:
+        """完整解码一次，检测人脸、检查质量；对齐并标准化光照一次，同时用于特征和处理后的图像"""
+        image = cv2.imdecode(np.frombuffer(data, np.uint8), cv2.IMREAD_COLOR)
+        if image is None:
+            raise ValueError("Invalid image format")
+
+        h, w = image.shape[:2]
+        processor = self._processor()
+        landmarks = processor.detect_face_landmarks(image)
+
+        quality = assess_quality(image, landmarks, photo_angle)
+        aligned = self._align(image, landmarks) if landmarks is not None else None
+        metadata = {
+            "features": self._features(image, landmarks, aligned) if landmarks is not None else None,
+            "image_width": w,
+            "image_height": h,
+            "face_detected": landmarks is not None,
+            "sharpness_score": quality.sharpness_score,
+            "lighting_score": quality.lighting_score,
+            "alignment_score": quality.alignment_score,
+            "quality": quality,
+        }
+        if landmarks is None:
+            return None, metadata
+
+        ok, buffer = cv2.imencode(".jpg", aligned, [cv2.IMWRITE_JPEG_QUALITY, 92])
+        if not ok:
+            raise ValueError("Failed to encode processed image")
+
+        key = content_key(digest, "processed.jpg", prefix="photos")
+        self.storage.put_bytes(key, buffer.tobytes())
+        return key, metadata
+
+    def process(self, data: bytes, digest: Optional[str] = None, photo_angle: str = "front") -> Dict:
+        """
+        处理一张上传的照片（阻塞，在线程中调用）
+
+        原图写入、缩略图、标准化处理三项并行执行
+
+        Args:
+            data: 上传的图片字节（bytes 或内存映射的 uint8 数组）
+            digest: 已知的内容摘要（可选，避免重复计算）
+            photo_angle: 拍摄角度（质量检查的期望头部姿态）
+
+        Returns:
+            各衍生文件的对象键、感知哈希和照片元数据
+        """
+        extension = detect_image_format(data)
+        if extension is None:
+            raise ValueError("Unsupported image format")
+
+        if digest is None:
+            digest = hashlib.sha256(data).hexdigest()
+
+        original_future = self.executor.submit(self._save_original, digest, data, extension)
+        thumbnail_future = self.executor.submit(self._save_thumbnail, digest, data)
+        processed_future = self.executor.submit(self._save_processed, digest, data, photo_angle)
+
+        processed_key, metadata = processed_future.result()
+        thumbnail_key, hash_value = thumbnail_future.result()
+        original_key = original_future.result()
+
+        return {
+            "original_key": original_key,
+            "thumbnail_key": thumbnail_key,
+            "processed_key": processed_key,
+            "phash": hash_value,
+            "file_size_bytes": len(data),
+            **metadata,
+        }
+
+    def _detect(self, image: np.ndarray) -> Optional[Dict]:
+        """在缩小的副本上检测人脸，返回原图坐标的关键点"""
+        h, w = image.shape[:2]
+        scale = min(1.0, QUALITY_MAX_SIZE / max(h, w))
+        small = image
+        if scale < 1:
+            # 人脸检测对混叠不敏感，用线性插值快速缩小
+            small = cv2.resize(image, (round(w * scale), round(h * scale)), interpolation=cv2.INTER_LINEAR)
+
+        landmarks = self._processor().detect_face_landmarks(small)
+        if landmarks is not None and scale < 1:
+            landmarks = scale_landmarks(landmarks, 1 / scale)
+        return landmarks
+
+    def _assess(self, image: np.ndarray, photo_angle: str) -> QualityReport:
+        """检测人脸后检查质量"""
+        return assess_quality(image, self._detect(image), photo_angle)
+
+    def check_quality(self, images: List[np.ndarray], photo_angle: str = "front") -> List[QualityReport]:
+        """
+        分析前的照片质量预检（阻塞，在线程中调用）
+
+        各照片在流水线线程池中并行检查（复用线程内的 FaceMesh）
+
+        Args:
+            images: 已解码的 BGR 图像
+            photo_angle: 拍摄角度
+
+        Returns:
+            与 images 一一对应的质量检查结果
+        """
+        futures = [self.executor.submit(self._assess, image, photo_angle) for image in images]
+        return [future.result() for future in futures]
+
+    def _screen(
+        self,
+        before_image: np.ndarray,
+        before_landmarks: Optional[Dict],
+        after_image: np.ndarray,
+        after_landmarks: Optional[Dict],
+        comparability: Optional[ComparabilityReport]
+    ) -> LocalScreen:
+        """配准照片对并计算本地指标"""
+        start = time.perf_counter()
+        size = settings.STANDARD_IMAGE_SIZE
+        registered = before_landmarks is not None and after_landmarks is not None
+        if registered:
+            before_aligned, after_aligned = self._processor().register_pair(
+                before_image, before_landmarks, after_image, after_landmarks, size
+            )
+        else:
+            # 没有关键点无法配准，只缩放到相同尺寸
+            before_aligned = cv2.resize(before_image, size, interpolation=cv2.INTER_AREA)
+            after_aligned = cv2.resize(after_image, size, interpolation=cv2.INTER_AREA)
+
+        # 配准后保留分析器的逐像素中间结果，直接用于变化热力图
+        buffers = {} if registered else None
+        screen = screen_pair(before_aligned, after_aligned, self._analyzer, registered, comparability, buffers)
+        if registered and not screen.failed:
+            screen.change = change_maps(after_aligned, buffers)
+        if registered and settings.SKIN_REGION_ANALYSIS and not screen.failed:
+            screen.improvements["skin_regions"] = self._analyzer.compare_skin_regions(
+                region_features(before_image, before_landmarks, self.tile_executor),
+                region_features(after_image, after_landmarks, self.tile_executor)
+            )
+        screen.processing_time_ms = int((time.perf_counter() - start) * 1000)
+        return screen
+
+    def local_screen(
+        self,
+        before_image: np.ndarray,
+        before_landmarks: Optional[Dict],
+        after_image: np.ndarray,
+        after_landmarks: Optional[Dict],
+        comparability: Optional[ComparabilityReport] = None
+    ) -> LocalScreen:
+        """
+        混合分析的本地预筛（阻塞，在线程中调用）
+
+        复用质量预检得到的关键点，术后照片配准到术前照片后计算本地 OpenCV 指标
+
+        Args:
+            before_image: 术前照片（BGR 原图）
+            before_landmarks: 术前照片的关键点（原图坐标），未检测到人脸为 None
+            after_image: 术后照片
+            after_landmarks: 术后照片的关键点
+            comparability: 照片对可比性
+
+        Returns:
+            本地预筛结果
+        """
+        return self.executor.submit(
+            self._screen, before_image, before_landmarks, after_image, after_landmarks, comparability
+        ).result()
+
+    def _prepare_view(self, angle: str, before_image: np.ndarray, after_image: np.ndarray) -> ViewPair:
+        """一个角度的质量检查、可比性、本地预筛和人脸裁剪（在同一线程内顺序执行）"""
+        before_quality = self._assess(before_image, angle)
+        after_quality = self._assess(after_image, angle)
+        comparability = pair_comparability(
+            before_image, before_quality.landmarks, after_image, after_quality.landmarks
+        )
+        screen = self._screen(
+            before_image, before_quality.landmarks, after_image, after_quality.landmarks, comparability
+        )
+        return ViewPair(
+            angle=angle,
+            before_quality=before_quality,
+            after_quality=after_quality,
+            comparability=comparability,
+            screen=screen,
+            before_view=crop_face(before_image, before_quality.landmarks),
+            after_view=crop_face(after_image, after_quality.landmarks),
+        )
+
+    def prepare_views(self, pairs: Dict[str, Tuple[np.ndarray, np.ndarray]]) -> Dict[str, ViewPair]:
+        """
+        多角度分析的本地准备（阻塞，在线程中调用）
+
+        各角度在流水线线程池中并行处理
+
+        Args:
+            pairs: 角度 -> (术前图像, 术后图像)
+
+        Returns:
+            角度 -> 照片对及检查结果
+        """
+        futures = {
+            angle: self.executor.submit(self._prepare_view, angle, before, after)
+            for angle, (before, after) in pairs.items()
+        }
+        return {angle: future.result() for angle, future in futures.items()}
+
+    def _load(self, key: str, landmarks: Optional[Dict]) -> Tuple[np.ndarray, Optional[Dict]]:
+        """读取照片；没有保存的关键点时重新检测"""
+        image = self.load_image(key)
+        if image is None:
+            raise ValueError("Invalid image format")
+        if landmarks is None:
+            landmarks = self._detect(image)
+        return image, landmarks
+
+    def extract_features(self, key: str, landmarks: Optional[Dict] = None) -> Tuple[Optional[Dict], Optional[Dict]]:
+        """
+        为已保存的照片补算特征（阻塞，在流水线线程中调用）
+
+        Args:
+            key: 原图对象键
+            landmarks: 已保存的关键点（原图坐标），None 时检测
+
+        Returns:
+            (特征, 关键点)，未检测到人脸时特征为 None
+        """
+        image, landmarks = self._load(key, landmarks)
+        if landmarks is None:
+            return None, None
+        return self._features(image, landmarks), landmarks
+
+    def _change_view(
+        self,
+        before_key: str,
+        before_landmarks: Optional[Dict],
+        after_key: str,
+        after_landmarks: Optional[Dict]
+    ) -> Optional[ChangeMaps]:
+        before_image, before_landmarks = self._load(before_key, before_landmarks)
+        after_image, after_landmarks = self._load(after_key, after_landmarks)
+        if before_landmarks is None or after_landmarks is None:
+            return None
+
+        before_aligned, after_aligned = self._processor().register_pair(
+            before_image, before_landmarks, after_image, after_landmarks, settings.STANDARD_IMAGE_SIZE
+        )
+        buffers = {}
+        self._analyzer.analyze_comparison(before_aligned, after_aligned, buffers=buffers)
+        return change_maps(after_aligned, buffers)
+
+    def change_view(
+        self,
+        before_key: str,
+        before_landmarks: Optional[Dict],
+        after_key: str,
+        after_landmarks: Optional[Dict]
+    ) -> Optional[ChangeMaps]:
+        """
+        为已保存的照片对重新计算差异图（阻塞，在线程中调用；分析时未渲染热力图的旧记录使用）
+
+        Args:
+            before_key: 术前原图对象键
+            before_landmarks: 术前照片已保存的关键点，None 时检测
+            after_key: 术后原图对象键
+            after_landmarks: 术后照片已保存的关键点
+
+        Returns:
+            差异图，任一照片未检测到人脸时返回 None
+        """
+        return self.executor.submit(
+            self._change_view, before_key, before_landmarks, after_key, after_landmarks
+        ).result()
+
+    def load_image(self, key: str) -> Optional[np.ndarray]:
+        """从存储读取并解码照片（阻塞，在线程中调用）"""
+        data = self.storage.get_bytes(key)
+        return cv2.imdecode(np.frombuffer(data, np.uint8), cv2.IMREAD_COLOR)
+
+    def url_for(self, key: Optional[str]) -> Optional[str]:
+        """对象键 -> 签名访问URL"""
+        if key is None:
+            return None
+        return self.storage.url(key)
+
+    def shutdown(self) -> None:
+        """关闭线程池"""
+        self.executor.shutdown(wait=True)
+        self.tile_executor.shutdown(wait=True)
+
+
+# 全局照片流水线
+photo_pipeline = PhotoPipeline()
@@ -0,0 +1,522 @@
+"""
+报告生成流水线
+PDF / HTML / IMAGE 报告在独立的进程池中渲染，绝不占用 API 事件循环，
+生成的文件写入对象存储
+"""
+
+import asyncio
+import base64
+import hashlib
+import html
+import json
+import unicodedata
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from io import BytesIO
+from string import Template
+from typing import Dict, List, Optional, Tuple
+import logging
+
+import cv2
+
+from app.ai.report_templates import extract_improvements
+from app.core.config import settings
+from app.services.composite_service import composite_key, composite_service
+from app.storage import get_storage, StorageBackend
+
+logger = logging.getLogger(__name__)
+
+
+# 报告ID命名空间：相同的请求总是得到相同的报告ID
+REPORT_NAMESPACE = uuid.UUID("6f1b7c3e-9a57-4c36-8f0e-2f3d0c1b5a91")
+
+FILE_EXTENSIONS = {
+    "pdf": "pdf",
+    "html": "html",
+    "image": "jpg",
+}
+
+
+class ReportNotAvailableError(Exception):
+    """报告对当前受众不可见（由智能报告控制决定）"""
+    pass
+
+
+# ============================================
+# 报告内容（主进程，轻量）
+# ============================================
+
+def build_report_content(
+    record: Dict,
+    report_type: str,
+    include_patient_name: bool = True,
+    custom_message: Optional[str] = None
+) -> Dict:
+    """
+    根据分析记录和报告类型组装报告文字内容
+
+    患者版和社交媒体版遵循智能报告控制的可见性结果
+
+    Args:
+        record: 分析记录（analyze-upload 的返回结果）
+        report_type: doctor / patient / social_media
+        include_patient_name: 是否显示患者标识
+        custom_message: 诊所自定义留言
+
+    Returns:
+        报告内容字典
+
+    Raises:
+        ReportNotAvailableError: 报告对该受众不可见
+    """
+    doctor_view = record.get("doctor_view", {})
+    analysis = doctor_view.get("full_analysis") or {}
+    overall = analysis.get("overall_assessment", {})
+    patient_report = record.get("patient_report")
+
+    content = {
+        "title": "GlowTrack AI",
+        "subtitle": record.get("treatment_type") or "",
+        "patient_label": record.get("patient_id") if include_patient_name else None,
+        "overall_improvement": overall.get("overall_improvement", 0),
+        "custom_message": custom_message,
+    }
+
+    if report_type == "doctor":
+        improvements = sorted(
+            extract_improvements(analysis),
+            key=lambda item: item["improvement"],
+            reverse=True
+        )
+        content.update({
+            "headline": f"Effect level: {doctor_view.get('effect_level', 'unknown')}",
+            "badge": doctor_view.get("visibility_status", ""),
+            "highlights": [
+                f"{item['metric']}: {item['improvement']}%"
+                for item in improvements[:5]
+            ],
+            "summary": overall.get("summary", ""),
+            "next_steps": [risk.get("message", "") for risk in doctor_view.get("risks", [])],
+        })
+        return content
+
+    if not patient_report or not patient_report.get("can_view"):
+        raise ReportNotAvailableError("Report is pending doctor review")
+
+    if report_type == "social_media" and not patient_report.get("can_share"):
+        raise ReportNotAvailableError("Report is not shareable")
+
+    content.update({
+        "headline": patient_report.get("headline", ""),
+        "badge": patient_report.get("badge", ""),
+        "highlights": patient_report.get("highlights", []),
+        "summary": patient_report.get("summary", ""),
+        "next_steps": patient_report.get("next_steps", []),
+    })
+
+    # 社交媒体版不显示患者身份
+    if report_type == "social_media":
+        content["patient_label"] = None
+
+    return content
+
+
+def report_request_key(job: Dict) -> str:
+    """计算报告请求的去重键（内容相同的请求得到相同的键）"""
+    fields = {
+        "analysis_id": job["analysis_id"],
+        "report_type": job["report_type"],
+        "report_format": job["report_format"],
+        "blur_eyes": job["blur_eyes"],
+        "content": job["content"],
+    }
+    canonical = json.dumps(fields, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+# ============================================
+# 渲染（Worker 进程）
+# ============================================
+
+# 每个 worker 进程注册一次的字体
+_worker_fonts: Dict[str, object] = {}
+
+
+def _init_worker(font_path: Optional[str]) -> None:
+    """Worker 进程初始化：限制 OpenCV 线程并预加载字体"""
+    cv2.setNumThreads(1)
+    try:
+        _pdf_font(font_path)
+        _image_font(font_path, 28)
+    except Exception as e:
+        logger.warning(f"Report font preload failed: {str(e)}")
+
+
+def _pdf_font(font_path: Optional[str]) -> str:
+    """注册 PDF 字体（每个进程只注册一次），返回字体名"""
+    if "pdf" in _worker_fonts:
+        return _worker_fonts["pdf"]
+
+    from reportlab.pdfbase import pdfmetrics
+
+    if font_path:
+        from reportlab.pdfbase.ttfonts import TTFont
+        pdfmetrics.registerFont(TTFont("GlowTrackBody", font_path))
+        font_name = "GlowTrackBody"
+    else:
+        # 内置 CID 字体，支持中文
+        from reportlab.pdfbase.cidfonts import UnicodeCIDFont
+        pdfmetrics.registerFont(UnicodeCIDFont("STSong-Light"))
+        font_name = "STSong-Light"
+
+    _worker_fonts["pdf"] = font_name
+    return font_name
+
+
+def _image_font(font_path: Optional[str], size: int):
+    """加载图片报告字体（按字号缓存）"""
+    key = f"image:{size}"
+    if key not in _worker_fonts:
+        from PIL import ImageFont
+        if font_path:
+            _worker_fonts[key] = ImageFont.truetype(font_path, size)
+        else:
+            _worker_fonts[key] = ImageFont.load_default()
+    return _worker_fonts[key]
+
+
+def _strip_symbols(text: str) -> str:
+    """去掉 PDF 字体无法显示的表情符号"""
+    return "".join(
+        ch for ch in text
+        if ord(ch) <= 0xFFFF and unicodedata.category(ch) != "So"
+    ).strip()
+
+
+def _wrap_text(text: str, font_name: str, font_size: int, max_width: float) -> List[str]:
+    """按字符宽度折行（兼容无空格的中文）"""
+    from reportlab.pdfbase.pdfmetrics import stringWidth
+
+    lines, current = [], ""
+    for ch in text:
+        if ch == "\n":
+            lines.append(current)
+            current = ""
+            continue
+        if stringWidth(current + ch, font_name, font_size) > max_width and current:
+            lines.append(current)
+            current = ch
+        else:
+            current += ch
+    if current:
+        lines.append(current)
+    return lines
+
+
+def _render_pdf(content: Dict, composite: bytes, font_path: Optional[str]) -> bytes:
+    """渲染 PDF 报告"""
+    from reportlab.lib.pagesizes import A4
+    from reportlab.lib.utils import ImageReader
+    from reportlab.pdfgen import canvas
+
+    font_name = _pdf_font(font_path)
+    buffer = BytesIO()
+    pdf = canvas.Canvas(buffer, pagesize=A4)
+    width, height = A4
+    margin = 48
+    max_width = width - 2 * margin
+    y = height - margin
+
+    def draw_lines(text: str, size: int, gap: int = 6):
+        nonlocal y
+        pdf.setFont(font_name, size)
+        for line in _wrap_text(_strip_symbols(text), font_name, size, max_width):
+            if y < margin + size:
+                pdf.showPage()
+                pdf.setFont(font_name, size)
+                y = height - margin
+            pdf.drawString(margin, y - size, line)
+            y -= size + gap
+
+    draw_lines(content["title"], 22)
+    if content.get("subtitle"):
+        draw_lines(content["subtitle"], 12)
+    if content.get("patient_label"):
+        draw_lines(f"Patient: {content['patient_label']}", 11)
+    y -= 8
+
+    image = ImageReader(BytesIO(composite))
+    img_w, img_h = image.getSize()
+    draw_h = max_width * img_h / img_w
+    pdf.drawImage(image, margin, y - draw_h, width=max_width, height=draw_h)
+    y -= draw_h + 20
+
+    draw_lines(content.get("headline", ""), 16)
+    if content.get("badge"):
+        draw_lines(content["badge"], 12)
+    draw_lines(f"Overall improvement: {content.get('overall_improvement', 0)}%", 12)
+    y -= 6
+
+    for item in content.get("highlights", []):
+        draw_lines(f"• {item}", 11, gap=4)
+    if content.get("summary"):
+        y -= 6
+        draw_lines(content["summary"], 11, gap=4)
+    if content.get("next_steps"):
+        y -= 6
+        for step in content["next_steps"]:
+            draw_lines(f"- {step}", 11, gap=4)
+    if content.get("custom_message"):
+        y -= 6
+        draw_lines(content["custom_message"], 11, gap=4)
+
+    pdf.showPage()
+    pdf.save()
+    return buffer.getvalue()
+
+
+# 预编译 HTML 模板
+_HTML_TEMPLATE = Template("""<!DOCTYPE html>
+<html lang="zh-CN">
+<head>
+<meta charset="utf-8">
+<title>$title</title>
+<style>
+body { font-family: -apple-system, "PingFang SC", "Microsoft YaHei", sans-serif; max-width: 960px; margin: 32px auto; color: #1f2937; }
+img { width: 100%; border-radius: 8px; }
+.badge { display: inline-block; padding: 4px 12px; border-radius: 999px; background: #eef2ff; color: #4f46e5; }
+.improvement { font-size: 32px; font-weight: 700; color: #4f46e5; }
+</style>
+</head>
+<body>
+<h1>$title</h1>
+<p>$subtitle</p>
+$patient_block
+<img src="data:image/jpeg;base64,$composite" alt="Before / After">
+<h2>$headline</h2>
+<span class="badge">$badge</span>
+<p class="improvement">$overall_improvement%</p>
+<ul>$highlights</ul>
+<p>$summary</p>
+<ol>$next_steps</ol>
+$custom_block
+</body>
+</html>
+""")
+
+
+def _render_html(content: Dict, composite: bytes) -> bytes:
+    """渲染 HTML 报告（对比图内嵌，单文件可直接分享）"""
+    esc = html.escape
+    patient = content.get("patient_label")
+    custom = content.get("custom_message")
+    page = _HTML_TEMPLATE.substitute(
+        title=esc(content["title"]),
+        subtitle=esc(content.get("subtitle", "")),
+        patient_block=f"<p>Patient: {esc(patient)}</p>" if patient else "",
+        composite=base64.b64encode(composite).decode("ascii"),
+        headline=esc(content.get("headline", "")),
+        badge=esc(content.get("badge", "")),
+        overall_improvement=esc(str(content.get("overall_improvement", 0))),
+        highlights="".join(f"<li>{esc(item)}</li>" for item in content.get("highlights", [])),
+        summary=esc(content.get("summary", "")),
+        next_steps="".join(f"<li>{esc(step)}</li>" for step in content.get("next_steps", [])),
+        custom_block=f"<blockquote>{esc(custom)}</blockquote>" if custom else "",
+    )
+    return page.encode("utf-8")
+
+
+def _render_image(content: Dict, composite: bytes, font_path: Optional[str]) -> bytes:
+    """渲染图片报告（对比图 + 底部信息栏）"""
+    from PIL import Image, ImageDraw
+
+    image = Image.open(BytesIO(composite)).convert("RGB")
+    w, h = image.size
+    banner_h = max(80, h // 8)
+
+    canvas = Image.new("RGB", (w, h + banner_h), (255, 255, 255))
+    canvas.paste(image, (0, 0))
+    draw = ImageDraw.Draw(canvas)
+
+    font = _image_font(font_path, max(20, banner_h // 3))
+    # 未配置字体时默认字体不支持中文，只输出数字信息
+    text = f"+{content.get('overall_improvement', 0)}%"
+    if font_path:
+        text = f"{_strip_symbols(content.get('headline', ''))}  {text}"
+    draw.text((24, h + banner_h // 3), text, fill=(79, 70, 229), font=font)
+
+    output = BytesIO()
+    canvas.save(output, format="JPEG", quality=90)
+    return output.getvalue()
+
+
+def render_report(job: Dict) -> Dict:
+    """
+    渲染报告并写入对象存储（在 worker 进程中执行）
+
+    Args:
+        job: 报告任务（见 ReportGenerator.generate）
+
+    Returns:
+        文件对象键和大小
+    """
+    storage = get_storage()
+
+    # 对比图按内容寻址缓存，同一对照片的所有报告共用
+    # 已知照片摘要时先按内容地址查找，命中则不读取原图
+    composite = None
+    if job.get("before_digest") and job.get("after_digest"):
+        key = composite_key(job["before_digest"], job["after_digest"], eyes_blurred=job["blur_eyes"])
+        composite = composite_service.lookup(key, "print")
+
+    if composite is None:
+        key, composite = composite_service.get_or_create(
+            storage.get_bytes(job["before_key"]),
+            storage.get_bytes(job["after_key"]),
+            size="print",
+            eyes_blurred=job["blur_eyes"],
+            before_digest=job.get("before_digest"),
+            after_digest=job.get("after_digest")
+        )
+
+    report_format = job["report_format"]
+    if report_format == "pdf":
+        data = _render_pdf(job["content"], composite, job.get("font_path"))
+    elif report_format == "html":
+        data = _render_html(job["content"], composite)
+    elif report_format == "image":
+        data = _render_image(job["content"], composite, job.get("font_path"))
+    else:
+        raise ValueError(f"Unsupported report format: {report_format}")
+
+    storage.put_bytes(job["thumbnail_key"], composite_service.lookup(key, "thumbnail"))
+    # 报告文件最后写入，存在即代表报告完整
+    storage.put_bytes(job["file_key"], data)
+
+    return {
+        "file_key": job["file_key"],
+        "file_size_bytes": len(data),
+        "thumbnail_key": job["thumbnail_key"],
+    }
+
+
+# ============================================
+# 调度（主进程）
+# ============================================
+
+class ReportGenerator:
+    """报告生成器 - 进程池渲染 + 请求去重"""
+
+    def __init__(self, storage: Optional[StorageBackend] = None, max_workers: Optional[int] = None):
+        """
+        初始化生成器
+
+        Args:
+            storage: 存储后端，默认全局存储（首次使用时创建）
+            max_workers: 渲染进程数，默认 REPORT_WORKERS
+        """
+        self._storage = storage
+        self.max_workers = max_workers or settings.REPORT_WORKERS
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._in_flight: Dict[str, asyncio.Future] = {}
+
+    @property
+    def storage(self) -> StorageBackend:
+        if self._storage is None:
+            self._storage = get_storage()
+        return self._storage
+
+    @property
+    def executor(self) -> ProcessPoolExecutor:
+        """渲染进程池（首次使用时创建）"""
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                initializer=_init_worker,
+                initargs=(settings.PDF_FONT_PATH,)
+            )
+        return self._executor
+
+    def report_id_for(self, request_key: str) -> str:
+        """由请求去重键得到稳定的报告ID"""
+        return str(uuid.uuid5(REPORT_NAMESPACE, request_key))
+
+    def object_keys(self, report_id: str, report_format: str) -> Tuple[str, str]:
+        """报告文件和缩略图的对象键"""
+        extension = FILE_EXTENSIONS[report_format]
+        return (
+            f"reports/{report_id}.{extension}",
+            f"reports/{report_id}_thumb.jpg",
+        )
+
+    async def generate(
+        self,
+        analysis_id: str,
+        report_type: str,
+        report_format: str,
+        content: Dict,
+        before_key: str,
+        after_key: str,
+        before_digest: Optional[str] = None,
+        after_digest: Optional[str] = None,
+        blur_eyes: bool = False
+    ) -> Dict:
+        """
+        生成报告
+
+        相同的请求只渲染一次：已生成的直接返回，正在生成的共享同一个任务
+
+        Returns:
+            report_id / file_key / file_size_bytes / thumbnail_key / cached
+        """
+        job = {
+            "analysis_id": analysis_id,
+            "report_type": report_type,
+            "report_format": report_format,
+            "content": content,
+            "blur_eyes": blur_eyes,
+            "before_key": before_key,
+            "after_key": after_key,
+            "before_digest": before_digest,
+            "after_digest": after_digest,
+            "font_path": settings.PDF_FONT_PATH,
+        }
+        request_key = report_request_key(job)
+        report_id = self.report_id_for(request_key)
+        file_key, thumbnail_key = self.object_keys(report_id, report_format)
+
+        # 1. 已生成
+        if await asyncio.to_thread(self.storage.exists, file_key):
+            return {
+                "report_id": report_id,
+                "file_key": file_key,
+                "file_size_bytes": await asyncio.to_thread(self.storage.size, file_key),
+                "thumbnail_key": thumbnail_key,
+                "cached": True,
+            }
+
+        # 2. 正在生成：等待同一个任务
+        future = self._in_flight.get(request_key)
+        if future is None:
+            job["file_key"] = file_key
+            job["thumbnail_key"] = thumbnail_key
+            loop = asyncio.get_running_loop()
+            future = loop.run_in_executor(self.executor, render_report, job)
+            self._in_flight[request_key] = future
+            future.add_done_callback(lambda _: self._in_flight.pop(request_key, None))
+        else:
+            logger.info(f"Joining in-flight report generation: {report_id}")
+
+        # shield：单个请求取消不影响其他等待者
+        result = await asyncio.shield(future)
+        return {"report_id": report_id, "cached": False, **result}
+
+    def shutdown(self) -> None:
+        """关闭渲染进程池"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
+
+
+# 全局报告生成器
+report_generator = ReportGenerator()
@@ -0,0 +1,199 @@
+"""
+可合并的分布摘要
+QuantileSketch 为 merging t-digest（k1 尺度函数），Histogram 为固定分箱直方图；
+两者都可按天预聚合后合并，统计查询无需扫描原始分析结果
+"""
+
+import math
+from bisect import bisect_right
+from typing import Dict, List, Optional
+
+# 默认压缩参数：质心数约为 compression 的 1~2 倍，中位数附近误差约 1%
+DEFAULT_COMPRESSION = 100
+
+# 改善百分比直方图：[-100, 100]，超出范围的值计入两端分箱
+HISTOGRAM_MIN = -100.0
+HISTOGRAM_MAX = 100.0
+HISTOGRAM_BIN_WIDTH = 5.0
+
+
+class QuantileSketch:
+    """t-digest 分位数摘要"""
+
+    def __init__(self, compression: int = DEFAULT_COMPRESSION):
+        self.compression = compression
+        self._centroids: List[List[float]] = []  # [均值, 权重]，按均值排序
+        self._buffer: List[List[float]] = []
+        self.count = 0.0
+        self.min: Optional[float] = None
+        self.max: Optional[float] = None
+
+    # ---------- 写入 ----------
+
+    def add(self, value: float, weight: float = 1.0) -> None:
+        self._buffer.append([float(value), float(weight)])
+        self.count += weight
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = value if self.max is None else max(self.max, value)
+        if len(self._buffer) >= self.compression * 4:
+            self._compress()
+
+    def merge(self, other: "QuantileSketch") -> None:
+        """合并另一个摘要"""
+        if other.count == 0:
+            return
+        other._compress()
+        self._buffer.extend([c[:] for c in other._centroids])
+        self.count += other.count
+        self.min = other.min if self.min is None else min(self.min, other.min)
+        self.max = other.max if self.max is None else max(self.max, other.max)
+        self._compress()
+
+    def _k(self, q: float) -> float:
+        return self.compression / (2 * math.pi) * math.asin(2 * q - 1)
+
+    def _k_inverse(self, k: float) -> float:
+        return (math.sin(k * 2 * math.pi / self.compression) + 1) / 2
+
+    def _compress(self) -> None:
+        if not self._buffer:
+            return
+
+        points = sorted(self._centroids + self._buffer, key=lambda c: c[0])
+        self._buffer = []
+
+        merged = []
+        current = points[0][:]
+        weight_before = 0.0
+        q_limit = self._k_inverse(self._k(0.0) + 1)
+
+        for mean, weight in points[1:]:
+            if (weight_before + current[1] + weight) / self.count <= q_limit:
+                total = current[1] + weight
+                current[0] += (mean - current[0]) * weight / total
+                current[1] = total
+            else:
+                weight_before += current[1]
+                merged.append(current)
+                q_limit = self._k_inverse(min(self._k(weight_before / self.count) + 1, self.compression / 4))
+                current = [mean, weight]
+
+        merged.append(current)
+        self._centroids = merged
+
+    # ---------- 查询 ----------
+
+    def quantile(self, q: float) -> Optional[float]:
+        """
+        估计分位数
+
+        Args:
+            q: 0~1
+
+        Returns:
+            分位数值，空摘要返回 None
+        """
+        self._compress()
+        if not self._centroids:
+            return None
+        if q <= 0:
+            return self.min
+        if q >= 1:
+            return self.max
+
+        target = q * self.count
+        previous_mean, previous_position = self.min, 0.0
+        cumulative = 0.0
+        for mean, weight in self._centroids:
+            position = cumulative + weight / 2
+            if target < position:
+                span = position - previous_position
+                if span <= 0:
+                    return mean
+                return previous_mean + (mean - previous_mean) * (target - previous_position) / span
+            previous_mean, previous_position = mean, position
+            cumulative += weight
+
+        span = self.count - previous_position
+        if span <= 0:
+            return self.max
+        return previous_mean + (self.max - previous_mean) * (target - previous_position) / span
+
+    def rank(self, value: float) -> Optional[float]:
+        """
+        估计 value 的百分位排名（0~1，小于等于 value 的比例）
+
+        Returns:
+            排名，空摘要返回 None
+        """
+        self._compress()
+        if not self._centroids:
+            return None
+        if value < self.min:
+            return 0.0
+        if value >= self.max:
+            return 1.0
+
+        previous_mean, previous_position = self.min, 0.0
+        cumulative = 0.0
+        for mean, weight in self._centroids:
+            position = cumulative + weight / 2
+            if value < mean:
+                span = mean - previous_mean
+                fraction = (value - previous_mean) / span if span > 0 else 1.0
+                return (previous_position + (position - previous_position) * fraction) / self.count
+            previous_mean, previous_position = mean, position
+            cumulative += weight
+
+        span = self.max - previous_mean
+        fraction = (value - previous_mean) / span if span > 0 else 1.0
+        return (previous_position + (self.count - previous_position) * fraction) / self.count
+
+    # ---------- 序列化 ----------
+
+    def to_dict(self) -> Dict:
+        self._compress()
+        return {
+            "compression": self.compression,
+            "min": self.min,
+            "max": self.max,
+            "centroids": [[round(mean, 4), weight] for mean, weight in self._centroids],
+        }
+
+    @classmethod
+    def from_dict(cls, data: Optional[Dict]) -> "QuantileSketch":
+        data = data or {}
+        sketch = cls(compression=data.get("compression", DEFAULT_COMPRESSION))
+        sketch._centroids = [list(c) for c in data.get("centroids", [])]
+        sketch.count = sum(weight for _, weight in sketch._centroids)
+        sketch.min = data.get("min")
+        sketch.max = data.get("max")
+        return sketch
+
+
+class Histogram:
+    """固定分箱直方图"""
+
+    def __init__(self, counts: Optional[List[int]] = None):
+        self.edges = [
+            HISTOGRAM_MIN + i * HISTOGRAM_BIN_WIDTH
+            for i in range(int((HISTOGRAM_MAX - HISTOGRAM_MIN) / HISTOGRAM_BIN_WIDTH) + 1)
+        ]
+        self.counts = list(counts) if counts else [0] * (len(self.edges) - 1)
+
+    def add(self, value: float) -> None:
+        index = bisect_right(self.edges, value) - 1
+        self.counts[max(0, min(index, len(self.counts) - 1))] += 1
+
+    def merge(self, other: "Histogram") -> None:
+        self.counts = [a + b for a, b in zip(self.counts, other.counts)]
+
+    def bins(self) -> List[Dict]:
+        """非空区间内的分箱（去掉两端的空分箱）"""
+        nonzero = [i for i, count in enumerate(self.counts) if count]
+        if not nonzero:
+            return []
+        return [
+            {"start": self.edges[i], "end": self.edges[i + 1], "count": self.counts[i]}
+            for i in range(nonzero[0], nonzero[-1] + 1)
+        ]
@@ -0,0 +1,149 @@
+"""
+治疗时间线服务
+同一治疗同一角度的随访照片与最新的术前照片对比本地指标，拟合效果随时间的变化；
+对比只用两张照片已保存的特征（photos.features）计算，不解码图像，
+每个随访点只计算一次并写入 timeline_points
+"""
+
+import asyncio
+import uuid
+from datetime import datetime
+from typing import Dict, List, Optional, Set, Tuple
+import logging
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.ai.analyzer import BeforeAfterAnalyzer
+from app.ai.comparability import signature_comparability
+from app.ai.face_geometry import compact_landmarks
+from app.ai.features import current_features
+from app.ai.hybrid_analyzer import screen_features
+from app.models import Photo, TimelinePoint, Treatment
+from app.repositories import PhotoRepository, TimelineRepository
+from app.services.photo_pipeline import photo_pipeline
+
+logger = logging.getLogger(__name__)
+
+
+def days_elapsed(treatment: Treatment, photo: Photo) -> int:
+    """照片距治疗日期的天数（没有拍摄时间时使用上传时间）"""
+    taken: datetime = photo.captured_at or photo.created_at
+    return (taken.date() - treatment.treatment_date).days
+
+
+class TimelineService:
+    """治疗时间线"""
+
+    def __init__(self):
+        self._analyzer = BeforeAfterAnalyzer()
+
+    async def _ensure_features(self, photos: List[Photo]) -> Set[uuid.UUID]:
+        """
+        为缺少特征（或特征版本过期）的照片补算特征并写回（在流水线线程池中并行）
+
+        Returns:
+            读取失败的照片ID
+        """
+        missing = [photo for photo in photos if current_features(photo.features) is None]
+        failed = set()
+        if not missing:
+            return failed
+
+        loop = asyncio.get_running_loop()
+        results = await asyncio.gather(
+            *(
+                loop.run_in_executor(
+                    photo_pipeline.executor,
+                    photo_pipeline.extract_features, photo.original_url, photo.face_landmarks
+                )
+                for photo in missing
+            ),
+            return_exceptions=True
+        )
+        for photo, result in zip(missing, results):
+            if isinstance(result, Exception):
+                logger.warning(f"Failed to extract features for photo {photo.id}: {str(result)}")
+                failed.add(photo.id)
+                continue
+            features, landmarks = result
+            if features is not None:
+                photo.features = features
+            if photo.face_landmarks is None and landmarks is not None:
+                photo.face_landmarks = compact_landmarks(landmarks)
+        return failed
+
+    def _point(self, treatment: Treatment, before: Photo, photo: Photo) -> Dict:
+        """一个随访点（两张照片都有特征时计算本地指标，否则写入空值避免重复计算）"""
+        row = {
+            "photo_id": photo.id,
+            "before_photo_id": before.id,
+            "treatment_id": treatment.id,
+            "photo_type": photo.photo_type,
+            "photo_angle": photo.photo_angle,
+            "days_elapsed": days_elapsed(treatment, photo),
+            "overall_improvement": None,
+            "comparability_score": None,
+            "metrics": None,
+        }
+        before_features = current_features(before.features)
+        after_features = current_features(photo.features)
+        if before_features is None or after_features is None:
+            return row
+
+        comparability = signature_comparability(
+            before_features["face"], before.face_landmarks, after_features["face"], photo.face_landmarks
+        )
+        screen = screen_features(before_features["image"], after_features["image"], self._analyzer, comparability)
+        if not screen.failed:
+            row.update(
+                overall_improvement=screen.overall_improvement,
+                comparability_score=comparability.score,
+                metrics=screen.metrics,
+            )
+        return row
+
+    async def update(
+        self,
+        session: AsyncSession,
+        treatment: Treatment,
+        photo_angle: str
+    ) -> Tuple[Optional[Photo], List[TimelinePoint], int]:
+        """
+        计算尚未计算的随访点并返回完整时间线（调用方需要 commit）
+
+        Args:
+            session: 数据库会话
+            treatment: 治疗记录
+            photo_angle: 拍摄角度
+
+        Returns:
+            (术前照片, 按天数排序的随访点, 本次新计算的点数)，没有术前照片时为 (None, [], 0)
+        """
+        photos = await PhotoRepository(session).for_angle(treatment.id, photo_angle)
+        befores = [photo for photo in photos if photo.photo_type == "before"]
+        if not befores:
+            return None, [], 0
+
+        before = befores[-1]
+        repository = TimelineRepository(session)
+        points = await repository.for_angle(treatment.id, photo_angle, before.id)
+        computed = {point.photo_id for point in points}
+        pending = [photo for photo in photos if photo.photo_type != "before" and photo.id not in computed]
+        if not pending:
+            return before, points, 0
+
+        # 上传时已提取特征的照片不需要解码，只有历史照片需要补算一次
+        failed = await self._ensure_features([before, *pending])
+        if before.id in failed:
+            raise ValueError("Failed to read before photo")
+        # 读取失败的照片不写入，下次请求重试
+        rows = [self._point(treatment, before, photo) for photo in pending if photo.id not in failed]
+
+        await repository.add_points(rows)
+        await session.flush()
+        points = await repository.for_angle(treatment.id, photo_angle, before.id)
+        return before, points, len(rows)
+
+
+# 全局时间线服务
+timeline_service = TimelineService()
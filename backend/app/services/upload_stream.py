@@ -0,0 +1,139 @@
+"""
+流式上传处理
+分块读取上传文件：边读边检查大小、增量计算哈希，并写入 TEMP_DIR 下的临时文件，
+解码时通过内存映射读取，避免在内存中保留完整的上传字节
+"""
+
+import hashlib
+import os
+import tempfile
+from pathlib import Path
+from typing import Optional
+import logging
+
+import cv2
+import numpy as np
+from fastapi import UploadFile
+from fastapi.concurrency import run_in_threadpool
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+# 每次读取的块大小
+CHUNK_SIZE = 1024 * 1024
+
+
+class UploadTooLargeError(ValueError):
+    """上传文件超过大小限制"""
+    pass
+
+
+class EmptyUploadError(ValueError):
+    """上传文件为空"""
+    pass
+
+
+class SpooledUpload:
+    """已落盘的上传文件"""
+
+    def __init__(self, path: Path, size: int, sha256: str, filename: Optional[str] = None):
+        """
+        Args:
+            path: 临时文件路径
+            size: 文件大小（字节）
+            sha256: 内容摘要
+            filename: 原始文件名
+        """
+        self.path = path
+        self.size = size
+        self.sha256 = sha256
+        self.filename = filename
+        self._map: Optional[np.memmap] = None
+
+    def buffer(self) -> np.ndarray:
+        """以只读内存映射方式访问文件内容（按需分页，不整体读入内存）"""
+        if self._map is None:
+            self._map = np.memmap(self.path, dtype=np.uint8, mode="r")
+        return self._map
+
+    def header(self, length: int = 16) -> bytes:
+        """读取文件头（用于识别格式）"""
+        with open(self.path, "rb") as f:
+            return f.read(length)
+
+    def decode(self, flags: int = cv2.IMREAD_COLOR) -> Optional[np.ndarray]:
+        """解码图像，失败返回 None"""
+        return cv2.imdecode(self.buffer(), flags)
+
+    def close(self) -> None:
+        """释放映射并删除临时文件"""
+        # memmap 没有 close，删除引用后由 GC 释放映射（文件删除后映射仍然有效）
+        self._map = None
+        try:
+            os.unlink(self.path)
+        except FileNotFoundError:
+            pass
+
+    def __enter__(self) -> "SpooledUpload":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.close()
+
+
+async def spool_upload(
+    upload: UploadFile,
+    max_bytes: Optional[int] = None,
+    chunk_size: int = CHUNK_SIZE
+) -> SpooledUpload:
+    """
+    将上传文件分块写入临时文件
+
+    超过大小限制时立即停止读取并删除临时文件
+
+    Args:
+        upload: FastAPI 上传文件
+        max_bytes: 大小上限，默认 MAX_IMAGE_SIZE_MB
+        chunk_size: 分块大小
+
+    Returns:
+        SpooledUpload（调用方负责 close，推荐使用 with）
+
+    Raises:
+        UploadTooLargeError: 超过大小限制
+        EmptyUploadError: 文件为空
+    """
+    if max_bytes is None:
+        max_bytes = settings.MAX_IMAGE_SIZE_MB * 1024 * 1024
+
+    settings.TEMP_DIR.mkdir(parents=True, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=settings.TEMP_DIR, prefix="upload-", suffix=".part")
+    hasher = hashlib.sha256()
+    size = 0
+
+    try:
+        with os.fdopen(fd, "wb") as f:
+            while True:
+                chunk = await upload.read(chunk_size)
+                if not chunk:
+                    break
+
+                size += len(chunk)
+                if size > max_bytes:
+                    raise UploadTooLargeError(
+                        f"File exceeds {max_bytes // (1024 * 1024)}MB limit"
+                    )
+
+                hasher.update(chunk)
+                await run_in_threadpool(f.write, chunk)
+
+        if size == 0:
+            raise EmptyUploadError("Empty file")
+
+    except Exception:
+        os.unlink(tmp_path)
+        raise
+
+    return SpooledUpload(Path(tmp_path), size, hasher.hexdigest(), upload.filename)
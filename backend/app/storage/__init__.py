@@ -0,0 +1,54 @@
+"""
+对象存储
+根据 STORAGE_BACKEND 选择本地磁盘、AWS S3 或 Cloudflare R2
+"""
+
+from functools import lru_cache
+
+from app.core.config import settings
+from app.storage.base import (
+    StorageBackend,
+    StorageError,
+    ObjectNotFoundError,
+    content_key,
+    guess_content_type,
+)
+
+
+@lru_cache(maxsize=1)
+def get_storage() -> StorageBackend:
+    """获取全局存储后端（每个进程创建一次）"""
+    backend = settings.STORAGE_BACKEND
+
+    if backend == "local":
+        from app.storage.local import LocalStorage
+        return LocalStorage(
+            root=settings.STORAGE_LOCAL_DIR,
+            base_url=settings.STORAGE_PUBLIC_URL,
+            secret=settings.SECRET_KEY,
+            default_expires=settings.STORAGE_URL_EXPIRE_SECONDS
+        )
+
+    if backend == "s3":
+        from app.storage.s3 import S3Storage
+        return S3Storage(
+            bucket=settings.S3_BUCKET_NAME,
+            access_key_id=settings.AWS_ACCESS_KEY_ID,
+            secret_access_key=settings.AWS_SECRET_ACCESS_KEY,
+            region=settings.AWS_REGION,
+            endpoint_url=settings.S3_ENDPOINT_URL,
+            default_expires=settings.STORAGE_URL_EXPIRE_SECONDS
+        )
+
+    if backend == "r2":
+        from app.storage.s3 import S3Storage
+        return S3Storage(
+            bucket=settings.R2_BUCKET_NAME,
+            access_key_id=settings.R2_ACCESS_KEY_ID,
+            secret_access_key=settings.R2_SECRET_ACCESS_KEY,
+            region="auto",
+            endpoint_url=f"https://{settings.R2_ACCOUNT_ID}.r2.cloudflarestorage.com",
+            default_expires=settings.STORAGE_URL_EXPIRE_SECONDS
+        )
+
+    raise StorageError(f"Unknown storage backend: {backend}")
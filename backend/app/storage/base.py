@@ -0,0 +1,179 @@
+"""
+对象存储接口
+照片、对比图、报告统一通过存储后端读写，大文件由存储或静态服务器直接提供
+"""
+
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import BinaryIO, Dict, List, Optional
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+# 分片上传的最小分片（S3 要求除最后一片外 >= 5MB）
+MULTIPART_CHUNK_SIZE = 8 * 1024 * 1024
+
+CONTENT_TYPES = {
+    "jpg": "image/jpeg",
+    "jpeg": "image/jpeg",
+    "png": "image/png",
+    "webp": "image/webp",
+    "pdf": "application/pdf",
+    "html": "text/html; charset=utf-8",
+    "json": "application/json",
+}
+
+
+class StorageError(Exception):
+    """存储操作失败"""
+    pass
+
+
+class ObjectNotFoundError(StorageError):
+    """对象不存在"""
+    pass
+
+
+def content_key(digest: str, extension: str, prefix: str = "objects") -> str:
+    """
+    内容寻址的对象键
+
+    同样内容的文件总是得到同样的键，重复上传自动去重
+
+    Args:
+        digest: 内容摘要（SHA-256 十六进制）
+        extension: 扩展名
+        prefix: 键前缀（photos / composites / reports）
+
+    Returns:
+        如 "photos/ab/cd/abcd....jpg"
+    """
+    return f"{prefix}/{digest[:2]}/{digest[2:4]}/{digest}.{extension}"
+
+
+def guess_content_type(key: str) -> str:
+    """根据对象键的扩展名推断 Content-Type"""
+    extension = key.rsplit(".", 1)[-1].lower() if "." in key else ""
+    return CONTENT_TYPES.get(extension, "application/octet-stream")
+
+
+def validate_key(key: str) -> str:
+    """校验对象键（禁止绝对路径和 .. 等路径穿越）"""
+    if not key or key.startswith("/") or "\\" in key:
+        raise StorageError(f"Invalid storage key: {key}")
+    if any(part in ("", ".", "..") for part in key.split("/")):
+        raise StorageError(f"Invalid storage key: {key}")
+    return key
+
+
+class StorageBackend(ABC):
+    """存储后端"""
+
+    # ---------- 基本读写 ----------
+
+    @abstractmethod
+    def put_bytes(self, key: str, data: bytes, content_type: Optional[str] = None) -> None:
+        """写入对象"""
+
+    @abstractmethod
+    def put_file(self, key: str, path: Path, content_type: Optional[str] = None) -> None:
+        """上传本地文件（大文件自动分片）"""
+
+    @abstractmethod
+    def get_bytes(self, key: str) -> bytes:
+        """读取完整对象"""
+
+    @abstractmethod
+    def get_range(self, key: str, start: int, end: Optional[int] = None) -> bytes:
+        """
+        读取对象的字节范围
+
+        Args:
+            key: 对象键
+            start: 起始偏移（包含）
+            end: 结束偏移（包含），None 表示读到末尾
+        """
+
+    @abstractmethod
+    def exists(self, key: str) -> bool:
+        """对象是否存在"""
+
+    @abstractmethod
+    def size(self, key: str) -> int:
+        """对象大小（字节）"""
+
+    @abstractmethod
+    def delete(self, key: str) -> None:
+        """删除对象（不存在时忽略）"""
+
+    # ---------- 分片上传 ----------
+
+    @abstractmethod
+    def create_multipart_upload(self, key: str, content_type: Optional[str] = None) -> str:
+        """开始分片上传，返回 upload_id"""
+
+    @abstractmethod
+    def upload_part(self, key: str, upload_id: str, part_number: int, data: bytes) -> str:
+        """上传一个分片（part_number 从 1 开始），返回 ETag"""
+
+    @abstractmethod
+    def complete_multipart_upload(self, key: str, upload_id: str, parts: List[Dict]) -> None:
+        """
+        完成分片上传
+
+        Args:
+            parts: [{"PartNumber": 1, "ETag": "..."}, ...]
+        """
+
+    @abstractmethod
+    def abort_multipart_upload(self, key: str, upload_id: str) -> None:
+        """放弃分片上传"""
+
+    # ---------- 访问URL ----------
+
+    @abstractmethod
+    def url(self, key: str, expires_in: Optional[int] = None) -> str:
+        """
+        生成带签名、会过期的访问URL
+
+        Args:
+            key: 对象键
+            expires_in: 有效期（秒），默认 STORAGE_URL_EXPIRE_SECONDS
+        """
+
+    # ---------- 通用实现 ----------
+
+    def upload_stream(
+        self,
+        key: str,
+        stream: BinaryIO,
+        content_type: Optional[str] = None,
+        chunk_size: int = MULTIPART_CHUNK_SIZE
+    ) -> None:
+        """
+        以分片方式上传文件流（内存中最多保留一个分片）
+
+        Args:
+            key: 对象键
+            stream: 可读的二进制流
+            content_type: Content-Type
+            chunk_size: 分片大小
+        """
+        upload_id = self.create_multipart_upload(key, content_type or guess_content_type(key))
+        parts = []
+        try:
+            part_number = 1
+            while True:
+                chunk = stream.read(chunk_size)
+                if not chunk and part_number > 1:
+                    break
+                etag = self.upload_part(key, upload_id, part_number, chunk)
+                parts.append({"PartNumber": part_number, "ETag": etag})
+                part_number += 1
+                if not chunk:
+                    break
+            self.complete_multipart_upload(key, upload_id, parts)
+        except Exception:
+            self.abort_multipart_upload(key, upload_id)
+            raise
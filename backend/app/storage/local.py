@@ -0,0 +1,180 @@
+"""
+本地磁盘存储后端
+签名URL指向静态文件服务（生产环境可由 Nginx secure_link 校验）
+"""
+
+import hashlib
+import hmac
+import os
+import shutil
+import tempfile
+import time
+import uuid
+from pathlib import Path
+from typing import Dict, List, Optional
+from urllib.parse import quote, urlencode
+import logging
+
+from app.storage.base import (
+    StorageBackend,
+    StorageError,
+    ObjectNotFoundError,
+    validate_key,
+)
+
+logger = logging.getLogger(__name__)
+
+
+def atomic_write(path: Path, write) -> None:
+    """
+    原子写入文件
+
+    先写入同目录下的临时文件，再通过 os.replace 替换，读取方永远不会看到写了一半的文件
+
+    Args:
+        path: 目标路径
+        write: 写入函数，参数为已打开的二进制文件对象
+    """
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            write(f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
+
+
+def atomic_write_bytes(path: Path, data: bytes) -> None:
+    """原子写入字节"""
+    atomic_write(path, lambda f: f.write(data))
+
+
+def sign_key(secret: str, key: str, expires: int) -> str:
+    """计算对象键的 HMAC-SHA256 签名"""
+    message = f"{key}:{expires}".encode("utf-8")
+    return hmac.new(secret.encode("utf-8"), message, hashlib.sha256).hexdigest()
+
+
+class LocalStorage(StorageBackend):
+    """本地磁盘存储"""
+
+    def __init__(
+        self,
+        root: Path,
+        base_url: str,
+        secret: str,
+        default_expires: int = 3600
+    ):
+        """
+        初始化本地存储
+
+        Args:
+            root: 存储根目录
+            base_url: 静态访问URL前缀
+            secret: URL签名密钥
+            default_expires: 默认URL有效期（秒）
+        """
+        self.root = root
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.base_url = base_url.rstrip("/")
+        self.secret = secret
+        self.default_expires = default_expires
+        self._multipart_root = self.root / ".multipart"
+
+    def path(self, key: str) -> Path:
+        """对象键 -> 本地路径"""
+        return self.root / validate_key(key)
+
+    # ---------- 基本读写 ----------
+
+    def put_bytes(self, key: str, data: bytes, content_type: Optional[str] = None) -> None:
+        atomic_write(self.path(key), lambda f: f.write(data))
+
+    def put_file(self, key: str, path: Path, content_type: Optional[str] = None) -> None:
+        def copy(f):
+            with open(path, "rb") as src:
+                shutil.copyfileobj(src, f, 1024 * 1024)
+        atomic_write(self.path(key), copy)
+
+    def get_bytes(self, key: str) -> bytes:
+        try:
+            return self.path(key).read_bytes()
+        except FileNotFoundError:
+            raise ObjectNotFoundError(key)
+
+    def get_range(self, key: str, start: int, end: Optional[int] = None) -> bytes:
+        try:
+            with open(self.path(key), "rb") as f:
+                f.seek(start)
+                if end is None:
+                    return f.read()
+                return f.read(end - start + 1)
+        except FileNotFoundError:
+            raise ObjectNotFoundError(key)
+
+    def exists(self, key: str) -> bool:
+        return self.path(key).is_file()
+
+    def size(self, key: str) -> int:
+        try:
+            return self.path(key).stat().st_size
+        except FileNotFoundError:
+            raise ObjectNotFoundError(key)
+
+    def delete(self, key: str) -> None:
+        try:
+            self.path(key).unlink()
+        except FileNotFoundError:
+            pass
+
+    # ---------- 分片上传 ----------
+
+    def _upload_dir(self, upload_id: str) -> Path:
+        if not upload_id or "/" in upload_id or upload_id.startswith("."):
+            raise StorageError(f"Invalid upload id: {upload_id}")
+        return self._multipart_root / upload_id
+
+    def create_multipart_upload(self, key: str, content_type: Optional[str] = None) -> str:
+        validate_key(key)
+        upload_id = uuid.uuid4().hex
+        self._upload_dir(upload_id).mkdir(parents=True)
+        return upload_id
+
+    def upload_part(self, key: str, upload_id: str, part_number: int, data: bytes) -> str:
+        part_path = self._upload_dir(upload_id) / f"{part_number:05d}"
+        part_path.write_bytes(data)
+        return hashlib.md5(data).hexdigest()
+
+    def complete_multipart_upload(self, key: str, upload_id: str, parts: List[Dict]) -> None:
+        upload_dir = self._upload_dir(upload_id)
+
+        def concat(f):
+            for part in sorted(parts, key=lambda p: p["PartNumber"]):
+                with open(upload_dir / f"{part['PartNumber']:05d}", "rb") as src:
+                    shutil.copyfileobj(src, f, 1024 * 1024)
+
+        atomic_write(self.path(key), concat)
+        shutil.rmtree(upload_dir, ignore_errors=True)
+
+    def abort_multipart_upload(self, key: str, upload_id: str) -> None:
+        shutil.rmtree(self._upload_dir(upload_id), ignore_errors=True)
+
+    # ---------- 访问URL ----------
+
+    def url(self, key: str, expires_in: Optional[int] = None) -> str:
+        validate_key(key)
+        expires = int(time.time()) + (expires_in or self.default_expires)
+        query = urlencode({"expires": expires, "signature": sign_key(self.secret, key, expires)})
+        return f"{self.base_url}/{quote(key)}?{query}"
+
+    def verify(self, key: str, expires: int, signature: str) -> bool:
+        """校验签名URL（未过期且签名正确）"""
+        if expires < time.time():
+            return False
+        expected = sign_key(self.secret, key, expires)
+        return hmac.compare_digest(expected, signature)
@@ -0,0 +1,174 @@
+"""
+S3 兼容存储后端
+支持 AWS S3、Cloudflare R2，以及 MinIO 等本地替身（通过 endpoint_url）
+"""
+
+from pathlib import Path
+from typing import Dict, List, Optional
+import logging
+
+from app.storage.base import (
+    StorageBackend,
+    ObjectNotFoundError,
+    MULTIPART_CHUNK_SIZE,
+    guess_content_type,
+    validate_key,
+)
+
+logger = logging.getLogger(__name__)
+
+
+class S3Storage(StorageBackend):
+    """S3 兼容存储"""
+
+    def __init__(
+        self,
+        bucket: str,
+        access_key_id: Optional[str] = None,
+        secret_access_key: Optional[str] = None,
+        region: Optional[str] = None,
+        endpoint_url: Optional[str] = None,
+        default_expires: int = 3600
+    ):
+        """
+        初始化 S3 客户端
+
+        Args:
+            bucket: 存储桶
+            access_key_id: Access Key
+            secret_access_key: Secret Key
+            region: 区域（R2 使用 "auto"）
+            endpoint_url: 自定义端点（R2 / MinIO）
+            default_expires: 默认签名URL有效期（秒）
+        """
+        import boto3
+        from boto3.s3.transfer import TransferConfig
+        from botocore.config import Config
+
+        self.bucket = bucket
+        self.default_expires = default_expires
+        self.client = boto3.client(
+            "s3",
+            aws_access_key_id=access_key_id,
+            aws_secret_access_key=secret_access_key,
+            region_name=region,
+            endpoint_url=endpoint_url,
+            config=Config(signature_version="s3v4", max_pool_connections=32)
+        )
+        # 超过阈值的文件自动分片并发上传
+        self.transfer_config = TransferConfig(
+            multipart_threshold=MULTIPART_CHUNK_SIZE,
+            multipart_chunksize=MULTIPART_CHUNK_SIZE
+        )
+
+    def _is_not_found(self, error) -> bool:
+        code = getattr(error, "response", {}).get("Error", {}).get("Code")
+        return code in ("404", "NoSuchKey", "NotFound")
+
+    # ---------- 基本读写 ----------
+
+    def put_bytes(self, key: str, data: bytes, content_type: Optional[str] = None) -> None:
+        self.client.put_object(
+            Bucket=self.bucket,
+            Key=validate_key(key),
+            Body=data,
+            ContentType=content_type or guess_content_type(key)
+        )
+
+    def put_file(self, key: str, path: Path, content_type: Optional[str] = None) -> None:
+        self.client.upload_file(
+            str(path),
+            self.bucket,
+            validate_key(key),
+            ExtraArgs={"ContentType": content_type or guess_content_type(key)},
+            Config=self.transfer_config
+        )
+
+    def get_bytes(self, key: str) -> bytes:
+        from botocore.exceptions import ClientError
+        try:
+            response = self.client.get_object(Bucket=self.bucket, Key=validate_key(key))
+            return response["Body"].read()
+        except ClientError as e:
+            if self._is_not_found(e):
+                raise ObjectNotFoundError(key)
+            raise
+
+    def get_range(self, key: str, start: int, end: Optional[int] = None) -> bytes:
+        from botocore.exceptions import ClientError
+        byte_range = f"bytes={start}-{'' if end is None else end}"
+        try:
+            response = self.client.get_object(
+                Bucket=self.bucket,
+                Key=validate_key(key),
+                Range=byte_range
+            )
+            return response["Body"].read()
+        except ClientError as e:
+            if self._is_not_found(e):
+                raise ObjectNotFoundError(key)
+            raise
+
+    def exists(self, key: str) -> bool:
+        from botocore.exceptions import ClientError
+        try:
+            self.client.head_object(Bucket=self.bucket, Key=validate_key(key))
+            return True
+        except ClientError as e:
+            if self._is_not_found(e):
+                return False
+            raise
+
+    def size(self, key: str) -> int:
+        from botocore.exceptions import ClientError
+        try:
+            response = self.client.head_object(Bucket=self.bucket, Key=validate_key(key))
+            return response["ContentLength"]
+        except ClientError as e:
+            if self._is_not_found(e):
+                raise ObjectNotFoundError(key)
+            raise
+
+    def delete(self, key: str) -> None:
+        self.client.delete_object(Bucket=self.bucket, Key=validate_key(key))
+
+    # ---------- 分片上传 ----------
+
+    def create_multipart_upload(self, key: str, content_type: Optional[str] = None) -> str:
+        response = self.client.create_multipart_upload(
+            Bucket=self.bucket,
+            Key=validate_key(key),
+            ContentType=content_type or guess_content_type(key)
+        )
+        return response["UploadId"]
+
+    def upload_part(self, key: str, upload_id: str, part_number: int, data: bytes) -> str:
+        response = self.client.upload_part(
+            Bucket=self.bucket,
+            Key=key,
+            UploadId=upload_id,
+            PartNumber=part_number,
+            Body=data
+        )
+        return response["ETag"]
+
+    def complete_multipart_upload(self, key: str, upload_id: str, parts: List[Dict]) -> None:
+        self.client.complete_multipart_upload(
+            Bucket=self.bucket,
+            Key=key,
+            UploadId=upload_id,
+            MultipartUpload={"Parts": sorted(parts, key=lambda p: p["PartNumber"])}
+        )
+
+    def abort_multipart_upload(self, key: str, upload_id: str) -> None:
+        self.client.abort_multipart_upload(Bucket=self.bucket, Key=key, UploadId=upload_id)
+
+    # ---------- 访问URL ----------
+
+    def url(self, key: str, expires_in: Optional[int] = None) -> str:
+        """预签名URL，客户端直接从 S3 / R2 下载"""
+        return self.client.generate_presigned_url(
+            "get_object",
+            Params={"Bucket": self.bucket, "Key": validate_key(key)},
+            ExpiresIn=expires_in or self.default_expires
+        )
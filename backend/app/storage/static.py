@@ -0,0 +1,36 @@
+"""
+本地存储的签名静态文件服务
+校验 expires / signature 后由 StaticFiles 直接发送文件（支持 Range、ETag），
+生产环境建议改由 Nginx secure_link 提供
+"""
+
+from starlette.exceptions import HTTPException
+from starlette.staticfiles import StaticFiles
+from starlette.types import Scope
+from urllib.parse import parse_qs
+import logging
+
+from app.storage.local import LocalStorage
+
+logger = logging.getLogger(__name__)
+
+
+class SignedStaticFiles(StaticFiles):
+    """只允许签名URL访问的静态文件服务"""
+
+    def __init__(self, storage: LocalStorage):
+        super().__init__(directory=str(storage.root))
+        self.storage = storage
+
+    async def get_response(self, path: str, scope: Scope):
+        query = parse_qs(scope.get("query_string", b"").decode("latin-1"))
+        try:
+            expires = int(query["expires"][0])
+            signature = query["signature"][0]
+        except (KeyError, ValueError):
+            raise HTTPException(status_code=403, detail="Missing signature")
+
+        if path.startswith(".") or not self.storage.verify(path, expires, signature):
+            raise HTTPException(status_code=403, detail="Invalid or expired signature")
+
+        return await super().get_response(path, scope)
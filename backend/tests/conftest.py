@@ -0,0 +1,70 @@
+"""
+测试公共设置
+数据库测试使用内存 SQLite（按 ORM 模型建表，包括统计触发器），每个测试一个独立的数据库
+"""
+
+import asyncio
+import os
+import tempfile
+
+# 配置在导入 app 之前设置：目录写到临时目录，不连接外部数据库
+_TEMP = tempfile.mkdtemp(prefix="glowtrack-tests-")
+for _name in ("UPLOAD_DIR", "TEMP_DIR", "REPORTS_DIR", "AI_MODELS_DIR", "STORAGE_LOCAL_DIR"):
+    os.environ.setdefault(_name, os.path.join(_TEMP, _name.lower()))
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+import pytest  # noqa: E402
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine  # noqa: E402
+
+from app.models import Base  # noqa: E402
+
+
+@pytest.fixture
+def run_db():
+    """
+    在新的内存数据库中运行异步测试场景
+
+    用法：run_db(scenario)，scenario 为 async def scenario(session)
+    """
+    def run(scenario):
+        async def main():
+            engine = create_async_engine("sqlite+aiosqlite://")
+            try:
+                async with engine.begin() as conn:
+                    await conn.run_sync(Base.metadata.create_all)
+                async with async_sessionmaker(engine, expire_on_commit=False)() as session:
+                    return await scenario(session)
+            finally:
+                await engine.dispose()
+
+        return asyncio.run(main())
+
+    return run
+
+
+@pytest.fixture
+def face_landmarks():
+    """
+    由通用三维人脸模型投影得到的关键点（原图坐标，格式同 detect_face_landmarks）
+
+    用法：face_landmarks((高, 宽), yaw=0.0, distance=2.5)，distance 为相机距离（图像宽度的倍数）
+    """
+    import cv2
+    import numpy as np
+
+    from app.ai.face_geometry import FACE_MODEL_3D, POSE_LANDMARKS
+
+    def make(image_size, yaw=0.0, distance=2.5):
+        h, w = image_size
+        camera = np.array([[w, 0, w / 2], [0, w, h / 2], [0, 0, 1]], dtype=np.float64)
+        rotation = np.array([0.0, np.radians(yaw), 0.0])
+        points, _ = cv2.projectPoints(
+            FACE_MODEL_3D, rotation, np.array([0.0, 0.0, distance * w]), camera, None
+        )
+        points = points.reshape(-1, 2)
+        all_landmarks = [tuple(points[0])] * 468
+        for index, point in zip(POSE_LANDMARKS, points):
+            all_landmarks[index] = tuple(point)
+        return {"all_landmarks": [(float(x), float(y)) for x, y in all_landmarks], "key_points": {}}
+
+    return make
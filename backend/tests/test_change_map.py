@@ -0,0 +1,95 @@
+"""变化热力图"""
+
+import cv2
+import numpy as np
+
+from app.ai.change_map import (
+    CHANGE_KINDS,
+    CHANGE_MIN_SCALE,
+    IMPROVED_COLOR,
+    WORSENED_COLOR,
+    change_maps,
+    render_overlay,
+)
+from app.ai.features import image_features
+from app.services.composite_service import COMPOSITE_FORMATS
+from app.services.heatmap_service import HEATMAP_SIZES, HeatmapService
+from app.storage.local import LocalStorage
+
+SIZE = 1000
+# 额头区域（标准画面中位于面部范围内）
+LINES = slice(300, 400), slice(350, 650)
+
+
+def _skin(seed=0):
+    rng = np.random.default_rng(seed)
+    return cv2.GaussianBlur(rng.normal(160, 6, (SIZE, SIZE, 3)).clip(0, 255).astype(np.uint8), (0, 0), 2)
+
+
+def _wrinkled(seed=0):
+    image = _skin(seed)
+    for y in range(LINES[0].start, LINES[0].stop, 12):
+        cv2.line(image, (LINES[1].start, y), (LINES[1].stop, y), (90, 90, 90), 2)
+    return image
+
+
+def _change(before, after):
+    buffers = {"before": {}, "after": {}}
+    image_features(before, buffers=buffers["before"])
+    image_features(after, buffers=buffers["after"])
+    return change_maps(after, buffers)
+
+
+def test_smoothed_lines_show_as_improvement():
+    change = _change(_wrinkled(), _skin())
+    assert set(change.maps) == set(CHANGE_KINDS)
+
+    for kind in ("edges", "texture"):
+        diff = change.maps[kind]
+        assert diff[LINES].mean() > CHANGE_MIN_SCALE[kind]
+        # 面部范围以外不着色
+        assert diff[:50, :50].max() == 0
+
+    worsened = _change(_skin(), _wrinkled())
+    assert worsened.maps["edges"][LINES].mean() < 0
+
+
+def test_overlay_colors_follow_sign():
+    image = np.full((40, 40, 3), 128, dtype=np.uint8)
+    diff = np.zeros((40, 40), dtype=np.float32)
+    diff[:, :20] = 1.0
+    diff[:, 20:] = -1.0
+    diff[:10] = 0.0
+
+    overlay = render_overlay(image, diff, scale=1.0)
+    assert (overlay[:10] == image[:10]).all()
+    improved, worsened = overlay[20, 5].astype(int), overlay[20, 35].astype(int)
+    assert np.argmax(improved) == np.argmax(IMPROVED_COLOR)
+    assert np.argmax(worsened) == np.argmax(WORSENED_COLOR)
+
+
+def test_missing_buffers_skip_kinds():
+    image = _skin()
+    buffers = {"before": {}, "after": {}}
+    image_features(image, analysis_types=("wrinkles",), buffers=buffers["before"])
+    image_features(image, analysis_types=("wrinkles",), buffers=buffers["after"])
+
+    change = change_maps(image, buffers)
+    assert set(change.maps) == {"edges"}
+    assert change.scales["edges"] == CHANGE_MIN_SCALE["edges"]
+    assert change_maps(image, {"before": {}, "after": buffers["after"]}) is None
+
+
+def test_service_stores_every_variant(tmp_path):
+    storage = LocalStorage(tmp_path, "/files", "secret")
+    service = HeatmapService(storage=storage)
+    analysis_id = "0f8fad5b-d9cb-469f-a165-70867728950e"
+
+    kinds = service.render(analysis_id, _change(_wrinkled(), _skin()))
+    assert sorted(kinds) == sorted(CHANGE_KINDS)
+    for kind in kinds:
+        for size, width in HEATMAP_SIZES.items():
+            for fmt in COMPOSITE_FORMATS:
+                data = storage.get_bytes(service.object_key(analysis_id, kind, size, fmt))
+                image = cv2.imdecode(np.frombuffer(data, np.uint8), cv2.IMREAD_COLOR)
+                assert image.shape[1] == min(width, SIZE)
@@ -0,0 +1,70 @@
+"""术前术后照片可比性"""
+
+import json
+
+import cv2
+import numpy as np
+
+from app.ai.comparability import (
+    COMPARABLE,
+    HIST_BINS,
+    NOT_COMPARABLE,
+    face_signature,
+    pair_comparability,
+)
+
+SIZE = (1200, 900)
+
+
+def _photo(mean=128.0, seed=0):
+    rng = np.random.default_rng(seed)
+    return cv2.resize(
+        rng.normal(mean, 30, (SIZE[0] // 4, SIZE[1] // 4, 3)).clip(0, 255).astype(np.uint8),
+        (SIZE[1], SIZE[0]), interpolation=cv2.INTER_NEAREST
+    )
+
+
+def test_same_setup_is_comparable(face_landmarks):
+    landmarks = face_landmarks(SIZE)
+    report = pair_comparability(_photo(seed=0), landmarks, _photo(seed=1), landmarks)
+
+    assert report.level == COMPARABLE
+    assert report.issues == []
+    assert report.components["pose"] == report.components["shape"] == report.components["scale"] == 1.0
+    assert report.details["scale_ratio"] == 1.0
+
+
+def test_pose_and_distance_mismatch(face_landmarks):
+    before = face_landmarks(SIZE)
+
+    turned = pair_comparability(_photo(), before, _photo(), face_landmarks(SIZE, yaw=30))
+    assert turned.level == NOT_COMPARABLE and not turned.passed
+    assert turned.components["pose"] == 0.0
+    assert abs(turned.details["pose_delta"]["yaw"]) > 25
+    assert "pose_mismatch" in {issue["code"] for issue in turned.issues}
+
+    farther = pair_comparability(_photo(), before, _photo(), face_landmarks(SIZE, distance=5.0))
+    assert abs(farther.details["scale_ratio"] - 0.5) < 0.02
+    assert farther.components["scale"] <= 0.05
+    # 只改变距离时形状经相似变换对齐后不变
+    assert farther.components["shape"] == 1.0
+
+
+def test_lighting_mismatch(face_landmarks):
+    landmarks = face_landmarks(SIZE)
+    report = pair_comparability(_photo(mean=128), landmarks, _photo(mean=60), landmarks)
+
+    assert report.details["brightness_delta"] < -20
+    assert report.components["lighting"] < 0.7
+    assert report.score == report.components["lighting"]
+
+
+def test_signature_is_serializable(face_landmarks):
+    signature = face_signature(_photo(), face_landmarks(SIZE))
+    histogram = np.array(json.loads(json.dumps(signature))["lab_histogram"])
+    assert histogram.shape == (3, HIST_BINS)
+    assert np.allclose(histogram.sum(axis=1), 1.0)
+
+
+def test_missing_face_has_no_report(face_landmarks):
+    assert pair_comparability(_photo(), None, _photo(), face_landmarks(SIZE)) is None
@@ -0,0 +1,55 @@
+"""对比图"""
+
+import cv2
+import numpy as np
+import pytest
+
+from app.ai.composite import build_pyramid
+from app.services.composite_service import COMPOSITE_FORMATS, COMPOSITE_SIZES, CompositeService, composite_key
+from app.storage.local import LocalStorage
+
+
+def _photo(seed, shape=(1200, 900)):
+    image = np.random.default_rng(seed).integers(0, 256, shape + (3,), dtype=np.uint8)
+    return cv2.imencode(".jpg", image)[1].tobytes()
+
+
+def test_pyramid_never_upscales():
+    image = np.zeros((1000, 2000, 3), dtype=np.uint8)
+    levels = build_pyramid(image, {"small": 500, "medium": 1000, "huge": 4000})
+    assert levels["huge"] is image
+    assert levels["medium"].shape[:2] == (500, 1000)
+    assert levels["small"].shape[:2] == (250, 500)
+
+
+def test_key_depends_on_content_and_options():
+    key = composite_key("a" * 64, "b" * 64)
+    assert key == composite_key("a" * 64, "b" * 64)
+    assert key != composite_key("b" * 64, "a" * 64)
+    assert key != composite_key("a" * 64, "b" * 64, labels=False)
+    assert key != composite_key("a" * 64, "b" * 64, eyes_blurred=True)
+
+
+def test_renders_once_then_serves_cached_variants(tmp_path, monkeypatch):
+    storage = LocalStorage(tmp_path, "/files", "secret")
+    service = CompositeService(storage=storage)
+    before, after = _photo(0), _photo(1)
+
+    key, data = service.get_or_create(before, after, size="web", fmt="jpg")
+    for size in COMPOSITE_SIZES:
+        for fmt in COMPOSITE_FORMATS:
+            assert storage.exists(service.object_key(key, size, fmt))
+    assert cv2.imdecode(np.frombuffer(data, np.uint8), cv2.IMREAD_COLOR).shape[1] == 1600
+
+    def fail(*args, **kwargs):
+        raise AssertionError("cached composite must not be re-rendered")
+
+    monkeypatch.setattr(service, "render", fail)
+    assert service.get_or_create(before, after, size="web", fmt="jpg") == (key, data)
+    # 新的服务实例（内存缓存为空）从存储读取
+    fresh = CompositeService(storage=storage)
+    monkeypatch.setattr(fresh, "render", fail)
+    assert fresh.get_or_create(before, after, size="thumbnail", fmt="webp")[0] == key
+
+    with pytest.raises(ValueError):
+        service.lookup(key, size="poster")
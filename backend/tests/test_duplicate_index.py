@@ -0,0 +1,88 @@
+"""重复照片检测"""
+
+import random
+import uuid
+
+import cv2
+import numpy as np
+
+from app.ai.perceptual_hash import HASH_BITS, hamming, phash, to_signed
+from app.models import Clinic, Photo
+from app.services.duplicate_index import DuplicateIndex, MultiIndexHash
+
+
+def _flip(value, bits, rng):
+    for bit in rng.sample(range(HASH_BITS), bits):
+        value ^= 1 << bit
+    return value
+
+
+def test_multi_index_search_matches_brute_force():
+    """阈值小于分段数（走桶）和不小于分段数（全量比较）时都与逐个比较一致"""
+    rng = random.Random(7)
+    index = MultiIndexHash()
+    query = rng.getrandbits(HASH_BITS)
+    hashes = {uuid.uuid4(): _flip(query, distance, rng) for distance in range(0, 16) for _ in range(3)}
+    hashes.update({uuid.uuid4(): rng.getrandbits(HASH_BITS) for _ in range(500)})
+    for photo_id, hash_value in hashes.items():
+        index.add(photo_id, hash_value)
+
+    for max_distance in (0, 3, 6, 7, 8, 12):
+        expected = {photo_id for photo_id, value in hashes.items() if hamming(query, value) <= max_distance}
+        found = index.search(query, max_distance)
+        assert {photo_id for _, photo_id in found} == expected
+        assert [distance for distance, _ in found] == sorted(distance for distance, _ in found)
+
+
+def test_discard_removes_from_all_buckets():
+    index = MultiIndexHash()
+    photo_id = uuid.uuid4()
+    index.add(photo_id, 0x0123456789ABCDEF)
+    index.discard(photo_id)
+    assert len(index) == 0
+    assert index.search(0x0123456789ABCDEF, 0) == []
+    assert all(not table for table in index._tables)
+
+
+def test_phash_tolerates_reencoding():
+    rng = np.random.default_rng(1)
+    image = cv2.resize(rng.integers(0, 256, (24, 32, 3), dtype=np.uint8), (640, 480))
+    recompressed = cv2.imdecode(cv2.imencode(".jpg", image, [cv2.IMWRITE_JPEG_QUALITY, 60])[1], cv2.IMREAD_COLOR)
+    other = cv2.resize(rng.integers(0, 256, (24, 32, 3), dtype=np.uint8), (640, 480))
+
+    assert hamming(phash(image), phash(recompressed)) <= 6
+    assert hamming(phash(image), phash(other)) > 6
+
+
+def test_find_loads_clinic_hashes_and_drops_deleted(run_db):
+    """首次查询从数据库加载；已删除的照片不返回并移出索引；只查本诊所"""
+    async def scenario(session):
+        clinics = [Clinic(name=f"c{i}", email=f"c{i}@example.com") for i in range(2)]
+        session.add_all(clinics)
+        await session.flush()
+
+        base = 0xF0F0_0F0F_AAAA_5555
+        near, far, deleted, elsewhere = (
+            Photo(clinic_id=clinic.id, photo_type="before", photo_angle="front",
+                  original_url="x.jpg", phash=to_signed(value))
+            for clinic, value in (
+                (clinics[0], base ^ 0b101),
+                (clinics[0], ~base & (2 ** HASH_BITS - 1)),
+                (clinics[0], base ^ 0b1),
+                (clinics[1], base),
+            )
+        )
+        session.add_all([near, far, deleted, elsewhere])
+        await session.flush()
+
+        index = DuplicateIndex(max_distance=6)
+        matches = await index.find(session, clinics[0].id, base)
+        assert [(match.photo_id, match.distance) for match in matches] == [(deleted.id, 1), (near.id, 2)]
+
+        await session.delete(deleted)
+        await session.flush()
+        matches = await index.find(session, clinics[0].id, base, exclude=[near.id])
+        assert matches == []
+        assert deleted.id not in index._clinics[clinics[0].id].hashes.hashes
+
+    run_db(scenario)
@@ -0,0 +1,49 @@
+"""单图特征"""
+
+import cv2
+import numpy as np
+import pytest
+
+from app.ai.features import (
+    PORE_THRESHOLD,
+    STRIP_ROWS,
+    _PORE_KERNEL,
+    _strip_statistics,
+    image_features,
+    pore_features,
+    texture_features,
+)
+
+
+def _reference(gray):
+    """整图计算（条带化之前的实现）"""
+    laplacian = cv2.Laplacian(gray, cv2.CV_64F)
+    blackhat = cv2.morphologyEx(gray, cv2.MORPH_BLACKHAT, _PORE_KERNEL)
+    _, mask = cv2.threshold(blackhat, PORE_THRESHOLD, 255, cv2.THRESH_BINARY)
+    return laplacian, float(laplacian.var()), int(np.count_nonzero(mask))
+
+
+@pytest.mark.parametrize("shape", [(1000, 1000), (STRIP_ROWS * 3, 257), (STRIP_ROWS + 1, 65), (7, 300)])
+def test_strips_match_full_frame(shape):
+    """条带边界（含不足一个条带的尾部）上的结果与整图计算相同"""
+    rng = np.random.default_rng(sum(shape))
+    gray = rng.integers(0, 256, shape, dtype=np.uint8)
+    laplacian, variance, pore_area = _reference(gray)
+
+    buffers = {}
+    statistics = _strip_statistics(gray, buffers=buffers)
+    assert statistics["pore_area"] == pore_area
+    assert statistics["laplacian_var"] == pytest.approx(variance, rel=1e-12)
+    assert buffers["laplacian"].dtype == np.int16
+    np.testing.assert_array_equal(buffers["laplacian"], laplacian)
+
+
+def test_wrappers_and_image_features_agree():
+    rng = np.random.default_rng(0)
+    image = rng.integers(0, 256, (300, 200, 3), dtype=np.uint8)
+    gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+
+    features = image_features(image, ("texture", "pores"))
+    assert features["texture"] == texture_features(gray)
+    assert features["pores"] == pore_features(gray)
+    assert set(_strip_statistics(gray, texture=False)) == {"pore_area"}
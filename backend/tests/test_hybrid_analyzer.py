@@ -0,0 +1,104 @@
+"""本地 + Claude 混合分析"""
+
+from types import SimpleNamespace
+
+import cv2
+import numpy as np
+import pytest
+
+from app.ai.analyzer import BeforeAfterAnalyzer
+from app.ai.comparability import ComparabilityReport
+from app.ai.features import image_features
+from app.ai.hybrid_analyzer import (
+    MODE_CLAUDE,
+    MODE_HYBRID,
+    MODE_LOCAL,
+    REASON_LARGE_CHANGE,
+    REASON_LOCAL_FAILED,
+    REASON_MODE,
+    REASON_NEGATIVE_CHANGE,
+    REASON_NO_FACE,
+    REASON_NOT_COMPARABLE,
+    REASON_REQUESTED,
+    AnalysisPolicy,
+    LocalScreen,
+    escalation_reasons,
+    local_analysis_result,
+    screen_features,
+    screen_pair,
+)
+from app.ai.metrics import extract_metrics, overall_score
+from app.ai.report_templates import extract_improvements
+
+
+def _skin(seed=0, lines=False):
+    rng = np.random.default_rng(seed)
+    image = cv2.GaussianBlur(rng.normal(160, 6, (1000, 1000, 3)).clip(0, 255).astype(np.uint8), (0, 0), 2)
+    if lines:
+        for y in range(250, 700, 15):
+            cv2.line(image, (300, y), (700, y), (90, 90, 90), 2)
+    return image
+
+
+def _screen(overall=10.0, pcts=(5.0,), **kwargs):
+    metrics = [
+        {"category": "wrinkles", "metric": f"m{i}", "before_score": 5, "after_score": 4, "improvement_pct": pct}
+        for i, pct in enumerate(pcts)
+    ]
+    return LocalScreen(improvements={}, overall_improvement=overall, metrics=metrics, **kwargs)
+
+
+def _comparability(score):
+    return ComparabilityReport(score=score, components={}, details={})
+
+
+def test_policy_falls_back_to_defaults():
+    assert AnalysisPolicy.for_clinic(None, MODE_HYBRID, 30.0) == AnalysisPolicy(MODE_HYBRID, 30.0)
+
+    clinic = SimpleNamespace(analysis_mode=MODE_LOCAL, claude_escalation_threshold=0)
+    assert AnalysisPolicy.for_clinic(clinic, MODE_HYBRID, 30.0) == AnalysisPolicy(MODE_LOCAL, 0.0)
+
+    unknown = SimpleNamespace(analysis_mode="gpt", claude_escalation_threshold=None)
+    assert AnalysisPolicy.for_clinic(unknown, MODE_CLAUDE, 25.0) == AnalysisPolicy(MODE_CLAUDE, 25.0)
+
+
+def test_escalation_reasons():
+    hybrid = AnalysisPolicy(MODE_HYBRID, 30.0)
+    assert escalation_reasons(_screen(), hybrid) == []
+    assert escalation_reasons(_screen(overall=30.0), hybrid) == [REASON_LARGE_CHANGE]
+    assert escalation_reasons(_screen(pcts=(5.0, -12.0)), hybrid) == [REASON_NEGATIVE_CHANGE]
+    assert escalation_reasons(_screen(registered=False), hybrid) == [REASON_NO_FACE]
+    assert escalation_reasons(_screen(comparability=_comparability(0.5)), hybrid) == [REASON_NOT_COMPARABLE]
+    assert escalation_reasons(_screen(comparability=_comparability(0.9)), hybrid) == []
+    assert escalation_reasons(_screen(overall=None), hybrid) == [REASON_LOCAL_FAILED]
+    assert escalation_reasons(_screen(), hybrid, requested=True) == [REASON_REQUESTED]
+
+    # local 只在医生要求时调用，claude 始终调用；两者都不看本地信号
+    local = AnalysisPolicy(MODE_LOCAL, 0.0)
+    assert escalation_reasons(_screen(overall=90.0, pcts=(-50.0,)), local) == []
+    assert escalation_reasons(_screen(), local, requested=True) == [REASON_REQUESTED]
+    assert escalation_reasons(_screen(), AnalysisPolicy(MODE_CLAUDE)) == [REASON_MODE]
+
+
+def test_local_result_uses_claude_shape():
+    screen = _screen(overall=12.5, pcts=(20.0, -3.0))
+    result = local_analysis_result(screen)
+
+    assert result["success"] is True
+    assert overall_score(result) == 12.5
+    assert result["_meta"]["cost_usd"] == 0.0
+    assert [row["improvement"] for row in extract_improvements(result)] == [20.0, -3.0]
+    assert [row["improvement_pct"] for row in extract_metrics(result)] == [20.0, -3.0]
+
+
+def test_screen_from_features_matches_pair():
+    analyzer = BeforeAfterAnalyzer()
+    before, after = _skin(0, lines=True), _skin(1)
+
+    pair = screen_pair(before, after, analyzer)
+    assert not pair.failed
+    assert pair.overall_improvement > 0
+
+    stored = screen_features(image_features(before), image_features(after), analyzer)
+    assert stored.overall_improvement == pytest.approx(pair.overall_improvement)
+    assert stored.metrics == pair.metrics
@@ -0,0 +1,82 @@
+"""分析指标提取"""
+
+from sqlalchemy import select
+
+from app.ai.metrics import category_improvements, extract_metrics, overall_score
+from app.models import AnalysisMetric, Clinic
+from app.repositories import AnalysisRepository
+
+CLAUDE_RESULT = {
+    "wrinkle_analysis": {
+        "forehead_lines": {"before_score": 40, "after_score": 70, "improvement_pct": 50.0},
+        "crows_feet": {"before_score": 50, "after_score": 60, "improvement_pct": 20},
+        "notes": "text is ignored",
+    },
+    "skin_quality": {"radiance": {"improvement_pct": 10}, "pore_size": {"improvement_pct": "n/a"}},
+    "overall_assessment": {"overall_improvement": 42},
+}
+
+LOCAL_RESULT = {
+    "wrinkles": {"regions": {"forehead": {"reduction_pct": 12.5}, "eyes": {"reduction_pct": 7.5}}},
+    "skin_tone": {"improvement_pct": 4.0},
+    "pores": {"reduction_pct": 6.0},
+    "overall_score": 6.5,
+}
+
+
+def test_claude_and_local_formats_use_same_metric_names():
+    claude = {(row["category"], row["metric"]): row["improvement_pct"] for row in extract_metrics(CLAUDE_RESULT)}
+    local = {(row["category"], row["metric"]): row["improvement_pct"] for row in extract_metrics(LOCAL_RESULT)}
+
+    assert claude == {
+        ("wrinkles", "forehead_lines"): 50.0,
+        ("wrinkles", "crows_feet"): 20.0,
+        ("skin_quality", "radiance"): 10.0,
+    }
+    assert local == {
+        ("wrinkles", "forehead_lines"): 12.5,
+        ("wrinkles", "crows_feet"): 7.5,
+        ("skin_quality", "tone_evenness"): 4.0,
+        ("skin_quality", "pore_size"): 6.0,
+    }
+    assert overall_score(CLAUDE_RESULT) == 42
+    assert overall_score(LOCAL_RESULT) == 65
+    assert extract_metrics(None) == [] and overall_score("bad") is None
+
+
+def test_category_improvements():
+    categories = category_improvements(extract_metrics(CLAUDE_RESULT))
+    assert categories == {"wrinkles": 35.0, "skin_quality": 10.0, "contour": None, "volume": None}
+
+
+def test_create_projects_columns_and_metric_rows(run_db):
+    async def scenario(session):
+        clinic = Clinic(name="c", email="c@example.com")
+        session.add(clinic)
+        await session.flush()
+
+        repository = AnalysisRepository(session)
+        analysis = await repository.create(
+            clinic_id=clinic.id, treatment_type="botox", improvements=CLAUDE_RESULT
+        )
+        assert analysis.overall_score == 42
+        assert analysis.wrinkles_improvement_pct == 35.0
+        assert analysis.contour_improvement_pct is None
+
+        rows = list(await session.scalars(select(AnalysisMetric).where(AnalysisMetric.analysis_id == analysis.id)))
+        assert {(row.category, row.metric) for row in rows} == {
+            ("wrinkles", "forehead_lines"), ("wrinkles", "crows_feet"), ("skin_quality", "radiance")
+        }
+        assert all(row.clinic_id == clinic.id and row.treatment_type == "botox" for row in rows)
+
+        # 规则重放：改写 improvements 后重新投影，指标行整体替换
+        analysis.improvements = LOCAL_RESULT
+        await session.flush()
+        assert await repository.reproject() == 1
+        rows = list(await session.scalars(
+            select(AnalysisMetric).where(AnalysisMetric.analysis_id == analysis.id).execution_options(populate_existing=True)
+        ))
+        assert len(rows) == 4
+        assert analysis.overall_score == 65
+
+    run_db(scenario)
@@ -0,0 +1,144 @@
+"""多角度对比"""
+
+from datetime import date, datetime
+
+import numpy as np
+
+from app.ai.comparability import ComparabilityReport
+from app.ai.hybrid_analyzer import LocalScreen
+from app.ai.multi_view import (
+    FACE_CROP_MARGIN,
+    SOURCE_CLAUDE,
+    SOURCE_LOCAL,
+    ViewPair,
+    crop_face,
+    merge_views,
+    sort_angles,
+)
+from app.ai.quality_gate import REJECT, QualityReport
+from app.models import Clinic, Patient, Photo, Treatment
+from app.repositories import PhotoRepository
+
+
+def _view(angle, overall=10.0, comparability=None, after_passed=True):
+    screen = LocalScreen(
+        improvements={},
+        overall_improvement=overall,
+        metrics=[{
+            "category": "wrinkles", "metric": "forehead_lines",
+            "before_score": 6, "after_score": 5, "improvement_pct": overall,
+        }],
+    )
+    after_quality = QualityReport(face_detected=True, sharpness_score=1.0, lighting_score=1.0)
+    if not after_passed:
+        after_quality.add_issue("blurry", REJECT, "Photo is blurry")
+    empty = np.zeros((8, 8, 3), dtype=np.uint8)
+    return ViewPair(
+        angle=angle,
+        before_quality=QualityReport(face_detected=True, sharpness_score=1.0, lighting_score=1.0),
+        after_quality=after_quality,
+        comparability=comparability,
+        screen=screen,
+        before_view=empty,
+        after_view=empty,
+    )
+
+
+def test_sort_angles():
+    assert sort_angles(["right90", "custom", "left45", "front"]) == ["front", "left45", "right90", "custom"]
+
+
+def test_crop_face_keeps_margin_and_downscales(face_landmarks):
+    image = np.zeros((3000, 2000, 3), dtype=np.uint8)
+    landmarks = face_landmarks((3000, 2000))
+    crop = crop_face(image, landmarks, max_size=200)
+    assert max(crop.shape[:2]) == 200
+
+    points = np.array(landmarks["all_landmarks"])
+    width, height = np.ptp(points, axis=0) * (1 + 2 * FACE_CROP_MARGIN)
+    assert abs(crop.shape[1] / crop.shape[0] - width / height) < 0.02
+
+    assert crop_face(np.zeros((300, 200, 3), dtype=np.uint8), None).shape == (300, 200, 3)
+
+
+def test_merge_prefers_claude_and_falls_back_to_local():
+    views = {"left45": _view("left45", overall=8.0), "front": _view("front", overall=12.0)}
+    claude = {
+        "views": {
+            "front": {"success": True, "overall_assessment": {"overall_improvement": 40}},
+            "left45": {"success": False, "error": "unparsable"},
+        },
+        "requested_angles": ["front", "left45"],
+        "_meta": {"model": "claude", "tokens_used": 900},
+    }
+
+    merged = merge_views(views, claude)
+    assert merged["primary_angle"] == "front"
+    assert merged["source"] == SOURCE_CLAUDE
+    assert merged["overall_assessment"]["overall_improvement"] == 40
+    assert merged["_meta"]["tokens_used"] == 900
+    assert merged["views"]["left45"]["source"] == SOURCE_LOCAL
+    assert merged["views"]["left45"]["overall_assessment"]["overall_improvement"] == 8.0
+    assert merged["views"]["left45"]["local_screen"]["overall_improvement"] == 8.0
+
+
+def test_merge_without_claude_uses_local_meta():
+    merged = merge_views({"right45": _view("right45")}, None)
+    assert merged["primary_angle"] == "right45"
+    assert merged["source"] == SOURCE_LOCAL
+    assert merged["_meta"]["cost_usd"] == 0.0
+    assert "claude_error" not in merged
+
+    failed = merge_views({"front": _view("front")}, {"error": "timeout", "requested_angles": ["front"]})
+    assert failed["source"] == SOURCE_LOCAL
+    assert failed["claude_error"] == "timeout"
+
+
+def test_view_issues():
+    assert _view("front").issues == {}
+
+    mismatch = ComparabilityReport(score=0.2, components={}, details={}, issues=[{"code": "pose_mismatch"}])
+    view = _view("front", comparability=mismatch, after_passed=False)
+    assert set(view.issues) == {"after", "comparability"}
+    assert view.issues["after"][0]["code"] == "blurry"
+
+
+def test_angle_pairs_take_latest_photos(run_db):
+    async def scenario(session):
+        clinic = Clinic(name="c", email="c@example.com")
+        session.add(clinic)
+        await session.flush()
+        patient = Patient(clinic_id=clinic.id, first_name="P", last_name="Test")
+        session.add(patient)
+        await session.flush()
+        treatment = Treatment(
+            patient_id=patient.id, clinic_id=clinic.id, treatment_type="botox", treatment_date=date(2026, 10, 1)
+        )
+        session.add(treatment)
+        await session.flush()
+
+        def photo(photo_type, angle, day):
+            return Photo(
+                treatment_id=treatment.id, patient_id=patient.id, clinic_id=clinic.id,
+                photo_type=photo_type, photo_angle=angle, original_url=f"{photo_type}-{angle}-{day}",
+                created_at=datetime(2026, 10, day),
+            )
+
+        photos = [
+            photo("before", "front", 1), photo("before", "front", 2),
+            photo("after_2weeks", "front", 15), photo("after_1month", "front", 30),
+            photo("before", "left45", 1), photo("after_2weeks", "left45", 15),
+            photo("before", "right45", 1),
+        ]
+        session.add_all(photos)
+        await session.flush()
+
+        repository = PhotoRepository(session)
+        pairs = await repository.angle_pairs(treatment.id)
+        assert set(pairs) == {"front", "left45"}
+        assert pairs["front"] == (photos[1], photos[3])
+
+        two_weeks = await repository.angle_pairs(treatment.id, after_photo_type="after_2weeks")
+        assert two_weeks["front"] == (photos[1], photos[2])
+
+    run_db(scenario)
@@ -0,0 +1,94 @@
+"""游标分页"""
+
+import uuid
+from datetime import datetime
+
+import pytest
+
+from app.api.patients import get_clinic_patients
+from app.models import Clinic, Patient
+from app.repositories import PatientRepository
+from app.repositories.pagination import InvalidCursorError, decode_cursor, encode_cursor
+
+
+async def _page_all(repository, clinic_id, limit):
+    """翻到最后一页，返回全部 id（游标不前进时页数超过行数，直接失败而不是死循环）"""
+    ids, cursor = [], None
+    for _ in range(100):
+        page = await repository.page_for_clinic(clinic_id, cursor=cursor, limit=limit)
+        ids.extend(patient.id for patient in page.items)
+        if page.next_cursor is None:
+            return ids
+        cursor = page.next_cursor
+    pytest.fail("keyset pagination did not terminate")
+
+
+def _patients(clinic, count, created_at=None):
+    return [
+        Patient(clinic_id=clinic.id, first_name=f"P{i}", last_name="Test", created_at=created_at)
+        for i in range(count)
+    ]
+
+
+def test_pages_rows_sharing_one_timestamp(run_db):
+    """同一时间戳（整秒）的行靠 id 区分，翻页不重复、不遗漏"""
+    async def scenario(session):
+        clinic = Clinic(name="c", email="c@example.com")
+        session.add(clinic)
+        await session.flush()
+        patients = _patients(clinic, 7, created_at=datetime(2026, 10, 19, 0, 56, 19))
+        session.add_all(patients)
+        await session.flush()
+
+        ids = await _page_all(PatientRepository(session), clinic.id, limit=2)
+        assert len(ids) == 7
+        assert set(ids) == {patient.id for patient in patients}
+        assert ids == sorted(ids, reverse=True)
+
+    run_db(scenario)
+
+
+def test_pages_rows_created_in_same_second(run_db):
+    """默认创建时间（同一秒内连续插入）翻页不重复"""
+    async def scenario(session):
+        clinic = Clinic(name="c", email="c@example.com")
+        session.add(clinic)
+        await session.flush()
+        patients = _patients(clinic, 9)
+        for patient in patients:
+            session.add(patient)
+            await session.flush()
+
+        ids = await _page_all(PatientRepository(session), clinic.id, limit=4)
+        assert len(ids) == len(set(ids)) == 9
+
+    run_db(scenario)
+
+
+def test_cursor_round_trip():
+    created_at, id = datetime(2026, 10, 19, 0, 56, 19, 123456), uuid.uuid4()
+    assert decode_cursor(encode_cursor(created_at, id)) == (created_at, id)
+
+
+def test_invalid_cursor():
+    with pytest.raises(InvalidCursorError):
+        decode_cursor("not-a-cursor")
+
+
+def test_clinic_patients_total_from_stats(run_db):
+    """列表的 total 为在册患者数（来自 clinic_stats），与翻页结果一致"""
+    async def scenario(session):
+        clinic = Clinic(name="c", email="c@example.com")
+        session.add(clinic)
+        await session.flush()
+        patients = _patients(clinic, 5)
+        session.add_all(patients)
+        await session.flush()
+        await PatientRepository(session).update(patients[0].id, is_active=False)
+
+        response = await get_clinic_patients(str(clinic.id), limit=2, session=session)
+        assert response["total"] == 4
+        assert len(response["patients"]) == 2
+        assert response["next_cursor"] is not None
+
+    run_db(scenario)
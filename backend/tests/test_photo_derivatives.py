@@ -0,0 +1,86 @@
+"""照片上传的衍生文件"""
+
+import hashlib
+
+import cv2
+import numpy as np
+import pytest
+
+from app.services.photo_pipeline import THUMBNAIL_SIZE, PhotoPipeline, decode_thumbnail, detect_image_format
+from app.storage.local import LocalStorage
+
+
+class NoFaceProcessor:
+    """未检测到人脸（只生成原图和缩略图）"""
+
+    def detect_face_landmarks(self, image):
+        return None
+
+
+def _jpeg(shape=(1600, 1200), seed=0):
+    rng = np.random.default_rng(seed)
+    image = cv2.resize(
+        rng.integers(0, 256, (shape[0] // 8, shape[1] // 8, 3), dtype=np.uint8), (shape[1], shape[0])
+    )
+    return cv2.imencode(".jpg", image)[1].tobytes()
+
+
+@pytest.fixture
+def pipeline(tmp_path):
+    pipeline = PhotoPipeline(storage=LocalStorage(tmp_path, "/files", "secret"), max_workers=2)
+    # 处理器按线程创建，流水线线程也使用替身
+    pipeline._processor = NoFaceProcessor
+    yield pipeline
+    pipeline.shutdown()
+
+
+def test_detect_image_format():
+    assert detect_image_format(_jpeg((64, 64))) == "jpg"
+    assert detect_image_format(cv2.imencode(".png", np.zeros((4, 4, 3), np.uint8))[1]) == "png"
+    assert detect_image_format(b"GIF89a") is None
+
+
+def test_decode_thumbnail_short_side():
+    thumbnail = decode_thumbnail(_jpeg((4000, 3000)))
+    assert thumbnail.shape[:2] == (round(4000 * THUMBNAIL_SIZE / 3000), THUMBNAIL_SIZE)
+
+    # 短边不足时不放大
+    assert decode_thumbnail(_jpeg((400, 200))).shape[:2] == (400, 200)
+    assert decode_thumbnail(b"\xff\xd8\xff broken") is None
+
+
+def test_process_stores_original_and_thumbnail(pipeline):
+    data = _jpeg()
+    result = pipeline.process(data, photo_angle="front")
+
+    assert result["original_key"].endswith(".jpg")
+    assert pipeline.storage.get_bytes(result["original_key"]) == data
+    thumbnail = cv2.imdecode(
+        np.frombuffer(pipeline.storage.get_bytes(result["thumbnail_key"]), np.uint8), cv2.IMREAD_COLOR
+    )
+    assert min(thumbnail.shape[:2]) == THUMBNAIL_SIZE
+    assert result["processed_key"] is None
+    assert result["face_detected"] is False
+    assert (result["image_width"], result["image_height"]) == (1200, 1600)
+    assert result["file_size_bytes"] == len(data)
+    assert isinstance(result["phash"], int)
+
+    # 内容寻址：相同内容得到相同的键
+    again = pipeline.process(data, digest=hashlib.sha256(data).hexdigest())
+    assert again["original_key"] == result["original_key"]
+    assert again["thumbnail_key"] == result["thumbnail_key"]
+
+
+def test_process_rejects_unknown_format(pipeline):
+    with pytest.raises(ValueError):
+        pipeline.process(b"not an image")
+
+
+def test_save_original_file(pipeline, tmp_path):
+    data = _jpeg((64, 64))
+    path = tmp_path / "upload.bin"
+    path.write_bytes(data)
+
+    key = pipeline.save_original_file(path, hashlib.sha256(data).hexdigest())
+    assert key.endswith(".jpg")
+    assert pipeline.storage.get_bytes(key) == data
@@ -0,0 +1,63 @@
+"""照片处理流水线"""
+
+import cv2
+import numpy as np
+import pytest
+
+pytest.importorskip("mediapipe")
+
+from app.ai.face_geometry import FACE_MODEL_3D, POSE_LANDMARKS  # noqa: E402
+from app.ai.image_processor import ImageProcessor  # noqa: E402
+from app.services.photo_pipeline import PhotoPipeline  # noqa: E402
+from app.storage.local import LocalStorage  # noqa: E402
+
+
+class CountingProcessor(ImageProcessor):
+    """投影标准人脸模型得到关键点，并记录对齐次数"""
+
+    def __init__(self):
+        self.registrations = 0
+
+    def detect_face_landmarks(self, image):
+        h, w = image.shape[:2]
+        camera = np.array([[w, 0, w / 2], [0, w, h / 2], [0, 0, 1]], dtype=float)
+        points, _ = cv2.projectPoints(
+            FACE_MODEL_3D, np.zeros(3), np.array([0, 0, 2.5 * w]), camera, None
+        )
+        points = points.reshape(-1, 2)
+        all_landmarks = [tuple(map(int, points[0]))] * 468
+        for index, point in zip(POSE_LANDMARKS, points):
+            all_landmarks[index] = tuple(map(int, point))
+        return {"all_landmarks": all_landmarks, "key_points": {}}
+
+    def register_to(self, *args, **kwargs):
+        self.registrations += 1
+        return super().register_to(*args, **kwargs)
+
+    def align_face(self, *args, **kwargs):
+        raise AssertionError("processed image must reuse the registered image")
+
+
+def test_upload_aligns_once(tmp_path):
+    storage = LocalStorage(tmp_path, "/files", "secret")
+    pipeline = PhotoPipeline(storage=storage)
+    processor = CountingProcessor()
+    pipeline._local.processor = processor
+
+    rng = np.random.default_rng(3)
+    image = cv2.resize(
+        rng.normal(128, 30, (300, 225, 3)).clip(0, 255).astype(np.uint8),
+        (900, 1200), interpolation=cv2.INTER_NEAREST
+    )
+    data = cv2.imencode(".jpg", image)[1].tobytes()
+
+    try:
+        result = pipeline._save_processed("ab" * 32, data, "front")
+    finally:
+        pipeline.shutdown()
+
+    key, metadata = result
+    assert processor.registrations == 1
+    assert metadata["features"] is not None
+    processed = cv2.imdecode(np.frombuffer(storage.get_bytes(key), np.uint8), cv2.IMREAD_COLOR)
+    assert processed.shape[:2] == (1000, 1000)
@@ -0,0 +1,52 @@
+"""照片质量检查"""
+
+import cv2
+import numpy as np
+
+from app.ai.quality_gate import REJECT, WARN, assess_quality
+
+SIZE = (1200, 900)
+
+
+def _photo(mean=128.0, blur=0.0, seed=0):
+    rng = np.random.default_rng(seed)
+    image = cv2.resize(
+        rng.normal(mean, 30, (SIZE[0] // 4, SIZE[1] // 4, 3)).clip(0, 255).astype(np.uint8),
+        (SIZE[1], SIZE[0]), interpolation=cv2.INTER_NEAREST
+    )
+    return cv2.GaussianBlur(image, (0, 0), blur) if blur else image
+
+
+def _codes(report, level):
+    return {issue["code"] for issue in report.issues if issue["level"] == level}
+
+
+def test_good_front_photo_passes(face_landmarks):
+    report = assess_quality(_photo(), face_landmarks(SIZE), "front")
+    assert report.passed
+    assert report.issues == []
+    assert report.quality_score > 0.9
+    assert abs(report.pose["yaw"]) < 1
+
+
+def test_rejects_blur_exposure_and_missing_face(face_landmarks):
+    landmarks = face_landmarks(SIZE)
+    assert "blurry" in _codes(assess_quality(_photo(blur=12), landmarks), REJECT)
+    assert "underexposed" in _codes(assess_quality(_photo(mean=20), landmarks), REJECT)
+    assert "overexposed" in _codes(assess_quality(_photo(mean=240), landmarks), REJECT)
+
+    report = assess_quality(_photo(), None)
+    assert not report.passed and report.quality_score == 0.0
+    assert "no_face" in _codes(report, REJECT)
+
+
+def test_pose_checked_against_photo_angle(face_landmarks):
+    turned = face_landmarks(SIZE, yaw=45)
+    assert "head_yaw" in _codes(assess_quality(_photo(), turned, "front"), REJECT)
+    assert assess_quality(_photo(), turned, "left45").passed
+    assert "head_yaw" in _codes(assess_quality(_photo(), face_landmarks(SIZE, yaw=15), "front"), WARN)
+
+
+def test_small_face_rejected(face_landmarks):
+    report = assess_quality(_photo(), face_landmarks(SIZE, distance=20), "front")
+    assert "face_too_small" in _codes(report, REJECT)
@@ -0,0 +1,56 @@
+"""术前术后配准"""
+
+import cv2
+import numpy as np
+import pytest
+
+from app.ai.face_geometry import (
+    LEFT_EYE_OUTER,
+    RIGHT_EYE_OUTER,
+    canonical_transform,
+    compose_affine,
+    similarity_transform,
+)
+
+
+def _apply(matrix, points):
+    return np.asarray(points) @ matrix[:, :2].T + matrix[:, 2]
+
+
+def test_similarity_transform_recovers_known_warp():
+    rng = np.random.default_rng(0)
+    src = rng.uniform(0, 1000, (468, 2))
+    known = cv2.getRotationMatrix2D((500, 400), 7.5, 1.2)
+    known[:, 2] += (30, -12)
+
+    matrix, residual = similarity_transform(src, _apply(known, src))
+    np.testing.assert_allclose(matrix, known, atol=1e-9)
+    assert residual == pytest.approx(0, abs=1e-9)
+
+
+def test_similarity_transform_never_mirrors():
+    rng = np.random.default_rng(1)
+    src = rng.uniform(0, 100, (50, 2))
+    mirrored = src * (-1, 1)
+    matrix, residual = similarity_transform(src, mirrored)
+    assert np.linalg.det(matrix[:, :2]) > 0
+    assert residual > 1
+
+
+def test_registered_pair_lands_on_same_canonical_points(face_landmarks):
+    """术后关键点配准到术前后，两张图在标准画面中逐点重合，双眼位于约定位置"""
+    size = (1000, 1000)
+    before = face_landmarks((1200, 900))
+    moved = cv2.getRotationMatrix2D((450, 600), -6.0, 0.8)
+    after = {"all_landmarks": [tuple(p) for p in _apply(moved, before["all_landmarks"])], "key_points": {}}
+
+    canonical = canonical_transform(before, size)
+    registration, _ = similarity_transform(after["all_landmarks"], before["all_landmarks"])
+    before_points = _apply(canonical, before["all_landmarks"])
+    after_points = _apply(compose_affine(canonical, registration), after["all_landmarks"])
+
+    np.testing.assert_allclose(after_points, before_points, atol=1e-6)
+    left, right = before_points[LEFT_EYE_OUTER], before_points[RIGHT_EYE_OUTER]
+    assert left[1] == pytest.approx(right[1])
+    assert right[0] - left[0] == pytest.approx(size[0] * 0.35)
+    np.testing.assert_allclose((left + right) / 2, (size[0] / 2, size[1] * 0.4))
@@ -0,0 +1,97 @@
+"""报告生成"""
+
+import asyncio
+
+import cv2
+import numpy as np
+import pytest
+
+from app.services import report_generator as report_module
+from app.services.composite_service import CompositeService, content_digest
+from app.services.report_generator import ReportGenerator, render_report, report_request_key
+from app.storage.local import LocalStorage
+
+
+@pytest.fixture
+def storage(tmp_path, monkeypatch):
+    storage = LocalStorage(tmp_path, "/files", "secret")
+    monkeypatch.setattr(report_module, "get_storage", lambda: storage)
+    monkeypatch.setattr(report_module, "composite_service", CompositeService(storage=storage))
+    return storage
+
+
+def _job(storage, report_format="html"):
+    photos = {}
+    for name, seed in (("before", 0), ("after", 1)):
+        image = np.random.default_rng(seed).integers(0, 256, (600, 450, 3), dtype=np.uint8)
+        data = cv2.imencode(".jpg", image)[1].tobytes()
+        storage.put_bytes(f"photos/{name}.jpg", data)
+        photos[name] = data
+
+    generator = ReportGenerator(storage=storage)
+    file_key, thumbnail_key = generator.object_keys("r1", report_format)
+    return {
+        "analysis_id": "a1",
+        "report_type": "patient",
+        "report_format": report_format,
+        "content": {"title": "<Report>", "headline": "Great", "highlights": ["Radiance +12%"]},
+        "blur_eyes": False,
+        "before_key": "photos/before.jpg",
+        "after_key": "photos/after.jpg",
+        "before_digest": content_digest(photos["before"]),
+        "after_digest": content_digest(photos["after"]),
+        "file_key": file_key,
+        "thumbnail_key": thumbnail_key,
+    }
+
+
+def test_render_report_writes_file_and_thumbnail(storage):
+    job = _job(storage)
+    result = render_report(job)
+
+    page = storage.get_bytes(result["file_key"]).decode("utf-8")
+    assert "&lt;Report&gt;" in page and "<li>Radiance +12%</li>" in page
+    assert result["file_size_bytes"] == storage.size(job["file_key"])
+    assert storage.exists(job["thumbnail_key"])
+
+
+def test_cached_composite_skips_original_photos(storage):
+    """已知摘要且对比图已生成时，不再读取原图"""
+    render_report(_job(storage))
+    storage.delete("photos/before.jpg")
+    storage.delete("photos/after.jpg")
+
+    job = dict(_job(storage, "image"), before_key="photos/missing.jpg", after_key="photos/missing.jpg")
+    result = render_report(job)
+    assert cv2.imdecode(np.frombuffer(storage.get_bytes(result["file_key"]), np.uint8), cv2.IMREAD_COLOR) is not None
+
+
+def test_request_key_ignores_object_keys():
+    job = {
+        "analysis_id": "a1", "report_type": "patient", "report_format": "pdf",
+        "blur_eyes": False, "content": {"title": "t"}, "before_key": "x",
+    }
+    assert report_request_key(job) == report_request_key(dict(job, before_key="y"))
+    assert report_request_key(job) != report_request_key(dict(job, blur_eyes=True))
+
+
+def test_generate_returns_existing_report(storage):
+    generator = ReportGenerator(storage=storage)
+    job = _job(storage)
+
+    async def generate():
+        return await generator.generate(
+            analysis_id=job["analysis_id"], report_type=job["report_type"],
+            report_format=job["report_format"], content=job["content"],
+            before_key=job["before_key"], after_key=job["after_key"],
+        )
+
+    report_id = generator.report_id_for(report_request_key(job))
+    file_key, _ = generator.object_keys(report_id, "html")
+    storage.put_bytes(file_key, b"<html></html>")
+
+    result = asyncio.run(generate())
+    assert result["cached"] is True
+    assert result["report_id"] == report_id
+    assert result["file_size_bytes"] == 13
+    assert generator._executor is None
@@ -0,0 +1,60 @@
+"""患者报告模板渲染"""
+
+from app.ai.report_templates import (
+    DEFAULT_LOCALE,
+    ReportTemplateRenderer,
+    extract_improvements,
+    highlight_key,
+    render_cache_info,
+    resolve_locale,
+)
+
+
+def _improvements():
+    analysis = {
+        "wrinkle_analysis": {
+            "crows_feet": {"improvement_pct": 35, "description": "鱼尾纹变浅"},
+            "overall_score": 7,
+        },
+        "skin_quality": {
+            "radiance": {"improvement_pct": 12.5, "description": "肤色更亮"},
+        },
+    }
+    return extract_improvements(analysis)
+
+
+def test_resolve_locale():
+    assert resolve_locale(None) == DEFAULT_LOCALE
+    assert resolve_locale("en") == "en-US"
+    assert resolve_locale("en_us") == "en-US"
+    assert resolve_locale("zh") == "zh-CN"
+    assert resolve_locale("fr-FR") == DEFAULT_LOCALE
+
+
+def test_render_uses_cache_and_returns_copies():
+    renderer = ReportTemplateRenderer("en")
+    improvements = _improvements()
+
+    first = renderer.render_patient_texts("excellent", improvements)
+    hits = render_cache_info().hits
+    first["highlights"].append("mutated")
+    first["next_steps"].clear()
+
+    second = renderer.render_patient_texts("excellent", improvements)
+    assert render_cache_info().hits == hits + 1
+    assert second["highlights"] == ["Crow's feet improved by 35%", "Skin radiance improved by 12.5%"]
+    assert second["next_steps"] == renderer.render_next_steps("excellent")
+    assert second["badge"] == "⭐ Excellent Result"
+
+
+def test_unknown_level_falls_back_to_fair():
+    renderer = ReportTemplateRenderer()
+    texts = renderer.render_patient_texts("negative", _improvements())
+    assert texts["headline"] == renderer.render_patient_texts("fair", [])["headline"]
+    assert texts["highlights"] == ["鱼尾纹变浅", "肤色更亮"]
+
+
+def test_highlight_key_keeps_top_items():
+    improvements = _improvements() * 3
+    assert len(highlight_key(improvements)) == 3
+    assert highlight_key(improvements, limit=1) == (("wrinkle_analysis", "crows_feet", 35, "鱼尾纹变浅"),)
@@ -0,0 +1,71 @@
+"""仓储基类"""
+
+import uuid
+
+from sqlalchemy import select
+
+from app.core.database import async_database_url
+from app.models import Clinic
+from app.repositories import ClinicRepository, parse_id
+
+
+def test_async_database_url():
+    assert async_database_url("postgresql://u:p@db/app") == "postgresql+asyncpg://u:p@db/app"
+    assert async_database_url("postgres://u@db/app") == "postgresql+asyncpg://u@db/app"
+    assert async_database_url("sqlite:///./local.db") == "sqlite+aiosqlite:///./local.db"
+    assert async_database_url("postgresql+asyncpg://db/app") == "postgresql+asyncpg://db/app"
+
+
+def test_parse_id():
+    value = uuid.uuid4()
+    assert parse_id(value) is value
+    assert parse_id(str(value)) == value
+    assert parse_id("not-a-uuid") is None
+    assert parse_id(None) is None
+
+
+def test_crud(run_db):
+    async def scenario(session):
+        repository = ClinicRepository(session)
+        clinic = await repository.create(name="a", email="a@example.com")
+        await repository.create(name="b", email="b@example.com")
+
+        assert await repository.get(str(clinic.id)) is clinic
+        assert await repository.get("bad-id") is None
+        assert (await repository.update(clinic.id, name="renamed")).name == "renamed"
+        assert await repository.update(uuid.uuid4(), name="x") is None
+
+        assert await repository.count_by() == 2
+        assert [c.name for c in await repository.list_by(order_by=Clinic.email, limit=1)] == ["renamed"]
+        assert await repository.update_where({"phone": "123"}, name="b") == 1
+
+        assert await repository.delete(clinic.id) is True
+        assert await repository.delete(clinic.id) is False
+        assert await repository.delete("bad-id") is False
+        assert await repository.count_by(phone="123") == 1
+
+    run_db(scenario)
+
+
+def test_bulk_insert_and_upsert(run_db):
+    async def scenario(session):
+        repository = ClinicRepository(session)
+        ids = [uuid.uuid4() for _ in range(5)]
+        rows = [{"id": id, "name": f"c{i}", "email": f"c{i}@example.com"} for i, id in enumerate(ids)]
+        assert await repository.bulk_insert(rows, batch_size=2) == 5
+        assert await repository.bulk_insert([]) == 0
+
+        changed = [
+            {"id": ids[0], "name": "updated", "email": "c0@example.com"},
+            {"id": uuid.uuid4(), "name": "new", "email": "new@example.com"},
+        ]
+        assert await repository.upsert(changed, batch_size=1) == 2
+        # update_columns 为空时冲突行保持不变
+        await repository.upsert([{"id": ids[1], "name": "ignored", "email": "x@example.com"}], update_columns=[])
+
+        names = dict((await session.execute(select(Clinic.id, Clinic.name))).all())
+        assert len(names) == 6
+        assert names[ids[0]] == "updated"
+        assert names[ids[1]] == "c1"
+
+    run_db(scenario)
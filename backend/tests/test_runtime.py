@@ -0,0 +1,37 @@
+"""运行时线程配置"""
+
+import fcntl
+
+from app.core import runtime as runtime_module
+from app.core.config import settings
+from app.core.runtime import PROFILE_SHARED, claim_worker_slot, resolve_runtime
+
+
+def test_shared_profile_pins_worker_slice(monkeypatch):
+    monkeypatch.setattr(settings, "RUNTIME_PROFILE", PROFILE_SHARED)
+    monkeypatch.setattr(settings, "WEB_WORKERS", 4)
+    cpus = list(range(8))
+
+    config = resolve_runtime(cpus, worker_index=2)
+    assert config.cpus_per_worker == 2
+    assert config.affinity == [4, 5]
+    assert config.opencv_threads == config.blas_threads == config.inference_threads == 1
+
+    assert resolve_runtime(cpus).affinity is None
+
+
+def test_claim_worker_slot_skips_taken_slots(tmp_path, monkeypatch):
+    """其他进程持有的序号被跳过；全部占用时返回 None"""
+    monkeypatch.setattr(runtime_module, "_worker_slot", None)
+    held = []
+    for index in (0, 2):
+        handle = open(tmp_path / f"worker-{index}.lock", "a")
+        fcntl.flock(handle, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        held.append(handle)
+
+    try:
+        assert claim_worker_slot(3, tmp_path) == 1
+        assert claim_worker_slot(3, tmp_path) is None
+    finally:
+        for handle in held:
+            handle.close()
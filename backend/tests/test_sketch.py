@@ -0,0 +1,60 @@
+"""可合并的分布摘要"""
+
+import numpy as np
+import pytest
+
+from app.services.sketch import HISTOGRAM_MAX, HISTOGRAM_MIN, Histogram, QuantileSketch
+
+
+def _sketch(values):
+    sketch = QuantileSketch()
+    for value in values:
+        sketch.add(value)
+    return sketch
+
+
+def test_merged_daily_sketches_match_exact_quantiles():
+    """按天分别聚合、序列化后再合并，分位数与原始数据的精确分位数相近"""
+    rng = np.random.default_rng(0)
+    days = [rng.normal(30 + day, 15, 400) for day in range(30)]
+    values = np.concatenate(days)
+
+    merged = QuantileSketch()
+    for day in days:
+        merged.merge(QuantileSketch.from_dict(_sketch(day).to_dict()))
+
+    assert merged.count == len(values)
+    assert merged.min == values.min() and merged.max == values.max()
+    spread = values.max() - values.min()
+    for q in (0.01, 0.1, 0.25, 0.5, 0.75, 0.9, 0.99):
+        assert merged.quantile(q) == pytest.approx(np.quantile(values, q), abs=spread * 0.01)
+    for value in (0.0, 30.0, 60.0):
+        assert merged.rank(value) == pytest.approx((values <= value).mean(), abs=0.01)
+
+
+def test_sketch_stays_compact():
+    sketch = _sketch(np.random.default_rng(1).uniform(-100, 100, 50_000))
+    assert len(sketch.to_dict()["centroids"]) <= 2 * sketch.compression
+
+
+def test_empty_sketch():
+    sketch = QuantileSketch()
+    sketch.merge(QuantileSketch())
+    assert sketch.quantile(0.5) is None
+    assert sketch.rank(0) is None
+
+
+def test_histogram_merge_and_clamping():
+    first, second = Histogram(), Histogram()
+    for value in (-250, -100, -2.5, 0, 4.9):
+        first.add(value)
+    for value in (5, 99.9, 100, 400):
+        second.add(value)
+    first.merge(second)
+
+    assert sum(first.counts) == 9
+    bins = first.bins()
+    assert bins[0]["start"] == HISTOGRAM_MIN and bins[0]["count"] == 2
+    assert bins[-1]["end"] == HISTOGRAM_MAX and bins[-1]["count"] == 3
+    assert {b["start"]: b["count"] for b in bins}[0.0] == 2
+    assert Histogram(first.counts).counts == first.counts
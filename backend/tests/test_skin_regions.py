@@ -0,0 +1,89 @@
+"""高分辨率皮肤区域分析"""
+
+from concurrent.futures import ThreadPoolExecutor
+
+import cv2
+import numpy as np
+import pytest
+
+from app.ai.face_geometry import LEFT_EYE_OUTER, RIGHT_EYE_OUTER
+from app.ai.skin_regions import PORE_THRESHOLD, SKIN_REGIONS, TILE_SIZE, region_features
+
+
+def _image(shape=(1600, 1400), seed=0):
+    rng = np.random.default_rng(seed)
+    image = rng.normal(150, 25, shape + (3,)).clip(0, 255).astype(np.uint8)
+    return cv2.GaussianBlur(image, (0, 0), 0.8)
+
+
+def _landmarks(regions, eye_distance=600.0):
+    """每个区域的关键点落在给定圆上（按原多边形的顶点顺序）"""
+    points = np.zeros((468, 2))
+    for name, (cx, cy, radius) in regions.items():
+        indices = SKIN_REGIONS[name]
+        angles = np.linspace(0, 2 * np.pi, len(indices), endpoint=False)
+        points[list(indices)] = np.column_stack([cx + radius * np.cos(angles), cy + radius * np.sin(angles)])
+    points[LEFT_EYE_OUTER] = (100, 100)
+    points[RIGHT_EYE_OUTER] = (100 + eye_distance, 100)
+    return {"all_landmarks": points.tolist(), "key_points": {}}
+
+
+def _whole_image(image, landmarks, name):
+    """整图计算（分块结果的参考值）"""
+    polygon = np.round(np.array(landmarks["all_landmarks"])[list(SKIN_REGIONS[name])]).astype(np.int32)
+    mask = np.zeros(image.shape[:2], dtype=np.uint8)
+    cv2.fillPoly(mask, [polygon], 1)
+    selected = mask.astype(bool)
+
+    gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+    laplacian = cv2.Laplacian(gray, cv2.CV_64F)[selected]
+    kernel = cv2.getStructuringElement(cv2.MORPH_ELLIPSE, (3, 3))
+    blackhat = cv2.morphologyEx(gray, cv2.MORPH_BLACKHAT, kernel)[selected]
+    lab = cv2.cvtColor(image, cv2.COLOR_BGR2LAB)[selected].astype(np.float64)
+    return {
+        "pixels": int(selected.sum()),
+        "laplacian_var": laplacian.var(),
+        "pore_density": float((blackhat > PORE_THRESHOLD).mean()),
+        "l_mean": lab[:, 0].mean(),
+        "l_std": lab[:, 0].std(),
+        "a_mean": lab[:, 1].mean(),
+    }
+
+
+def test_tiles_match_whole_image():
+    # 额头半径大于分块，跨多个分块
+    landmarks = _landmarks({"forehead": (700, 600, 1.2 * TILE_SIZE / 2 + 100), "chin": (700, 1450, 120)})
+    image = _image()
+    features = region_features(image, landmarks, regions=("forehead", "chin"))
+
+    for name in ("forehead", "chin"):
+        expected = _whole_image(image, landmarks, name)
+        assert features[name]["scale"] == 1.0
+        assert features[name]["pixels"] == expected["pixels"]
+        for key in ("laplacian_var", "pore_density", "l_mean", "l_std", "a_mean"):
+            assert features[name][key] == pytest.approx(expected[key], rel=1e-6), key
+
+
+def test_parallel_tiles_match_sequential():
+    landmarks = _landmarks({"left_cheek": (500, 700, 450), "right_cheek": (1000, 700, 300)})
+    image = _image(seed=1)
+    regions = ("left_cheek", "right_cheek")
+
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        parallel = region_features(image, landmarks, executor=executor, regions=regions)
+    assert parallel == region_features(image, landmarks, regions=regions)
+
+
+def test_large_faces_use_capped_resolution():
+    landmarks = _landmarks({"forehead": (700, 600, 400)}, eye_distance=1200.0)
+    features = region_features(_image(), landmarks, regions=("forehead",))
+    assert features["forehead"]["scale"] == pytest.approx(800 / 1200, abs=1e-3)
+    # 面积按缩放比例的平方缩小
+    full = np.pi * 400 ** 2
+    assert features["forehead"]["pixels"] == pytest.approx(full * (800 / 1200) ** 2, rel=0.05)
+
+
+def test_regions_outside_image_are_skipped():
+    landmarks = _landmarks({"forehead": (700, 600, 300), "chin": (5000, 5000, 200)})
+    features = region_features(_image(), landmarks, regions=("forehead", "chin"))
+    assert set(features) == {"forehead"}
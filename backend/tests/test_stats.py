@@ -0,0 +1,118 @@
+"""触发器维护的统计表"""
+
+from datetime import date
+
+import pytest
+from sqlalchemy import select
+
+from app.models import Clinic, ClinicStats, Patient, PatientStats, Treatment
+from app.repositories import ClinicStatsRepository, PatientRepository, PatientStatsRepository
+from app.repositories.stats import StatsRepository
+
+
+async def _clinic(session):
+    clinic = Clinic(name="c", email="c@example.com")
+    session.add(clinic)
+    await session.flush()
+    return clinic
+
+
+async def _patient(session, clinic):
+    patient = Patient(clinic_id=clinic.id, first_name="P", last_name="Test")
+    session.add(patient)
+    await session.flush()
+    return patient
+
+
+async def _stats(session, model, id):
+    # 统计行由触发器更新，绕过会话中的缓存对象
+    return await session.get(model, id, populate_existing=True)
+
+
+def test_clinic_patient_counter(run_db):
+    """插入加一，软删除减一，恢复加一，物理删除不重复扣减"""
+    async def scenario(session):
+        clinic = await _clinic(session)
+        assert (await _stats(session, ClinicStats, clinic.id)).total_patients == 0
+
+        patients = [await _patient(session, clinic) for _ in range(3)]
+        assert (await _stats(session, ClinicStats, clinic.id)).total_patients == 3
+
+        repository = PatientRepository(session)
+        await repository.update(patients[0].id, is_active=False)
+        assert (await _stats(session, ClinicStats, clinic.id)).total_patients == 2
+
+        await repository.update(patients[0].id, is_active=True)
+        assert (await _stats(session, ClinicStats, clinic.id)).total_patients == 3
+
+        await repository.update(patients[1].id, is_active=False)
+        await repository.delete(patients[1].id)
+        await repository.delete(patients[2].id)
+        assert (await _stats(session, ClinicStats, clinic.id)).total_patients == 1
+
+    run_db(scenario)
+
+
+def test_patient_treatment_summary(run_db):
+    """治疗数、费用累加，删除后 last_treatment_date 重新计算"""
+    async def scenario(session):
+        clinic = await _clinic(session)
+        patient = await _patient(session, clinic)
+        treatments = [
+            Treatment(
+                patient_id=patient.id, clinic_id=clinic.id, treatment_type="botox",
+                treatment_date=date(2026, 10, day), cost=cost,
+            )
+            for day, cost in ((1, 100.0), (15, 250.5), (9, None))
+        ]
+        session.add_all(treatments)
+        await session.flush()
+
+        stats = await _stats(session, PatientStats, patient.id)
+        assert stats.total_treatments == 3
+        assert stats.total_spent == 350.5
+        assert stats.last_treatment_date == date(2026, 10, 15)
+        assert (await _stats(session, ClinicStats, clinic.id)).total_treatments == 3
+
+        await session.delete(treatments[1])
+        await session.flush()
+        stats = await _stats(session, PatientStats, patient.id)
+        assert stats.total_treatments == 2
+        assert stats.total_spent == 100.0
+        assert stats.last_treatment_date == date(2026, 10, 9)
+
+    run_db(scenario)
+
+
+def test_rebuild_matches_triggers(run_db):
+    """从源表重建的结果与触发器维护的结果一致"""
+    async def scenario(session):
+        clinic = await _clinic(session)
+        patients = [await _patient(session, clinic) for _ in range(4)]
+        await PatientRepository(session).update(patients[0].id, is_active=False)
+        session.add_all([
+            Treatment(
+                patient_id=patient.id, clinic_id=clinic.id, treatment_type="filler",
+                treatment_date=date(2026, 9, 1 + i), cost=10.0 * i,
+            )
+            for i, patient in enumerate(patients)
+        ])
+        await session.flush()
+
+        clinic_columns = ClinicStats.__table__.columns
+        patient_columns = PatientStats.__table__.columns
+        clinic_before = (await session.execute(select(*clinic_columns))).one()
+        patient_before = set(await session.execute(select(*patient_columns)))
+
+        await ClinicStatsRepository(session).rebuild([clinic.id])
+        await PatientStatsRepository(session).rebuild()
+        assert (await session.execute(select(*clinic_columns))).one() == clinic_before
+        assert set(await session.execute(select(*patient_columns))) == patient_before
+        assert clinic_before.total_patients == 3
+
+    run_db(scenario)
+
+
+def test_stats_repository_requires_sources():
+    with pytest.raises(TypeError):
+        StatsRepository(None)
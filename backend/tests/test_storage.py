@@ -0,0 +1,53 @@
+"""本地对象存储"""
+
+import io
+import time
+from urllib.parse import parse_qs, urlsplit
+
+import pytest
+
+from app.storage.base import ObjectNotFoundError, StorageError, content_key
+from app.storage.local import LocalStorage
+
+
+@pytest.fixture
+def storage(tmp_path):
+    return LocalStorage(tmp_path, "/files", "secret")
+
+
+def test_put_get_range_and_delete(storage):
+    key = content_key("ab" * 32, "jpg", prefix="photos")
+    assert key.startswith("photos/ab/ab/")
+    storage.put_bytes(key, b"0123456789")
+
+    assert storage.exists(key) and storage.size(key) == 10
+    assert storage.get_bytes(key) == b"0123456789"
+    assert storage.get_range(key, 2, 4) == b"234"
+    storage.delete(key)
+    with pytest.raises(ObjectNotFoundError):
+        storage.get_bytes(key)
+
+
+def test_multipart_stream_upload(storage):
+    data = bytes(range(256)) * 100
+    storage.upload_stream("reports/a.pdf", io.BytesIO(data), chunk_size=1000)
+    assert storage.get_bytes("reports/a.pdf") == data
+    assert not any(storage._multipart_root.iterdir())
+
+
+@pytest.mark.parametrize("key", ["/etc/passwd", "a/../b", "a//b", "a\\b", ""])
+def test_rejects_unsafe_keys(storage, key):
+    with pytest.raises(StorageError):
+        storage.put_bytes(key, b"x")
+
+
+def test_signed_url(storage):
+    url = storage.url("photos/a b.jpg", expires_in=60)
+    parts = urlsplit(url)
+    query = {name: values[0] for name, values in parse_qs(parts.query).items()}
+    assert parts.path == "/files/photos/a%20b.jpg"
+
+    expires, signature = int(query["expires"]), query["signature"]
+    assert storage.verify("photos/a b.jpg", expires, signature)
+    assert not storage.verify("photos/other.jpg", expires, signature)
+    assert not storage.verify("photos/a b.jpg", int(time.time()) - 1, signature)
@@ -0,0 +1,49 @@
+"""治疗效果时间曲线"""
+
+import math
+
+import pytest
+
+from app.ai.timeline import BUILDING, FADING, MODEL_LINEAR, MODEL_RISE_FADE, PEAK, STABLE, fit_trajectory
+
+
+def _rise_fade(day, amplitude=2.0, tau=40.0):
+    return amplitude * day * math.exp(-day / tau)
+
+
+def test_recovers_peak_of_rise_fade_curve():
+    days = [7, 14, 30, 60, 90, 120]
+    fit = fit_trajectory(days, [_rise_fade(day) for day in days])
+
+    assert fit.model == MODEL_RISE_FADE
+    assert fit.peak_day == pytest.approx(40.0, abs=0.1)
+    assert fit.peak_improvement == pytest.approx(2.0 * 40 / math.e, abs=0.05)
+    assert fit.status == FADING
+    assert fit.change_per_30_days < 0
+    assert fit.r_squared == pytest.approx(1.0)
+    assert fit.curve[0] == [0.0, 0.0]
+
+
+@pytest.mark.parametrize("last_day, status", [(14, BUILDING), (40, PEAK), (90, FADING)])
+def test_status_follows_latest_visit(last_day, status):
+    days = [7, last_day // 2, last_day]
+    assert fit_trajectory(days, [_rise_fade(day) for day in days]).status == status
+
+
+def test_linear_fallback():
+    # 正值点不足两个时无法拟合先升后降
+    flat = fit_trajectory([0, 30, 60], [0.0, 0.5, -0.3])
+    assert flat.model == MODEL_LINEAR and flat.status == STABLE
+
+    # 加速上升（τ 无效）
+    rising = fit_trajectory([30, 60], [5.0, 40.0])
+    assert rising.model == MODEL_LINEAR and rising.status == BUILDING
+    assert rising.change_per_30_days == pytest.approx(35.0)
+
+    fading = fit_trajectory([0, 30, 60], [0.0, -10.0, -20.0])
+    assert fading.model == MODEL_LINEAR and fading.status == FADING
+
+
+def test_needs_two_distinct_days():
+    assert fit_trajectory([30, 30], [10.0, 12.0]) is None
+    assert fit_trajectory([], []) is None
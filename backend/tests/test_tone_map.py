@@ -0,0 +1,69 @@
+"""肤色积分图"""
+
+import cv2
+import numpy as np
+import pytest
+
+from app.ai.tone_map import (
+    FACE_BOX,
+    GRID_SHAPE,
+    TONE_REGIONS,
+    ToneIntegral,
+    compare_grids,
+    compare_regions,
+    tone_features,
+)
+
+
+def _image(seed=0, shape=(500, 400)):
+    return np.random.default_rng(seed).integers(0, 256, shape + (3,), dtype=np.uint8)
+
+
+def test_region_stats_match_direct_computation():
+    image = _image()
+    lab = cv2.cvtColor(image, cv2.COLOR_BGR2LAB).astype(np.float64)
+    integral = ToneIntegral(image)
+    h, w = lab.shape[:2]
+
+    for box in list(TONE_REGIONS.values()) + [(0.0, 0.0, 1.0, 1.0)]:
+        x0, y0, x1, y1 = (round(box[0] * w), round(box[1] * h), round(box[2] * w), round(box[3] * h))
+        region = lab[y0:y1, x0:x1]
+        stats = integral.stats(box)
+        assert stats["pixels"] == region.shape[0] * region.shape[1]
+        assert stats["l_mean"] == pytest.approx(region[..., 0].mean())
+        assert stats["l_std"] == pytest.approx(region[..., 0].std())
+        assert stats["a_mean"] == pytest.approx(region[..., 1].mean())
+
+    assert integral.stats((0.5, 0.5, 0.5, 0.9)) is None
+
+
+def test_grid_cells_match_direct_computation():
+    image = _image(1)
+    lab = cv2.cvtColor(image, cv2.COLOR_BGR2LAB).astype(np.float64)
+    counts, mean, std = ToneIntegral(image).grid_stats(FACE_BOX, GRID_SHAPE)
+    h, w = lab.shape[:2]
+    ys = np.linspace(round(FACE_BOX[1] * h), round(FACE_BOX[3] * h), GRID_SHAPE[0] + 1).round().astype(int)
+    xs = np.linspace(round(FACE_BOX[0] * w), round(FACE_BOX[2] * w), GRID_SHAPE[1] + 1).round().astype(int)
+
+    assert counts.sum() == (ys[-1] - ys[0]) * (xs[-1] - xs[0])
+    for row in range(GRID_SHAPE[0]):
+        for col in range(GRID_SHAPE[1]):
+            cell = lab[ys[row]:ys[row + 1], xs[col]:xs[col + 1]]
+            np.testing.assert_allclose(mean[row, col], cell.mean(axis=(0, 1)))
+            np.testing.assert_allclose(std[row, col], cell.std(axis=(0, 1)), atol=1e-6)
+
+
+def test_less_red_after_image_reports_reduction():
+    before = _image(2)
+    lab = cv2.cvtColor(before, cv2.COLOR_BGR2LAB)
+    lab[..., 1] = np.clip(lab[..., 1].astype(np.int16) - 6, 0, 255).astype(np.uint8)
+    after = cv2.cvtColor(lab, cv2.COLOR_LAB2BGR)
+
+    before_features, after_features = tone_features(before), tone_features(after)
+    regions = compare_regions(before_features["regions"], after_features["regions"])
+    assert set(regions) == set(TONE_REGIONS)
+    assert all(region["redness_reduction"] > 3 for region in regions.values())
+
+    grid = compare_grids(before_features["grid"], after_features["grid"])
+    assert np.nanmin(np.array(grid["redness_reduction"], dtype=np.float64)) > 3
+    assert compare_grids(before_features["grid"], {**after_features["grid"], "box": [0, 0, 1, 1]}) is None
@@ -0,0 +1,43 @@
+"""流式上传"""
+
+import asyncio
+import hashlib
+import io
+
+import cv2
+import numpy as np
+import pytest
+from fastapi import UploadFile
+
+from app.core.config import settings
+from app.services.upload_stream import EmptyUploadError, UploadTooLargeError, spool_upload
+
+
+def _spool(data, **kwargs):
+    return asyncio.run(spool_upload(UploadFile(io.BytesIO(data), filename="photo.jpg"), **kwargs))
+
+
+def _leftovers():
+    return list(settings.TEMP_DIR.glob("upload-*"))
+
+
+def test_spooled_upload_hashes_and_decodes():
+    image = np.random.default_rng(0).integers(0, 256, (64, 48, 3), dtype=np.uint8)
+    data = cv2.imencode(".png", image)[1].tobytes()
+
+    with _spool(data, chunk_size=100) as upload:
+        assert upload.size == len(data)
+        assert upload.sha256 == hashlib.sha256(data).hexdigest()
+        assert upload.header(4) == data[:4]
+        np.testing.assert_array_equal(upload.decode(), image)
+        path = upload.path
+    assert not path.exists()
+
+
+def test_rejects_oversized_and_empty_uploads():
+    before = _leftovers()
+    with pytest.raises(UploadTooLargeError):
+        _spool(b"x" * 5000, max_bytes=4096, chunk_size=1024)
+    with pytest.raises(EmptyUploadError):
+        _spool(b"")
+    assert _leftovers() == before
@@ -28,6 +28,10 @@ CREATE TABLE clinics (
   monthly_analysis_limit INTEGER DEFAULT 50,
   analysis_count_current_month INTEGER DEFAULT 0,
 
+  -- 分析策略（为空时使用全局默认值）
+  analysis_mode VARCHAR(20), -- claude, hybrid, local
+  claude_escalation_threshold NUMERIC(5,1), -- 本地整体改善达到该值时调用 Claude
+
   created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
   updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
 );
@@ -109,7 +113,9 @@ CREATE TABLE patients (
 );
 
 -- 患者索引
-CREATE INDEX idx_patients_clinic_id ON patients(clinic_id);
+-- 游标分页：WHERE clinic_id = ? AND (created_at, id) < (?, ?) ORDER BY created_at DESC, id DESC
+-- （同时覆盖按 clinic_id 的查询，无需单独的 clinic_id 索引）
+CREATE INDEX idx_patients_clinic_created ON patients(clinic_id, created_at DESC, id DESC);
 CREATE INDEX idx_patients_email ON patients(email);
 CREATE INDEX idx_patients_phone ON patients(phone);
 
@@ -161,7 +167,8 @@ CREATE TABLE treatments (
 );
 
 -- 治疗记录索引
-CREATE INDEX idx_treatments_patient_id ON treatments(patient_id);
+CREATE INDEX idx_treatments_patient_created ON treatments(patient_id, created_at DESC, id DESC);
+CREATE INDEX idx_treatments_patient_date ON treatments(patient_id, treatment_date); -- patient_stats 触发器
 CREATE INDEX idx_treatments_provider_id ON treatments(provider_id);
 CREATE INDEX idx_treatments_clinic_id ON treatments(clinic_id);
 CREATE INDEX idx_treatments_date ON treatments(treatment_date);
@@ -180,14 +187,19 @@ CREATE TABLE photos (
   photo_type VARCHAR(50) NOT NULL, -- before, after_2weeks, after_1month, after_3months
   photo_angle VARCHAR(50) NOT NULL, -- front, left45, right45, left90, right90, top, bottom
 
-  -- 文件信息
+  -- 文件信息（保存存储对象键，访问URL按需签名）
   original_url TEXT NOT NULL,
   processed_url TEXT,
   thumbnail_url TEXT,
+  content_sha256 VARCHAR(64), -- 原图内容摘要（对比图按内容寻址）
   file_size_bytes BIGINT,
   image_width INTEGER,
   image_height INTEGER,
 
+  -- 重复检测
+  phash BIGINT, -- 64 位感知哈希（有符号存储）
+  duplicate_of_id UUID REFERENCES photos(id) ON DELETE SET NULL, -- 疑似重复的已有照片
+
   -- 拍摄元数据
   capture_distance DECIMAL(5,2), -- 距离（米）
   lighting_score DECIMAL(3,2), -- 0-1，光线质量评分
@@ -202,6 +214,7 @@ CREATE TABLE photos (
   face_detected BOOLEAN DEFAULT false,
   face_landmarks JSONB, -- MediaPipe landmarks
   face_bounding_box JSONB, -- {x, y, width, height}
+  features JSONB, -- per-photo analyzer features + comparability signature
 
   -- 环境信息
   ambient_lighting VARCHAR(50), -- natural, artificial, mixed
@@ -213,9 +226,9 @@ CREATE TABLE photos (
 );
 
 -- 照片索引
-CREATE INDEX idx_photos_treatment_id ON photos(treatment_id);
+CREATE INDEX idx_photos_treatment_created ON photos(treatment_id, created_at DESC, id DESC);
 CREATE INDEX idx_photos_patient_id ON photos(patient_id);
-CREATE INDEX idx_photos_clinic_id ON photos(clinic_id);
+CREATE INDEX idx_photos_clinic_created ON photos(clinic_id, created_at); -- 重复检测索引增量加载
 CREATE INDEX idx_photos_type_angle ON photos(photo_type, photo_angle);
 
 -- ============================================
@@ -286,6 +299,17 @@ CREATE TABLE analysis_results (
   }
   */
 
+  -- 从 improvements 提取的统计字段（写入时由应用填充，见 backend/app/ai/metrics.py）
+  treatment_type VARCHAR(100),
+  overall_score DECIMAL(6,2), -- 0-100
+  wrinkles_improvement_pct DECIMAL(6,2),
+  skin_quality_improvement_pct DECIMAL(6,2),
+  contour_improvement_pct DECIMAL(6,2),
+  volume_improvement_pct DECIMAL(6,2),
+
+  -- 智能报告控制结果（患者报告、医生视图、元数据），报告生成使用
+  report_data JSONB,
+
   -- 对比图像
   comparison_image_url TEXT,
   side_by_side_url TEXT,
@@ -294,6 +318,7 @@ CREATE TABLE analysis_results (
   -- AI模型信息
   ai_model_version VARCHAR(50),
   ai_confidence_score DECIMAL(3,2), -- 0-1
+  comparability_score DECIMAL(3,2), -- 0-1，术前术后照片可比性（明细在 improvements.comparability）
 
   -- 处理信息
   processing_time_ms INTEGER,
@@ -310,7 +335,87 @@ CREATE TABLE analysis_results (
 -- 分析结果索引
 CREATE INDEX idx_analysis_treatment_id ON analysis_results(treatment_id);
 CREATE INDEX idx_analysis_patient_id ON analysis_results(patient_id);
-CREATE INDEX idx_analysis_clinic_id ON analysis_results(clinic_id);
+-- 按诊所 / 时间范围统计（同时覆盖按 clinic_id 的查询）
+CREATE INDEX idx_analysis_clinic_analyzed ON analysis_results(clinic_id, analyzed_at);
+CREATE INDEX idx_analysis_clinic_type_analyzed ON analysis_results(clinic_id, treatment_type, analyzed_at);
+-- improvements 的临时查询，如 improvements @> '{"overall_assessment": {"naturalness": 90}}'
+CREATE INDEX idx_analysis_improvements ON analysis_results USING GIN (improvements jsonb_path_ops);
+
+-- ============================================
+-- 分析指标表（improvements 的展开投影，写入分析结果时同时写入）
+-- ============================================
+CREATE TABLE analysis_metrics (
+  analysis_id UUID REFERENCES analysis_results(id) ON DELETE CASCADE,
+  category VARCHAR(50), -- wrinkles, skin_quality, contour, volume
+  metric VARCHAR(100), -- forehead_lines, tone_evenness, ...
+
+  -- 冗余字段，队列统计只扫描一个索引范围
+  clinic_id UUID,
+  treatment_type VARCHAR(100),
+  analyzed_at TIMESTAMP,
+
+  before_score DECIMAL(6,2),
+  after_score DECIMAL(6,2),
+  improvement_pct DECIMAL(6,2) NOT NULL,
+
+  PRIMARY KEY (analysis_id, category, metric)
+);
+
+-- 例：本季度肉毒素的额头纹平均改善
+-- SELECT AVG(improvement_pct) FROM analysis_metrics
+-- WHERE clinic_id = ? AND treatment_type = 'botox' AND metric = 'forehead_lines' AND analyzed_at >= ?
+CREATE INDEX idx_analysis_metrics_cohort
+  ON analysis_metrics(clinic_id, treatment_type, metric, analyzed_at) INCLUDE (improvement_pct);
+
+-- ============================================
+-- 队列统计日汇总表（写入分析结果时增量更新）
+-- ============================================
+CREATE TABLE analysis_daily_rollups (
+  clinic_id UUID REFERENCES clinics(id) ON DELETE CASCADE,
+  treatment_type VARCHAR(100), -- 未指定时为 'unspecified'
+  metric VARCHAR(100), -- overall_score、分类名或单项指标名
+  day DATE,
+
+  count INTEGER DEFAULT 0,
+  total DOUBLE PRECISION DEFAULT 0,
+  total_squares DOUBLE PRECISION DEFAULT 0,
+  min_value DOUBLE PRECISION,
+  max_value DOUBLE PRECISION,
+
+  -- 固定分箱直方图（[-100, 100]，步长 5）和 t-digest 分位数摘要，均可跨天合并
+  histogram JSONB,
+  digest JSONB,
+
+  updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+
+  PRIMARY KEY (clinic_id, treatment_type, metric, day)
+);
+
+-- 不区分治疗类型的查询
+CREATE INDEX idx_analysis_rollups_metric_day ON analysis_daily_rollups(clinic_id, metric, day);
+
+-- ============================================
+-- 治疗时间线（随访照片配准到术前照片后的本地指标，每张随访照片计算一次）
+-- ============================================
+CREATE TABLE timeline_points (
+  photo_id UUID REFERENCES photos(id) ON DELETE CASCADE,
+  before_photo_id UUID REFERENCES photos(id) ON DELETE CASCADE, -- 术前照片更换后重新计算
+  treatment_id UUID REFERENCES treatments(id) ON DELETE CASCADE,
+
+  photo_type VARCHAR(50) NOT NULL,
+  photo_angle VARCHAR(50) NOT NULL,
+  days_elapsed INTEGER NOT NULL,
+
+  overall_improvement DECIMAL(6,2),
+  comparability_score DECIMAL(3,2),
+  metrics JSONB, -- [{category, metric, before_score, after_score, improvement_pct}]
+
+  created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+
+  PRIMARY KEY (photo_id, before_photo_id)
+);
+
+CREATE INDEX idx_timeline_treatment_angle ON timeline_points(treatment_id, photo_angle, days_elapsed);
 
 -- ============================================
 -- 报告表
@@ -448,51 +553,108 @@ CREATE INDEX idx_activity_logs_user_id ON activity_logs(user_id);
 CREATE INDEX idx_activity_logs_created_at ON activity_logs(created_at);
 CREATE INDEX idx_activity_logs_activity_type ON activity_logs(activity_type);
 
+-- ============================================
+-- 诊所统计汇总表（由触发器增量维护）
+-- ============================================
+CREATE TABLE clinic_stats (
+  clinic_id UUID PRIMARY KEY REFERENCES clinics(id) ON DELETE CASCADE,
+
+  total_patients INTEGER NOT NULL DEFAULT 0,
+  total_treatments INTEGER NOT NULL DEFAULT 0,
+  total_analyses INTEGER NOT NULL DEFAULT 0,
+  total_reports INTEGER NOT NULL DEFAULT 0,
+
+  -- 满意度：保存计数和总和，平均值 / 比例在读取时计算
+  total_ratings INTEGER NOT NULL DEFAULT 0,
+  rated_count INTEGER NOT NULL DEFAULT 0, -- overall_rating 非空的评分数
+  rating_sum INTEGER NOT NULL DEFAULT 0,
+  recommend_count INTEGER NOT NULL DEFAULT 0,
+  social_share_count INTEGER NOT NULL DEFAULT 0
+);
+
+-- ============================================
+-- 患者治疗摘要表（由触发器增量维护）
+-- ============================================
+CREATE TABLE patient_stats (
+  patient_id UUID PRIMARY KEY REFERENCES patients(id) ON DELETE CASCADE,
+
+  total_treatments INTEGER NOT NULL DEFAULT 0,
+  total_photos INTEGER NOT NULL DEFAULT 0,
+  total_analyses INTEGER NOT NULL DEFAULT 0,
+  last_treatment_date DATE,
+  total_spent DECIMAL(12, 2) NOT NULL DEFAULT 0,
+
+  -- 满意度：保存计数和总和，平均值在读取时计算
+  rated_count INTEGER NOT NULL DEFAULT 0,
+  rating_sum INTEGER NOT NULL DEFAULT 0
+);
+
 -- ============================================
 -- 视图：患者治疗摘要
 -- ============================================
+-- 每个子表先按 patient_id 聚合再 JOIN，避免多表 JOIN 后的行数膨胀（SUM / AVG 被放大）；
+-- 日常读取使用 patient_stats，本视图用于重建和校准
 CREATE VIEW patient_treatment_summary AS
 SELECT
   p.id AS patient_id,
   p.first_name,
   p.last_name,
   p.clinic_id,
-  COUNT(DISTINCT t.id) AS total_treatments,
-  COUNT(DISTINCT ph.id) AS total_photos,
-  COUNT(DISTINCT ar.id) AS total_analyses,
-  MAX(t.treatment_date) AS last_treatment_date,
-  AVG(sr.overall_rating) AS average_satisfaction,
-  SUM(t.cost) AS total_spent
+  COALESCE(t.total_treatments, 0) AS total_treatments,
+  COALESCE(ph.total_photos, 0) AS total_photos,
+  COALESCE(ar.total_analyses, 0) AS total_analyses,
+  t.last_treatment_date,
+  sr.average_satisfaction,
+  COALESCE(t.total_spent, 0) AS total_spent,
+  COALESCE(sr.rated_count, 0) AS rated_count,
+  COALESCE(sr.rating_sum, 0) AS rating_sum
 FROM patients p
-LEFT JOIN treatments t ON p.id = t.patient_id
-LEFT JOIN photos ph ON t.id = ph.treatment_id
-LEFT JOIN analysis_results ar ON t.id = ar.treatment_id
-LEFT JOIN satisfaction_ratings sr ON t.id = sr.treatment_id
-GROUP BY p.id, p.first_name, p.last_name, p.clinic_id;
+LEFT JOIN (
+  SELECT
+    patient_id,
+    COUNT(*) AS total_treatments,
+    MAX(treatment_date) AS last_treatment_date,
+    SUM(cost) AS total_spent
+  FROM treatments
+  GROUP BY patient_id
+) t ON t.patient_id = p.id
+LEFT JOIN (
+  SELECT patient_id, COUNT(*) AS total_photos
+  FROM photos
+  GROUP BY patient_id
+) ph ON ph.patient_id = p.id
+LEFT JOIN (
+  SELECT patient_id, COUNT(*) AS total_analyses
+  FROM analysis_results
+  GROUP BY patient_id
+) ar ON ar.patient_id = p.id
+LEFT JOIN (
+  SELECT
+    patient_id,
+    AVG(overall_rating) AS average_satisfaction,
+    COUNT(overall_rating) AS rated_count,
+    SUM(overall_rating) AS rating_sum
+  FROM satisfaction_ratings
+  GROUP BY patient_id
+) sr ON sr.patient_id = p.id;
 
 -- ============================================
 -- 视图：诊所Analytics
 -- ============================================
+-- 读取 clinic_stats，不再对各表做 JOIN 后 COUNT(DISTINCT)
 CREATE VIEW clinic_analytics AS
 SELECT
   c.id AS clinic_id,
   c.name AS clinic_name,
-  COUNT(DISTINCT p.id) AS total_patients,
-  COUNT(DISTINCT t.id) AS total_treatments,
-  COUNT(DISTINCT ar.id) AS total_analyses,
-  COUNT(DISTINCT r.id) AS total_reports,
-  AVG(sr.overall_rating) AS average_satisfaction,
-  COUNT(DISTINCT CASE WHEN sr.would_recommend = true THEN sr.id END)::FLOAT /
-    NULLIF(COUNT(DISTINCT sr.id), 0) * 100 AS recommendation_rate,
-  COUNT(DISTINCT CASE WHEN sr.shared_on_social_media = true THEN sr.id END)::FLOAT /
-    NULLIF(COUNT(DISTINCT sr.id), 0) * 100 AS social_share_rate
+  cs.total_patients,
+  cs.total_treatments,
+  cs.total_analyses,
+  cs.total_reports,
+  cs.rating_sum::FLOAT / NULLIF(cs.rated_count, 0) AS average_satisfaction,
+  cs.recommend_count::FLOAT / NULLIF(cs.total_ratings, 0) * 100 AS recommendation_rate,
+  cs.social_share_count::FLOAT / NULLIF(cs.total_ratings, 0) * 100 AS social_share_rate
 FROM clinics c
-LEFT JOIN patients p ON c.id = p.clinic_id
-LEFT JOIN treatments t ON c.id = t.clinic_id
-LEFT JOIN analysis_results ar ON c.id = ar.clinic_id
-LEFT JOIN reports r ON c.id = r.clinic_id
-LEFT JOIN satisfaction_ratings sr ON c.id = sr.clinic_id
-GROUP BY c.id, c.name;
+JOIN clinic_stats cs ON cs.clinic_id = c.id;
 
 -- ============================================
 -- 函数：更新updated_at时间戳
@@ -521,6 +683,218 @@ CREATE TRIGGER update_treatments_updated_at BEFORE UPDATE ON treatments
 CREATE TRIGGER update_photos_updated_at BEFORE UPDATE ON photos
   FOR EACH ROW EXECUTE FUNCTION update_updated_at_column();
 
+-- ============================================
+-- 触发器：增量维护 clinic_stats
+-- （与 app/models/stats.py 中的 CLINIC_STATS 定义保持一致）
+-- ============================================
+CREATE OR REPLACE FUNCTION clinic_stats_seed() RETURNS TRIGGER AS $$
+BEGIN
+  INSERT INTO clinic_stats (clinic_id) VALUES (NEW.id);
+  RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER clinic_stats_seed AFTER INSERT ON clinics
+  FOR EACH ROW EXECUTE FUNCTION clinic_stats_seed();
+
+CREATE OR REPLACE FUNCTION clinic_stats_patients() RETURNS TRIGGER AS $$
+BEGIN
+  IF TG_OP IN ('UPDATE', 'DELETE') THEN
+    UPDATE clinic_stats SET total_patients = total_patients - (CASE WHEN OLD.is_active THEN 1 ELSE 0 END) WHERE clinic_id = OLD.clinic_id;
+  END IF;
+  IF TG_OP IN ('INSERT', 'UPDATE') THEN
+    UPDATE clinic_stats SET total_patients = total_patients + (CASE WHEN NEW.is_active THEN 1 ELSE 0 END) WHERE clinic_id = NEW.clinic_id;
+  END IF;
+  RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER clinic_stats_patients
+  AFTER INSERT OR DELETE OR UPDATE OF clinic_id, is_active ON patients
+  FOR EACH ROW EXECUTE FUNCTION clinic_stats_patients();
+
+CREATE OR REPLACE FUNCTION clinic_stats_treatments() RETURNS TRIGGER AS $$
+BEGIN
+  IF TG_OP IN ('UPDATE', 'DELETE') THEN
+    UPDATE clinic_stats SET total_treatments = total_treatments - (1) WHERE clinic_id = OLD.clinic_id;
+  END IF;
+  IF TG_OP IN ('INSERT', 'UPDATE') THEN
+    UPDATE clinic_stats SET total_treatments = total_treatments + (1) WHERE clinic_id = NEW.clinic_id;
+  END IF;
+  RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER clinic_stats_treatments
+  AFTER INSERT OR DELETE OR UPDATE OF clinic_id ON treatments
+  FOR EACH ROW EXECUTE FUNCTION clinic_stats_treatments();
+
+CREATE OR REPLACE FUNCTION clinic_stats_analyses() RETURNS TRIGGER AS $$
+BEGIN
+  IF TG_OP IN ('UPDATE', 'DELETE') THEN
+    UPDATE clinic_stats SET total_analyses = total_analyses - (1) WHERE clinic_id = OLD.clinic_id;
+  END IF;
+  IF TG_OP IN ('INSERT', 'UPDATE') THEN
+    UPDATE clinic_stats SET total_analyses = total_analyses + (1) WHERE clinic_id = NEW.clinic_id;
+  END IF;
+  RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER clinic_stats_analyses
+  AFTER INSERT OR DELETE OR UPDATE OF clinic_id ON analysis_results
+  FOR EACH ROW EXECUTE FUNCTION clinic_stats_analyses();
+
+CREATE OR REPLACE FUNCTION clinic_stats_reports() RETURNS TRIGGER AS $$
+BEGIN
+  IF TG_OP IN ('UPDATE', 'DELETE') THEN
+    UPDATE clinic_stats SET total_reports = total_reports - (1) WHERE clinic_id = OLD.clinic_id;
+  END IF;
+  IF TG_OP IN ('INSERT', 'UPDATE') THEN
+    UPDATE clinic_stats SET total_reports = total_reports + (1) WHERE clinic_id = NEW.clinic_id;
+  END IF;
+  RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER clinic_stats_reports
+  AFTER INSERT OR DELETE OR UPDATE OF clinic_id ON reports
+  FOR EACH ROW EXECUTE FUNCTION clinic_stats_reports();
+
+CREATE OR REPLACE FUNCTION clinic_stats_ratings() RETURNS TRIGGER AS $$
+BEGIN
+  IF TG_OP IN ('UPDATE', 'DELETE') THEN
+    UPDATE clinic_stats SET total_ratings = total_ratings - (1), rated_count = rated_count - (CASE WHEN OLD.overall_rating IS NULL THEN 0 ELSE 1 END), rating_sum = rating_sum - (COALESCE(OLD.overall_rating, 0)), recommend_count = recommend_count - (CASE WHEN OLD.would_recommend THEN 1 ELSE 0 END), social_share_count = social_share_count - (CASE WHEN OLD.shared_on_social_media THEN 1 ELSE 0 END) WHERE clinic_id = OLD.clinic_id;
+  END IF;
+  IF TG_OP IN ('INSERT', 'UPDATE') THEN
+    UPDATE clinic_stats SET total_ratings = total_ratings + (1), rated_count = rated_count + (CASE WHEN NEW.overall_rating IS NULL THEN 0 ELSE 1 END), rating_sum = rating_sum + (COALESCE(NEW.overall_rating, 0)), recommend_count = recommend_count + (CASE WHEN NEW.would_recommend THEN 1 ELSE 0 END), social_share_count = social_share_count + (CASE WHEN NEW.shared_on_social_media THEN 1 ELSE 0 END) WHERE clinic_id = NEW.clinic_id;
+  END IF;
+  RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER clinic_stats_ratings
+  AFTER INSERT OR DELETE OR UPDATE OF clinic_id, overall_rating, would_recommend, shared_on_social_media ON satisfaction_ratings
+  FOR EACH ROW EXECUTE FUNCTION clinic_stats_ratings();
+
+-- 已有数据库补齐统计（新建库时为空操作；各表单独聚合，避免 JOIN 膨胀）
+INSERT INTO clinic_stats (
+  clinic_id, total_patients, total_treatments, total_analyses, total_reports,
+  total_ratings, rated_count, rating_sum, recommend_count, social_share_count
+)
+SELECT
+  c.id,
+  (SELECT COUNT(*) FROM patients WHERE clinic_id = c.id AND is_active),
+  (SELECT COUNT(*) FROM treatments WHERE clinic_id = c.id),
+  (SELECT COUNT(*) FROM analysis_results WHERE clinic_id = c.id),
+  (SELECT COUNT(*) FROM reports WHERE clinic_id = c.id),
+  sr.total_ratings,
+  sr.rated_count,
+  sr.rating_sum,
+  sr.recommend_count,
+  sr.social_share_count
+FROM clinics c
+CROSS JOIN LATERAL (
+  SELECT
+    COUNT(*) AS total_ratings,
+    COUNT(overall_rating) AS rated_count,
+    COALESCE(SUM(overall_rating), 0) AS rating_sum,
+    COUNT(*) FILTER (WHERE would_recommend) AS recommend_count,
+    COUNT(*) FILTER (WHERE shared_on_social_media) AS social_share_count
+  FROM satisfaction_ratings
+  WHERE clinic_id = c.id
+) sr
+ON CONFLICT (clinic_id) DO NOTHING;
+
+-- ============================================
+-- 触发器：增量维护 patient_stats
+-- （与 app/models/stats.py 中的 PATIENT_STATS 定义保持一致）
+-- ============================================
+CREATE OR REPLACE FUNCTION patient_stats_seed() RETURNS TRIGGER AS $$
+BEGIN
+  INSERT INTO patient_stats (patient_id) VALUES (NEW.id);
+  RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER patient_stats_seed AFTER INSERT ON patients
+  FOR EACH ROW EXECUTE FUNCTION patient_stats_seed();
+
+CREATE OR REPLACE FUNCTION patient_stats_treatments() RETURNS TRIGGER AS $$
+BEGIN
+  IF TG_OP IN ('UPDATE', 'DELETE') THEN
+    UPDATE patient_stats SET total_treatments = total_treatments - (1), total_spent = total_spent - (COALESCE(OLD.cost, 0)), last_treatment_date = (SELECT MAX(treatment_date) FROM treatments WHERE patient_id = OLD.patient_id) WHERE patient_id = OLD.patient_id;
+  END IF;
+  IF TG_OP IN ('INSERT', 'UPDATE') THEN
+    UPDATE patient_stats SET total_treatments = total_treatments + (1), total_spent = total_spent + (COALESCE(NEW.cost, 0)), last_treatment_date = (SELECT MAX(treatment_date) FROM treatments WHERE patient_id = NEW.patient_id) WHERE patient_id = NEW.patient_id;
+  END IF;
+  RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER patient_stats_treatments
+  AFTER INSERT OR DELETE OR UPDATE OF patient_id, cost, treatment_date ON treatments
+  FOR EACH ROW EXECUTE FUNCTION patient_stats_treatments();
+
+CREATE OR REPLACE FUNCTION patient_stats_photos() RETURNS TRIGGER AS $$
+BEGIN
+  IF TG_OP IN ('UPDATE', 'DELETE') THEN
+    UPDATE patient_stats SET total_photos = total_photos - (1) WHERE patient_id = OLD.patient_id;
+  END IF;
+  IF TG_OP IN ('INSERT', 'UPDATE') THEN
+    UPDATE patient_stats SET total_photos = total_photos + (1) WHERE patient_id = NEW.patient_id;
+  END IF;
+  RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER patient_stats_photos
+  AFTER INSERT OR DELETE OR UPDATE OF patient_id ON photos
+  FOR EACH ROW EXECUTE FUNCTION patient_stats_photos();
+
+CREATE OR REPLACE FUNCTION patient_stats_analyses() RETURNS TRIGGER AS $$
+BEGIN
+  IF TG_OP IN ('UPDATE', 'DELETE') THEN
+    UPDATE patient_stats SET total_analyses = total_analyses - (1) WHERE patient_id = OLD.patient_id;
+  END IF;
+  IF TG_OP IN ('INSERT', 'UPDATE') THEN
+    UPDATE patient_stats SET total_analyses = total_analyses + (1) WHERE patient_id = NEW.patient_id;
+  END IF;
+  RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER patient_stats_analyses
+  AFTER INSERT OR DELETE OR UPDATE OF patient_id ON analysis_results
+  FOR EACH ROW EXECUTE FUNCTION patient_stats_analyses();
+
+CREATE OR REPLACE FUNCTION patient_stats_ratings() RETURNS TRIGGER AS $$
+BEGIN
+  IF TG_OP IN ('UPDATE', 'DELETE') THEN
+    UPDATE patient_stats SET rated_count = rated_count - (CASE WHEN OLD.overall_rating IS NULL THEN 0 ELSE 1 END), rating_sum = rating_sum - (COALESCE(OLD.overall_rating, 0)) WHERE patient_id = OLD.patient_id;
+  END IF;
+  IF TG_OP IN ('INSERT', 'UPDATE') THEN
+    UPDATE patient_stats SET rated_count = rated_count + (CASE WHEN NEW.overall_rating IS NULL THEN 0 ELSE 1 END), rating_sum = rating_sum + (COALESCE(NEW.overall_rating, 0)) WHERE patient_id = NEW.patient_id;
+  END IF;
+  RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER patient_stats_ratings
+  AFTER INSERT OR DELETE OR UPDATE OF patient_id, overall_rating ON satisfaction_ratings
+  FOR EACH ROW EXECUTE FUNCTION patient_stats_ratings();
+
+-- 已有数据库补齐统计（新建库时为空操作）
+INSERT INTO patient_stats (
+  patient_id, total_treatments, total_photos, total_analyses,
+  last_treatment_date, total_spent, rated_count, rating_sum
+)
+SELECT
+  patient_id, total_treatments, total_photos, total_analyses,
+  last_treatment_date, total_spent, rated_count, rating_sum
+FROM patient_treatment_summary
+ON CONFLICT (patient_id) DO NOTHING;
+
 -- ============================================
 -- 示例数据（用于测试）
 -- ============================================
@@ -16,60 +16,60 @@ import {
 } from 'lucide-react'
 import { useClinicPatients } from '@/hooks/usePatients'
 import type { Patient } from '@/types/api'
-import Pagination from '@/components/Pagination'
+import CursorPagination from '@/components/CursorPagination'
 
 export default function PatientsPage() {
   // TODO: 从用户 session 获取 clinic_id
   const clinicId = 'clinic-demo-001'
 
-  // 获取患者数据
-  const { data, isLoading, error } = useClinicPatients(clinicId)
-
-  // 搜索状态
-  const [searchQuery, setSearchQuery] = useState('')
-
-  // 分页状态
-  const [currentPage, setCurrentPage] = useState(1)
+  // 分页状态：cursors[i] 是第 i 页的游标（第一页为 undefined）
+  const [cursors, setCursors] = useState<(string | undefined)[]>([undefined])
   const [itemsPerPage, setItemsPerPage] = useState(12)
+  const pageIndex = cursors.length - 1
 
-  // 搜索和分页患者
-  const { paginatedPatients, totalFilteredCount } = useMemo(() => {
-    if (!data?.patients) return { paginatedPatients: [], totalFilteredCount: 0 }
+  // 获取当前页患者数据
+  const { data, isLoading, error } = useClinicPatients(clinicId, {
+    cursor: cursors[pageIndex],
+    limit: itemsPerPage,
+  })
 
-    // 搜索筛选
-    let filtered = data.patients.filter((patient) => {
-      const searchLower = searchQuery.toLowerCase()
-      return (
-        patient.first_name.toLowerCase().includes(searchLower) ||
-        patient.last_name.toLowerCase().includes(searchLower) ||
-        patient.email?.toLowerCase().includes(searchLower) ||
-        patient.phone?.includes(searchQuery)
-      )
-    })
-
-    const totalFilteredCount = filtered.length
+  // 搜索状态（在当前页内筛选）
+  const [searchQuery, setSearchQuery] = useState('')
 
-    // 分页
-    const startIndex = (currentPage - 1) * itemsPerPage
-    const endIndex = startIndex + itemsPerPage
-    const paginatedPatients = filtered.slice(startIndex, endIndex)
+  const filteredPatients = useMemo(() => {
+    if (!data?.patients) return []
 
-    return { paginatedPatients, totalFilteredCount }
-  }, [data?.patients, searchQuery, currentPage, itemsPerPage])
+    const searchLower = searchQuery.toLowerCase()
+    return data.patients.filter((patient) => (
+      patient.first_name.toLowerCase().includes(searchLower) ||
+      patient.last_name.toLowerCase().includes(searchLower) ||
+      patient.email?.toLowerCase().includes(searchLower) ||
+      patient.phone?.includes(searchQuery)
+    ))
+  }, [data?.patients, searchQuery])
 
-  // 计算总页数
-  const totalPages = Math.ceil(totalFilteredCount / itemsPerPage)
+  const totalFilteredCount = filteredPatients.length
 
-  // 当搜索改变时，重置到第一页
   const handleSearchChange = (value: string) => {
     setSearchQuery(value)
-    setCurrentPage(1)
+  }
+
+  const goToNextPage = () => {
+    if (data?.next_cursor) {
+      setCursors([...cursors, data.next_cursor])
+    }
+  }
+
+  const goToPreviousPage = () => {
+    if (cursors.length > 1) {
+      setCursors(cursors.slice(0, -1))
+    }
   }
 
   // 改变每页显示数量时，重置到第一页
   const handleItemsPerPageChange = (value: number) => {
     setItemsPerPage(value)
-    setCurrentPage(1)
+    setCursors([undefined])
   }
 
   return (
@@ -88,9 +88,9 @@ export default function PatientsPage() {
               <div>
                 <h1 className="text-3xl font-bold text-gray-900">患者管理</h1>
                 <p className="text-gray-600 mt-1">
-                  {totalFilteredCount < (data?.total || 0) ? (
+                  {searchQuery ? (
                     <>
-                      显示 {totalFilteredCount} 位 / 共 {data?.total || 0} 位患者
+                      当前页匹配 {totalFilteredCount} 位 / 共 {data?.total || 0} 位患者
                     </>
                   ) : (
                     <>共 {data?.total || 0} 位患者</>
@@ -174,23 +174,24 @@ export default function PatientsPage() {
             {/* 患者卡片网格 */}
             <div className="bg-white rounded-xl shadow-md overflow-hidden">
               <div className="grid grid-cols-1 md:grid-cols-2 lg:grid-cols-3 gap-6 p-6">
-                {paginatedPatients.map((patient) => (
+                {filteredPatients.map((patient) => (
                   <PatientCard key={patient.id} patient={patient} />
                 ))}
               </div>
 
               {/* 分页控件 */}
-              {totalPages > 1 && (
-                <Pagination
-                  currentPage={currentPage}
-                  totalPages={totalPages}
-                  totalItems={totalFilteredCount}
-                  itemsPerPage={itemsPerPage}
-                  onPageChange={setCurrentPage}
-                  onItemsPerPageChange={handleItemsPerPageChange}
-                  itemsPerPageOptions={[12, 24, 48, 96]}
-                />
-              )}
+              <CursorPagination
+                pageIndex={pageIndex}
+                itemsOnPage={data?.patients.length || 0}
+                itemsPerPage={itemsPerPage}
+                totalItems={data?.total}
+                hasPreviousPage={pageIndex > 0}
+                hasNextPage={!!data?.next_cursor}
+                onPrevious={goToPreviousPage}
+                onNext={goToNextPage}
+                onItemsPerPageChange={handleItemsPerPageChange}
+                itemsPerPageOptions={[12, 24, 48, 96]}
+              />
             </div>
           </>
         )}
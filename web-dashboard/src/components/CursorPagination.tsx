@@ -0,0 +1,101 @@
+/**
+ * 游标分页组件
+ * 用于服务端 keyset 分页：只支持上一页 / 下一页，不支持跳页
+ */
+
+import { ChevronLeft, ChevronRight } from 'lucide-react'
+
+interface CursorPaginationProps {
+  pageIndex: number
+  itemsOnPage: number
+  itemsPerPage: number
+  totalItems?: number
+  hasPreviousPage: boolean
+  hasNextPage: boolean
+  onPrevious: () => void
+  onNext: () => void
+  onItemsPerPageChange: (itemsPerPage: number) => void
+  itemsPerPageOptions?: number[]
+}
+
+export default function CursorPagination({
+  pageIndex,
+  itemsOnPage,
+  itemsPerPage,
+  totalItems,
+  hasPreviousPage,
+  hasNextPage,
+  onPrevious,
+  onNext,
+  onItemsPerPageChange,
+  itemsPerPageOptions = [10, 20, 50, 100],
+}: CursorPaginationProps) {
+  const startItem = pageIndex * itemsPerPage + 1
+  const endItem = pageIndex * itemsPerPage + itemsOnPage
+
+  if (!hasPreviousPage && !hasNextPage) {
+    return null // 只有一页时不显示分页
+  }
+
+  return (
+    <div className="flex flex-col sm:flex-row items-center justify-between gap-4 px-4 py-3 bg-white border-t border-gray-200">
+      {/* 左侧：显示信息 */}
+      <div className="flex items-center space-x-4">
+        <p className="text-sm text-gray-700">
+          显示 <span className="font-semibold">{startItem}</span> 到{' '}
+          <span className="font-semibold">{endItem}</span>
+          {totalItems !== undefined && (
+            <>
+              ，共 <span className="font-semibold">{totalItems}</span> 条
+            </>
+          )}
+        </p>
+
+        {/* 每页显示数量选择 */}
+        <div className="flex items-center space-x-2">
+          <label htmlFor="cursor-items-per-page" className="text-sm text-gray-700">
+            每页
+          </label>
+          <select
+            id="cursor-items-per-page"
+            value={itemsPerPage}
+            onChange={(e) => onItemsPerPageChange(Number(e.target.value))}
+            className="px-2 py-1 border border-gray-300 rounded-lg focus:ring-2 focus:ring-primary-500 focus:border-transparent bg-white text-sm"
+          >
+            {itemsPerPageOptions.map((option) => (
+              <option key={option} value={option}>
+                {option}
+              </option>
+            ))}
+          </select>
+          <span className="text-sm text-gray-700">条</span>
+        </div>
+      </div>
+
+      {/* 右侧：翻页控件 */}
+      <div className="flex items-center space-x-2">
+        <button
+          onClick={onPrevious}
+          disabled={!hasPreviousPage}
+          className="p-2 rounded-lg hover:bg-gray-100 disabled:opacity-50 disabled:cursor-not-allowed transition-colors"
+          title="上一页"
+        >
+          <ChevronLeft className="w-5 h-5 text-gray-600" />
+        </button>
+
+        <span className="px-3 py-2 rounded-lg bg-primary-600 text-white font-semibold">
+          {pageIndex + 1}
+        </span>
+
+        <button
+          onClick={onNext}
+          disabled={!hasNextPage}
+          className="p-2 rounded-lg hover:bg-gray-100 disabled:opacity-50 disabled:cursor-not-allowed transition-colors"
+          title="下一页"
+        >
+          <ChevronRight className="w-5 h-5 text-gray-600" />
+        </button>
+      </div>
+    </div>
+  )
+}
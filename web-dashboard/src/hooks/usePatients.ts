@@ -2,15 +2,16 @@
  * 患者管理 React Query Hooks
  */
 
-import { useQuery, useMutation, useQueryClient } from '@tanstack/react-query'
+import { useQuery, useMutation, useQueryClient, keepPreviousData } from '@tanstack/react-query'
 import { patientsApi } from '@/lib/api-client'
-import type { Patient, PatientCreate, PatientUpdate } from '@/types/api'
+import type { CursorParams, Patient, PatientCreate, PatientUpdate } from '@/types/api'
 
 // Query Keys
 export const patientKeys = {
   all: ['patients'] as const,
   lists: () => [...patientKeys.all, 'list'] as const,
-  list: (clinicId: string) => [...patientKeys.lists(), clinicId] as const,
+  list: (clinicId: string, params?: CursorParams) =>
+    [...patientKeys.lists(), clinicId, params ?? {}] as const,
   details: () => [...patientKeys.all, 'detail'] as const,
   detail: (id: string) => [...patientKeys.details(), id] as const,
 }
@@ -18,14 +19,15 @@ export const patientKeys = {
 // ============ Queries ============
 
 /**
- * 获取诊所的所有患者
+ * 获取诊所的患者（游标分页）
  */
-export function useClinicPatients(clinicId: string, params?: { skip?: number; limit?: number }) {
+export function useClinicPatients(clinicId: string, params?: CursorParams) {
   return useQuery({
-    queryKey: patientKeys.list(clinicId),
+    queryKey: patientKeys.list(clinicId, params),
     queryFn: () => patientsApi.getClinicPatients(clinicId, params),
     enabled: !!clinicId,
     staleTime: 5 * 60 * 1000, // 5 分钟
+    placeholderData: keepPreviousData, // 翻页时保留上一页，避免闪烁
   })
 }
 
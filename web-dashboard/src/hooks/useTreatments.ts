@@ -2,16 +2,17 @@
  * 治疗记录 React Query Hooks
  */
 
-import { useQuery, useMutation, useQueryClient } from '@tanstack/react-query'
+import { useQuery, useMutation, useQueryClient, keepPreviousData } from '@tanstack/react-query'
 import { treatmentsApi } from '@/lib/api-client'
-import type { Treatment, TreatmentCreate, TreatmentUpdate } from '@/types/api'
+import type { CursorParams, Treatment, TreatmentCreate, TreatmentUpdate } from '@/types/api'
 import { patientKeys } from './usePatients'
 
 // Query Keys
 export const treatmentKeys = {
   all: ['treatments'] as const,
   lists: () => [...treatmentKeys.all, 'list'] as const,
-  list: (patientId: string) => [...treatmentKeys.lists(), patientId] as const,
+  list: (patientId: string, params?: CursorParams) =>
+    [...treatmentKeys.lists(), patientId, params ?? {}] as const,
   details: () => [...treatmentKeys.all, 'detail'] as const,
   detail: (id: string) => [...treatmentKeys.details(), id] as const,
 }
@@ -19,14 +20,15 @@ export const treatmentKeys = {
 // ============ Queries ============
 
 /**
- * 获取患者的所有治疗记录
+ * 获取患者的治疗记录（游标分页，按创建时间倒序）
  */
-export function usePatientTreatments(patientId: string) {
+export function usePatientTreatments(patientId: string, params?: CursorParams) {
   return useQuery({
-    queryKey: treatmentKeys.list(patientId),
-    queryFn: () => treatmentsApi.getPatientTreatments(patientId),
+    queryKey: treatmentKeys.list(patientId, params),
+    queryFn: () => treatmentsApi.getPatientTreatments(patientId, params),
     enabled: !!patientId,
     staleTime: 5 * 60 * 1000, // 5 分钟
+    placeholderData: keepPreviousData,
   })
 }
 
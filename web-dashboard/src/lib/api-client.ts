@@ -12,6 +12,7 @@ import type {
   PatientCreate,
   PatientUpdate,
   PatientsResponse,
+  CursorParams,
   Treatment,
   TreatmentCreate,
   TreatmentUpdate,
@@ -88,7 +89,7 @@ export const patientsApi = USE_MOCK
        */
       getClinicPatients: async (
         clinicId: string,
-        params?: { skip?: number; limit?: number }
+        params?: CursorParams
       ): Promise<PatientsResponse> => {
         const response = await apiClient.get<PatientsResponse>(
           `/api/v1/patients/clinic/${clinicId}`,
@@ -140,9 +141,13 @@ export const treatmentsApi = USE_MOCK
       /**
        * 获取患者的所有治疗记录
        */
-      getPatientTreatments: async (patientId: string): Promise<TreatmentsResponse> => {
+      getPatientTreatments: async (
+        patientId: string,
+        params?: CursorParams
+      ): Promise<TreatmentsResponse> => {
         const response = await apiClient.get<TreatmentsResponse>(
-          `/api/v1/treatments/patient/${patientId}`
+          `/api/v1/treatments/patient/${patientId}`,
+          { params }
         )
         return response.data
       },
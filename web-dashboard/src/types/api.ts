@@ -14,7 +14,13 @@ export interface Patient {
   email?: string
   phone?: string
   skin_type?: string
+  // 治疗摘要
   total_treatments: number
+  total_photos?: number
+  total_analyses?: number
+  last_treatment_date?: string | null
+  average_satisfaction?: number | null
+  total_spent?: number
   created_at?: string
   updated_at?: string
 }
@@ -37,6 +43,13 @@ export interface PatientsResponse {
   clinic_id: string
   patients: Patient[]
   total: number
+  next_cursor: string | null // 下一页游标，null 表示没有更多数据
+}
+
+// 游标分页参数
+export interface CursorParams {
+  cursor?: string
+  limit?: number
 }
 
 // ============ 治疗记录相关 ============
@@ -74,6 +87,7 @@ export interface TreatmentUpdate extends Partial<TreatmentCreate> {}
 export interface TreatmentsResponse {
   patient_id: string
   treatments: Treatment[]
+  next_cursor: string | null
 }
 
 // ============ AI 分析相关 ============
@@ -44,6 +44,11 @@ export interface Photo {
   thumbnail_url?: string
   face_detected: boolean
   quality_score?: number
+  lighting_score?: number | null
+  alignment_score?: number | null
+  sharpness_score?: number | null
+  quality_issues?: { code: string; level: 'reject' | 'warn'; message: string }[]
+  duplicate_of?: string | null
   captured_at?: string
   created_at?: string
 }
@@ -99,6 +104,7 @@ export interface AnalysisResult {
   comparison_image_url?: string
   side_by_side_url?: string
   ai_confidence_score?: number
+  comparability_score?: number | null
   analyzed_at?: string
   created_at?: string
 }
@@ -130,6 +136,8 @@ export interface Clinic {
   subscription_status: 'active' | 'inactive' | 'trial' | 'cancelled'
   monthly_analysis_limit: number
   analysis_count_current_month: number
+  analysis_mode: 'claude' | 'hybrid' | 'local'
+  claude_escalation_threshold: number
   created_at?: string
   updated_at?: string
 }